@@ -0,0 +1,260 @@
+"""
+Shared frontmatter schema for docker/<svc>/README.md and k3s/apps/<svc>/README.md.
+
+The rules below are declarative; compile_schema() turns each stack's table
+into one validator function (regexes compiled, enums frozen into sets) the
+first time it is asked for, so a full-repo pass is one dict walk per file.
+Every problem in a file is returned at once instead of stopping at the first.
+
+    from _schema import load, validate, conflicts
+
+    meta, issues = load(Path("k3s/apps/homarr/README.md"))
+    issues += conflicts([(label, meta), ...], "k3s")   # duplicate ports / domains / names
+
+Used by validate-service.py, the update-*-readme.py generators and
+k3s/scripts/new-services.py.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import yaml
+
+
+DOCKER_CATEGORIES = [
+    '📊 Monitoring & Stats',
+    '🧲 Download Managers',
+    '🎬 Media & Entertainment',
+    '📁 File Management & Collaboration',
+    '🏠 Smart Home Automation & Workflow',
+    '🛠️ Development & DevOps',
+    '🏡 Dashboard & Network Services',
+    '🚀 Backend Services',
+]
+
+K3S_CATEGORIES = [
+    '🛠️ Infra & GitOps',
+    '🌐 Network & Ingress',
+    '📊 Monitoring & Stats',
+    '🏡 Dashboards',
+    '🤖 Automation',
+    '🎬 Media & Entertainment',
+    '📁 Files & Storage',
+    '🧲 Downloads',
+    '🗄️ Databases',
+]
+
+K3S_COMPONENTS = [
+    'deployment', 'statefulset', 'daemonset', 'cronjob', 'job',
+    'service', 'ingress', 'ingressroute', 'middleware', 'certificate',
+    'configmap', 'secret', 'sealedsecret', 'rbac', 'pvc', 'pv',
+]
+
+PLACEHOLDERS = {'—', '-', ''}
+FRONTMATTER_RE = re.compile(r'^---\s*\n(.*?)\n---\s*\n', re.DOTALL)
+DNS_LABEL = r'^[a-z0-9]([-a-z0-9]{0,61}[a-z0-9])?$'
+HOSTNAME = r'^(?=.{1,253}$)([a-z0-9]([-a-z0-9]{0,61}[a-z0-9])?\.)+[a-z]{2,63}$'
+_AMOUNT = r'~\d+(\.\d+)?(-\d+(\.\d+)?)?\s?[KMG]B RAM( \([^()]+\))?'
+RESOURCE_USAGE = rf'^{_AMOUNT}(, {_AMOUNT})*$'          # "~256MB RAM (server), ~128MB RAM (runner)"
+
+
+# ─── Declarative rules ───────────────────────────────────────────────────────
+
+
+@dataclass(frozen=True)
+class Rule:
+    kind: str = 'text'                  # text | list | port
+    required: bool = True
+    enum: Tuple[str, ...] = ()
+    pattern: str = ''
+    hint: str = ''                      # shown when `pattern` doesn't match
+    max_len: int = 0
+    min_items: int = 0
+    warn_below: int = 0                 # list: warn (not fail) under this many items
+    vocabulary: Tuple[str, ...] = ()    # list: allowed item values
+    placeholder: bool = False           # "—" means "none"
+
+
+COMMON: Dict[str, Rule] = {
+    'name':           Rule(max_len=40),
+    'category':       Rule(),                                       # enum set per stack
+    'purpose':        Rule(max_len=80),
+    'description':    Rule(),
+    'icon':           Rule(max_len=8),
+    'features':       Rule('list', min_items=1, warn_below=2),
+    'resource_usage': Rule(pattern=RESOURCE_USAGE, hint='like "~128MB RAM" or "~1-2GB RAM (note)"'),
+}
+
+SCHEMAS: Dict[str, Dict[str, Rule]] = {
+    'docker': {
+        **COMMON,
+        'category': Rule(enum=tuple(DOCKER_CATEGORIES)),
+    },
+    'k3s': {
+        **COMMON,
+        'category':      Rule(enum=tuple(K3S_CATEGORIES)),
+        'namespace':     Rule(pattern=DNS_LABEL, hint='a DNS-1123 label'),
+        'external_port': Rule('port', required=False, placeholder=True),
+        'domain':        Rule(required=False, pattern=HOSTNAME, hint='a hostname', placeholder=True),
+        'components':    Rule('list', min_items=1, vocabulary=tuple(K3S_COMPONENTS)),
+    },
+}
+
+# Keys that must be unique across one stack, with their normaliser.
+UNIQUE: Dict[str, Dict[str, Callable[[Any], str]]] = {
+    'docker': {'name': lambda v: str(v).strip().casefold()},
+    'k3s': {
+        'name': lambda v: str(v).strip().casefold(),
+        'external_port': lambda v: str(v).strip().lstrip('0'),
+        'domain': lambda v: str(v).strip().rstrip('.').casefold(),
+    },
+}
+
+
+@dataclass(frozen=True)
+class Issue:
+    level: str                          # error | warning
+    field: str
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.field}: {self.message}" if self.field else self.message
+
+
+Check = Callable[[Any], List[Issue]]
+
+
+# ─── Compilation ─────────────────────────────────────────────────────────────
+
+
+def _compile_rule(key: str, rule: Rule) -> Check:
+    regex = re.compile(rule.pattern, re.IGNORECASE) if rule.pattern else None
+    enum: FrozenSet[str] = frozenset(rule.enum)
+    vocabulary: FrozenSet[str] = frozenset(rule.vocabulary)
+
+    def error(msg: str) -> List[Issue]:
+        return [Issue('error', key, msg)]
+
+    def check_text(value: Any) -> List[Issue]:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = str(value)
+        if not isinstance(value, str):
+            return error(f"must be a string, not {type(value).__name__}")
+        value = value.strip()
+        if rule.placeholder and value in PLACEHOLDERS:
+            return []
+        if not value:
+            return error("is empty")
+        if enum and value not in enum:
+            return error(f"'{value}' is not one of: {', '.join(rule.enum)}")
+        if regex and not regex.match(value):
+            return error(f"'{value}' is not {rule.hint or 'valid'}")
+        if rule.max_len and len(value) > rule.max_len:
+            return [Issue('warning', key, f"longer than {rule.max_len} characters (truncated in tables)")]
+        return []
+
+    def check_list(value: Any) -> List[Issue]:
+        if not isinstance(value, list):
+            return error(f"must be a list, not {type(value).__name__}")
+        out = [Issue('error', key, f"item {i + 1} must be a non-empty string")
+               for i, item in enumerate(value) if not isinstance(item, str) or not item.strip()]
+        if len(value) < rule.min_items:
+            out += error(f"needs at least {rule.min_items} item(s)")
+        elif len(value) < rule.warn_below:
+            out.append(Issue('warning', key, f"only {len(value)} listed — consider adding more"))
+        if vocabulary:
+            unknown = [str(v) for v in value if isinstance(v, str) and v not in vocabulary]
+            if unknown:
+                out += error(f"unknown {', '.join(unknown)} (one of: {', '.join(rule.vocabulary)})")
+        return out
+
+    def check_port(value: Any) -> List[Issue]:
+        if isinstance(value, str) and value.strip() in PLACEHOLDERS:
+            return []
+        text = str(value).strip()
+        if isinstance(value, bool) or not text.isdigit() or not 0 < int(text) < 65536:
+            return error(f"'{value}' is not a port (1-65535) or \"—\"")
+        return []
+
+    return {'text': check_text, 'list': check_list, 'port': check_port}[rule.kind]
+
+
+def compile_schema(rules: Dict[str, Rule]) -> Callable[[Dict[str, Any]], List[Issue]]:
+    """One validator for a whole rule table: required keys, per-field checks, unknown keys."""
+    checks = [(key, rule.required, _compile_rule(key, rule)) for key, rule in rules.items()]
+    known = frozenset(rules)
+
+    def validator(meta: Dict[str, Any]) -> List[Issue]:
+        issues: List[Issue] = []
+        for key, required, check in checks:
+            value = meta.get(key)
+            if value is None:
+                if required:
+                    issues.append(Issue('error', key, 'is required'))
+                continue
+            issues += check(value)
+        for key in meta:
+            if key not in known:
+                issues.append(Issue('warning', key, 'is not part of the schema (typo?)'))
+        return issues
+
+    return validator
+
+
+@lru_cache(maxsize=None)
+def validator(stack: str) -> Callable[[Dict[str, Any]], List[Issue]]:
+    return compile_schema(SCHEMAS[stack])
+
+
+# ─── Entry points ────────────────────────────────────────────────────────────
+
+
+def detect_stack(service_dir: Path) -> str:
+    parts = service_dir.resolve().parts
+    if 'k3s' in parts and 'apps' in parts:
+        return 'k3s'
+    return 'docker'
+
+
+def validate(meta: Dict[str, Any], stack: str) -> List[Issue]:
+    return validator(stack)(meta)
+
+
+def load(readme: Path, stack: Optional[str] = None) -> Tuple[Optional[Dict[str, Any]], List[Issue]]:
+    """(frontmatter, every issue with it); frontmatter is None if it can't be read at all."""
+    stack = stack or detect_stack(readme.parent)
+    try:
+        text = readme.read_text(encoding='utf-8')
+    except OSError as exc:
+        return None, [Issue('error', '', f"cannot read {readme}: {exc}")]
+    m = FRONTMATTER_RE.match(text)
+    if not m:
+        return None, [Issue('error', '', 'no YAML frontmatter')]
+    try:
+        meta = yaml.safe_load(m.group(1)) or {}
+    except yaml.YAMLError as exc:
+        return None, [Issue('error', '', f"invalid YAML: {exc}")]
+    if not isinstance(meta, dict):
+        return None, [Issue('error', '', 'frontmatter is not a mapping')]
+    return meta, validate(meta, stack)
+
+
+def conflicts(entries: Iterable[Tuple[str, Dict[str, Any]]], stack: str) -> List[Tuple[str, Issue]]:
+    """Duplicate unique keys within one stack: [(label, issue)], one hash lookup per value."""
+    unique = UNIQUE[stack]
+    seen: Dict[Tuple[str, str], str] = {}
+    out: List[Tuple[str, Issue]] = []
+    for label, meta in entries:
+        for key, norm in unique.items():
+            value = meta.get(key)
+            if value is None or str(value).strip() in PLACEHOLDERS:
+                continue
+            owner = seen.setdefault((key, norm(value)), label)
+            if owner != label:
+                out.append((label, Issue('error', key, f"'{value}' is already used by {owner}")))
+    return out
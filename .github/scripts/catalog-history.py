@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+"""
+Mine the service catalog's history: service counts, planned RAM and category
+churn per commit, without checking anything out.
+
+One `git rev-list` lists the commits, and a single long-lived
+`git cat-file --batch` process serves every commit, tree and blob the walk
+needs. Only docker/<svc>/ and k3s/{apps,databases}/<svc>/ are descended
+into. Results are memoised by object SHA at three levels:
+
+    blob           README frontmatter (name, category, resource_usage) or a
+                   manifest's memory requests/limits — parsed once, ever
+    service tree   one record per docker/<svc> or k3s/apps/<svc> directory
+    stack tree     the full service list of docker/, k3s/apps/, k3s/databases/
+
+A commit that didn't touch a stack resolves it with one dict lookup, so a full
+mine costs roughly one parse per unique blob plus one read per unique tree,
+not commits × files. The caches persist in .github/.history-cache.json
+(gitignored), so a rerun only reads what was committed since.
+
+Historical READMEs predate today's schema, so a service counts when its
+frontmatter parses and has a `name` (not when it passes validate-service.py).
+Planned RAM is the sum of resource_usage amounts (a range counts as its
+midpoint); k3s also sums container memory requests/limits × replicas.
+
+Rows are emitted only when a value changes, so the series stays compact.
+
+Usage:
+  python3 .github/scripts/catalog-history.py                  Table on stdout
+  python3 .github/scripts/catalog-history.py --csv out.csv    CSV time series
+  python3 .github/scripts/catalog-history.py --json -         JSON (with per-category counts)
+  python3 .github/scripts/catalog-history.py --readme         Refresh the AUTOGEN:HISTORY_CHART section
+  python3 .github/scripts/catalog-history.py --rev v1..main --all-parents --no-cache
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import re
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, IO, List, Optional, Tuple
+
+import yaml
+
+from _schema import FRONTMATTER_RE
+
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+README = REPO_ROOT / "README.md"
+CACHE_FILE = REPO_ROOT / ".github" / ".history-cache.json"
+CACHE_VERSION = 1
+
+# (stack id, path from the repo root) — the directories whose children are services
+STACKS: List[Tuple[str, Tuple[str, ...]]] = [
+    ("docker", ("docker",)),
+    ("k3s", ("k3s", "apps")),
+    ("databases", ("k3s", "databases")),
+]
+_AMOUNT_RE = re.compile(r"~?\s*(\d+(?:\.\d+)?)(?:\s*-\s*(\d+(?:\.\d+)?))?\s*([KMG])i?B", re.IGNORECASE)
+_QUANTITY_RE = re.compile(r"^(\d+(?:\.\d+)?)([KMGT]i?|[kmgt])?$")
+_MIB = {"K": 1 / 1024, "M": 1.0, "G": 1024.0, "T": 1024.0 ** 2}
+
+
+# ─── git cat-file --batch ────────────────────────────────────────────────────
+
+
+class CatFile:
+    """One `git cat-file --batch` process; read(sha) → (type, bytes)."""
+
+    def __init__(self, repo: Path) -> None:
+        self.proc = subprocess.Popen(
+            ["git", "-C", str(repo), "cat-file", "--batch"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        )
+        self.reads = 0
+
+    def read(self, sha: str) -> Tuple[str, bytes]:
+        assert self.proc.stdin and self.proc.stdout
+        self.proc.stdin.write(sha.encode() + b"\n")
+        self.proc.stdin.flush()
+        head = self.proc.stdout.readline().split()
+        if len(head) < 3:                            # "<sha> missing"
+            return "missing", b""
+        size = int(head[2])
+        data = self.proc.stdout.read(size)
+        self.proc.stdout.read(1)                     # trailing LF
+        self.reads += 1
+        return head[1].decode(), data
+
+    def close(self) -> None:
+        if self.proc.stdin:
+            self.proc.stdin.close()
+        self.proc.wait()
+
+
+def parse_tree(data: bytes) -> Dict[str, Tuple[str, str]]:
+    """name → (mode, sha) for one raw tree object."""
+    entries: Dict[str, Tuple[str, str]] = {}
+    i = 0
+    while i < len(data):
+        space = data.index(b" ", i)
+        nul = data.index(b"\0", space)
+        entries[data[space + 1:nul].decode("utf-8", "replace")] = (data[i:space].decode(), data[nul + 1:nul + 21].hex())
+        i = nul + 21
+    return entries
+
+
+def commit_tree(data: bytes) -> str:
+    return data.split(b"\n", 1)[0].split()[1].decode()
+
+
+# ─── Blob parsers ────────────────────────────────────────────────────────────
+
+
+def ram_mb(text: Any) -> float:
+    """resource_usage like "~256MB RAM (server), ~1-2GB RAM" → MiB; ranges count as midpoint."""
+    total = 0.0
+    for lo, hi, unit in _AMOUNT_RE.findall(str(text or "")):
+        value = (float(lo) + float(hi)) / 2 if hi else float(lo)
+        total += value * _MIB[unit.upper()]
+    return total
+
+
+def quantity_mib(value: Any) -> float:
+    m = _QUANTITY_RE.match(str(value or "").strip())
+    if not m:
+        return 0.0
+    number, unit = float(m.group(1)), m.group(2) or ""
+    if unit.endswith("i"):
+        return number * _MIB[unit[0]]
+    factor = {"": 1, "k": 1e3, "m": 1e6, "g": 1e9, "t": 1e12}[unit.lower()]
+    return number * factor / 2 ** 20
+
+
+def parse_readme(data: bytes) -> Dict[str, Any]:
+    m = FRONTMATTER_RE.match(data.decode("utf-8", "replace"))
+    try:
+        meta = yaml.safe_load(m.group(1)) if m else None
+    except yaml.YAMLError:
+        meta = None
+    if not isinstance(meta, dict) or not meta.get("name"):
+        return {}
+    return {"name": str(meta["name"]).strip(), "category": str(meta.get("category", "")).strip(),
+            "ram_mb": round(ram_mb(meta.get("resource_usage")), 1)}
+
+
+def parse_manifest(data: bytes) -> Dict[str, Any]:
+    if b"containers:" not in data:
+        return {"requests_mib": 0.0, "limits_mib": 0.0}
+    requests = limits = 0.0
+    try:
+        docs = [d for d in yaml.safe_load_all(data.decode("utf-8", "replace")) if isinstance(d, dict)]
+    except yaml.YAMLError:
+        docs = []
+    for doc in docs:
+        if doc.get("kind") not in ("Deployment", "StatefulSet", "DaemonSet"):
+            continue
+        spec = doc.get("spec") or {}
+        replicas = spec.get("replicas", 1) if isinstance(spec.get("replicas", 1), int) else 1
+        pod = (spec.get("template") or {}).get("spec") or {}
+        for c in pod.get("containers") or []:
+            res = (c or {}).get("resources") or {}
+            requests += quantity_mib((res.get("requests") or {}).get("memory")) * replicas
+            limits += quantity_mib((res.get("limits") or {}).get("memory")) * replicas
+    return {"requests_mib": round(requests, 1), "limits_mib": round(limits, 1)}
+
+
+# ─── Walk ────────────────────────────────────────────────────────────────────
+
+
+@dataclass
+class Stats:
+    commits: int = 0
+    blobs_parsed: int = 0
+    blob_hits: int = 0
+    service_hits: int = 0
+    stack_hits: int = 0
+
+
+class Miner:
+    def __init__(self, git: CatFile, cache: Dict[str, Dict[str, Any]]) -> None:
+        self.git = git
+        self.blobs: Dict[str, Any] = cache.setdefault("blob", {})
+        self.services: Dict[str, Any] = cache.setdefault("service", {})
+        self.stacks: Dict[str, Any] = cache.setdefault("stack", {})
+        self.trees: Dict[str, Dict[str, Tuple[str, str]]] = {}
+        self.stats = Stats()
+
+    def tree(self, sha: str) -> Dict[str, Tuple[str, str]]:
+        if sha not in self.trees:
+            kind, data = self.git.read(sha)
+            self.trees[sha] = parse_tree(data) if kind == "tree" else {}
+        return self.trees[sha]
+
+    def blob(self, sha: str, parser: Any) -> Dict[str, Any]:
+        if sha in self.blobs:
+            self.stats.blob_hits += 1
+            return self.blobs[sha]
+        kind, data = self.git.read(sha)
+        self.blobs[sha] = parser(data) if kind == "blob" else {}
+        self.stats.blobs_parsed += 1
+        return self.blobs[sha]
+
+    def service(self, sha: str) -> Dict[str, Any]:
+        """One service directory → {name, category, ram_mb, requests_mib, limits_mib} ({} if not a service)."""
+        if sha in self.services:
+            self.stats.service_hits += 1
+            return self.services[sha]
+        entries = self.tree(sha)
+        record: Dict[str, Any] = {}
+        if "README.md" in entries:
+            record.update(self.blob(entries["README.md"][1], parse_readme))
+        requests = limits = 0.0
+        manifests = 0
+        for name, (mode, blob_sha) in entries.items():
+            if mode.startswith("100") and name.endswith((".yaml", ".yml")) and "secret" not in name \
+                    and not name.startswith(("docker-compose", "compose")):
+                m = self.blob(blob_sha, parse_manifest)
+                requests += m.get("requests_mib", 0.0)
+                limits += m.get("limits_mib", 0.0)
+                manifests += 1
+        if manifests:
+            record.update(requests_mib=round(requests, 1), limits_mib=round(limits, 1), manifests=manifests)
+        self.services[sha] = record
+        return record
+
+    def stack(self, sha: str, counts_without_readme: bool) -> Dict[str, Dict[str, Any]]:
+        """Every service directory under one stack tree, keyed by directory name."""
+        key = f"{sha}:{int(counts_without_readme)}"
+        if key in self.stacks:
+            self.stats.stack_hits += 1
+            return self.stacks[key]
+        out: Dict[str, Dict[str, Any]] = {}
+        for name, (mode, child) in sorted(self.tree(sha).items()):
+            if mode != "40000" or name.startswith("."):
+                continue
+            record = self.service(child)
+            if record.get("name") or (counts_without_readme and record.get("manifests")):
+                out[name] = record
+        self.stacks[key] = out
+        return out
+
+    def snapshot(self, commit: str) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        _, data = self.git.read(commit)
+        root = commit_tree(data)
+        snap: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for stack, path in STACKS:
+            sha: Optional[str] = root
+            for part in path:
+                entry = self.tree(sha).get(part) if sha else None
+                sha = entry[1] if entry and entry[0] == "40000" else None
+            snap[stack] = self.stack(sha, stack == "databases") if sha else {}
+        self.stats.commits += 1
+        return snap
+
+
+# ─── Series ──────────────────────────────────────────────────────────────────
+
+
+@dataclass
+class Row:
+    commit: str
+    date: str
+    docker_services: int
+    k3s_apps: int
+    k3s_databases: int
+    docker_ram_mb: int
+    k3s_ram_mb: int
+    k3s_requests_mib: int
+    k3s_limits_mib: int
+    added: int
+    removed: int
+    recategorized: int
+    categories: Dict[str, int] = field(default_factory=dict)
+
+    def values(self) -> Tuple[Any, ...]:
+        return (self.docker_services, self.k3s_apps, self.k3s_databases, self.docker_ram_mb, self.k3s_ram_mb,
+                self.k3s_requests_mib, self.k3s_limits_mib, self.categories)
+
+
+CSV_FIELDS = [f for f in Row.__dataclass_fields__ if f != "categories"]
+
+
+def build_row(commit: str, ts: int, snap: Dict[str, Dict[str, Dict[str, Any]]],
+              prev: Dict[str, str]) -> Tuple[Row, Dict[str, str]]:
+    """Row for one commit; churn is counted against the previous commit's service → category map."""
+    current = {f"{stack}/{d}": rec.get("category", "") for stack in ("docker", "k3s") for d, rec in snap[stack].items()}
+    categories: Dict[str, int] = {}
+    for key, category in current.items():
+        label = f"{key.split('/')[0]}:{category or '—'}"
+        categories[label] = categories.get(label, 0) + 1
+    k3s_all = list(snap["k3s"].values()) + list(snap["databases"].values())
+    row = Row(
+        commit=commit[:10],
+        date=datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d"),
+        docker_services=len(snap["docker"]),
+        k3s_apps=len(snap["k3s"]),
+        k3s_databases=len(snap["databases"]),
+        docker_ram_mb=round(sum(r.get("ram_mb", 0) for r in snap["docker"].values())),
+        k3s_ram_mb=round(sum(r.get("ram_mb", 0) for r in snap["k3s"].values())),
+        k3s_requests_mib=round(sum(r.get("requests_mib", 0) for r in k3s_all)),
+        k3s_limits_mib=round(sum(r.get("limits_mib", 0) for r in k3s_all)),
+        added=len(current.keys() - prev.keys()),
+        removed=len(prev.keys() - current.keys()),
+        recategorized=sum(1 for k in current.keys() & prev.keys() if current[k] != prev[k]),
+        categories=dict(sorted(categories.items())),
+    )
+    return row, current
+
+
+def rev_list(rev: str, first_parent: bool) -> List[Tuple[str, int]]:
+    cmd = ["git", "-C", str(REPO_ROOT), "rev-list", "--reverse", "--timestamp"]
+    cmd += ["--first-parent"] if first_parent else []
+    res = subprocess.run(cmd + [rev], capture_output=True, text=True)
+    if res.returncode != 0:
+        raise RuntimeError(res.stderr.strip() or f"git rev-list {rev} failed")
+    out = []
+    for line in res.stdout.splitlines():
+        ts, sha = line.split()
+        out.append((sha, int(ts)))
+    return out
+
+
+def mine(rev: str, first_parent: bool, cache: Dict[str, Any]) -> Tuple[List[Row], Stats]:
+    commits = rev_list(rev, first_parent)
+    git = CatFile(REPO_ROOT)
+    miner = Miner(git, cache)
+    rows: List[Row] = []
+    prev: Dict[str, str] = {}
+    try:
+        for sha, ts in commits:
+            row, prev = build_row(sha, ts, miner.snapshot(sha), prev)
+            if not rows or row.values() != rows[-1].values() or row.added or row.removed or row.recategorized:
+                rows.append(row)
+    finally:
+        git.close()
+    return rows, miner.stats
+
+
+# ─── Output ──────────────────────────────────────────────────────────────────
+
+
+def write_csv(rows: List[Row], fh: IO[str]) -> None:
+    w = csv.writer(fh)
+    w.writerow(CSV_FIELDS)
+    for r in rows:
+        w.writerow([getattr(r, f) for f in CSV_FIELDS])
+
+
+def print_table(rows: List[Row]) -> None:
+    print(f"{'DATE':<10} {'COMMIT':<10} {'DOCKER':>6} {'K3S':>4} {'DBS':>4} {'DOCKER RAM':>10} {'K3S RAM':>8} "
+          f"{'REQ':>7} {'LIMIT':>7}  CHURN")
+    for r in rows:
+        churn = " ".join(s for s in (f"+{r.added}" if r.added else "", f"-{r.removed}" if r.removed else "",
+                                     f"~{r.recategorized}" if r.recategorized else "") if s)
+        print(f"{r.date:<10} {r.commit:<10} {r.docker_services:>6} {r.k3s_apps:>4} {r.k3s_databases:>4} "
+              f"{r.docker_ram_mb:>8}MB {r.k3s_ram_mb:>6}MB {r.k3s_requests_mib:>4}Mi {r.k3s_limits_mib:>4}Mi  {churn}")
+
+
+def chart(rows: List[Row], points: int = 24) -> str:
+    """Mermaid xychart: services per stack, last value per month (per day for short histories)."""
+    if not rows:
+        return "\n_No history yet._\n"
+    first, last = rows[0].date, rows[-1].date
+    span = (datetime.fromisoformat(last) - datetime.fromisoformat(first)).days
+    bucket = (lambda d: d[:7]) if span > 60 else (lambda d: d)
+    series: Dict[str, Row] = {}
+    for r in rows:
+        series[bucket(r.date)] = r
+    labels = list(series)[-points:]
+    docker = [series[b].docker_services for b in labels]
+    k3s = [series[b].k3s_apps for b in labels]
+    top = max(docker + k3s + [1])
+    return (
+        "\n```mermaid\n"
+        "xychart-beta\n"
+        '    title "Services over time (line 1: 🐳 Docker, line 2: ☸️ k3s)"\n'
+        f"    x-axis [{', '.join(json.dumps(b) for b in labels)}]\n"
+        f'    y-axis "Services" 0 --> {top + max(2, top // 5)}\n'
+        f"    line [{', '.join(map(str, docker))}]\n"
+        f"    line [{', '.join(map(str, k3s))}]\n"
+        "```\n\n"
+        f"<sub>Planned RAM at {last}: 🐳 {rows[-1].docker_ram_mb} MB · ☸️ {rows[-1].k3s_ram_mb} MB "
+        f"(requests {rows[-1].k3s_requests_mib} Mi) — "
+        "regenerate with `python3 .github/scripts/catalog-history.py --readme`</sub>\n"
+    )
+
+
+def replace_block(content: str, marker: str, new_inner: str) -> str:
+    pattern = re.compile(
+        rf"(<!--\s*AUTOGEN:{re.escape(marker)}\s*-->)(.*?)(<!--\s*/AUTOGEN:{re.escape(marker)}\s*-->)",
+        re.DOTALL,
+    )
+    if not pattern.search(content):
+        print(f"⚠️  Marker AUTOGEN:{marker} not found in README.md")
+        return content
+    return pattern.sub(lambda m: f"{m.group(1)}{new_inner}{m.group(3)}", content)
+
+
+def load_cache() -> Dict[str, Any]:
+    try:
+        data = json.loads(CACHE_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data if data.get("version") == CACHE_VERSION else {}
+
+
+def save_cache(cache: Dict[str, Any]) -> None:
+    cache["version"] = CACHE_VERSION
+    tmp = CACHE_FILE.with_suffix(".tmp")
+    tmp.write_text(json.dumps(cache, separators=(",", ":")), encoding="utf-8")
+    tmp.replace(CACHE_FILE)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Service catalog trends over the git history.")
+    ap.add_argument("--rev", default="HEAD", help="revision or range to walk (default: HEAD)")
+    ap.add_argument("--all-parents", action="store_true", help="walk merged branches too (default: --first-parent)")
+    ap.add_argument("--csv", metavar="FILE", help="write the series as CSV ('-' for stdout)")
+    ap.add_argument("--json", metavar="FILE", help="write the series as JSON ('-' for stdout)")
+    ap.add_argument("--readme", action="store_true", help="refresh <!-- AUTOGEN:HISTORY_CHART --> in README.md")
+    ap.add_argument("--no-cache", action="store_true", help="ignore and don't write .history-cache.json")
+    args = ap.parse_args()
+
+    cache = {} if args.no_cache else load_cache()
+    started = time.monotonic()
+    try:
+        rows, stats = mine(args.rev, not args.all_parents, cache)
+    except RuntimeError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    elapsed = time.monotonic() - started
+    if not args.no_cache:
+        try:
+            save_cache(cache)
+        except OSError as e:
+            print(f"⚠️  Could not write {CACHE_FILE.name}: {e}", file=sys.stderr)
+
+    quiet = "-" in (args.csv, args.json)
+    if args.csv:
+        if args.csv == "-":
+            write_csv(rows, sys.stdout)
+        else:
+            with open(args.csv, "w", encoding="utf-8", newline="") as fh:
+                write_csv(rows, fh)
+    if args.json:
+        text = json.dumps([asdict(r) for r in rows], indent=2, ensure_ascii=False)
+        if args.json == "-":
+            print(text)
+        else:
+            Path(args.json).write_text(text + "\n", encoding="utf-8")
+    if not quiet and not args.csv and not args.json:
+        print_table(rows)
+    if args.readme:
+        content = README.read_text(encoding="utf-8")
+        updated = replace_block(content, "HISTORY_CHART", chart(rows))
+        if updated != content:
+            README.write_text(updated, encoding="utf-8")
+            print("✅ README.md history chart updated", file=sys.stderr if quiet else sys.stdout)
+
+    print(f"📋 {stats.commits} commits, {len(rows)} rows — {stats.blobs_parsed} blobs parsed, "
+          f"{stats.blob_hits} blob / {stats.service_hits} service / {stats.stack_hits} stack cache hits, "
+          f"{elapsed:.2f}s", file=sys.stderr if quiet else sys.stdout)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Check every internal link and #anchor in the repository's Markdown files.
+
+One pass over the tree builds an index of every file/directory and of every
+heading anchor (GitHub slug rules: lowercased, punctuation and emoji dropped,
+spaces → "-", duplicates suffixed -1, -2, …, plus <a name/id> anchors).
+Markdown files are read and parsed on a worker pool; each link is then
+resolved against the index:
+
+    [text](../apps/homarr/)            file or directory must exist
+    [text](README.md#quick-start)      …and the anchor must be in that file
+    [text](#features)                  anchor in the same file
+    <a href="..."> / <img src="...">   same rules
+
+External URLs (http:, https:, mailto:, …) are not fetched.
+
+Parsed links and anchors are cached per file in .github/.link-cache.json
+(gitignored), keyed by size + mtime and then by SHA-256, so a rerun only
+re-parses files that changed; links are always re-resolved against the
+fresh index, so renaming a target still breaks the files pointing at it.
+
+Usage:
+  python3 .github/scripts/check-links.py                   Whole repo
+  python3 .github/scripts/check-links.py k3s/README.md     Report only these files
+  python3 .github/scripts/check-links.py --no-cache
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import unquote
+
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+CACHE_FILE = REPO_ROOT / ".github" / ".link-cache.json"
+CACHE_VERSION = 1
+SKIP_DIRS = {".git", "node_modules", ".venv", "venv", "__pycache__", ".pytest_cache", ".mypy_cache"}
+
+FENCE_RE = re.compile(r"^\s*(```|~~~)")
+HEADING_RE = re.compile(r"^\s{0,3}(#{1,6})\s+(.*?)\s*#*\s*$")
+INLINE_CODE_RE = re.compile(r"`+[^`]*`+")
+INLINE_LINK_RE = re.compile(r"\[(?:[^\[\]]|\[[^\]]*\])*\]\(\s*<?([^)\s>]*)>?(?:\s+[\"'][^\"']*[\"'])?\s*\)")
+REF_DEF_RE = re.compile(r"^\s{0,3}\[[^\]]+\]:\s*<?(\S+?)>?(?:\s+[\"'(].*)?$")
+HTML_ATTR_RE = re.compile(r"""\b(?:href|src)\s*=\s*["']([^"']+)["']""", re.IGNORECASE)
+HTML_ANCHOR_RE = re.compile(r"""<a\s[^>]*\b(?:name|id)\s*=\s*["']([^"']+)["']""", re.IGNORECASE)
+SCHEME_RE = re.compile(r"^[a-zA-Z][a-zA-Z0-9+.-]*:|^//")
+
+
+# ─── Parsing ─────────────────────────────────────────────────────────────────
+
+
+def slugify(heading: str) -> str:
+    """GitHub heading slug (github-slugger) of the rendered heading text."""
+    text = re.sub(r"!?\[([^\]]*)\]\([^)]*\)", r"\1", heading)   # links → text
+    text = re.sub(r"<[^>]+>", "", text)                           # inline HTML
+    text = text.replace("`", "").replace("*", "")
+    text = re.sub(r"(^|\s)_+|_+(\s|$)", r"\1\2", text)           # _emphasis_
+    out = []
+    for ch in text.lower():
+        if ch in (" ", "-", "_") or unicodedata.category(ch)[0] in "LMN" or unicodedata.category(ch) == "Pc":
+            out.append("-" if ch == " " else ch)
+    return "".join(out)
+
+
+def parse_markdown(text: str) -> Tuple[List[str], List[Tuple[int, str]]]:
+    """(anchors, [(line number, link target)]) of one Markdown document."""
+    anchors: List[str] = []
+    seen: Dict[str, int] = {}
+    links: List[Tuple[int, str]] = []
+    lines = text.splitlines()
+    start = 0
+    if lines and lines[0].strip() == "---":                      # YAML frontmatter
+        end = next((i for i in range(1, len(lines)) if lines[i].strip() == "---"), None)
+        start = end + 1 if end is not None else 0
+
+    fence: Optional[str] = None
+    for n in range(start, len(lines)):
+        line = lines[n]
+        m = FENCE_RE.match(line)
+        if m:
+            if fence is None:
+                fence = m.group(1)
+            elif m.group(1) == fence:
+                fence = None
+            continue
+        if fence:
+            continue
+        h = HEADING_RE.match(line)
+        if h:
+            slug = slugify(h.group(2))
+            count = seen.get(slug, 0)
+            seen[slug] = count + 1
+            anchors.append(slug if count == 0 else f"{slug}-{count}")
+        anchors += HTML_ANCHOR_RE.findall(line)
+        code_free = INLINE_CODE_RE.sub(lambda c: " " * len(c.group(0)), line)
+        for target in INLINE_LINK_RE.findall(code_free) + HTML_ATTR_RE.findall(code_free):
+            links.append((n + 1, target))
+        ref = REF_DEF_RE.match(code_free)
+        if ref:
+            links.append((n + 1, ref.group(1)))
+    return anchors, links
+
+
+def parse_file(rel: str, cached: Optional[Dict[str, Any]]) -> Tuple[str, Dict[str, Any], bool]:
+    """Parse one file unless its cache entry still matches (size+mtime, then hash)."""
+    path = REPO_ROOT / rel
+    st = path.stat()
+    if cached and cached.get("size") == st.st_size and cached.get("mtime") == st.st_mtime_ns:
+        return rel, cached, False
+    data = path.read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    if cached and cached.get("sha256") == digest:
+        return rel, {**cached, "size": st.st_size, "mtime": st.st_mtime_ns}, False
+    anchors, links = parse_markdown(data.decode("utf-8", errors="replace"))
+    entry = {"size": st.st_size, "mtime": st.st_mtime_ns, "sha256": digest, "anchors": anchors, "links": links}
+    return rel, entry, True
+
+
+# ─── Index + check ───────────────────────────────────────────────────────────
+
+
+def walk_tree() -> Tuple[Set[str], List[str]]:
+    """Every file and directory (repo-relative, POSIX) and the Markdown files among them."""
+    paths: Set[str] = {""}
+    markdown: List[str] = []
+    for dirpath, dirnames, filenames in os.walk(REPO_ROOT):
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        rel_dir = os.path.relpath(dirpath, REPO_ROOT).replace(os.sep, "/")
+        rel_dir = "" if rel_dir == "." else rel_dir
+        for d in dirnames:
+            paths.add(f"{rel_dir}/{d}".lstrip("/"))
+        for f in filenames:
+            rel = f"{rel_dir}/{f}".lstrip("/")
+            paths.add(rel)
+            if f.lower().endswith(".md"):
+                markdown.append(rel)
+    return paths, sorted(markdown)
+
+
+def check_link(source: str, target: str, paths: Set[str], anchors: Dict[str, Set[str]]) -> Optional[str]:
+    """Problem with one link, or None if it resolves."""
+    if not target or SCHEME_RE.match(target) or "{{" in target:
+        return None
+    path_part, _, fragment = target.partition("#")
+    path_part = unquote(path_part.split("?", 1)[0])
+    if path_part:
+        base = "" if path_part.startswith("/") else os.path.dirname(source)
+        resolved = os.path.normpath(os.path.join(base, path_part.lstrip("/"))).replace(os.sep, "/")
+        resolved = "" if resolved == "." else resolved
+        if resolved.startswith(".."):
+            return "points outside the repository"
+        if resolved not in paths:
+            return "no such file or directory"
+    else:
+        resolved = source
+    if fragment and resolved in anchors and unquote(fragment).lower() not in anchors[resolved]:
+        return f"no heading #{fragment} in {resolved}"
+    return None
+
+
+def load_cache(enabled: bool) -> Dict[str, Any]:
+    if not enabled:
+        return {}
+    try:
+        data = json.loads(CACHE_FILE.read_text(encoding="utf-8"))
+        return data.get("files", {}) if data.get("version") == CACHE_VERSION else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(files: Dict[str, Any]) -> None:
+    tmp = CACHE_FILE.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"version": CACHE_VERSION, "files": files}, separators=(",", ":")), encoding="utf-8")
+    tmp.replace(CACHE_FILE)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Validate internal Markdown links and anchors.")
+    ap.add_argument("files", nargs="*", help="only report problems in these Markdown files")
+    ap.add_argument("--no-cache", action="store_true", help="re-parse every file, don't write the cache")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="parser threads")
+    args = ap.parse_args()
+
+    paths, markdown = walk_tree()
+    cache = load_cache(not args.no_cache)
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        results = list(pool.map(lambda rel: parse_file(rel, cache.get(rel)), markdown))
+    entries = {rel: entry for rel, entry, _ in results}
+    parsed = sum(1 for _, _, fresh in results if fresh)
+    anchors = {rel: {a.lower() for a in entry["anchors"]} for rel, entry in entries.items()}
+
+    only = {os.path.relpath(os.path.abspath(f), REPO_ROOT).replace(os.sep, "/") for f in args.files}
+    broken: List[Tuple[str, int, str, str]] = []
+    checked = 0
+    for rel in markdown:
+        if only and rel not in only:
+            continue
+        for line, target in entries[rel]["links"]:
+            checked += 1
+            problem = check_link(rel, target, paths, anchors)
+            if problem:
+                broken.append((rel, line, target, problem))
+
+    if not args.no_cache:
+        try:
+            save_cache(entries)
+        except OSError as e:
+            print(f"⚠️  Could not write {CACHE_FILE.name}: {e}")
+
+    for rel, line, target, problem in broken:
+        print(f"❌ {rel}:{line}: {target} — {problem}")
+    print(f"🔗 {checked} links in {len(only) or len(markdown)} file(s) "
+          f"({parsed} parsed, {len(markdown) - parsed} from cache)")
+    if broken:
+        print(f"💥 {len(broken)} broken link(s)")
+        sys.exit(1)
+    print("✅ All internal links resolve")
+
+
+if __name__ == "__main__":
+    main()
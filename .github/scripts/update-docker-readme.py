@@ -11,6 +11,8 @@ import sys
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from _schema import validate
+
 class ServiceParser:
     def __init__(self, repo_root: str):
         self.repo_root = Path(repo_root)
@@ -31,6 +33,14 @@ class ServiceParser:
 
             yaml_content = match.group(1)
             metadata = yaml.safe_load(yaml_content)
+            if not isinstance(metadata, dict):
+                return None
+
+            issues = validate(metadata, 'docker')
+            for issue in issues:
+                print(f"{'❌' if issue.level == 'error' else '⚠️ '} {readme_path.parent.name}: {issue}")
+            if any(issue.level == 'error' for issue in issues):
+                return None
 
             # Extract description from first paragraph after frontmatter
             remaining_content = content[match.end():].strip()
@@ -62,7 +72,7 @@ class ServiceParser:
 
             metadata = self.extract_metadata(readme_path)
             if not metadata:
-                # If no metadata, skip this service (not an error)
+                # No or invalid metadata: skip this service (issues printed above)
                 continue
 
             # Add service directory name
@@ -25,7 +25,7 @@ import sys
 from pathlib import Path
 from typing import Dict, List, Tuple
 
-import yaml
+from _schema import load
 
 
 REPO_ROOT = Path(__file__).resolve().parents[2]
@@ -63,23 +63,8 @@ WORKLOAD_BLOCKLIST = {"pi-hole", "twingate connector", "argocd", "nginx proxy ma
 # ─── Frontmatter scanning ────────────────────────────────────────────────────
 
 
-def parse_frontmatter(path: Path) -> dict | None:
-    try:
-        text = path.read_text(encoding="utf-8", errors="ignore")
-    except OSError:
-        return None
-    m = re.match(r"^---\s*\n(.*?)\n---\s*\n", text, re.DOTALL)
-    if not m:
-        return None
-    try:
-        data = yaml.safe_load(m.group(1)) or {}
-    except yaml.YAMLError as exc:
-        print(f"⚠️  YAML error in {path}: {exc}")
-        return None
-    return data if isinstance(data, dict) else None
-
-
-def scan_stack(root: Path) -> List[dict]:
+def scan_stack(root: Path, stack: str) -> List[dict]:
+    """Frontmatter of every service that passes its stack's schema (same set the stack READMEs list)."""
     services: List[dict] = []
     if not root.is_dir():
         return services
@@ -89,9 +74,12 @@ def scan_stack(root: Path) -> List[dict]:
         readme = child / "README.md"
         if not readme.exists():
             continue
-        meta = parse_frontmatter(readme)
-        if meta and meta.get("name") and meta.get("category"):
-            services.append(meta)
+        meta, issues = load(readme, stack)
+        if meta is None or any(i.level == "error" for i in issues):
+            print(f"⚠️  {stack}/{child.name}: invalid frontmatter, not counted "
+                  f"({'; '.join(str(i) for i in issues if i.level == 'error')})")
+            continue
+        services.append(meta)
     return services
 
 
@@ -277,8 +265,8 @@ def main() -> int:
         print(f"❌ {README} not found", file=sys.stderr)
         return 1
 
-    docker_services = scan_stack(DOCKER_DIR)
-    k3s_services = scan_stack(K3S_APPS_DIR)
+    docker_services = scan_stack(DOCKER_DIR, "docker")
+    k3s_services = scan_stack(K3S_APPS_DIR, "k3s")
 
     docker_count = len(docker_services)
     k3s_count = len(k3s_services)
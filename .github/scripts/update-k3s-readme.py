@@ -34,10 +34,7 @@ import sys
 from pathlib import Path
 from typing import Any, Dict, List
 
-import yaml
-
-
-REQUIRED = ("name", "category", "purpose", "namespace", "icon")
+from _schema import conflicts, load
 
 CATEGORY_DESCRIPTIONS = {
     "🛠️ Infra & GitOps":      "Cluster control plane, GitOps, secrets",
@@ -57,26 +54,8 @@ CATEGORY_ORDER = list(CATEGORY_DESCRIPTIONS.keys())
 # ─── Parsing ─────────────────────────────────────────────────────────────────
 
 
-def parse_frontmatter(path: Path) -> Dict[str, Any] | None:
-    text = path.read_text(encoding="utf-8", errors="ignore")
-    m = re.match(r"^---\s*\n(.*?)\n---\s*\n", text, re.DOTALL)
-    if not m:
-        return None
-    try:
-        data = yaml.safe_load(m.group(1)) or {}
-    except yaml.YAMLError as exc:
-        print(f"⚠️  YAML error in {path}: {exc}")
-        return None
-    if not isinstance(data, dict):
-        return None
-    missing = [k for k in REQUIRED if k not in data]
-    if missing:
-        print(f"⚠️  {path.parent.name}: missing required fields {missing}")
-        return None
-    return data
-
-
 def scan_apps(apps_dir: Path) -> List[Dict[str, Any]]:
+    """Every app whose frontmatter passes the k3s schema; every issue is printed."""
     services: List[Dict[str, Any]] = []
     for item in sorted(apps_dir.iterdir()):
         if not item.is_dir() or item.name.startswith("."):
@@ -85,8 +64,11 @@ def scan_apps(apps_dir: Path) -> List[Dict[str, Any]]:
         if not readme.exists():
             print(f"⏭️  {item.name}: no README.md, skipping")
             continue
-        meta = parse_frontmatter(readme)
-        if meta is None:
+        meta, issues = load(readme, "k3s")
+        for issue in issues:
+            print(f"{'❌' if issue.level == 'error' else '⚠️ '} {item.name}: {issue}")
+        if meta is None or any(i.level == "error" for i in issues):
+            print(f"⏭️  {item.name}: invalid frontmatter, left out of the README")
             continue
         meta["directory"] = item.name
         meta["path"] = f"./apps/{item.name}/"
@@ -94,6 +76,8 @@ def scan_apps(apps_dir: Path) -> List[Dict[str, Any]]:
         meta.setdefault("domain", "—")
         meta.setdefault("components", [])
         services.append(meta)
+    for label, issue in conflicts(((s["directory"], s) for s in services), "k3s"):
+        print(f"⚠️  {label}: {issue}")
     return services
 
 
@@ -3,7 +3,8 @@
 Validate service README metadata before committing.
 
 Usage:
-  python3 .github/scripts/validate-service.py <service-directory>
+  python3 .github/scripts/validate-service.py <service-directory> [...]
+  python3 .github/scripts/validate-service.py --all    Every service + cross-service conflicts
 
 The stack is auto-detected from the path:
   - docker/<svc>/  → docker schema
@@ -11,106 +12,53 @@ The stack is auto-detected from the path:
 """
 
 import sys
-import re
-import yaml
 from pathlib import Path
+from typing import Any, Dict, List, Tuple
 
-DOCKER_REQUIRED = ['name', 'category', 'purpose', 'description', 'icon', 'features', 'resource_usage']
-K3S_REQUIRED = ['name', 'category', 'purpose', 'description', 'icon', 'namespace', 'components', 'features', 'resource_usage']
-
-DOCKER_CATEGORIES = [
-    '📊 Monitoring & Stats',
-    '🧲 Download Managers',
-    '🎬 Media & Entertainment',
-    '📁 File Management & Collaboration',
-    '🏠 Smart Home Automation & Workflow',
-    '🛠️ Development & DevOps',
-    '🏡 Dashboard & Network Services',
-    '🚀 Backend Services',
-]
-
-K3S_CATEGORIES = [
-    '🛠️ Infra & GitOps',
-    '🌐 Network & Ingress',
-    '📊 Monitoring & Stats',
-    '🏡 Dashboards',
-    '🤖 Automation',
-    '🎬 Media & Entertainment',
-    '📁 Files & Storage',
-    '🧲 Downloads',
-    '🗄️ Databases',
-]
-
-
-def detect_stack(service_dir: Path) -> str:
-    parts = service_dir.resolve().parts
-    if 'k3s' in parts and 'apps' in parts:
-        return 'k3s'
-    return 'docker'
+from _schema import FRONTMATTER_RE, Issue, conflicts, detect_stack, load
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+STACK_DIRS = {'docker': REPO_ROOT / 'docker', 'k3s': REPO_ROOT / 'k3s' / 'apps'}
+
+
+def report(label: str, issues: List[Issue]) -> bool:
+    """Print every issue for one service; True if none of them is an error."""
+    failed = False
+    for issue in issues:
+        if issue.level == 'error':
+            failed = True
+            print(f"❌ {label}: {issue}")
+        else:
+            print(f"⚠️  {label}: {issue}")
+    return not failed
 
 
 def validate_service_metadata(service_dir: str) -> bool:
-    """Validate a single service's README metadata."""
+    """Validate a single service's README metadata, reporting every problem at once."""
     service_path = Path(service_dir)
     readme_path = service_path / 'README.md'
     stack = detect_stack(service_path)
-    required_fields = K3S_REQUIRED if stack == 'k3s' else DOCKER_REQUIRED
-    valid_categories = K3S_CATEGORIES if stack == 'k3s' else DOCKER_CATEGORIES
 
     if not readme_path.exists():
         print(f"❌ No README.md found in {service_dir}")
         return False
 
-    try:
-        with open(readme_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-    except Exception as e:
-        print(f"❌ Error reading {readme_path}: {e}")
-        return False
-
-    # Check for YAML frontmatter
-    frontmatter_pattern = r'^---\s*\n(.*?)\n---\s*\n'
-    match = re.match(frontmatter_pattern, content, re.DOTALL)
-
-    if not match:
-        print(f"❌ No YAML frontmatter found in {readme_path}")
-        print("   Add metadata like this to the top of your README:")
-        print("   ---")
-        print("   name: \"Service Name\"")
-        print("   category: \"📊 Infrastructure & Monitoring\"")
-        print("   purpose: \"Brief purpose\"")
-        print("   # ... other fields")
-        print("   ---")
+    metadata, issues = load(readme_path, stack)
+    if metadata is None:
+        report(str(readme_path), issues)
+        if not FRONTMATTER_RE.match(readme_path.read_text(encoding='utf-8', errors='ignore')):
+            print("   Add metadata like this to the top of your README:")
+            print("   ---")
+            print("   name: \"Service Name\"")
+            print("   category: \"📊 Monitoring & Stats\"")
+            print("   purpose: \"Brief purpose\"")
+            print("   # ... other fields")
+            print("   ---")
         return False
 
-    try:
-        yaml_content = match.group(1)
-        metadata = yaml.safe_load(yaml_content)
-    except yaml.YAMLError as e:
-        print(f"❌ Invalid YAML in {readme_path}: {e}")
+    if not report(f"{readme_path} ({stack} schema)", issues):
         return False
 
-    # Required fields
-    missing_fields = [f for f in required_fields if f not in metadata]
-
-    if missing_fields:
-        print(f"❌ Missing required fields in {readme_path} ({stack} schema): {', '.join(missing_fields)}")
-        return False
-
-    # Validate categories
-
-    if metadata['category'] not in valid_categories:
-        print(f"⚠️  Unknown category '{metadata['category']}' in {readme_path}")
-        print(f"   Consider using one of: {', '.join(valid_categories)}")
-
-    # Validate features is a list
-    if not isinstance(metadata['features'], list):
-        print(f"❌ 'features' should be a list in {readme_path}")
-        return False
-
-    if len(metadata['features']) < 2:
-        print(f"⚠️  Consider adding more features (current: {len(metadata['features'])}) in {readme_path}")
-
     print(f"✅ {service_dir} metadata is valid ({stack})")
     print(f"   Name: {metadata['name']}")
     print(f"   Category: {metadata['category']}")
@@ -123,24 +71,51 @@ def validate_service_metadata(service_dir: str) -> bool:
 
     return True
 
+
+def validate_all() -> bool:
+    """Every service of both stacks, plus duplicate names / ports / domains per stack."""
+    ok = True
+    for stack, root in STACK_DIRS.items():
+        entries: List[Tuple[str, Dict[str, Any]]] = []
+        for service in sorted(p for p in root.iterdir() if p.is_dir() and (p / 'README.md').is_file()):
+            label = str(service.relative_to(REPO_ROOT))
+            metadata, issues = load(service / 'README.md', stack)
+            ok = report(label, issues) and ok
+            if metadata is not None:
+                entries.append((label, metadata))
+        for label, issue in conflicts(entries, stack):
+            ok = report(label, [issue]) and ok
+        print(f"📋 {stack}: {len(entries)} service(s) checked")
+    return ok
+
+
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python3 .github/scripts/validate-service.py <service-directory>")
+    if len(sys.argv) < 2:
+        print("Usage: python3 .github/scripts/validate-service.py <service-directory> [...] | --all")
         print("Example: python3 .github/scripts/validate-service.py ./netdata")
         sys.exit(1)
 
-    service_dir = sys.argv[1].rstrip('/')
-
-    if not Path(service_dir).exists():
-        print(f"❌ Directory {service_dir} does not exist")
+    if sys.argv[1] == '--all':
+        if validate_all():
+            print("\n🎉 All service metadata is valid and conflict-free!")
+            sys.exit(0)
+        print("\n💡 Fix the issues above and try again")
         sys.exit(1)
 
-    if validate_service_metadata(service_dir):
-        print(f"\n🎉 Service {service_dir} is ready for the automated README!")
-        sys.exit(0)
-    else:
+    failed = 0
+    for service_dir in (arg.rstrip('/') for arg in sys.argv[1:]):
+        if not Path(service_dir).exists():
+            print(f"❌ Directory {service_dir} does not exist")
+            failed += 1
+        elif validate_service_metadata(service_dir):
+            print(f"\n🎉 Service {service_dir} is ready for the automated README!")
+        else:
+            failed += 1
+
+    if failed:
         print(f"\n💡 Fix the issues above and try again")
         sys.exit(1)
+    sys.exit(0)
 
 if __name__ == '__main__':
     main()
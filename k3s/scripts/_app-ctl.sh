@@ -68,7 +68,7 @@ _apply_config_dir() {
 
   kubectl create configmap "${APP}-config" -n "$NAMESPACE" \
     "${from_file_args[@]}" --dry-run=client -o yaml | \
-    kubectl apply -f - > /dev/null
+    kubectl apply -f - > /dev/null || return 1
   echo -e "  ${GREEN}✓${NC} configmap ${APP}-config (from config/)"
 }
 
@@ -77,18 +77,35 @@ _apply_dir() {
   local dir="$1"
   [[ -d "$DEPLOY_DIR/$dir" ]] || return 0
   while IFS= read -r f; do
-    kubectl apply -f "$f" > /dev/null
+    kubectl apply -f "$f" > /dev/null || return 1
     echo -e "  ${GREEN}✓${NC} $dir/$(basename "$f")"
   done < <(find "$DEPLOY_DIR/$dir" -maxdepth 1 -type f \( -name '*.yaml' -o -name '*.yml' \) | sort)
 }
 
+# Apply the app's manifests. With python3 + PyYAML this goes through
+# apply-apps.py: the rendered manifest set is hashed and applied in a single
+# multi-document kubectl apply, or skipped (return 3) when the hash matches
+# the local record and the app's workloads still exist. Pass --force to
+# apply regardless. Without python3 it falls back to one apply per file.
+# Callers capture the status (`|| rc=$?`), which turns `set -e` off in here,
+# so every apply below returns its failure explicitly.
+_apply_ordered() {
+  if command -v python3 &>/dev/null && python3 -c 'import yaml' &>/dev/null; then
+    local rc=0
+    python3 "$(dirname "${BASH_SOURCE[0]}")/apply-apps.py" "$DEPLOY_DIR" \
+      --app "$APP" -n "$NAMESPACE" --quiet "$@" || rc=$?
+    return "$rc"
+  fi
+  _apply_per_file
+}
+
 # Apply manifests in correct dependency order. Top-level files are applied in
 # the canonical order; per-app extras live in services/ (applied after the
 # workload) so apps with multiple Service / Route manifests stay tidy.
-_apply_ordered() {
+_apply_per_file() {
   # If the app has a kustomization, let kustomize handle everything
   if [[ -f "$DEPLOY_DIR/kustomization.yaml" ]]; then
-    kubectl apply -k "$DEPLOY_DIR"
+    kubectl apply -k "$DEPLOY_DIR" || return 1
     echo -e "  ${GREEN}✓${NC} kustomize"
     return
   fi
@@ -106,11 +123,11 @@ _apply_ordered() {
     ingress.yaml
   )
 
-  _apply_config_dir
+  _apply_config_dir || return 1
 
   # Wait for any cert-manager Certificates so the workload can mount the secret
   if [[ -f "$DEPLOY_DIR/certificate.yaml" ]]; then
-    kubectl apply -f "$DEPLOY_DIR/certificate.yaml" > /dev/null
+    kubectl apply -f "$DEPLOY_DIR/certificate.yaml" > /dev/null || return 1
     echo -e "  ${GREEN}✓${NC} certificate.yaml"
     local cert_names
     cert_names=$(kubectl get -f "$DEPLOY_DIR/certificate.yaml" -o jsonpath='{.items[*].metadata.name}{.metadata.name}' 2>/dev/null)
@@ -122,7 +139,7 @@ _apply_ordered() {
   for f in "${files[@]}"; do
     [[ "$f" == "certificate.yaml" ]] && continue
     if [[ -f "$DEPLOY_DIR/$f" ]]; then
-      kubectl apply -f "$DEPLOY_DIR/$f" > /dev/null
+      kubectl apply -f "$DEPLOY_DIR/$f" > /dev/null || return 1
       echo -e "  ${GREEN}✓${NC} $f"
     fi
   done
@@ -134,11 +151,11 @@ _apply_ordered() {
   while IFS= read -r f; do
     local base; base="$(basename "$f")"
     [[ "$known" == *" $base "* ]] && continue
-    kubectl apply -f "$f" > /dev/null
+    kubectl apply -f "$f" > /dev/null || return 1
     echo -e "  ${GREEN}✓${NC} $base"
   done < <(find "$DEPLOY_DIR" -maxdepth 1 -type f \( -name '*.yaml' -o -name '*.yml' \) ! -name 'secret.yaml' | sort)
 
-  _apply_dir services
+  _apply_dir services || return 1
 }
 
 # Delete manifests in reverse dependency order
@@ -211,12 +228,25 @@ _detect_workload_kind() {
 # ─── Commands ─────────────────────────────────────────────────────────────────
 
 cmd_deploy() {
+  local apply_args=()
+  [[ "${1:-}" == "--force" ]] && apply_args=(--force)
+
   local existing_workload_kind
   existing_workload_kind="$(_detect_workload_kind)"
 
   echo -e "\n${BOLD}Deploying ${CYAN}$APP${NC}${BOLD} → ${CYAN}$NAMESPACE${NC}\n"
-  _apply_ordered
+  local rc=0
+  _apply_ordered ${apply_args[@]+"${apply_args[@]}"} || rc=$?
   echo ""
+  if [[ "$rc" -eq 3 ]]; then
+    ok "Manifests unchanged since the last deploy — nothing applied"
+    dim "  (./setup.sh deploy --force to re-apply and restart anyway)"
+    cmd_status
+    return 0
+  elif [[ "$rc" -ne 0 ]]; then
+    err "Apply failed"
+    exit 1
+  fi
 
   local workload_kind
   workload_kind="$(_detect_workload_kind)"
@@ -277,6 +307,27 @@ cmd_teardown() {
 }
 
 cmd_status() {
+  # One batched cluster read joined in memory (cluster-status.py) instead of
+  # a kubectl call per section; the per-call path below is the fallback.
+  if command -v python3 &>/dev/null && python3 -c 'import yaml' &>/dev/null; then
+    python3 "$(dirname "${BASH_SOURCE[0]}")/cluster-status.py" "$APP" -n "$NAMESPACE"
+  else
+    _status_per_call
+  fi
+
+  header "Access"
+  [[ -n "${DOMAIN:-}" ]] && echo -e "  Domain  : ${GREEN}http://$DOMAIN${NC}"
+  [[ -n "${EXTERNAL_PORT:-}" ]] && echo -e "  Direct  : ${GREEN}http://${NODE_IP:-192.168.0.108}:$EXTERNAL_PORT${NC}"
+  [[ -z "${DOMAIN:-}" && -z "${EXTERNAL_PORT:-}" ]] && dim "  (internal-only — no LoadBalancer/Ingress)"
+
+  if [[ -n "${DOMAIN:-}${EXTERNAL_PORT:-}" ]] && command -v python3 &>/dev/null; then
+    python3 "$(dirname "${BASH_SOURCE[0]}")/ingress-probe.py" \
+      --only "$(basename "$DEPLOY_DIR")" --count 3 --timeout 5 2>/dev/null || true
+  fi
+  echo ""
+}
+
+_status_per_call() {
   local workload_kind
   workload_kind="$(_detect_workload_kind)"
 
@@ -318,12 +369,6 @@ cmd_status() {
     --sort-by='.lastTimestamp' 2>/dev/null | \
     grep -iE "$APP|Warning|Error|Failed|BackOff|OOM" | tail -8 \
     || dim "  No notable events"
-
-  header "Access"
-  [[ -n "${DOMAIN:-}" ]] && echo -e "  Domain  : ${GREEN}http://$DOMAIN${NC}"
-  [[ -n "${EXTERNAL_PORT:-}" ]] && echo -e "  Direct  : ${GREEN}http://${NODE_IP:-192.168.0.108}:$EXTERNAL_PORT${NC}"
-  [[ -z "${DOMAIN:-}" && -z "${EXTERNAL_PORT:-}" ]] && dim "  (internal-only — no LoadBalancer/Ingress)"
-  echo ""
 }
 
 cmd_logs() {
@@ -331,18 +376,38 @@ cmd_logs() {
   local tail="--tail=100"
   local previous=""
   local extra_args=()
+  local container_args=()
+  local mux_args=()
+  local with_apps=()
 
   while [[ $# -gt 0 ]]; do
     case "$1" in
       --no-follow|-n) follow="" ;;
       --previous|-p)  previous="--previous"; follow="" ;;
       --tail|-t)      tail="--tail=${2:?'--tail requires a number'}"; shift ;;
-      -c|--container) extra_args+=("-c" "${2:?'-c requires a container name'}"); shift ;;
+      -c|--container) container_args+=("-c" "${2:?'-c requires a container name'}"); shift ;;
+      --with|-w)      with_apps+=("${2:?'--with requires an app name'}"); shift ;;
+      --grep|-g)      mux_args+=("-g" "${2:?'--grep requires a regex'}"); shift ;;
+      --level)        mux_args+=("--level" "${2:?'--level requires a level'}"); shift ;;
       *) extra_args+=("$1") ;;
     esac
     shift
   done
 
+  # Every pod of the app (plus any --with apps), merged by timestamp via
+  # logs.py. --previous and raw kubectl flags still go straight to kubectl.
+  if [[ -z "$previous" && ${#extra_args[@]} -eq 0 ]] && \
+     command -v python3 &>/dev/null && python3 -c 'import yaml' &>/dev/null; then
+    local mux=("$NAMESPACE/$APP" ${with_apps[@]+"${with_apps[@]}"} "$tail")
+    [[ -z "$follow" ]] && mux+=(--no-follow)
+    exec python3 "$(dirname "${BASH_SOURCE[0]}")/logs.py" "${mux[@]}" \
+      ${container_args[@]+"${container_args[@]}"} ${mux_args[@]+"${mux_args[@]}"}
+  fi
+  if [[ ${#with_apps[@]} -gt 0 || ${#mux_args[@]} -gt 0 ]]; then
+    warn "--with/--grep/--level need python3 + PyYAML (scripts/logs.py) — showing $APP only"
+  fi
+  extra_args+=(${container_args[@]+"${container_args[@]}"})
+
   local pod; pod="$(_get_any_pod)"
   if [[ -z "$pod" ]]; then
     err "No pod found for $APP in $NAMESPACE"; exit 1
@@ -467,6 +532,14 @@ cmd_events() {
     2>/dev/null | tail -31 | \
     awk 'NR==1{print} NR>1{if($2=="Warning") printf "\033[0;31m"; print; printf "\033[0m"}' \
     || dim "  No events in $NAMESPACE"
+
+  # Events expire after ~1h; event-store.py keeps OOM kills / BackOffs / restarts
+  # (recorded from cron) so older incidents still show up here.
+  local db; db="$(dirname "${BASH_SOURCE[0]}")/../.events.db"
+  if [[ -f "$db" ]] && command -v python3 &>/dev/null && python3 -c 'import yaml' &>/dev/null; then
+    echo ""
+    python3 "$(dirname "${BASH_SOURCE[0]}")/event-store.py" --app "$APP"
+  fi
 }
 
 cmd_resources() {
@@ -523,6 +596,11 @@ cmd_pvc() {
     kubectl get pv "$pv_name" -o jsonpath='  ├ Status:   {.status.phase}{"\n"}  ├ Capacity: {.spec.capacity.storage}{"\n"}  └ Path:     {.spec.hostPath.path}{"\n"}' 2>/dev/null
     echo ""
   done
+
+  # Actual usage on disk (only meaningful on the node that holds the hostPaths)
+  if command -v python3 &>/dev/null && python3 -c 'import yaml' &>/dev/null; then
+    python3 "$(dirname "${BASH_SOURCE[0]}")/disk-usage.py" --app "$(basename "$DEPLOY_DIR")"
+  fi
 }
 
 # ─── ArgoCD integration ──────────────────────────────────────────────────────
@@ -661,6 +739,7 @@ _show_usage() {
 
   echo -e "${CYAN}Deployment:${NC}"
   echo "  deploy                Apply all manifests in correct order"
+  echo "  deploy --force        Re-apply even if no manifest changed"
   echo "  teardown              Remove all k8s resources (warns if ArgoCD-managed)"
   echo "  teardown --purge      Same + delete PVCs/PVs (destroys data!)"
   echo "  scale <n>             Scale to N replicas (cluster-only, ArgoCD may revert)"
@@ -673,6 +752,8 @@ _show_usage() {
   echo "  logs                  Stream pod logs (Ctrl+C to stop)"
   echo "  logs --previous       Logs from last crashed container"
   echo "  logs --tail <N>       Last N lines only"
+  echo "  logs --with <app>     Merge another app's logs in (repeatable)"
+  echo "  logs -g <re> --level warn   Filter lines by regex / minimum level"
   echo "  events                All namespace events sorted by time (warnings in red)"
   echo "  resources             kubectl top + configured requests/limits"
   echo "  describe              Full kubectl describe: deployment + pod"
@@ -709,7 +790,7 @@ _show_usage() {
 # ─── Main entry point (called by each app's setup.sh) ────────────────────────
 main() {
   case "${1:-help}" in
-    deploy)    cmd_deploy ;;
+    deploy)    cmd_deploy "${2:-}" ;;
     teardown)  cmd_teardown "${@:2}" ;;
     status)    cmd_status ;;
     logs)      cmd_logs "${@:2}" ;;
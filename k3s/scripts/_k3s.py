@@ -0,0 +1,409 @@
+"""
+Shared helpers for the Python tools in k3s/scripts/.
+
+Imported by the *.py scripts next to it — do NOT execute directly. Plays the
+same role for Python that _app-ctl.sh plays for the bash scripts: one place
+for repo paths, terminal output, manifest discovery (in the same order
+_app-ctl.sh applies files) and the kubectl / docker runners.
+
+Every tool shells out through run_kubectl() / run_docker(), which honour
+$KUBECTL / $DOCKER so a fake stand-in can replace the real binary:
+
+    KUBECTL="python3 fixtures/fake-kubectl.py" ./parallel-restore.py
+    DOCKER="python3 $PWD/fixtures/fake-docker.py" ./compose-up.py
+"""
+
+from __future__ import annotations
+
+import base64
+import os
+import re
+import shlex
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import yaml
+
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+K3S_ROOT = SCRIPTS_DIR.parent
+REPO_ROOT = K3S_ROOT.parent
+APPS_DIR = K3S_ROOT / "apps"
+DATABASES_DIR = K3S_ROOT / "databases"
+INFRA_DIR = K3S_ROOT / "infra"
+NAMESPACES_FILE = K3S_ROOT / "base" / "namespaces" / "namespaces.yaml"
+DOCKER_DIR = REPO_ROOT / "docker"
+
+
+# ─── Terminal output (same prefixes as _app-ctl.sh) ──────────────────────────
+
+if sys.stdout.isatty():
+    RED, GREEN, YELLOW = "\033[0;31m", "\033[0;32m", "\033[1;33m"
+    BLUE, CYAN, BOLD, DIM, NC = "\033[0;34m", "\033[0;36m", "\033[1m", "\033[2m", "\033[0m"
+else:
+    RED = GREEN = YELLOW = BLUE = CYAN = BOLD = DIM = NC = ""
+
+
+def info(msg: str) -> None:
+    print(f"{BLUE}[INFO]{NC}  {msg}")
+
+
+def ok(msg: str) -> None:
+    print(f"{GREEN}[OK]{NC}    {msg}")
+
+
+def warn(msg: str) -> None:
+    print(f"{YELLOW}[WARN]{NC}  {msg}")
+
+
+def err(msg: str) -> None:
+    print(f"{RED}[ERR]{NC}   {msg}", file=sys.stderr)
+
+
+def header(msg: str) -> None:
+    print(f"\n{CYAN}{BOLD}━━━ {msg} {NC}")
+
+
+# ─── Manifests ───────────────────────────────────────────────────────────────
+
+# Canonical apply order — keep in sync with _apply_ordered in _app-ctl.sh.
+APPLY_ORDER = [
+    "pv.yaml",
+    "pvc.yaml",
+    "certificate.yaml",
+    "configmap.yaml",
+    "sealedsecret.yaml",
+    "rbac.yaml",
+    "deployment.yaml",
+    "statefulset.yaml",
+    "service.yaml",
+    "ingress.yaml",
+]
+
+WORKLOAD_KINDS = ("Deployment", "StatefulSet", "DaemonSet")
+
+
+def load_yaml_docs(path: Path) -> List[Dict[str, Any]]:
+    """Return every mapping document in a (multi-document) YAML file."""
+    try:
+        text = path.read_text(encoding="utf-8")
+    except OSError:
+        return []
+    try:
+        return [d for d in yaml.safe_load_all(text) if isinstance(d, dict)]
+    except yaml.YAMLError as exc:
+        warn(f"YAML error in {path}: {exc}")
+        return []
+
+
+def _yaml_files(directory: Path) -> List[Path]:
+    if not directory.is_dir():
+        return []
+    return sorted(
+        p for p in directory.iterdir()
+        if p.is_file() and p.suffix in (".yaml", ".yml")
+    )
+
+
+def manifest_files(app_dir: Path) -> List[Path]:
+    """Manifest files of an app directory, in the order _app-ctl.sh applies them.
+
+    Kustomize apps return their listed resources. Plaintext secret.yaml is
+    never included (it is gitignored and only exists to be sealed).
+    """
+    kustomization = app_dir / "kustomization.yaml"
+    if kustomization.is_file():
+        docs = load_yaml_docs(kustomization)
+        resources = docs[0].get("resources", []) if docs else []
+        return [app_dir / r for r in resources if (app_dir / r).is_file()]
+
+    root = [p for p in _yaml_files(app_dir) if p.name != "secret.yaml"]
+    known = [app_dir / name for name in APPLY_ORDER if (app_dir / name).is_file()]
+    extras = [p for p in root if p.name not in APPLY_ORDER]
+    return known + extras + _yaml_files(app_dir / "services")
+
+
+def app_manifests(app_dir: Path) -> List[Dict[str, Any]]:
+    docs: List[Dict[str, Any]] = []
+    for f in manifest_files(app_dir):
+        docs.extend(load_yaml_docs(f))
+    return docs
+
+
+def discover_app_dirs(include_databases: bool = True) -> List[Path]:
+    """Every k3s/databases/* and k3s/apps/* directory that carries manifests."""
+    roots = ([DATABASES_DIR] if include_databases else []) + [APPS_DIR]
+    dirs: List[Path] = []
+    for root in roots:
+        if not root.is_dir():
+            continue
+        for child in sorted(root.iterdir()):
+            if child.is_dir() and not child.name.startswith(".") and manifest_files(child):
+                dirs.append(child)
+    return dirs
+
+
+def workloads(docs: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [d for d in docs if d.get("kind") in WORKLOAD_KINDS]
+
+
+def pod_spec(workload: Dict[str, Any]) -> Dict[str, Any]:
+    return ((workload.get("spec") or {}).get("template") or {}).get("spec") or {}
+
+
+def config_configmap(app_dir: Path, app: str, namespace: str) -> Optional[Dict[str, Any]]:
+    """The ${APP}-config ConfigMap _apply_config_dir generates from config/.
+
+    Built in-process — same result as `kubectl create configmap --from-file`
+    (UTF-8 files under data, anything else base64 under binaryData).
+    """
+    config_dir = app_dir / "config"
+    files = sorted(p for p in config_dir.iterdir() if p.is_file()) if config_dir.is_dir() else []
+    if not files:
+        return None
+    data: Dict[str, str] = {}
+    binary: Dict[str, str] = {}
+    for f in files:
+        raw = f.read_bytes()
+        try:
+            data[f.name] = raw.decode("utf-8")
+        except UnicodeDecodeError:
+            binary[f.name] = base64.b64encode(raw).decode("ascii")
+    cm: Dict[str, Any] = {
+        "apiVersion": "v1",
+        "kind": "ConfigMap",
+        "metadata": {"name": f"{app}-config", "namespace": namespace},
+        "data": data,
+    }
+    if binary:
+        cm["binaryData"] = binary
+    return cm
+
+
+_QUANTITY_SUFFIXES = {
+    "Ki": 2 ** 10, "Mi": 2 ** 20, "Gi": 2 ** 30, "Ti": 2 ** 40, "Pi": 2 ** 50, "Ei": 2 ** 60,
+    "m": 1e-3, "k": 1e3, "K": 1e3, "M": 1e6, "G": 1e9, "T": 1e12, "P": 1e15, "E": 1e18,
+}
+
+
+def parse_quantity(value: Any) -> Optional[float]:
+    """Kubernetes resource quantity ("512Mi", "100m", "2") as a number; None if unparsable."""
+    text = str(value if value is not None else "").strip()
+    for suffix in sorted(_QUANTITY_SUFFIXES, key=len, reverse=True):
+        if text.endswith(suffix):
+            number, factor = text[: -len(suffix)], _QUANTITY_SUFFIXES[suffix]
+            break
+    else:
+        number, factor = text, 1
+    try:
+        return float(number) * factor
+    except ValueError:
+        return None
+
+
+# ─── Line-level YAML edits (keep comments and layout) ────────────────────────
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip())
+
+
+def doc_ranges(lines: Sequence[str]) -> List[Tuple[int, int]]:
+    """[start, end) line ranges of the documents in a `---`-separated file."""
+    bounds = [-1] + [i for i, l in enumerate(lines) if l.rstrip() == "---"] + [len(lines)]
+    return [(lo + 1, hi) for lo, hi in zip(bounds, bounds[1:])]
+
+
+def block_end(lines: Sequence[str], idx: int) -> int:
+    """Index just past the last non-blank line nested under lines[idx]."""
+    own = _indent(lines[idx])
+    end = idx + 1
+    for j in range(idx + 1, len(lines)):
+        if not lines[j].strip():
+            continue
+        if _indent(lines[j]) <= own:
+            break
+        end = j + 1
+    return end
+
+
+def find_key(lines: Sequence[str], start: int, end: int, indent: int, key: str) -> Optional[int]:
+    pattern = re.compile(rf"^ {{{indent}}}{re.escape(key)}:(\s|$)")
+    return next((j for j in range(start, end) if pattern.match(lines[j])), None)
+
+
+def ensure_key(lines: List[str], parent: int, key: str, value: Optional[str] = None) -> int:
+    """Make `key` a child of lines[parent] (a scalar `value`, or a mapping if
+    value is None); returns the key's line index. lines[parent] may be a
+    `- name: x` list item, whose keys sit two columns right of the dash."""
+    end = block_end(lines, parent)
+    children = [j for j in range(parent + 1, end) if lines[j].strip() and not lines[j].lstrip().startswith("#")]
+    indent = _indent(lines[children[0]]) if children else _indent(lines[parent]) + 2
+    if lines[parent].lstrip().startswith("- "):
+        indent = _indent(lines[parent]) + 2
+    text = " " * indent + (f"{key}: {value}\n" if value is not None else f"{key}:\n")
+    j = find_key(lines, parent + 1, end, indent, key)
+    if j is None:
+        lines.insert(end, text)
+        return end
+    if value is not None:
+        lines[j] = text
+    return j
+
+
+
+def drop_key(lines: List[str], parent: int, key: str) -> bool:
+    """Remove child `key` of lines[parent] along with everything nested under it."""
+    end = block_end(lines, parent)
+    children = [j for j in range(parent + 1, end) if lines[j].strip() and not lines[j].lstrip().startswith("#")]
+    if not children:
+        return False
+    j = find_key(lines, parent + 1, end, _indent(lines[children[0]]), key)
+    if j is None:
+        return False
+    del lines[j:block_end(lines, j)]
+    return True
+
+# ─── docker/ compose stacks ──────────────────────────────────────────────────
+
+COMPOSE_FILES = ("docker-compose.yml", "docker-compose.yaml", "compose.yml", "compose.yaml")
+_VAR_RE = re.compile(r"\$\{([A-Za-z_][A-Za-z0-9_]*)(?::?-([^}]*))?\}|\$([A-Za-z_][A-Za-z0-9_]*)")
+
+
+def docker_stacks() -> List[Path]:
+    """docker/<svc>/ dirs with README frontmatter — the set update-docker-readme.py lists."""
+    if not DOCKER_DIR.is_dir():
+        return []
+    return [
+        d for d in sorted(DOCKER_DIR.iterdir())
+        if d.is_dir() and not d.name.startswith(".") and parse_frontmatter(d / "README.md") is not None
+    ]
+
+
+def compose_file(stack: Path) -> Optional[Path]:
+    """The stack's default compose file (None when it only ships variants)."""
+    return next((stack / f for f in COMPOSE_FILES if (stack / f).is_file()), None)
+
+
+def compose_env(stack: Path) -> Dict[str, str]:
+    """KEY=VALUE pairs from a stack's .env.example, overridden by .env."""
+    env: Dict[str, str] = {}
+    for name in (".env.example", ".env"):
+        path = stack / name
+        if not path.is_file():
+            continue
+        for line in path.read_text(encoding="utf-8", errors="ignore").splitlines():
+            line = line.split(" #", 1)[0].strip()
+            if line and not line.startswith("#") and "=" in line:
+                k, v = line.split("=", 1)
+                env[k.strip()] = v.strip().strip("\"'")
+    return env
+
+
+def expand_vars(value: str, env: Dict[str, str]) -> Optional[str]:
+    """Compose-style ${VAR} / ${VAR:-default} expansion; None if a VAR is unset."""
+    missing = False
+
+    def sub(m: "re.Match[str]") -> str:
+        nonlocal missing
+        var = m.group(1) or m.group(3)
+        if env.get(var):
+            return env[var]
+        if m.group(2) is not None:
+            return m.group(2)
+        missing = True
+        return ""
+
+    out = _VAR_RE.sub(sub, value)
+    return None if missing else out
+
+
+# ─── Catalog (k3s/apps/<svc>/README.md frontmatter) ──────────────────────────
+
+
+def parse_frontmatter(path: Path) -> Optional[Dict[str, Any]]:
+    """YAML frontmatter of a README, or None if it has none / is invalid."""
+    try:
+        text = path.read_text(encoding="utf-8", errors="ignore")
+    except OSError:
+        return None
+    m = re.match(r"^---\s*\n(.*?)\n---\s*\n", text, re.DOTALL)
+    if not m:
+        return None
+    try:
+        data = yaml.safe_load(m.group(1)) or {}
+    except yaml.YAMLError as exc:
+        warn(f"YAML error in {path}: {exc}")
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def catalog() -> List[Dict[str, Any]]:
+    """Frontmatter of every app, with `directory` set and "—" placeholders as None."""
+    entries: List[Dict[str, Any]] = []
+    for app_dir in sorted(APPS_DIR.iterdir()) if APPS_DIR.is_dir() else []:
+        meta = parse_frontmatter(app_dir / "README.md") if app_dir.is_dir() else None
+        if meta is None:
+            continue
+        meta["directory"] = app_dir.name
+        for key in ("external_port", "domain"):
+            value = str(meta.get(key) or "").strip()
+            meta[key] = None if value in ("", "—", "-") else value
+        entries.append(meta)
+    return entries
+
+
+# ─── docker ──────────────────────────────────────────────────────────────────
+
+
+def docker_cmd() -> List[str]:
+    """The docker argv prefix — $DOCKER lets tests swap in a fake binary."""
+    return shlex.split(os.environ.get("DOCKER", "docker"))
+
+
+def run_docker(args: Sequence[str], cwd: Optional[Path] = None, timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+    """Run docker with captured text output. Never raises on a non-zero exit."""
+    try:
+        return subprocess.run(
+            docker_cmd() + list(args), cwd=cwd, capture_output=True, text=True,
+            stdin=subprocess.DEVNULL, timeout=timeout,
+        )
+    except FileNotFoundError:
+        return subprocess.CompletedProcess(args, 127, "", f"{docker_cmd()[0]}: not found")
+    except subprocess.TimeoutExpired:
+        return subprocess.CompletedProcess(args, 124, "", f"timed out after {timeout}s")
+
+
+# ─── kubectl ─────────────────────────────────────────────────────────────────
+
+
+def kubectl_cmd() -> List[str]:
+    """The kubectl argv prefix — $KUBECTL lets tests swap in a fake binary."""
+    return shlex.split(os.environ.get("KUBECTL", "kubectl"))
+
+
+def run_kubectl(
+    args: Sequence[str],
+    input: Optional[str] = None,
+    timeout: Optional[float] = None,
+) -> subprocess.CompletedProcess:
+    """Run kubectl with captured text output. Never raises on a non-zero exit.
+
+    Without `input`, stdin is /dev/null so `kubectl exec -i` can never block
+    on the caller's terminal.
+    """
+    stdin = {"input": input} if input is not None else {"stdin": subprocess.DEVNULL}
+    try:
+        return subprocess.run(
+            kubectl_cmd() + list(args),
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+            **stdin,
+        )
+    except subprocess.TimeoutExpired as exc:
+        return subprocess.CompletedProcess(exc.cmd, 124, "", f"timed out after {timeout}s")
+    except FileNotFoundError as exc:
+        return subprocess.CompletedProcess(kubectl_cmd(), 127, "", str(exc))
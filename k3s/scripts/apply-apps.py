@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+apply-apps.py — Apply only the apps whose manifests changed.
+
+Each app directory's manifest set is rendered the way _app-ctl.sh applies it
+(canonical file order, root extras, services/, the ${APP}-config ConfigMap
+generated from config/; kustomize apps via `kubectl kustomize`) and reduced
+to a normalised SHA-256: YAML is re-serialised as sorted JSON, so comments,
+key order and whitespace don't count as changes.
+
+The hash is recorded locally in k3s/.apply-state.json, per kube context
+(gitignored). An app is skipped only if its recorded hash matches and every
+workload it renders still exists in the cluster, so a rebuilt cluster is
+never mistaken for up to date; a hand-edited one is (use --force). Apps
+that render no workload, and every app when the live listing fails, are
+always applied.
+
+--annotate also stamps the hash on every workload as the annotation
+home.ijlalahmad.dev/manifest-hash (top-level metadata only, so it never
+triggers a rollout) and requires it to match before skipping. Leave it off
+for anything ArgoCD manages: the annotation isn't in git, so the app shows
+OutOfSync and the next sync strips it again. Changed apps get one
+ordered multi-document `kubectl apply -f -` instead of a process per file
+(Certificates still go first and are waited on, as in _apply_ordered).
+
+Usage:
+  ./apply-apps.py --all                      Databases, then apps — changed only
+  ./apply-apps.py ../apps/homarr             One or more app directories
+  ./apply-apps.py <dir> --app homarr -n dashboard-network
+                                             Name/namespace as set in setup.sh
+  ./apply-apps.py --all --dry-run            Show what would be applied
+  ./apply-apps.py --all --force              Apply everything, refresh hashes
+  ./apply-apps.py --all --annotate           Also gate on a live hash annotation
+                                             (clusters without ArgoCD only)
+
+Exit status: 0 if something was applied (with --dry-run: would be), 3 if
+every app was unchanged, 1 if any app failed to render or apply. kubectl
+is resolved from $KUBECTL (see _k3s.py).
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+from _k3s import (
+    DIM, GREEN, K3S_ROOT, NC, YELLOW, WORKLOAD_KINDS,
+    app_manifests, config_configmap, discover_app_dirs, err, header, info, ok, run_kubectl, warn,
+)
+
+
+HASH_ANNOTATION = "home.ijlalahmad.dev/manifest-hash"
+STATE_FILE = K3S_ROOT / ".apply-state.json"
+EXIT_UNCHANGED = 3
+
+
+@dataclass
+class AppSet:
+    app: str
+    namespace: str
+    app_dir: Path
+    rel: str
+    kustomize: bool
+    docs: List[Dict[str, Any]] = field(default_factory=list)
+    digest: str = ""
+    error: str = ""
+
+    @property
+    def workloads(self) -> List[Tuple[str, str, str]]:
+        return [
+            (d["kind"], (d.get("metadata") or {}).get("namespace", self.namespace), d["metadata"]["name"])
+            for d in self.docs if d.get("kind") in WORKLOAD_KINDS and (d.get("metadata") or {}).get("name")
+        ]
+
+
+# ─── Render + hash ───────────────────────────────────────────────────────────
+
+
+def _canonical(obj: Any) -> bytes:
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def _namespace_of(docs: List[Dict[str, Any]]) -> str:
+    for d in docs:
+        ns = (d.get("metadata") or {}).get("namespace")
+        if ns and d.get("kind") in WORKLOAD_KINDS:
+            return ns
+    return next(((d.get("metadata") or {}).get("namespace") for d in docs if (d.get("metadata") or {}).get("namespace")), "default")
+
+
+def render(app_dir: Path, app: Optional[str] = None, namespace: Optional[str] = None) -> AppSet:
+    """Render an app directory into the ordered document list kubectl will see."""
+    kustomize = (app_dir / "kustomization.yaml").is_file()
+    try:
+        rel = str(app_dir.resolve().relative_to(K3S_ROOT))
+    except ValueError:
+        rel = str(app_dir.resolve())
+    s = AppSet(app or app_dir.name, namespace or "", app_dir, rel, kustomize)
+    if kustomize:
+        res = run_kubectl(["kustomize", str(app_dir)], timeout=120)
+        if res.returncode != 0:
+            s.error = res.stderr.strip() or "kubectl kustomize failed"
+            return s
+        s.docs = [d for d in yaml.safe_load_all(res.stdout) if isinstance(d, dict)]
+    else:
+        s.docs = app_manifests(app_dir)
+    s.namespace = s.namespace or _namespace_of(s.docs)
+    if not kustomize:
+        cm = config_configmap(app_dir, s.app, s.namespace)
+        if cm:
+            # _apply_config_dir runs before anything else in _apply_ordered
+            s.docs.insert(0, cm)
+    s.digest = hashlib.sha256(b"\n".join(_canonical(d) for d in s.docs)).hexdigest()
+    return s
+
+
+def stamped(docs: List[Dict[str, Any]], digest: str) -> List[Dict[str, Any]]:
+    out = []
+    for d in docs:
+        if d.get("kind") in WORKLOAD_KINDS:
+            d = json.loads(json.dumps(d))
+            meta = d.setdefault("metadata", {})
+            meta.setdefault("annotations", {})[HASH_ANNOTATION] = digest
+        out.append(d)
+    return out
+
+
+# ─── State ───────────────────────────────────────────────────────────────────
+
+
+def current_context() -> str:
+    res = run_kubectl(["config", "current-context"], timeout=15)
+    return res.stdout.strip() if res.returncode == 0 and res.stdout.strip() else "default"
+
+
+def load_state() -> Dict[str, Dict[str, str]]:
+    try:
+        return json.loads(STATE_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state: Dict[str, Dict[str, str]]) -> None:
+    tmp = STATE_FILE.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    tmp.replace(STATE_FILE)
+
+
+def live_hashes() -> Optional[Dict[Tuple[str, str, str], str]]:
+    """Every workload in the cluster with its manifest-hash annotation, in one call."""
+    template = (
+        "{range .items[*]}{.kind}{'\\t'}{.metadata.namespace}{'\\t'}{.metadata.name}{'\\t'}"
+        "{.metadata.annotations." + HASH_ANNOTATION.replace(".", "\\.") + "}{'\\n'}{end}"
+    )
+    res = run_kubectl(["get", "deployments,statefulsets,daemonsets", "-A", "-o", f"jsonpath={template}"], timeout=60)
+    if res.returncode != 0:
+        return None
+    out: Dict[Tuple[str, str, str], str] = {}
+    for line in res.stdout.splitlines():
+        cols = line.split("\t")
+        if len(cols) >= 3:
+            out[(cols[0], cols[1], cols[2])] = cols[3] if len(cols) > 3 else ""
+    return out
+
+
+def is_current(s: AppSet, recorded: Optional[str], live: Optional[Dict[Tuple[str, str, str], str]],
+               annotate: bool) -> bool:
+    # Without a live listing (or with nothing live to check) the state file
+    # alone cannot prove the app is deployed — apply.
+    if recorded != s.digest or live is None or not s.workloads:
+        return False
+    if annotate:
+        return all(live.get(w) == s.digest for w in s.workloads)
+    return all(w in live for w in s.workloads)
+
+
+# ─── Apply ───────────────────────────────────────────────────────────────────
+
+
+def apply_set(s: AppSet, annotate: bool) -> Tuple[bool, str]:
+    docs = stamped(s.docs, s.digest) if annotate else s.docs
+    certs = [d for d in docs if d.get("kind") == "Certificate"]
+    rest = [d for d in docs if d.get("kind") != "Certificate"]
+    if certs:
+        res = run_kubectl(["apply", "-f", "-"], input=yaml.safe_dump_all(certs, sort_keys=False), timeout=120)
+        if res.returncode != 0:
+            return False, res.stderr.strip()
+        for c in certs:
+            meta = c.get("metadata") or {}
+            run_kubectl(["wait", "--for=condition=Ready", f"certificate/{meta.get('name')}",
+                         "-n", meta.get("namespace", s.namespace), "--timeout=120s"], timeout=135)
+    if not rest:
+        return True, ""
+    res = run_kubectl(["apply", "-f", "-"], input=yaml.safe_dump_all(rest, sort_keys=False), timeout=300)
+    return res.returncode == 0, res.stderr.strip()
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Hash-gated, single-process apply of changed apps.")
+    ap.add_argument("dirs", nargs="*", type=Path, help="app directories (default with --all: every app)")
+    ap.add_argument("--all", action="store_true", help="every k3s/databases/* and k3s/apps/* directory")
+    ap.add_argument("--app", help="app name for a single directory (default: directory name)")
+    ap.add_argument("-n", "--namespace", help="namespace for a single directory (default: from manifests)")
+    ap.add_argument("--force", action="store_true", help="apply even if unchanged")
+    ap.add_argument("--dry-run", action="store_true", help="only report what would be applied")
+    ap.add_argument("--annotate", action="store_true",
+                    help="stamp and check a live hash annotation (not for ArgoCD-managed apps)")
+    ap.add_argument("-q", "--quiet", action="store_true", help="only print changed apps and errors")
+    args = ap.parse_args()
+
+    dirs = discover_app_dirs() if args.all else args.dirs
+    if not dirs:
+        ap.error("give app directories or --all")
+    if (args.app or args.namespace) and len(dirs) != 1:
+        ap.error("--app/--namespace need exactly one directory")
+
+    started = time.monotonic()
+    sets = [render(d, args.app, args.namespace) for d in dirs]
+    context = current_context()
+    state = load_state()
+    recorded = state.setdefault(context, {})
+    live = None if args.force else live_hashes()
+    if live is None and not args.force:
+        warn("Could not list live workloads — applying every app")
+
+    if not args.quiet:
+        header(f"Apply — {len(sets)} app(s), context {context}")
+    applied = pending = unchanged = failed = 0
+    for s in sets:
+        if s.error:
+            failed += 1
+            err(f"{s.rel}: {s.error}")
+            continue
+        if not args.force and is_current(s, recorded.get(s.rel), live, args.annotate):
+            unchanged += 1
+            if not args.quiet:
+                print(f"  {DIM}= {s.rel}  unchanged ({s.digest[:12]}){NC}")
+            continue
+        if args.dry_run:
+            pending += 1
+            print(f"  {YELLOW}~{NC} {s.rel}  would apply {len(s.docs)} object(s)")
+            continue
+        success, detail = apply_set(s, args.annotate)
+        if success:
+            applied += 1
+            recorded[s.rel] = s.digest
+            print(f"  {GREEN}✓{NC} {s.rel}  {len(s.docs)} object(s) in one apply")
+        else:
+            failed += 1
+            recorded.pop(s.rel, None)
+            err(f"{s.rel}: {detail}")
+
+    if not args.dry_run:
+        save_state(state)
+    if not args.quiet:
+        print("")
+        done = f"{pending} would apply" if args.dry_run else f"{applied} applied"
+        info(f"{done}, {unchanged} unchanged, {failed} failed ({time.monotonic() - started:.1f}s)")
+    if failed:
+        return 1
+    if applied + pending == 0:
+        if not args.quiet:
+            ok("Nothing to apply — cluster matches git")
+        return EXIT_UNCHANGED
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
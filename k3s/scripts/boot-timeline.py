@@ -0,0 +1,557 @@
+#!/usr/bin/env python3
+"""
+boot-timeline.py — Where the minutes go after a reboot or k3s restart.
+
+After a power cycle (or networkd-dispatcher restarting k3s on a link bounce)
+every app comes back at once and it can take minutes before the last one is
+Ready. This reads pods, events and nodes cluster-wide in one
+`kubectl get nodes,pods,events -A -o json` (or a recorded snapshot of it) and
+rebuilds, per pod, the startup phases since the boot:
+
+    wait   ·  boot → PodScheduled
+    setup  ░  scheduled → container started (sandbox, init containers, create)
+    pull   ▓  Pulling → Pulled events (image not present on the node)
+    warmup █  container started → Ready (readiness probe passing)
+    stuck  ▒  started but not Ready when the snapshot was taken
+
+From those it reports the waterfall, the critical path through the restore DAG
+of parallel-restore.py (the chain of dependencies that finished last), the
+contention windows where more pods were warming up than the node has cores,
+and concrete suggestions: which slow starters to move out of a crowded
+window, readiness probes that fire long before the app can answer, liveness
+probes that can kill an app mid-warmup, and images pulled at boot.
+
+t0 is --since, else the latest node Ready transition, else the earliest
+SandboxChanged event, else the earliest pod creation. Events are only kept
+by the API server for an hour, so record soon after the boot.
+
+Usage:
+  ./boot-timeline.py                         Analyze the live cluster
+  ./boot-timeline.py --record boot.json      …and save the raw read for later
+  ./boot-timeline.py --fixture boot.json     Analyze a recorded snapshot (no cluster)
+  ./boot-timeline.py --since 2026-10-19T06:02:10Z -n media
+  ./boot-timeline.py --cores 4 --json
+
+fixtures/boot-timeline.json is a recorded boot (an image pull, probe
+failures, a liveness kill, a pod that never gets Ready) to try it against.
+
+kubectl is resolved from $KUBECTL (see _k3s.py).
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import sys
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from _k3s import (
+    BOLD, CYAN, DIM, GREEN, NC, RED, SCRIPTS_DIR, YELLOW, err, header, info, parse_quantity,
+    run_kubectl, warn,
+)
+
+KINDS = "nodes,pods,events"
+DEFAULT_CORES = 4           # Raspberry Pi 4/5 — used when the snapshot has no nodes
+SLOW_WARMUP = 30.0          # seconds started → Ready before a pod counts as a slow starter
+SLOW_PULL = 20.0
+PHASE_CHARS = {"wait": "·", "setup": "░", "pull": "▓", "warmup": "█", "stuck": "▒"}
+PHASE_COLORS = {"wait": DIM, "setup": CYAN, "pull": YELLOW, "warmup": GREEN, "stuck": RED}
+
+Obj = Dict[str, Any]
+
+
+# ─── Snapshot ────────────────────────────────────────────────────────────────
+
+
+def fetch_raw() -> Dict[str, Any]:
+    res = run_kubectl(["get", KINDS, "-A", "-o", "json"], timeout=60)
+    if res.returncode != 0:
+        raise RuntimeError(res.stderr.strip() or "kubectl get failed")
+    return {
+        "taken_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "items": json.loads(res.stdout).get("items", []),
+    }
+
+
+def parse_time(value: Any) -> Optional[float]:
+    """RFC 3339 timestamp (with or without fractional seconds) → epoch seconds."""
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def _event_times(event: Obj) -> List[float]:
+    series = (event.get("series") or {}).get("lastObservedTime")
+    raw = (event.get("firstTimestamp"), event.get("lastTimestamp"), event.get("eventTime"), series)
+    return [t for t in (parse_time(v) for v in raw) if t is not None]
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+# ─── Timeline model ──────────────────────────────────────────────────────────
+
+
+@dataclass
+class Probe:
+    initial_delay: int = 0
+    period: int = 10
+    failure_threshold: int = 3
+
+    @classmethod
+    def of(cls, spec: Optional[Obj]) -> Optional["Probe"]:
+        if not spec:
+            return None
+        return cls(
+            int(spec.get("initialDelaySeconds", 0)),
+            int(spec.get("periodSeconds", 10)),
+            int(spec.get("failureThreshold", 3)),
+        )
+
+    def budget(self) -> int:
+        """Seconds after start before this probe can fail the container."""
+        return self.initial_delay + self.period * self.failure_threshold
+
+
+@dataclass
+class PodTimeline:
+    """One pod's startup, as offsets in seconds from t0."""
+
+    namespace: str
+    name: str
+    images: List[str]
+    start: float
+    scheduled: float
+    started: Optional[float] = None
+    ready: Optional[float] = None
+    pull: Optional[Tuple[float, float]] = None
+    restarts: int = 0
+    unhealthy: int = 0
+    liveness_kills: int = 0
+    always_pull: bool = False
+    readiness: Optional[Probe] = None
+    liveness: Optional[Probe] = None
+    startup: Optional[Probe] = None
+    node: str = ""                 # parallel-restore DAG node, when known
+
+    @property
+    def key(self) -> str:
+        return f"{self.namespace}/{self.name}"
+
+    @property
+    def warmup(self) -> Optional[float]:
+        if self.started is None or self.ready is None:
+            return None
+        return max(self.ready - self.started, 0.0)
+
+    def segments(self, end: float) -> List[Tuple[str, float, float]]:
+        """(phase, from, to) in paint order — pull overlays setup."""
+        out = [("wait", self.start, self.scheduled)]
+        setup_end = self.started if self.started is not None else (self.ready if self.ready is not None else end)
+        out.append(("setup", self.scheduled, setup_end))
+        if self.pull:
+            out.append(("pull", *self.pull))
+        if self.started is not None:
+            out.append(("warmup", self.started, self.ready) if self.ready is not None else ("stuck", self.started, end))
+        return [(p, a, b) for p, a, b in out if b > a]
+
+
+def boot_time(items: List[Obj], since: Optional[str]) -> Tuple[float, str]:
+    if since:
+        ts = parse_time(since)
+        if ts is None:
+            raise ValueError(f"--since: not an RFC 3339 timestamp: {since}")
+        return ts, "--since"
+    ready = [
+        parse_time(c.get("lastTransitionTime"))
+        for o in items if o.get("kind") == "Node"
+        for c in (o.get("status") or {}).get("conditions") or []
+        if c.get("type") == "Ready" and c.get("status") == "True"
+    ]
+    ready = [t for t in ready if t is not None]
+    if ready:
+        return max(ready), "node Ready"
+    sandbox = [t for o in items if o.get("kind") == "Event" and o.get("reason") == "SandboxChanged"
+               for t in _event_times(o)]
+    if sandbox:
+        return min(sandbox), "first SandboxChanged"
+    created = [parse_time((o.get("metadata") or {}).get("creationTimestamp")) for o in items if o.get("kind") == "Pod"]
+    created = [t for t in created if t is not None]
+    if not created:
+        raise ValueError("snapshot has no pods")
+    return min(created), "first pod created"
+
+
+def node_cores(items: List[Obj]) -> Optional[float]:
+    cores = [parse_quantity(((o.get("status") or {}).get("capacity") or {}).get("cpu"))
+             for o in items if o.get("kind") == "Node"]
+    cores = [c for c in cores if c]
+    return sum(cores) if cores else None
+
+
+def build_timelines(items: List[Obj], t0: float, namespace: Optional[str]) -> List[PodTimeline]:
+    """Every pod that started (or was still starting) after t0."""
+    events: Dict[Tuple[str, str], List[Obj]] = {}
+    for e in items:
+        obj = e.get("involvedObject") or {}
+        if e.get("kind") == "Event" and obj.get("kind") == "Pod":
+            events.setdefault((obj.get("namespace", ""), obj.get("name", "")), []).append(e)
+
+    out: List[PodTimeline] = []
+    for pod in items:
+        if pod.get("kind") != "Pod":
+            continue
+        meta, spec, status = pod.get("metadata") or {}, pod.get("spec") or {}, pod.get("status") or {}
+        ns = meta.get("namespace", "")
+        if namespace and ns != namespace:
+            continue
+        if (status.get("phase") in ("Succeeded", "Failed")) or meta.get("deletionTimestamp"):
+            continue
+        created = parse_time(meta.get("creationTimestamp")) or t0
+        start = max(created, t0)
+        conditions = {c.get("type"): c for c in status.get("conditions") or []}
+
+        def cond(kind: str) -> Optional[float]:
+            c = conditions.get(kind) or {}
+            ts = parse_time(c.get("lastTransitionTime"))
+            return ts if c.get("status") == "True" and ts is not None and ts >= start else None
+
+        ready = cond("Ready")
+        statuses = status.get("containerStatuses") or []
+        started_at = [parse_time(((c.get("state") or {}).get("running") or {}).get("startedAt")) for c in statuses]
+        started_at = [t for t in started_at if t is not None and t >= start]
+
+        pulling: List[float] = []
+        pulled: List[float] = []
+        unhealthy = kills = 0
+        for e in events.get((ns, meta.get("name", "")), []):
+            times = [t for t in _event_times(e) if t >= start]
+            if not times:
+                continue
+            reason, message = e.get("reason", ""), e.get("message", "")
+            if reason == "Pulling":
+                pulling.append(min(times))
+            elif reason == "Pulled" and "already present" not in message:
+                pulled.append(max(times))
+            elif reason == "Started":
+                started_at.append(max(times))
+            elif reason == "Unhealthy" and message.startswith("Readiness"):
+                unhealthy += int(e.get("count") or 1)
+            elif reason == "Killing" and "liveness" in message.lower():
+                kills += int(e.get("count") or 1)
+
+        # A pod Ready since before t0 didn't restart — it isn't part of this boot.
+        ready_cond = conditions.get("Ready") or {}
+        if ready is None and ready_cond.get("status") == "True" and not started_at:
+            continue
+
+        containers = spec.get("containers") or [{}]
+        main = containers[0]
+        started = min(started_at) if started_at else None
+        scheduled = cond("PodScheduled") or start
+        out.append(PodTimeline(
+            namespace=ns,
+            name=meta.get("name", ""),
+            images=[c.get("image", "") for c in containers],
+            start=start - t0,
+            scheduled=max(scheduled, start) - t0,
+            started=None if started is None else started - t0,
+            ready=None if ready is None else ready - t0,
+            pull=(min(pulling) - t0, max(pulled) - t0) if pulling and pulled and max(pulled) > min(pulling) else None,
+            restarts=sum(int(c.get("restartCount", 0)) for c in statuses),
+            unhealthy=unhealthy,
+            liveness_kills=kills,
+            always_pull=any(c.get("imagePullPolicy") == "Always" for c in containers),
+            readiness=Probe.of(main.get("readinessProbe")),
+            liveness=Probe.of(main.get("livenessProbe")),
+            startup=Probe.of(main.get("startupProbe")),
+        ))
+    out.sort(key=lambda p: (p.start, p.ready if p.ready is not None else float("inf"), p.key))
+    return out
+
+
+# ─── Analysis ────────────────────────────────────────────────────────────────
+
+
+def load_dag(pods: List[PodTimeline]) -> Tuple[Any, Dict[str, Any]]:
+    """parallel-restore.py's DAG with each node's start/finish set from its pods."""
+    spec = importlib.util.spec_from_file_location("parallel_restore", SCRIPTS_DIR / "parallel-restore.py")
+    if spec is None or spec.loader is None:
+        return None, {}
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module          # dataclasses resolve types via sys.modules
+    spec.loader.exec_module(module)
+    try:
+        nodes = module.build_dag(None)
+    except ValueError as exc:
+        warn(f"Restore DAG unusable ({exc}) — critical path is the last pod only")
+        return None, {}
+
+    owners = sorted(
+        ((ns, name, node.name) for node in nodes.values() for _, name, ns in node.rollouts),
+        key=lambda r: -len(r[1]),
+    )
+    for pod in pods:
+        for ns, name, node_name in owners:
+            if pod.namespace == ns and pod.name.startswith(f"{name}-"):
+                pod.node = node_name
+                break
+
+    # Only fully Ready nodes get a finish time: the path ends at the last thing
+    # that came up; pods that never did are reported on their own.
+    for node in nodes.values():
+        mine = [p for p in pods if p.node == node.name]
+        if mine and all(p.ready is not None for p in mine):
+            node.status = "ready"
+            node.started = min(p.start for p in mine)
+            # +1e-9: a node Ready exactly at t0 still counts as finished for critical_path()
+            node.finished = max(p.ready for p in mine) + 1e-9
+    return module, nodes
+
+
+def critical_path(pods: List[PodTimeline], module: Any, nodes: Dict[str, Any]) -> List[Tuple[str, List[PodTimeline]]]:
+    """[(label, pods)] from the first gate to the last thing to become Ready."""
+    if module is not None:
+        chain = [n for n in module.critical_path(nodes) if n.finished]
+        by_node = {n.name: [p for p in pods if p.node == n.name] for n in chain}
+        path = [(n.name, by_node[n.name]) for n in chain if by_node[n.name]]
+        if path:
+            return path
+    finished = [p for p in pods if p.ready is not None]
+    if not finished:
+        return []
+    last = max(finished, key=lambda p: p.ready)
+    return [(last.key, [last])]
+
+
+@dataclass
+class Window:
+    start: float
+    end: float
+    peak: int
+    pods: List[str] = field(default_factory=list)
+
+
+def contention(pods: List[PodTimeline], cores: float, end: float) -> List[Window]:
+    """Intervals where more pods are warming up (started, not yet Ready) than there are cores."""
+    marks: List[Tuple[float, int, str]] = []
+    for p in pods:
+        if p.started is None:
+            continue
+        stop = p.ready if p.ready is not None else end
+        if stop > p.started:
+            marks += [(p.started, 1, p.key), (stop, -1, p.key)]
+    marks.sort(key=lambda m: (m[0], m[1]))
+
+    windows: List[Window] = []
+    active: Dict[str, int] = {}
+    current: Optional[Window] = None
+    for ts, delta, key in marks:
+        if delta > 0:
+            active[key] = active.get(key, 0) + 1
+        else:
+            active[key] -= 1
+            if not active[key]:
+                del active[key]
+        if len(active) > cores:
+            if current is None:
+                current = Window(ts, ts, len(active))
+                windows.append(current)
+            current.peak = max(current.peak, len(active))
+            current.pods += [k for k in active if k not in current.pods]
+        elif current is not None:
+            current.end = ts
+            current = None
+    if current is not None:
+        current.end = end
+    return [w for w in windows if w.end > w.start]
+
+
+def suggestions(
+    pods: List[PodTimeline], windows: List[Window], path: List[Tuple[str, List[PodTimeline]]],
+    nodes: Dict[str, Any],
+) -> List[str]:
+    out: List[str] = []
+    on_path = {p.key for _, group in path for p in group}
+    by_key = {p.key: p for p in pods}
+    needed = {d for n in nodes.values() for d in n.deps}
+
+    for w in windows:
+        crowd = [by_key[k] for k in w.pods]
+        movable = sorted(
+            (p for p in crowd if p.key not in on_path and p.node not in needed and (p.warmup or 0) >= SLOW_WARMUP),
+            key=lambda p: -(p.warmup or 0),
+        )
+        if movable:
+            names = ", ".join(f"{p.name} ({p.warmup:.0f}s)" for p in movable[:4])
+            out.append(
+                f"{w.peak} pods warm up together for {w.end - w.start:.0f}s at +{w.start:.0f}s — "
+                f"start the slow, non-critical ones later: {names}"
+            )
+
+    for p in pods:
+        warm = p.warmup
+        if warm is None:
+            if p.started is not None:
+                out.append(f"{p.key} started at +{p.started:.0f}s but never became Ready "
+                           f"({p.unhealthy} readiness failures, {p.restarts} restarts)")
+            continue
+        if p.liveness and not p.startup and (p.liveness_kills or warm > p.liveness.budget()):
+            budget = int(warm * 1.5) + 10
+            period = 10
+            out.append(
+                f"{p.key}: liveness can fail after {p.liveness.budget()}s but warmup took {warm:.0f}s"
+                + (f" ({p.liveness_kills} liveness kills)" if p.liveness_kills else "")
+                + f" — add a startupProbe (periodSeconds: {period}, failureThreshold: {-(-budget // period)})"
+            )
+        if p.readiness and p.unhealthy >= 3 and warm > p.readiness.initial_delay + 2 * p.readiness.period:
+            out.append(
+                f"{p.key}: {p.unhealthy} readiness failures before Ready at {warm:.0f}s — "
+                f"raise readinessProbe.initialDelaySeconds from {p.readiness.initial_delay} "
+                f"to ~{int(warm * 0.8)}"
+            )
+        if p.pull and p.pull[1] - p.pull[0] >= SLOW_PULL:
+            pull = p.pull[1] - p.pull[0]
+            why = "imagePullPolicy: Always" if p.always_pull else "image not on the node"
+            out.append(f"{p.key}: pulled its image for {pull:.0f}s at boot ({why}) — "
+                       f"pin the tag / pre-pull it (image-inventory.py)")
+        if p.scheduled - p.start >= SLOW_PULL:
+            out.append(f"{p.key}: waited {p.scheduled - p.start:.0f}s to be scheduled "
+                       f"(node not Ready, unbound PVC or insufficient requests)")
+    return out
+
+
+# ─── Report ──────────────────────────────────────────────────────────────────
+
+
+def _bar(pod: PodTimeline, scale: float, width: int, end: float) -> str:
+    cells = [" "] * width
+    owner = [""] * width
+    for phase, a, b in pod.segments(end):
+        lo = min(int(a * scale), width - 1)
+        hi = max(min(int(b * scale), width), lo + 1)
+        for i in range(lo, hi):
+            cells[i], owner[i] = PHASE_CHARS[phase], phase
+    out, prev = [], ""
+    for ch, phase in zip(cells, owner):
+        if phase != prev:
+            out.append(NC + PHASE_COLORS.get(phase, ""))
+            prev = phase
+        out.append(ch)
+    return "".join(out).rstrip() + NC
+
+
+def _secs(value: Optional[float]) -> str:
+    return f"{value:6.0f}s" if value is not None else f"{'—':>7}"
+
+
+def print_report(
+    pods: List[PodTimeline], t0: float, source: str, end: float, cores: float, width: int,
+    path: List[Tuple[str, List[PodTimeline]]], windows: List[Window], tips: List[str],
+) -> None:
+    last_ready = max((p.ready for p in pods if p.ready is not None), default=0.0)
+    span = max(end if any(p.ready is None for p in pods) else last_ready, 1.0)
+    scale = width / span
+
+    header(f"Startup waterfall — t0 {_iso(t0)} ({source}), {len(pods)} pods")
+    legend = "  ".join(f"{PHASE_COLORS[k]}{c}{NC} {k}" for k, c in PHASE_CHARS.items())
+    print(f"  {DIM}{'':<44} {'START':>7} {'READY':>7} {'WARMUP':>7}{NC}  {legend}")
+    for p in pods:
+        name = p.key if len(p.key) <= 44 else p.key[:43] + "…"
+        print(f"  {name:<44} {_secs(p.start)} {_secs(p.ready)} {_secs(p.warmup)}  {_bar(p, scale, width, end)}")
+    axis = f"0s{'':<{max(width - 2 - len(f'{span:.0f}s'), 1)}}{span:.0f}s"
+    print(f"  {'':<44} {'':>7} {'':>7} {'':>7}  {DIM}{axis}{NC}")
+
+    header("Critical path")
+    if not path:
+        print(f"  {DIM}No pod became Ready after t0{NC}")
+    for label, group in path:
+        slowest = max(group, key=lambda p: p.ready or 0.0)
+        phases = ", ".join(f"{ph} {b - a:.0f}s" for ph, a, b in slowest.segments(end))
+        ready = f"+{slowest.ready or 0.0:.0f}s"
+        print(f"  {BOLD}{label:<20}{NC} ready {ready:<6} {DIM}{slowest.name}: {phases}{NC}")
+
+    header(f"Contention (> {cores:g} pods warming up at once)")
+    if not windows:
+        print(f"  {GREEN}✓{NC} Never more warming pods than cores")
+    for w in windows:
+        print(f"  +{w.start:.0f}s → +{w.end:.0f}s  peak {YELLOW}{w.peak}{NC}  "
+              f"{DIM}{', '.join(k.split('/', 1)[1] for k in w.pods)}{NC}")
+
+    header("Suggestions")
+    if not tips:
+        print(f"  {GREEN}✓{NC} Nothing stands out")
+    for tip in tips:
+        print(f"  {YELLOW}→{NC} {tip}")
+    print(f"\n  Everything Ready after {BOLD}{last_ready:.0f}s{NC}"
+          + (f"   {RED}{sum(1 for p in pods if p.ready is None)} pod(s) still not Ready{NC}"
+             if any(p.ready is None for p in pods) else ""))
+
+
+# ─── Main ────────────────────────────────────────────────────────────────────
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Per-pod startup waterfall after a reboot or k3s restart.")
+    ap.add_argument("--fixture", help="read a snapshot recorded with --record instead of the cluster")
+    ap.add_argument("--record", help="write the raw snapshot to this file")
+    ap.add_argument("--since", help="t0 as an RFC 3339 timestamp (default: latest node Ready transition)")
+    ap.add_argument("-n", "--namespace", help="only pods in this namespace")
+    ap.add_argument("--cores", type=float, help="CPU cores for contention (default: node capacity, else 4)")
+    ap.add_argument("--width", type=int, default=48, help="waterfall width in columns (default: 48)")
+    ap.add_argument("--json", action="store_true", help="machine-readable timeline")
+    args = ap.parse_args()
+
+    try:
+        raw = json.loads(Path(args.fixture).read_text(encoding="utf-8")) if args.fixture else fetch_raw()
+    except (OSError, ValueError, RuntimeError) as exc:
+        err(f"Cannot read snapshot: {exc}")
+        return 1
+    if args.record:
+        Path(args.record).write_text(json.dumps(raw, indent=1) + "\n", encoding="utf-8")
+        info(f"Snapshot written to {args.record}")
+
+    items = raw.get("items", [])
+    try:
+        t0, source = boot_time(items, args.since)
+    except ValueError as exc:
+        err(str(exc))
+        return 1
+    end = (parse_time(raw.get("taken_at")) or t0) - t0
+    cores = args.cores or node_cores(items) or DEFAULT_CORES
+
+    pods = build_timelines(items, t0, args.namespace)
+    if not pods:
+        warn(f"No pods started after {_iso(t0)} ({source}) — try --since")
+        return 0
+    end = max([end] + [p.ready for p in pods if p.ready is not None])
+
+    module, nodes = load_dag(pods)
+    path = critical_path(pods, module, nodes)
+    windows = contention(pods, cores, end)
+    tips = suggestions(pods, windows, path, nodes)
+
+    if args.json:
+        print(json.dumps({
+            "t0": _iso(t0), "t0_source": source, "cores": cores,
+            "pods": [{**asdict(p), "warmup": p.warmup} for p in pods],
+            "critical_path": [{"node": label, "pods": [p.key for p in group]} for label, group in path],
+            "contention": [asdict(w) for w in windows],
+            "suggestions": tips,
+        }, indent=2))
+        return 0
+
+    print_report(pods, t0, source, end, cores, max(args.width, 10), path, windows, tips)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
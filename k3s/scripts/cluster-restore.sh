@@ -11,6 +11,10 @@ set -euo pipefail
 #   ./cluster-restore.sh --check     Preflight checks only
 #   ./cluster-restore.sh --infra     Infra only (Sealed Secrets + Traefik)
 #   ./cluster-restore.sh --apps      Apps only (assumes infra is ready)
+#
+# Add --parallel to any mode to apply databases/apps through parallel-restore.py
+# (dependency-ordered, concurrent applies and rollout watches). Tune with
+# RESTORE_WORKERS (default: 4).
 
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 REPO_ROOT="$(cd "$SCRIPT_DIR/.." && pwd)"
@@ -33,6 +37,13 @@ CONTROLLER_NAME="sealed-secrets-controller"
 CONTROLLER_NS="kube-system"
 NODE_IP="${K3S_NODE_IP:-192.168.0.108}"
 
+PARALLEL=false
+ARGS=()
+for arg in "$@"; do
+  if [[ "$arg" == "--parallel" ]]; then PARALLEL=true; else ARGS+=("$arg"); fi
+done
+set -- ${ARGS[@]+"${ARGS[@]}"}
+
 # ─── Preflight ────────────────────────────────────────────────────────────────
 check_preflight() {
   step "Preflight Checks"
@@ -214,6 +225,19 @@ apply_app() {
 apply_all_apps() {
   step "4. Applications"
 
+  # Hash-gated: only apps whose rendered manifests changed are applied, each
+  # in a single multi-document kubectl apply (scripts/apply-apps.py).
+  if command -v python3 &>/dev/null && python3 -c 'import yaml' &>/dev/null; then
+    local rc=0
+    python3 "$SCRIPT_DIR/apply-apps.py" --all || rc=$?
+    case "$rc" in
+      0) ok "Changed manifests applied" ;;
+      3) ok "All apps already match git" ;;
+      *) warn "Some apps failed to apply — see errors above" ;;
+    esac
+    return 0
+  fi
+
   # Databases first (other apps may depend on them)
   if [[ -d "$REPO_ROOT/databases" ]]; then
     echo -e "  ${BOLD}Databases:${NC}"
@@ -253,6 +277,18 @@ wait_for_apps() {
   [[ "$failed" -eq 0 ]] && ok "All deployments ready" || warn "$failed deployment(s) still rolling out"
 }
 
+# Apply + wait, either serially (above) or through the parallel DAG scheduler
+restore_apps() {
+  if $PARALLEL; then
+    step "4. Applications (parallel, dependency-ordered)"
+    python3 "$SCRIPT_DIR/parallel-restore.py" --workers "${RESTORE_WORKERS:-4}" \
+      || warn "Some nodes did not become ready — see the timeline above"
+  else
+    apply_all_apps
+    wait_for_apps
+  fi
+}
+
 # ─── Status summary ───────────────────────────────────────────────────────────
 print_summary() {
   step "Cluster Status"
@@ -269,21 +305,15 @@ print_summary() {
     }'
 
   echo ""
-  echo -e "  ${BOLD}Access URLs:${NC}"
-  echo "  Domain (via Traefik :80):"
-  for domain in homarr.lan pihole.lan dashdot.lan jellyfin.lan files.lan n8n.lan portainer.lan ha.lan traefik.lan; do
-    echo "    http://$domain"
-  done
-  echo ""
-  echo "  Direct IP:port:"
-  echo "    http://$NODE_IP:8100   Homarr"
-  echo "    http://$NODE_IP:8110   Pi-hole"
-  echo "    http://$NODE_IP:8120   Dashdot"
-  echo "    http://$NODE_IP:8200   Jellyfin"
-  echo "    http://$NODE_IP:8300   Filebrowser"
-  echo "    http://$NODE_IP:8400   n8n"
-  echo "    http://$NODE_IP:8500   Portainer"
-  echo "    http://$NODE_IP:8123   Home Assistant"
+  echo -e "  ${BOLD}Endpoints:${NC}"
+  # Targets come from the apps' README frontmatter (domain / external_port)
+  if command -v python3 &>/dev/null && python3 -c 'import yaml' &>/dev/null; then
+    K3S_NODE_IP="$NODE_IP" python3 "$SCRIPT_DIR/ingress-probe.py" --count 3 --timeout 5 || \
+      warn "Some endpoints are not answering yet — re-check: scripts/ingress-probe.py"
+  else
+    warn "python3 + PyYAML not found — skipping endpoint probe"
+    echo "    Direct access: http://$NODE_IP:<external_port>  (see k3s/README.md)"
+  fi
   echo ""
 
   ok "Restore complete!"
@@ -307,8 +337,7 @@ case "${1:-}" in
     setup_traefik
     ;;
   --apps)
-    apply_all_apps
-    wait_for_apps
+    restore_apps
     print_summary
     ;;
   "")
@@ -328,17 +357,19 @@ case "${1:-}" in
     apply_namespaces
     setup_sealed_secrets
     setup_traefik
-    apply_all_apps
-    wait_for_apps
+    restore_apps
     print_summary
     ;;
   --help|-h)
-    echo "Usage: $(basename "$0") [--check | --infra | --apps | --help]"
+    echo "Usage: $(basename "$0") [--check | --infra | --apps | --help] [--parallel]"
     echo ""
     echo "  (no flag)  Full restore: preflight → namespaces → infra → apps → status"
     echo "  --check    Preflight checks only (does not modify cluster)"
     echo "  --infra    Infra only: Sealed Secrets controller + Traefik"
     echo "  --apps     Apps only (assumes infra already running)"
+    echo ""
+    echo "  --parallel Apply databases/apps concurrently in dependency order and"
+    echo "             print a critical-path timing report (parallel-restore.py)"
     ;;
   *)
     err "Unknown option: $1"; echo "Run with --help for usage."; exit 1 ;;
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+cluster-status.py — Cluster-wide status snapshot from one batched API read.
+
+`setup.sh status` used to issue ~8 kubectl calls per app (pods, workload,
+svc, endpoints, ingressroute, pvc, top, events); a full sweep of the catalog
+meant 100+ process starts and API round trips. This fetches every kind the
+status views need cluster-wide in a single `kubectl get <kinds> -A -o json`
+(plus one optional call each for IngressRoutes and `top`), then joins the
+objects to apps in memory using the catalog's directory name and namespace —
+the same `app=<name>` / `<kind>/<name>` conventions _app-ctl.sh uses.
+
+Usage:
+  ./cluster-status.py                      Dashboard: one line per catalog app
+  ./cluster-status.py homarr               Detailed view of one app (setup.sh status)
+  ./cluster-status.py --json [app]         Machine-readable snapshot
+  ./cluster-status.py --watch 5            Re-render the dashboard every 5s
+  ./cluster-status.py --record snap.json   Save the raw API read for later
+  ./cluster-status.py --fixture snap.json  Render from a recorded snapshot (no cluster)
+
+fixtures/cluster-status.json is such a snapshot (healthy, crash-looping,
+pending-PVC, scaled-down and missing apps) to try the views against.
+
+kubectl is resolved from $KUBECTL (see _k3s.py).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from _k3s import (
+    BOLD, DIM, GREEN, NC, RED, YELLOW, catalog, err, header, run_kubectl, warn,
+)
+
+
+CORE_KINDS = "pods,deployments,statefulsets,daemonsets,services,endpoints,persistentvolumeclaims,events"
+INGRESSROUTE_KIND = "ingressroutes.traefik.io"
+NOTABLE_EVENT = ("Warning", "Failed", "BackOff", "OOM", "Error", "Unhealthy")
+
+Obj = Dict[str, Any]
+
+
+# ─── Snapshot ────────────────────────────────────────────────────────────────
+
+
+@dataclass
+class Snapshot:
+    """Every object of interest, indexed by (kind, namespace)."""
+
+    items: Dict[Tuple[str, str], List[Obj]] = field(default_factory=lambda: defaultdict(list))
+    usage: Dict[Tuple[str, str], Tuple[str, str]] = field(default_factory=dict)   # (ns, pod) → (cpu, mem)
+    taken_at: str = ""
+
+    @classmethod
+    def from_raw(cls, raw: Dict[str, Any]) -> "Snapshot":
+        snap = cls(taken_at=raw.get("taken_at", ""))
+        for obj in raw.get("items", []):
+            meta = obj.get("metadata") or {}
+            snap.items[(obj.get("kind", ""), meta.get("namespace", ""))].append(obj)
+        for row in raw.get("top", []):
+            snap.usage[(row["namespace"], row["pod"])] = (row["cpu"], row["memory"])
+        return snap
+
+    def of(self, kind: str, namespace: str) -> List[Obj]:
+        return self.items.get((kind, namespace), [])
+
+    def get(self, kind: str, namespace: str, name: str) -> Optional[Obj]:
+        for obj in self.of(kind, namespace):
+            if obj["metadata"].get("name") == name:
+                return obj
+        return None
+
+
+def fetch_raw() -> Dict[str, Any]:
+    """One batched list for every core kind; IngressRoutes and metrics are optional."""
+    res = run_kubectl(["get", CORE_KINDS, "-A", "-o", "json"], timeout=60)
+    if res.returncode != 0:
+        raise RuntimeError(res.stderr.strip() or "kubectl get failed")
+    items = json.loads(res.stdout).get("items", [])
+
+    res = run_kubectl(["get", INGRESSROUTE_KIND, "-A", "-o", "json"], timeout=30)
+    if res.returncode == 0:
+        items += json.loads(res.stdout).get("items", [])
+
+    top: List[Dict[str, str]] = []
+    res = run_kubectl(["top", "pods", "-A", "--no-headers"], timeout=30)
+    if res.returncode == 0:
+        for line in res.stdout.splitlines():
+            cols = line.split()
+            if len(cols) >= 4:
+                top.append({"namespace": cols[0], "pod": cols[1], "cpu": cols[2], "memory": cols[3]})
+
+    return {
+        "taken_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "items": items,
+        "top": top,
+    }
+
+
+# ─── Join ────────────────────────────────────────────────────────────────────
+
+
+def _labels_match(selector: Dict[str, str], labels: Dict[str, str]) -> bool:
+    return bool(selector) and all(labels.get(k) == v for k, v in selector.items())
+
+
+def _pod_row(pod: Obj, usage: Dict[Tuple[str, str], Tuple[str, str]]) -> Dict[str, Any]:
+    meta, status = pod["metadata"], pod.get("status") or {}
+    containers = status.get("containerStatuses") or []
+    reason = status.get("phase", "Unknown")
+    for c in containers:
+        waiting = (c.get("state") or {}).get("waiting") or {}
+        if waiting.get("reason"):
+            reason = waiting["reason"]
+            break
+    if meta.get("deletionTimestamp"):
+        reason = "Terminating"
+    cpu, mem = usage.get((meta.get("namespace", ""), meta["name"]), ("", ""))
+    return {
+        "name": meta["name"],
+        "status": reason,
+        "ready": f"{sum(1 for c in containers if c.get('ready'))}/{len(containers)}",
+        "restarts": sum(c.get("restartCount", 0) for c in containers),
+        "node": (pod.get("spec") or {}).get("nodeName", ""),
+        "created": meta.get("creationTimestamp", ""),
+        "cpu": cpu,
+        "memory": mem,
+    }
+
+
+def app_status(snap: Snapshot, app: str, namespace: str) -> Dict[str, Any]:
+    """Everything `setup.sh status` shows for one app, joined from the snapshot."""
+    workload: Optional[Obj] = None
+    for kind in ("StatefulSet", "Deployment", "DaemonSet"):
+        workload = snap.get(kind, namespace, app)
+        if workload:
+            break
+
+    selector = {"app": app}
+    if workload:
+        selector = ((workload.get("spec") or {}).get("selector") or {}).get("matchLabels") or selector
+    pods = [p for p in snap.of("Pod", namespace) if _labels_match(selector, p["metadata"].get("labels") or {})]
+
+    services = [
+        s for s in snap.of("Service", namespace)
+        if s["metadata"]["name"] == app
+        or _labels_match((s.get("spec") or {}).get("selector") or {}, selector)
+    ]
+    endpoints: Dict[str, int] = {}
+    for svc in services:
+        ep = snap.get("Endpoints", namespace, svc["metadata"]["name"]) or {}
+        endpoints[svc["metadata"]["name"]] = sum(len(s.get("addresses") or []) for s in ep.get("subsets") or [])
+
+    pvcs = [p for p in snap.of("PersistentVolumeClaim", namespace) if app in p["metadata"]["name"].lower()]
+    routes = [r for r in snap.of("IngressRoute", namespace) if r["metadata"]["name"] == app]
+
+    owned = {p["metadata"]["name"] for p in pods} | {s["metadata"]["name"] for s in services}
+    if workload:
+        owned.add(workload["metadata"]["name"])
+    events = [
+        e for e in snap.of("Event", namespace)
+        if (e.get("involvedObject") or {}).get("name", "").startswith(app)
+        or (e.get("involvedObject") or {}).get("name") in owned
+    ]
+    events.sort(key=lambda e: e.get("lastTimestamp") or e.get("eventTime") or "")
+
+    wl_status = (workload or {}).get("status") or {}
+    desired = ((workload or {}).get("spec") or {}).get("replicas", wl_status.get("desiredNumberScheduled", 0))
+    ready = wl_status.get("readyReplicas", wl_status.get("numberReady", 0)) or 0
+
+    return {
+        "app": app,
+        "namespace": namespace,
+        "workload": {
+            "kind": workload["kind"], "name": workload["metadata"]["name"],
+            "ready": ready, "desired": desired,
+        } if workload else None,
+        "pods": [_pod_row(p, snap.usage) for p in pods],
+        "services": [
+            {
+                "name": s["metadata"]["name"],
+                "type": (s.get("spec") or {}).get("type", "ClusterIP"),
+                "ports": [
+                    f"{p.get('port')}{'/' + p['protocol'] if p.get('protocol', 'TCP') != 'TCP' else ''}"
+                    for p in (s.get("spec") or {}).get("ports") or []
+                ],
+                "endpoints": endpoints.get(s["metadata"]["name"], 0),
+            }
+            for s in services
+        ],
+        "pvcs": [
+            {
+                "name": p["metadata"]["name"],
+                "phase": (p.get("status") or {}).get("phase", ""),
+                "capacity": ((p.get("status") or {}).get("capacity") or {}).get("storage", ""),
+            }
+            for p in pvcs
+        ],
+        "ingressroutes": [r["metadata"]["name"] for r in routes],
+        "events": [
+            {
+                "type": e.get("type", ""),
+                "reason": e.get("reason", ""),
+                "object": f"{(e.get('involvedObject') or {}).get('kind', '')}/{(e.get('involvedObject') or {}).get('name', '')}",
+                "message": (e.get("message") or "").strip(),
+                "count": e.get("count", 1),
+                "last": e.get("lastTimestamp") or e.get("eventTime") or "",
+            }
+            for e in events
+        ],
+    }
+
+
+def health(status: Dict[str, Any]) -> str:
+    wl = status["workload"]
+    if wl is None:
+        return "missing"
+    if wl["desired"] == 0:
+        return "scaled-down"
+    if wl["ready"] >= wl["desired"] and all(p["status"] == "Running" for p in status["pods"]):
+        return "healthy"
+    return "degraded" if wl["ready"] else "down"
+
+
+# ─── Rendering ───────────────────────────────────────────────────────────────
+
+HEALTH_COLOR = {"healthy": GREEN, "scaled-down": DIM, "degraded": YELLOW, "down": RED, "missing": RED}
+
+
+def render_dashboard(statuses: List[Dict[str, Any]], taken_at: str) -> None:
+    header(f"Cluster status — {len(statuses)} apps  {DIM}(snapshot {taken_at}){NC}")
+    print(f"  {BOLD}{'APP':<16} {'NAMESPACE':<18} {'HEALTH':<12} {'READY':>5}  {'RESTARTS':>8}  "
+          f"{'SVC/EP':<8} {'PVC':<6} {'ROUTE':<5}  {'WARN':>4}{NC}")
+    for s in statuses:
+        state = health(s)
+        wl = s["workload"]
+        ready = f"{wl['ready']}/{wl['desired']}" if wl else "—"
+        restarts = sum(p["restarts"] for p in s["pods"])
+        eps = sum(svc["endpoints"] for svc in s["services"])
+        svc = f"{len(s['services'])}/{eps}" if s["services"] else "—"
+        bound = sum(1 for p in s["pvcs"] if p["phase"] == "Bound")
+        pvc = f"{bound}/{len(s['pvcs'])}" if s["pvcs"] else "—"
+        route = "yes" if s["ingressroutes"] else "—"
+        warnings = sum(1 for e in s["events"] if e["type"] == "Warning")
+        color = HEALTH_COLOR.get(state, "")
+        print(f"  {s['app']:<16} {s['namespace']:<18} {color}{state:<12}{NC} {ready:>5}  "
+              f"{restarts:>8}  {svc:<8} {pvc:<6} {route:<5}  "
+              f"{(YELLOW if warnings else '') + str(warnings) + (NC if warnings else ''):>4}")
+    counts = defaultdict(int)
+    for s in statuses:
+        counts[health(s)] += 1
+    print("")
+    print("  " + "   ".join(f"{HEALTH_COLOR[k]}{k}{NC}: {v}" for k, v in sorted(counts.items())))
+
+
+def render_app(s: Dict[str, Any]) -> None:
+    header("Pod(s)")
+    if s["pods"]:
+        print(f"  {BOLD}{'NAME':<44} {'STATUS':<18} {'READY':<6} {'RESTARTS':>8}  {'CPU':>6} {'MEMORY':>8}  NODE{NC}")
+        for p in s["pods"]:
+            color = GREEN if p["status"] == "Running" else YELLOW
+            print(f"  {p['name']:<44} {color}{p['status']:<18}{NC} {p['ready']:<6} {p['restarts']:>8}  "
+                  f"{p['cpu'] or '—':>6} {p['memory'] or '—':>8}  {p['node']}")
+    else:
+        print("  No pods found")
+
+    header("Workload")
+    wl = s["workload"]
+    if wl:
+        color = HEALTH_COLOR.get(health(s), "")
+        print(f"  {wl['kind'].lower()}/{wl['name']}  {color}{wl['ready']}/{wl['desired']} ready{NC}")
+    else:
+        print("  No workload found")
+
+    if s["services"]:
+        header("Service & Endpoints")
+        for svc in s["services"]:
+            color = GREEN if svc["endpoints"] else RED
+            print(f"  {svc['name']:<24} {svc['type']:<13} {','.join(svc['ports']):<20} "
+                  f"{color}{svc['endpoints']} endpoint(s){NC}")
+
+    if s["ingressroutes"]:
+        header("IngressRoute")
+        for name in s["ingressroutes"]:
+            print(f"  {name}")
+
+    if s["pvcs"]:
+        header("Storage (PVC)")
+        for p in s["pvcs"]:
+            color = GREEN if p["phase"] == "Bound" else YELLOW
+            print(f"  {p['name']:<36} {color}{p['phase']:<8}{NC} {p['capacity']}")
+
+    header("Recent Events")
+    notable = [e for e in s["events"] if any(k in e["type"] + e["reason"] for k in NOTABLE_EVENT)]
+    shown = (notable or s["events"])[-8:]
+    if not shown:
+        print(f"  {DIM}No notable events{NC}")
+    for e in shown:
+        color = YELLOW if e["type"] == "Warning" else DIM
+        print(f"  {color}{e['last']:<21} {e['reason']:<18}{NC} {e['object']:<36} {e['message'][:100]}")
+
+
+# ─── Main ────────────────────────────────────────────────────────────────────
+
+
+def load_snapshot(fixture: Optional[str]) -> Tuple[Dict[str, Any], Snapshot]:
+    raw = json.loads(Path(fixture).read_text(encoding="utf-8")) if fixture else fetch_raw()
+    return raw, Snapshot.from_raw(raw)
+
+
+def targets(app: Optional[str], namespace: Optional[str]) -> List[Tuple[str, str]]:
+    entries = [(m["directory"], str(m.get("namespace", ""))) for m in catalog()]
+    if app is None:
+        return entries
+    for name, ns in entries:
+        if name == app:
+            return [(name, namespace or ns)]
+    if namespace:
+        return [(app, namespace)]
+    raise KeyError(app)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Cluster-wide status from one batched kubectl read.")
+    ap.add_argument("app", nargs="?", help="show one app in detail (catalog directory name)")
+    ap.add_argument("-n", "--namespace", help="namespace for apps outside the catalog")
+    ap.add_argument("--json", action="store_true", help="print the joined status as JSON")
+    ap.add_argument("--watch", type=float, metavar="SECONDS", help="refresh the view every N seconds")
+    ap.add_argument("--fixture", help="read a snapshot recorded with --record instead of the cluster")
+    ap.add_argument("--record", help="write the raw snapshot to this file")
+    args = ap.parse_args()
+
+    try:
+        apps = targets(args.app, args.namespace)
+    except KeyError:
+        err(f"'{args.app}' is not in the catalog — pass --namespace to look it up anyway")
+        return 2
+
+    while True:
+        try:
+            raw, snap = load_snapshot(args.fixture)
+        except (RuntimeError, OSError, ValueError) as exc:
+            err(f"Could not read cluster state: {exc}")
+            return 1
+        if args.record:
+            Path(args.record).write_text(json.dumps(raw, indent=1) + "\n", encoding="utf-8")
+        statuses = [app_status(snap, name, ns) for name, ns in apps]
+
+        if args.watch:
+            print("\033[2J\033[H", end="")
+        if args.json:
+            print(json.dumps(statuses[0] if args.app else statuses, indent=2))
+        elif args.app:
+            render_app(statuses[0])
+        else:
+            render_dashboard(statuses, snap.taken_at)
+
+        if not args.watch:
+            break
+        try:
+            time.sleep(args.watch)
+        except KeyboardInterrupt:
+            return 0
+
+    if not snap.items:
+        warn("Snapshot is empty — is the cluster reachable?")
+    return 0 if args.app or all(health(s) in ("healthy", "scaled-down") for s in statuses) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+compose-up.py — Dependency-ordered, parallel `docker compose up` for docker/.
+
+The docker/ stacks are normally brought up one `./setup.sh` at a time. This
+discovers the same stacks update-docker-readme.py lists (docker/<svc>/ with
+README frontmatter), derives cross-stack edges from the compose files and
+starts independent stacks concurrently:
+
+  - a stack joining an `external: true` network → the stack that creates it
+    (a non-external network with that `name:`); external networks nobody
+    creates are made once up front, as gitea/pydio setup.sh do
+  - `depends_on` / `external_links` naming a service or container_name that
+    lives in another stack → that stack
+
+Each stack is `docker compose up -d`, then watched via `docker compose ps`
+until every container is running and every healthcheck reports healthy —
+no fixed sleeps. Ups are bounded by --workers (pulls and first-start disk
+I/O are what hurt on a Pi); health watches are cheap and get their own pool.
+
+First-time setup (secrets, .env, data dirs) stays with each stack's setup.sh:
+a stack with .env.example but no .env is skipped until that has run
+(--assume-setup brings it up anyway, with the .env.example values).
+
+Usage:
+  ./compose-up.py                         Bring every stack up, report timings
+  ./compose-up.py --dry-run               Print the dependency waves, touch nothing
+  ./compose-up.py gitea pydio n8n         Only these stacks (others assumed up)
+  ./compose-up.py --workers 2 --timeout 300 --strict
+
+docker is resolved from $DOCKER (default: docker), so the scheduler can be
+exercised end-to-end against fixtures/fake-docker.py — with --assume-setup
+so every stack takes part, not only those with a .env on this machine:
+  DOCKER="python3 $PWD/fixtures/fake-docker.py" ./compose-up.py --assume-setup
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import yaml
+
+from _k3s import (
+    BOLD, CYAN, DIM, DOCKER_DIR, GREEN, NC, RED, SCRIPTS_DIR, YELLOW,
+    compose_env, compose_file, docker_stacks, err, expand_vars, header, info, ok, run_docker, warn,
+)
+
+
+# ─── Stack model ─────────────────────────────────────────────────────────────
+
+
+@dataclass
+class Stack:
+    name: str
+    path: Path
+    compose: Optional[Path] = None
+    deps: Set[str] = field(default_factory=set)
+    creates: Set[str] = field(default_factory=set)       # network names
+    joins: Set[str] = field(default_factory=set)         # external network names
+    provides: Set[str] = field(default_factory=set)      # service + container names
+    wants: Set[str] = field(default_factory=set)         # depends_on / external_links not defined locally
+    healthchecks: int = 0
+    status: str = "pending"
+    detail: str = ""
+    started: float = 0.0
+    applied: float = 0.0
+    finished: float = 0.0
+    slowest: str = ""                                    # "container (Ns)" that became healthy last
+
+
+def _names(value: Any) -> List[str]:
+    """depends_on / networks as either a list or a mapping → names."""
+    if isinstance(value, dict):
+        return [str(k) for k in value]
+    if isinstance(value, list):
+        return [str(v) for v in value]
+    return []
+
+
+def load_stack(path: Path, assume_setup: bool = False) -> Stack:
+    stack = Stack(path.name, path)
+    stack.compose = compose_file(path)
+    if stack.compose is None:
+        variants = sorted(p.name for p in path.glob("docker-compose.*.y*ml"))
+        stack.status, stack.detail = "skipped", (
+            f"pick a variant with ./setup.sh ({', '.join(variants)})" if variants else "no compose file"
+        )
+        return stack
+    if not assume_setup and (path / ".env.example").is_file() and not (path / ".env").is_file():
+        stack.status, stack.detail = "skipped", "no .env yet — run ./setup.sh once"
+
+    env = compose_env(path)
+    try:
+        doc = yaml.safe_load(stack.compose.read_text(encoding="utf-8")) or {}
+    except yaml.YAMLError as exc:
+        stack.status, stack.detail = "failed", f"invalid YAML: {exc}"
+        return stack
+    project = path.name.lower()
+
+    for key, cfg in (doc.get("networks") or {}).items():
+        cfg = cfg or {}
+        name = expand_vars(str(cfg.get("name") or ""), env) or ""
+        if cfg.get("external"):
+            ext = cfg["external"]
+            stack.joins.add(name or (ext.get("name") if isinstance(ext, dict) else None) or key)
+        else:
+            stack.creates.add(name or f"{project}_{key}")
+
+    services = doc.get("services") or {}
+    local = set(services)
+    for svc_name, svc in services.items():
+        svc = svc or {}
+        stack.provides.add(svc_name)
+        container = expand_vars(str(svc.get("container_name") or ""), env)
+        if container:
+            stack.provides.add(container)
+        if svc.get("healthcheck") and not (svc["healthcheck"] or {}).get("disable"):
+            stack.healthchecks += 1
+        stack.wants |= {d for d in _names(svc.get("depends_on")) if d not in local}
+        stack.wants |= {str(link).split(":", 1)[0] for link in svc.get("external_links") or []}
+    return stack
+
+
+def build_graph(only: Sequence[str], assume_setup: bool = False) -> Tuple[Dict[str, Stack], Set[str]]:
+    """(stacks by name, external networks no stack creates)."""
+    stacks = {p.name: load_stack(p, assume_setup) for p in docker_stacks()}
+    creators = {net: s.name for s in stacks.values() for net in s.creates}
+    providers = {name: s.name for s in stacks.values() for name in s.provides}
+    orphans: Set[str] = set()
+    for s in stacks.values():
+        for net in s.joins:
+            if net in creators and creators[net] != s.name:
+                s.deps.add(creators[net])
+            elif net not in creators:
+                orphans.add(net)
+        for name in s.wants:
+            if providers.get(name, s.name) != s.name:
+                s.deps.add(providers[name])
+
+    if only:
+        unknown = sorted(set(only) - stacks.keys())
+        if unknown:
+            raise KeyError(", ".join(unknown))
+        stacks = {n: s for n, s in stacks.items() if n in only}
+        orphans = {net for s in stacks.values() for net in s.joins} & orphans
+    # A dependency filtered out by the stack list is assumed to be up already.
+    for s in stacks.values():
+        s.deps &= stacks.keys()
+    return stacks, orphans
+
+
+def _restore_module() -> Any:
+    """parallel-restore.py, for its waves() / critical_path() over anything with .deps."""
+    spec = importlib.util.spec_from_file_location("parallel_restore", SCRIPTS_DIR / "parallel-restore.py")
+    if spec is None or spec.loader is None:
+        raise ImportError("parallel-restore.py not found")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module          # dataclasses resolve types via sys.modules
+    spec.loader.exec_module(module)
+    return module
+
+
+# ─── Stack actions ───────────────────────────────────────────────────────────
+
+
+def ensure_networks(names: Set[str]) -> List[str]:
+    """Create shared external networks that no stack defines; returns failures."""
+    failed = []
+    for net in sorted(names):
+        if run_docker(["network", "inspect", net], timeout=30).returncode == 0:
+            continue
+        res = run_docker(["network", "create", net], timeout=30)
+        if res.returncode == 0:
+            info(f"Created network {net}")
+        else:
+            failed.append(f"{net}: {res.stderr.strip()}")
+    return failed
+
+
+def up_stack(stack: Stack) -> Tuple[bool, str]:
+    assert stack.compose is not None
+    res = run_docker(["compose", "-f", stack.compose.name, "up", "-d"], cwd=stack.path, timeout=900)
+    if res.returncode != 0:
+        lines = (res.stderr or res.stdout).strip().splitlines()
+        return False, lines[-1] if lines else f"exit {res.returncode}"
+    return True, ""
+
+
+def _ps(stack: Stack) -> Optional[List[Dict[str, Any]]]:
+    """Containers of a stack; handles both the JSON-array and JSON-lines ps formats."""
+    assert stack.compose is not None
+    res = run_docker(["compose", "-f", stack.compose.name, "ps", "-a", "--format", "json"], cwd=stack.path, timeout=60)
+    if res.returncode != 0:
+        return None
+    text = res.stdout.strip()
+    if not text:
+        return []
+    try:
+        data = json.loads(text)
+        return data if isinstance(data, list) else [data]
+    except ValueError:
+        return [json.loads(line) for line in text.splitlines() if line.strip().startswith("{")]
+
+
+def watch_stack(stack: Stack, timeout: int) -> Tuple[bool, str]:
+    """Poll until every container is running (and healthy, if it has a healthcheck)."""
+    start = time.monotonic()
+    ready_at: Dict[str, float] = {}
+    delay = 0.5
+    while True:
+        elapsed = time.monotonic() - start
+        containers = _ps(stack)
+        if containers is None:
+            return False, "docker compose ps failed"
+        pending = []
+        for c in containers:
+            name = c.get("Name") or c.get("Service") or "?"
+            state, health = str(c.get("State", "")).lower(), str(c.get("Health", "")).lower()
+            if state == "exited" and int(c.get("ExitCode") or 0) == 0:
+                ready_at.setdefault(name, elapsed)            # one-shot init container
+            elif state in ("exited", "dead") or health == "unhealthy":
+                return False, f"{name} {health or state}"
+            elif state == "running" and health in ("", "healthy"):
+                ready_at.setdefault(name, elapsed)
+            else:
+                pending.append(f"{name} {health or state}")
+        if containers and not pending:
+            last = max(ready_at, key=lambda k: ready_at[k])
+            stack.slowest = f"{last} ({ready_at[last]:.1f}s)"
+            return True, ""
+        if elapsed >= timeout:
+            return False, f"not healthy after {timeout}s: {', '.join(pending) or 'no containers'}"
+        time.sleep(min(delay, max(timeout - elapsed, 0.1)))
+        delay = min(delay * 1.5, 3.0)
+
+
+# ─── Scheduler ───────────────────────────────────────────────────────────────
+
+
+def run(stacks: Dict[str, Stack], workers: int, watchers: int, timeout: int, strict: bool) -> bool:
+    """Start stacks as soon as their dependencies are healthy."""
+    t0 = time.monotonic()
+    lock = threading.Lock()
+    remaining = {n: set(s.deps) for n, s in stacks.items()}
+    running: Dict[Future, Tuple[Stack, str]] = {}
+
+    def _log(stack: Stack, colour: str, symbol: str, extra: str = "") -> None:
+        with lock:
+            stamp = f"{time.monotonic() - t0:6.1f}s"
+            print(f"  {DIM}{stamp}{NC}  {colour}{symbol}{NC} {stack.name}{('  ' + DIM + extra + NC) if extra else ''}")
+
+    with ThreadPoolExecutor(max_workers=workers) as up_pool, ThreadPoolExecutor(max_workers=watchers) as watch_pool:
+
+        def _release(done: Stack) -> None:
+            for other, deps in remaining.items():
+                if done.name not in deps:
+                    continue
+                deps.discard(done.name)
+                if not deps:
+                    _start(other)
+
+        def _finish(stack: Stack, success: bool, detail: str) -> None:
+            stack.finished = time.monotonic() - t0
+            stack.detail = detail or stack.detail
+            stack.status = "ready" if success else "failed"
+            _log(stack, GREEN if success else RED, "✓" if success else "✗", detail or stack.slowest)
+            _release(stack)
+
+        def _start(name: str) -> None:
+            stack = stacks[name]
+            stack.started = time.monotonic() - t0
+            if stack.status in ("skipped", "failed"):           # decided while loading
+                stack.finished = stack.started
+                _log(stack, YELLOW if stack.status == "skipped" else RED, "⏭", stack.detail)
+                _release(stack)
+                return
+            if strict and any(stacks[d].status in ("failed", "blocked") for d in stack.deps):
+                stack.status, stack.detail = "blocked", "dependency failed (--strict)"
+                stack.finished = stack.started
+                _log(stack, YELLOW, "⏭", stack.detail)
+                _release(stack)
+                return
+            stack.status = "queued"
+            running[up_pool.submit(_up, stack)] = (stack, "up")
+
+        def _up(stack: Stack) -> Tuple[bool, str]:
+            stack.status = "starting"
+            stack.started = time.monotonic() - t0        # queue time isn't the stack's fault
+            return up_stack(stack)
+
+        for name in sorted(n for n, deps in remaining.items() if not deps):
+            _start(name)
+
+        while running:
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for fut in done:
+                stack, phase = running.pop(fut)
+                success, detail = fut.result()
+                if phase == "up":
+                    stack.applied = time.monotonic() - t0
+                    if not success:
+                        _finish(stack, False, detail)
+                    else:
+                        stack.status = "waiting"
+                        _log(stack, CYAN, "→", f"up, waiting on {stack.healthchecks} healthcheck(s)")
+                        running[watch_pool.submit(watch_stack, stack, timeout)] = (stack, "watch")
+                else:
+                    _finish(stack, success, detail)
+
+    return all(s.status in ("ready", "skipped") for s in stacks.values())
+
+
+# ─── Report ──────────────────────────────────────────────────────────────────
+
+
+def print_report(stacks: Dict[str, Stack], wall: float, module: Any) -> None:
+    header("Startup times")
+    print(f"  {BOLD}{'STACK':<16} {'START':>7} {'UP':>7} {'HEALTHY':>8} {'TOTAL':>7}  STATUS{NC}")
+    for s in sorted(stacks.values(), key=lambda s: (s.started, s.name)):
+        up_s = max(s.applied - s.started, 0.0) if s.applied else 0.0
+        health_s = max(s.finished - s.applied, 0.0) if s.applied else 0.0
+        colour = {"ready": GREEN, "skipped": YELLOW, "blocked": YELLOW}.get(s.status, RED)
+        extra = s.slowest if s.status == "ready" else s.detail
+        print(
+            f"  {s.name:<16} {s.started:6.1f}s {up_s:6.1f}s {health_s:7.1f}s "
+            f"{s.finished - s.started:6.1f}s  {colour}{s.status}{NC}"
+            + (f"  {DIM}{extra}{NC}" if extra else "")
+        )
+
+    path = module.critical_path(stacks)
+    if len(path) > 1:
+        header("Critical path")
+        chain = f" {DIM}→{NC} ".join(f"{s.name} ({s.finished - s.started:.1f}s)" for s in path)
+        print(f"  {chain}")
+    serial = sum(s.finished - s.started for s in stacks.values())
+    print(f"\n  Wall clock: {BOLD}{wall:.1f}s{NC}   serial sum: {serial:.1f}s"
+          + (f"   speedup: {serial / wall:.1f}×" if wall > 0 else ""))
+
+
+# ─── Main ────────────────────────────────────────────────────────────────────
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Parallel, dependency-ordered bring-up of the docker/ stacks.")
+    ap.add_argument("stacks", nargs="*", help="only these docker/<name> stacks (default: all)")
+    ap.add_argument("--workers", type=int, default=3, help="concurrent `compose up` calls (default: 3)")
+    ap.add_argument("--watchers", type=int, default=16, help="concurrent health watches (default: 16)")
+    ap.add_argument("--timeout", type=int, default=300, help="per-stack health timeout in seconds (default: 300)")
+    ap.add_argument("--strict", action="store_true", help="skip stacks whose dependencies failed")
+    ap.add_argument("--dry-run", action="store_true", help="print the dependency waves and exit")
+    ap.add_argument("--assume-setup", action="store_true",
+                    help="treat stacks without .env as set up (.env.example values; rehearsals)")
+    args = ap.parse_args()
+
+    try:
+        stacks, orphans = build_graph(args.stacks, args.assume_setup)
+    except KeyError as exc:
+        err(f"Unknown stack(s): {exc.args[0]} (see {DOCKER_DIR})")
+        return 1
+    if not stacks:
+        warn(f"No stacks found under {DOCKER_DIR}")
+        return 0
+    module = _restore_module()
+    try:
+        layers = module.waves(stacks)
+    except ValueError as exc:
+        err(str(exc))
+        return 1
+
+    if args.dry_run:
+        header(f"Bring-up plan — {len(stacks)} stacks, {len(layers)} waves")
+        if orphans:
+            print(f"  {DIM}shared networks created first: {', '.join(sorted(orphans))}{NC}")
+        for i, layer in enumerate(layers, start=1):
+            print(f"\n  {BOLD}Wave {i}{NC}")
+            for name in layer:
+                s = stacks[name]
+                what = s.detail if s.status != "pending" else f"{s.healthchecks} healthcheck(s)"
+                colour = YELLOW if s.status != "pending" else DIM
+                print(f"    {name:<16} {colour}{what:<44}{NC} {DIM}after: {', '.join(sorted(s.deps)) or '—'}{NC}")
+        return 0
+
+    failed = ensure_networks(orphans)
+    if failed:
+        for line in failed:
+            err(f"network {line}")
+        return 1
+    info(f"Starting {len(stacks)} stacks from {DOCKER_DIR} "
+         f"(workers={args.workers}, watchers={args.watchers}, timeout={args.timeout}s)")
+    start = time.monotonic()
+    success = run(stacks, max(args.workers, 1), max(args.watchers, 1), args.timeout, args.strict)
+    print_report(stacks, time.monotonic() - start, module)
+
+    if success:
+        ok("All stacks up")
+        return 0
+    bad = [s.name for s in stacks.values() if s.status not in ("ready", "skipped")]
+    warn(f"{len(bad)} stack(s) not healthy: {', '.join(bad)}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
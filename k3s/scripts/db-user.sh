@@ -8,6 +8,8 @@ set -euo pipefail
 #   ./db-user.sh <engine> create <username> <password> [db1,db2,...]
 #   ./db-user.sh <engine> delete <username>
 #   ./db-user.sh <engine> list
+#   ./db-user.sh plan  <users.yaml>     Diff a declarative spec (db-users.py)
+#   ./db-user.sh apply <users.yaml>     Apply it — one session per engine
 #
 # Engines: postgres | mongodb | mysql | redis
 #
@@ -33,6 +35,7 @@ set -euo pipefail
 #   - MySQL:    creates user + databases, grants per-DB privileges
 #   - Redis:    creates ACL user with full command access
 #   - All commands run via kubectl exec against the databases namespace
+#   - plan/apply: see k3s/databases/users.example.yaml for the spec format
 ###############################################################################
 
 NAMESPACE="databases"
@@ -40,7 +43,7 @@ NAMESPACE="databases"
 die() { echo "ERROR: $*" >&2; exit 1; }
 
 usage() {
-  sed -n '3,36p' "$0" | sed 's/^# \?//'
+  sed -n '3,39p' "$0" | sed 's/^# \?//'
   exit 1
 }
 
@@ -289,6 +292,11 @@ redis_admin_pass() {
 # --- Main -------------------------------------------------------------------
 [[ $# -lt 2 ]] && usage
 
+# Declarative batch mode — diff a users.yaml and converge every engine at once
+if [[ "$1" == "plan" || "$1" == "apply" ]]; then
+  exec python3 "$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)/db-users.py" "$@"
+fi
+
 ENGINE="$1"
 ACTION="$2"
 USERNAME="${3:-}"
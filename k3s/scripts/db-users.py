@@ -0,0 +1,559 @@
+#!/usr/bin/env python3
+"""
+db-users.py — Declarative, batched version of db-user.sh.
+
+Reads a YAML file describing the users, databases and grants every app needs,
+fetches the current state with ONE query per engine, diffs the two, and
+applies all changes in ONE client session per engine:
+
+  postgres  one psql session — roles in a transaction, CREATE DATABASE
+            (which cannot run inside one) between, grants in a second one,
+            then --prune drops after clearing their objects in every database
+  mysql     one mysql session
+  mongodb   one mongosh --eval script
+  redis     one redis-cli connection, commands pipelined over stdin
+
+Spec format (see k3s/databases/users.example.yaml):
+
+    postgres:
+      - user: n8n_user
+        password_from: {secret: n8n-secret, namespace: automation, key: N8N_DB_PASSWORD}
+        databases: [n8n]
+    mysql:
+      - user: myapp
+        password_env: MYAPP_DB_PASSWORD
+        databases: [myapp_dev, myapp_staging]
+    mongodb:
+      - user: orders
+        password: "..."            # avoid — prefer password_from / password_env
+        databases: [orders, inventory]
+    redis:
+      - user: cache
+        password_from: {secret: homarr-secret, namespace: dashboard-network, key: REDIS_PASSWORD}
+        rules: ["~*", "&*", "+@all"]   # default, same as db-user.sh
+
+Usage:
+  ./db-users.py plan  users.yaml               Show what would change (no writes)
+  ./db-users.py apply users.yaml               Apply the plan
+  ./db-users.py apply users.yaml --prune       Also drop users not in the file
+                                               (postgres: only login roles this
+                                               tool created or re-set)
+  ./db-users.py apply users.yaml --sync-passwords
+                                               Re-set passwords of existing users
+                                               (redis compares its ACL, password
+                                               hash included, on every run)
+  ./db-users.py plan users.yaml --docker       Target local containers named
+                                               postgres/mysql/mongodb/redis
+
+Clients run through `kubectl exec` ($KUBECTL honoured) or `docker exec`
+($DOCKER honoured), so both can be replaced by stand-ins.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import yaml
+
+from _k3s import DIM, GREEN, NC, RED, YELLOW, err, header, info, kubectl_cmd, ok, run_kubectl, warn
+
+
+NAMESPACE = "databases"
+ENGINES = ("postgres", "mysql", "mongodb", "redis")
+# kubectl exec target per engine (mongodb runs as a StatefulSet)
+TARGETS = {
+    "postgres": "deploy/postgres",
+    "mysql": "deploy/mysql",
+    "mongodb": "statefulset/mongodb",
+    "redis": "deploy/redis",
+}
+SYSTEM_USERS = {
+    "postgres": {"postgres"},
+    "mysql": {"root", "mysql.sys", "mysql.session", "mysql.infoschema", "debian-sys-maint"},
+    "mongodb": {"admin"},
+    "redis": {"admin", "default"},
+}
+NAME_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]{0,62}$")
+REDIS_NAME_RE = re.compile(r"^[A-Za-z0-9_.:-]{1,64}$")
+# ACL LIST spells some rules its own way and adds flags `reset` implies
+REDIS_ALIASES = {"allkeys": "~*", "allchannels": "&*", "allcommands": "+@all"}
+REDIS_IMPLIED = {"reset", "resetkeys", "resetchannels", "resetpass", "sanitize-payload"}
+# redis-cli exits 0 on error replies; they only show up in its output
+# postgres roles db-users.py created (or re-set) carry this comment; --prune touches no others
+PG_MANAGED = "managed by k3s/scripts/db-users.py"
+REDIS_ERROR_RE = re.compile(r"^(?:\(error\) )?(?:ERR|NOPERM|NOAUTH|WRONGPASS|WRONGTYPE)\b.*$", re.M)
+
+
+# ─── Spec ────────────────────────────────────────────────────────────────────
+
+
+@dataclass
+class UserSpec:
+    user: str
+    password: str
+    databases: List[str] = field(default_factory=list)
+    rules: List[str] = field(default_factory=lambda: ["~*", "&*", "+@all"])
+
+
+class SecretCache:
+    """Fetches each namespace's Secrets once, however many users reference them."""
+
+    def __init__(self) -> None:
+        self._by_ns: Dict[str, Dict[str, Dict[str, str]]] = {}
+
+    def get(self, namespace: str, name: str, key: str) -> str:
+        if namespace not in self._by_ns:
+            res = run_kubectl(["get", "secrets", "-n", namespace, "-o", "json"], timeout=60)
+            if res.returncode != 0:
+                raise ValueError(f"cannot read secrets in {namespace}: {res.stderr.strip()}")
+            self._by_ns[namespace] = {
+                item["metadata"]["name"]: item.get("data") or {} for item in json.loads(res.stdout).get("items", [])
+            }
+        encoded = self._by_ns[namespace].get(name, {}).get(key)
+        if encoded is None:
+            raise ValueError(f"secret {namespace}/{name} has no key {key}")
+        return base64.b64decode(encoded).decode("utf-8")
+
+
+def resolve_password(entry: Dict[str, Any], secrets: SecretCache) -> str:
+    if "password_from" in entry:
+        ref = entry["password_from"] or {}
+        return secrets.get(ref.get("namespace", NAMESPACE), ref["secret"], ref["key"])
+    if "password_env" in entry:
+        value = os.environ.get(entry["password_env"])
+        if value is None:
+            raise ValueError(f"environment variable {entry['password_env']} is not set")
+        return value
+    if "password" in entry:
+        return str(entry["password"])
+    raise ValueError("one of password_from / password_env / password is required")
+
+
+def load_spec(path: Path, secrets: SecretCache) -> Dict[str, List[UserSpec]]:
+    raw = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    unknown = set(raw) - set(ENGINES)
+    if unknown:
+        raise ValueError(f"unknown engine(s): {', '.join(sorted(unknown))}")
+    spec: Dict[str, List[UserSpec]] = {}
+    for engine in ENGINES:
+        users: List[UserSpec] = []
+        for entry in raw.get(engine) or []:
+            name = str(entry.get("user", ""))
+            pattern = REDIS_NAME_RE if engine == "redis" else NAME_RE
+            if not pattern.match(name):
+                raise ValueError(f"{engine}: invalid user name {name!r}")
+            if name in SYSTEM_USERS[engine]:
+                raise ValueError(f"{engine}: refusing to manage system user {name!r}")
+            dbs = [str(d) for d in entry.get("databases") or []]
+            bad = [d for d in dbs if not NAME_RE.match(d)]
+            if bad:
+                raise ValueError(f"{engine}/{name}: invalid database name(s) {bad}")
+            if engine in ("postgres", "mysql", "mongodb") and not dbs:
+                raise ValueError(f"{engine}/{name}: at least one database is required")
+            try:
+                password = resolve_password(entry, secrets)
+            except (KeyError, ValueError) as exc:
+                raise ValueError(f"{engine}/{name}: {exc}") from exc
+            user = UserSpec(name, password, dbs)
+            if entry.get("rules"):
+                user.rules = [str(r) for r in entry["rules"]]
+            users.append(user)
+        if users:
+            spec[engine] = users
+    return spec
+
+
+# ─── Client execution ────────────────────────────────────────────────────────
+
+
+class Runner:
+    """Runs a client command inside an engine's pod (or local container)."""
+
+    def __init__(self, docker: bool) -> None:
+        self.docker = docker
+
+    def __call__(self, engine: str, argv: Sequence[str], stdin: Optional[str] = None) -> subprocess.CompletedProcess:
+        if self.docker:
+            cmd = shlex.split(os.environ.get("DOCKER", "docker")) + ["exec", "-i", engine] + list(argv)
+            try:
+                return subprocess.run(cmd, input=stdin or "", capture_output=True, text=True, timeout=300)
+            except (OSError, subprocess.TimeoutExpired) as exc:
+                return subprocess.CompletedProcess(cmd, 1, "", str(exc))
+        return run_kubectl(["exec", "-i", "-n", NAMESPACE, TARGETS[engine], "--"] + list(argv), input=stdin, timeout=300)
+
+
+def root_password(engine: str, secrets: SecretCache) -> str:
+    if engine == "mysql":
+        return os.environ.get("MYSQL_ROOT_PASSWORD") or secrets.get(NAMESPACE, "mysql-secret", "MYSQL_ROOT_PASSWORD")
+    if engine == "mongodb":
+        return os.environ.get("MONGO_ROOT_PASSWORD") or secrets.get(NAMESPACE, "mongodb-secret", "MONGO_INITDB_ROOT_PASSWORD")
+    if engine == "redis":
+        # Hardcoded in the Redis ACL file — same default as db-user.sh
+        return os.environ.get("REDIS_ADMIN_PASSWORD", "adminRedis2024!")
+    return ""
+
+
+def redis_checked(res: subprocess.CompletedProcess) -> subprocess.CompletedProcess:
+    """Turn error replies in redis-cli's output into a non-zero exit."""
+    errors = REDIS_ERROR_RE.findall(res.stdout + "\n" + res.stderr)
+    if res.returncode != 0 or not errors:
+        return res
+    return subprocess.CompletedProcess(res.args, 1, res.stdout, "\n".join(errors))
+
+
+def client_argv(engine: str, root_pass: str) -> List[str]:
+    if engine == "postgres":
+        return ["psql", "-U", "postgres", "-v", "ON_ERROR_STOP=1", "-qtA", "-f", "-"]
+    if engine == "mysql":
+        return ["mysql", "-u", "root", f"-p{root_pass}", "-sN"]
+    if engine == "mongodb":
+        return ["mongosh", "-u", "admin", "-p", root_pass, "--authenticationDatabase", "admin", "--quiet", "--eval"]
+    return ["redis-cli", "--user", "admin", "--pass", root_pass, "--no-auth-warning"]
+
+
+# ─── State (one query per engine) ────────────────────────────────────────────
+
+# Current state is normalised to {user: set(databases)}, the set of existing databases,
+# and the users --prune may drop. Redis has no databases to grant; its sets hold the
+# user's ACL (see redis_acl).
+State = Tuple[Dict[str, Set[str]], Set[str], Set[str]]
+
+PG_STATE_SQL = """
+SELECT json_build_object(
+  'users', COALESCE((SELECT json_agg(rolname) FROM pg_roles
+                     WHERE rolcanlogin AND rolname NOT LIKE 'pg\\_%'), '[]'),
+  'managed', COALESCE((SELECT json_agg(rolname) FROM pg_roles
+                       WHERE rolcanlogin AND shobj_description(oid, 'pg_authid') = '""" + PG_MANAGED + """'), '[]'),
+  'dbs',   COALESCE((SELECT json_agg(json_build_object('name', datname, 'owner', pg_get_userbyid(datdba)))
+                     FROM pg_database WHERE NOT datistemplate), '[]'),
+  'grants', COALESCE((SELECT json_agg(json_build_object('user', pg_get_userbyid(a.grantee), 'db', d.datname))
+                     FROM pg_database d, aclexplode(d.datacl) a
+                     WHERE a.privilege_type = 'CREATE' AND a.grantee <> 0), '[]'));
+"""
+
+MYSQL_STATE_SQL = """
+SELECT JSON_OBJECT(
+  'users',  (SELECT JSON_ARRAYAGG(User) FROM mysql.user WHERE Host = '%'),
+  'dbs',    (SELECT JSON_ARRAYAGG(SCHEMA_NAME) FROM information_schema.SCHEMATA),
+  'grants', (SELECT JSON_ARRAYAGG(JSON_OBJECT('grantee', GRANTEE, 'db', TABLE_SCHEMA))
+             FROM information_schema.SCHEMA_PRIVILEGES));
+"""
+
+MONGO_STATE_JS = """
+const users = db.getSiblingDB('admin').runCommand({usersInfo: {forAllDBs: true}}).users || [];
+const dbs = db.adminCommand({listDatabases: 1}).databases.map(d => d.name);
+print(JSON.stringify({users: users.map(u => ({user: u.user, db: u.db,
+  roles: u.roles.filter(r => r.role === 'readWrite').map(r => r.db)})), dbs: dbs}));
+"""
+
+
+def _last_json_line(text: str) -> Any:
+    for line in reversed(text.strip().splitlines()):
+        line = line.strip()
+        if line.startswith("{"):
+            return json.loads(line)
+    raise ValueError(f"no JSON in client output: {text.strip()[:200]!r}")
+
+
+def redis_acl(rules: Sequence[str], password: Optional[str] = None) -> Set[str]:
+    """Normalised ACL tokens, comparable between a spec entry and an ACL LIST line."""
+    acl = {REDIS_ALIASES.get(r, r) for r in rules} - REDIS_IMPLIED
+    if password is not None:
+        acl |= {"on", "#" + hashlib.sha256(password.encode("utf-8")).hexdigest()}
+    return acl
+
+
+def fetch_state(engine: str, run: Runner, root_pass: str) -> State:
+    argv = client_argv(engine, root_pass)
+    if engine == "postgres":
+        res = run(engine, argv, PG_STATE_SQL)
+    elif engine == "mysql":
+        res = run(engine, argv, MYSQL_STATE_SQL)
+    elif engine == "mongodb":
+        res = run(engine, argv + [MONGO_STATE_JS])
+    else:
+        res = redis_checked(run(engine, argv + ["ACL", "LIST"]))
+    if res.returncode != 0:
+        raise RuntimeError(res.stderr.strip() or f"{engine} client exited {res.returncode}")
+
+    users: Dict[str, Set[str]] = {}
+    if engine == "redis":
+        # one "user <name> on #<sha256> ~* &* +@all" line per user
+        for line in res.stdout.splitlines():
+            tokens = line.split()
+            if len(tokens) >= 2 and tokens[0] == "user":
+                users[tokens[1]] = redis_acl(tokens[2:])
+        return users, set(), set(users)
+
+    data = _last_json_line(res.stdout)
+    if engine == "postgres":
+        users = {u: set() for u in data.get("users") or []}
+        # owner and CREATE grants both count; group (non-login) roles are not users
+        for d in data.get("dbs") or []:
+            if d["owner"] in users:
+                users[d["owner"]].add(d["name"])
+        for g in data.get("grants") or []:
+            if g["user"] in users:
+                users[g["user"]].add(g["db"])
+        return users, {d["name"] for d in data.get("dbs") or []}, set(data.get("managed") or [])
+    if engine == "mysql":
+        users = {u: set() for u in data.get("users") or []}
+        for g in data.get("grants") or []:
+            m = re.match(r"^'(.*)'@'%'$", g["grantee"])
+            if m and m.group(1) in users:
+                users[m.group(1)].add(g["db"])
+        return users, set(data.get("dbs") or []), set(users)
+    for u in data.get("users") or []:
+        users.setdefault(u["user"], set()).update(u["roles"])
+    return users, set(data.get("dbs") or []), set(users)
+
+
+# ─── Diff ────────────────────────────────────────────────────────────────────
+
+
+@dataclass
+class Plan:
+    create_users: List[UserSpec] = field(default_factory=list)
+    update_users: List[UserSpec] = field(default_factory=list)   # password / rules refresh
+    create_dbs: List[Tuple[str, str]] = field(default_factory=list)  # (db, owner)
+    grants: List[Tuple[str, str]] = field(default_factory=list)       # (user, db)
+    drop_users: List[str] = field(default_factory=list)
+    drop_in: List[str] = field(default_factory=list)   # databases to clear dropped users' objects from
+
+    def empty(self) -> bool:
+        return not (self.create_users or self.update_users or self.create_dbs or self.grants or self.drop_users)
+
+
+def diff(engine: str, desired: List[UserSpec], state: State, prune: bool, sync_passwords: bool) -> Plan:
+    current, existing_dbs, prunable = state
+    plan = Plan()
+    wanted_dbs: Set[str] = set()
+    for u in desired:
+        if u.user not in current:
+            plan.create_users.append(u)
+        elif engine == "redis":
+            # ACL LIST carries the password hash too, so drift of either is visible.
+            if current[u.user] != redis_acl(u.rules, u.password):
+                plan.update_users.append(u)
+        elif sync_passwords:
+            plan.update_users.append(u)
+        for db in u.databases:
+            if db not in existing_dbs and db not in wanted_dbs:
+                plan.create_dbs.append((db, u.user))
+            wanted_dbs.add(db)
+            if db not in current.get(u.user, set()):
+                plan.grants.append((u.user, db))
+    if prune:
+        declared = {u.user for u in desired}
+        plan.drop_users = sorted(n for n in prunable if n not in declared and n not in SYSTEM_USERS[engine])
+        if plan.drop_users:
+            plan.drop_in = sorted(existing_dbs)
+    return plan
+
+
+# ─── Script rendering (one session per engine) ───────────────────────────────
+
+
+def _sql_str(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def render_postgres(plan: Plan) -> str:
+    lines = ["BEGIN;"]
+    for u in plan.create_users:
+        lines.append(f'CREATE ROLE "{u.user}" WITH LOGIN PASSWORD {_sql_str(u.password)};')
+    for u in plan.update_users:
+        lines.append(f'ALTER ROLE "{u.user}" WITH LOGIN PASSWORD {_sql_str(u.password)};')
+    for u in plan.create_users + plan.update_users:
+        lines.append(f'COMMENT ON ROLE "{u.user}" IS {_sql_str(PG_MANAGED)};')
+    lines.append("COMMIT;")
+    # CREATE DATABASE cannot run inside a transaction block.
+    for db, owner in plan.create_dbs:
+        lines.append(f'CREATE DATABASE "{db}" OWNER "{owner}";')
+    lines.append("BEGIN;")
+    for user, db in plan.grants:
+        lines.append(f'GRANT ALL PRIVILEGES ON DATABASE "{db}" TO "{user}";')
+        lines.append(f'REVOKE ALL ON DATABASE "{db}" FROM PUBLIC;')
+    lines.append("COMMIT;")
+    if not plan.drop_users:
+        return "\n".join(lines) + "\n"
+    # REASSIGN / DROP OWNED only see the current database, and DROP ROLE fails
+    # while the role owns anything anywhere — clear every database first.
+    owned = ", ".join(f'"{user}"' for user in plan.drop_users)
+    for db in plan.drop_in:
+        lines.append(f'\\c "{db}"')
+        lines.append(f"REASSIGN OWNED BY {owned} TO postgres; DROP OWNED BY {owned};")
+    lines.append('\\c "postgres"')
+    for user in plan.drop_users:
+        lines.append(f'DROP ROLE IF EXISTS "{user}";')
+    return "\n".join(lines) + "\n"
+
+
+def render_mysql(plan: Plan) -> str:
+    lines = []
+    for u in plan.create_users:
+        lines.append(f"CREATE USER IF NOT EXISTS '{u.user}'@'%' IDENTIFIED BY {_sql_str(u.password)};")
+    for u in plan.update_users:
+        lines.append(f"ALTER USER '{u.user}'@'%' IDENTIFIED BY {_sql_str(u.password)};")
+    for db, _ in plan.create_dbs:
+        lines.append(f"CREATE DATABASE IF NOT EXISTS `{db}` CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;")
+    for user, db in plan.grants:
+        lines.append(f"GRANT ALL PRIVILEGES ON `{db}`.* TO '{user}'@'%';")
+    for user in plan.drop_users:
+        lines.append(f"DROP USER IF EXISTS '{user}'@'%';")
+    lines.append("FLUSH PRIVILEGES;")
+    return "\n".join(lines) + "\n"
+
+
+def render_mongodb(plan: Plan, desired: List[UserSpec]) -> str:
+    by_name = {u.user: u for u in desired}
+    lines = []
+    for u in plan.create_users:
+        roles = json.dumps([{"role": "readWrite", "db": d} for d in u.databases])
+        # First database is the auth source, as in db-user.sh
+        lines.append(f"db.getSiblingDB({json.dumps(u.databases[0])}).createUser("
+                     f"{{user: {json.dumps(u.user)}, pwd: {json.dumps(u.password)}, roles: {roles}}});")
+    for u in plan.update_users:
+        lines.append(f"db.getSiblingDB({json.dumps(u.databases[0])}).changeUserPassword("
+                     f"{json.dumps(u.user)}, {json.dumps(u.password)});")
+    created = {u.user for u in plan.create_users}
+    for user, db in plan.grants:
+        if user in created:
+            continue
+        auth_db = by_name[user].databases[0]
+        lines.append(f"db.getSiblingDB({json.dumps(auth_db)}).grantRolesToUser("
+                     f"{json.dumps(user)}, [{{role: 'readWrite', db: {json.dumps(db)}}}]);")
+    for db, _ in plan.create_dbs:
+        lines.append(f"db.getSiblingDB({json.dumps(db)}).createCollection('_init');")
+    for user in plan.drop_users:
+        lines.append("(db.getSiblingDB('admin').runCommand({usersInfo: {forAllDBs: true}}).users || [])"
+                     f".filter(u => u.user === {json.dumps(user)})"
+                     ".forEach(u => db.getSiblingDB(u.db).dropUser(u.user));")
+    lines.append("print('ok');")
+    return "\n".join(lines)
+
+
+def _redis_quote(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def render_redis(plan: Plan, save: bool) -> str:
+    lines = []
+    for u in plan.create_users + plan.update_users:
+        rules = " ".join(_redis_quote(r) for r in u.rules)
+        lines.append(f"ACL SETUSER {_redis_quote(u.user)} reset on {_redis_quote('>' + u.password)} {rules}")
+    for user in plan.drop_users:
+        lines.append(f"ACL DELUSER {_redis_quote(user)}")
+    if save:
+        lines.append("ACL SAVE")
+    return "\n".join(lines) + "\n"
+
+
+def apply_plan(engine: str, plan: Plan, desired: List[UserSpec], run: Runner, root_pass: str) -> subprocess.CompletedProcess:
+    argv = client_argv(engine, root_pass)
+    if engine == "postgres":
+        return run(engine, argv, render_postgres(plan))
+    if engine == "mysql":
+        return run(engine, argv, render_mysql(plan))
+    if engine == "mongodb":
+        return run(engine, argv + [render_mongodb(plan, desired)])
+    # ACL SAVE errors unless redis runs with an aclfile
+    res = redis_checked(run(engine, argv + ["CONFIG", "GET", "aclfile"]))
+    if res.returncode != 0:
+        return res
+    aclfile = res.stdout.splitlines()[1].strip() if len(res.stdout.splitlines()) > 1 else ""
+    if not aclfile:
+        warn("redis: no aclfile configured — users last until the next redis restart")
+    return redis_checked(run(engine, argv, render_redis(plan, bool(aclfile))))
+
+
+# ─── Output ──────────────────────────────────────────────────────────────────
+
+
+def print_plan(engine: str, plan: Plan) -> None:
+    header(f"{engine}")
+    if plan.empty():
+        print(f"  {DIM}(no changes){NC}")
+        return
+    for u in plan.create_users:
+        print(f"  {GREEN}+ user{NC}     {u.user}")
+    for u in plan.update_users:
+        print(f"  {YELLOW}~ user{NC}     {u.user}  {DIM}(password/ACL refresh){NC}")
+    for db, owner in plan.create_dbs:
+        print(f"  {GREEN}+ database{NC} {db}  {DIM}owner={owner}{NC}")
+    for user, db in plan.grants:
+        print(f"  {GREEN}+ grant{NC}    {user} → {db}")
+    for user in plan.drop_users:
+        print(f"  {RED}- user{NC}     {user}")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Declarative batch DB user provisioning.")
+    ap.add_argument("action", choices=("plan", "apply"))
+    ap.add_argument("spec", type=Path, help="YAML file of users per engine")
+    ap.add_argument("--prune", action="store_true", help="drop users that are not in the spec")
+    ap.add_argument("--sync-passwords", action="store_true", help="re-set passwords of existing users")
+    ap.add_argument("--docker", action="store_true", help="exec into local containers instead of the cluster")
+    ap.add_argument("--engine", choices=ENGINES, action="append", help="limit to one engine (repeatable)")
+    args = ap.parse_args()
+
+    if not args.spec.is_file():
+        err(f"Spec not found: {args.spec}")
+        return 1
+    secrets = SecretCache()
+    try:
+        spec = load_spec(args.spec, secrets)
+    except (ValueError, KeyError, yaml.YAMLError) as exc:
+        err(f"Invalid spec: {exc}")
+        return 1
+    if args.engine:
+        spec = {e: u for e, u in spec.items() if e in args.engine}
+    if not spec:
+        info("Spec declares no users — nothing to do")
+        return 0
+
+    run = Runner(args.docker)
+    target = "docker exec" if args.docker else " ".join(kubectl_cmd()) + f" exec -n {NAMESPACE}"
+    info(f"Fetching current state ({len(spec)} engine(s), one query each, via {target})")
+
+    failures = 0
+    for engine, desired in spec.items():
+        try:
+            root_pass = root_password(engine, secrets)
+            plan = diff(engine, desired, fetch_state(engine, run, root_pass),
+                        args.prune, args.sync_passwords)
+        except (RuntimeError, ValueError, KeyError) as exc:
+            err(f"{engine}: cannot read current state — {exc}")
+            failures += 1
+            continue
+        print_plan(engine, plan)
+        if args.action == "plan" or plan.empty():
+            continue
+        res = apply_plan(engine, plan, desired, run, root_pass)
+        if res.returncode == 0:
+            ok(f"{engine}: applied in one session")
+        else:
+            err(f"{engine}: {res.stderr.strip() or 'client exited ' + str(res.returncode)}")
+            failures += 1
+
+    print("")
+    if failures:
+        warn(f"{failures} engine(s) failed")
+        return 1
+    ok("Plan shown — re-run with 'apply' to execute" if args.action == "plan" else "All engines converged")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
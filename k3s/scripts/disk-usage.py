@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+disk-usage.py — Incremental disk-usage scan of app volumes, per app and claim.
+
+`app pvc` shows the PVC objects, not what is actually on disk, and a `du -sh`
+over /home/pi/k3s-volumes stats every file on the SD card each time. This
+walks the same trees with os.scandir on a thread pool and keeps a
+per-directory cache (mtime, inode, bytes of its own files, subdirectory
+names) in k3s/.disk-usage.json (gitignored).
+
+On a rescan a directory whose mtime and inode are unchanged is not listed
+again: its cached file total is reused and only its subdirectories are
+stat'ed, so the cost follows the number of directories rather than files.
+A directory's mtime does not move when a file inside it grows in place
+(databases, logs), so files of at least --big MiB are remembered and re-stat'ed
+on every scan; smaller in-place growth is picked up by --full.
+
+Scanned paths come from the manifests and docker/:
+  - PersistentVolume hostPath  → app / namespace/claim / capacity
+  - docker/<stack> bind mounts → docker:<stack>  (./x resolved in the stack dir)
+plus /home/pi/k3s-volumes itself, so data no claim points at (a removed
+app's leftovers) shows up as unclaimed. Every scan appends the per-path
+totals to a short history; the report shows the change since the previous
+scan (or --since DAYS ago) and the growth rate per day.
+
+Usage:
+  ./disk-usage.py                     Scan and report every volume
+  ./disk-usage.py --app jellyfin      Only that app's volumes (as `app pvc`)
+  ./disk-usage.py --since 7           Growth against the scan ≥7 days old
+  ./disk-usage.py --full              Ignore the cache (relist everything)
+  ./disk-usage.py --top 15            Also list the 15 largest directories
+  ./disk-usage.py --json              Machine-readable output
+  ./disk-usage.py /some/dir ...       Scan ad-hoc paths instead
+
+Sizes are allocated blocks (as du), hard links are counted per link.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import stat
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+from _k3s import (
+    BOLD, DIM, GREEN, K3S_ROOT, NC, REPO_ROOT, RED, YELLOW,
+    app_manifests, compose_env, discover_app_dirs, err, expand_vars, header, info, parse_quantity, warn,
+)
+
+
+VOLUMES_ROOT = "/home/pi/k3s-volumes"
+STATE_FILE = K3S_ROOT / ".disk-usage.json"
+HISTORY_LIMIT = 200
+SYSTEM_DIRS = ("/bin", "/boot", "/dev", "/etc", "/lib", "/proc", "/run", "/sbin", "/sys", "/tmp", "/usr", "/var")
+
+# Cache record per directory: [mtime_ns, inode, own_bytes, own_files, [subdirs], {big file: bytes}]
+Record = List[Any]
+
+
+@dataclass
+class Mapping:
+    path: str
+    app: str
+    claim: str              # "namespace/pvc", "docker:<stack>" or "unclaimed"
+    capacity: Optional[int] = None
+
+
+@dataclass
+class ScanStats:
+    listed: int = 0
+    reused: int = 0
+    files: int = 0
+    big_restat: int = 0
+    errors: List[str] = field(default_factory=list)
+
+
+# ─── Volume map ──────────────────────────────────────────────────────────────
+
+
+def pv_mappings() -> List[Mapping]:
+    """hostPath PersistentVolumes → (app directory, claimRef, capacity)."""
+    out: List[Mapping] = []
+    for app_dir in discover_app_dirs():
+        docs = app_manifests(app_dir)
+        bound = {
+            (d.get("spec") or {}).get("volumeName"): d.get("metadata") or {}
+            for d in docs if d.get("kind") == "PersistentVolumeClaim"
+        }
+        for doc in docs:
+            spec = doc.get("spec") or {}
+            path = (spec.get("hostPath") or {}).get("path")
+            if doc.get("kind") != "PersistentVolume" or not path:
+                continue
+            name = doc["metadata"]["name"]
+            ref = spec.get("claimRef") or bound.get(name) or {}
+            claim = f"{ref.get('namespace', '—')}/{ref.get('name') or name}"
+            capacity = parse_quantity((spec.get("capacity") or {}).get("storage"))
+            out.append(Mapping(os.path.normpath(path), app_dir.name, claim, int(capacity) if capacity else None))
+    return out
+
+
+def _bind_source(entry: Any, stack: Path, env: Dict[str, str]) -> Optional[str]:
+    if isinstance(entry, dict):
+        raw = entry.get("source") if entry.get("type") == "bind" else None
+    elif isinstance(entry, str) and ":" in entry:
+        raw = entry.split(":", 1)[0]
+    else:
+        raw = None
+    source = expand_vars(raw, env) if isinstance(raw, str) else None
+    if not source or not (source.startswith(("/", ".", "~"))):
+        return None      # named volume
+    return os.path.normpath(stack / os.path.expanduser(source))
+
+
+def docker_mappings() -> List[Mapping]:
+    out: List[Mapping] = []
+    docker_dir = REPO_ROOT / "docker"
+    if not docker_dir.is_dir():
+        return out
+    for stack in sorted(p for p in docker_dir.iterdir() if p.is_dir()):
+        env = compose_env(stack)
+        for path in sorted(stack.glob("*compose*.y*ml")):
+            try:
+                doc = yaml.safe_load(path.read_text(encoding="utf-8"))
+            except (OSError, yaml.YAMLError):
+                continue
+            services = doc.get("services") if isinstance(doc, dict) else None
+            for svc in (services or {}).values():
+                for entry in (svc or {}).get("volumes") or []:
+                    source = _bind_source(entry, stack, env)
+                    if not source or source == "/" or any(_within(source, d) for d in SYSTEM_DIRS):
+                        continue
+                    # dotfiles (~/.ssh, ~/.kube) and single-file mounts aren't app data
+                    name = os.path.basename(source)
+                    if name.startswith(".") or os.path.isfile(source) or (
+                            not os.path.exists(source) and os.path.splitext(name)[1]):
+                        continue
+                    out.append(Mapping(source, f"docker:{stack.name}", "bind mount"))
+    return out
+
+
+def volume_map(app: Optional[str]) -> List[Mapping]:
+    seen: Dict[str, Mapping] = {}
+    for m in pv_mappings() + docker_mappings():
+        if app and app != m.app.split(":")[-1]:
+            continue
+        seen.setdefault(m.path, m)
+    mappings = list(seen.values())
+    # a bind mount of e.g. /home/pi would swallow every volume below it
+    return [m for m in mappings
+            if m.claim != "bind mount" or not any(o.path != m.path and _within(o.path, m.path) for o in mappings)]
+
+
+def _within(path: str, root: str) -> bool:
+    return path == root or path.startswith(root.rstrip("/") + "/")
+
+
+# ─── Scan ────────────────────────────────────────────────────────────────────
+
+
+def scan_dir(path: str, old: Optional[Record], big: int, root_dev: Optional[int], full: bool
+             ) -> Tuple[str, Optional[Record], List[str], ScanStats]:
+    """List one directory (or reuse its cached listing); returns its record and subdirectories."""
+    s = ScanStats()
+    try:
+        st = os.stat(path)
+    except OSError as exc:
+        s.errors.append(f"{path}: {exc.strerror}")
+        return path, None, [], s
+    if root_dev is not None and st.st_dev != root_dev:
+        return path, None, [], s        # --one-file-system
+
+    if old is not None and not full and old[0] == st.st_mtime_ns and old[1] == st.st_ino:
+        s.reused += 1
+        own, bigs = old[2], dict(old[5])
+        for name, was in old[5].items():
+            s.big_restat += 1
+            try:
+                now = os.lstat(os.path.join(path, name)).st_blocks * 512
+            except OSError:
+                now = 0
+            own += now - was
+            bigs[name] = now
+        return path, [old[0], old[1], own, old[3], old[4], bigs], [os.path.join(path, d) for d in old[4]], s
+
+    s.listed += 1
+    own = files = 0
+    subdirs: List[str] = []
+    bigs: Dict[str, int] = {}
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.name)
+                        continue
+                    est = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                size = est.st_blocks * 512
+                own += size
+                files += 1
+                if stat.S_ISREG(est.st_mode) and size >= big:
+                    bigs[entry.name] = size
+    except OSError as exc:
+        s.errors.append(f"{path}: {exc.strerror}")
+    s.files = files
+    return path, [st.st_mtime_ns, st.st_ino, own, files, sorted(subdirs), bigs], [os.path.join(path, d) for d in subdirs], s
+
+
+def scan(roots: List[str], cache: Dict[str, Record], workers: int, big: int, one_fs: bool, full: bool
+         ) -> Tuple[Dict[str, Record], ScanStats]:
+    """Walk every root on a thread pool; os.scandir/stat release the GIL."""
+    fresh: Dict[str, Record] = {}
+    total = ScanStats()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending = set()
+        for root in roots:
+            dev = os.stat(root).st_dev if one_fs and os.path.isdir(root) else None
+            pending.add(pool.submit(scan_dir, root, cache.get(root), big, dev, full))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                path, rec, children, s = fut.result()
+                total.listed += s.listed
+                total.reused += s.reused
+                total.files += s.files
+                total.big_restat += s.big_restat
+                total.errors += s.errors
+                if rec is None:
+                    continue
+                fresh[path] = rec
+                dev = os.stat(path).st_dev if one_fs else None
+                for child in children:
+                    pending.add(pool.submit(scan_dir, child, cache.get(child), big, dev, full))
+    return fresh, total
+
+
+def subtree_totals(records: Dict[str, Record]) -> Dict[str, int]:
+    totals = {p: r[2] for p, r in records.items()}
+    for p in sorted(records, key=lambda x: x.count("/"), reverse=True):
+        parent = os.path.dirname(p)
+        if parent in totals and parent != p:
+            totals[parent] += totals[p]
+    return totals
+
+
+def unclaimed(totals: Dict[str, int], mappings: List[Mapping], root: str) -> List[str]:
+    """Topmost directories under root that neither hold nor sit inside a mapped path."""
+    free = {p for p in totals
+            if p != root and _within(p, root)
+            and not any(_within(p, m.path) or _within(m.path, p) for m in mappings)}
+    return sorted(p for p in free if os.path.dirname(p) not in free)
+
+
+# ─── State ───────────────────────────────────────────────────────────────────
+
+
+def load_state() -> Dict[str, Any]:
+    try:
+        state = json.loads(STATE_FILE.read_text(encoding="utf-8"))
+        return state if isinstance(state, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state: Dict[str, Any]) -> None:
+    tmp = STATE_FILE.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, separators=(",", ":")), encoding="utf-8")
+    tmp.replace(STATE_FILE)
+
+
+def baseline(history: List[Dict[str, Any]], path: str, now: float, since_days: Optional[float]
+             ) -> Optional[Tuple[float, int]]:
+    """Most recent earlier sample for path (at least since_days old, if given)."""
+    for entry in reversed(history):
+        if path not in entry["usage"]:
+            continue
+        if since_days is not None and now - entry["t"] < since_days * 86400:
+            continue
+        return entry["t"], entry["usage"][path]
+    return None
+
+
+# ─── Report ──────────────────────────────────────────────────────────────────
+
+
+def human(n: Optional[float], signed: bool = False) -> str:
+    if n is None:
+        return "—"
+    sign = ("+" if n > 0 else "-" if n < 0 else "") if signed else ("-" if n < 0 else "")
+    v = abs(float(n))
+    for unit in ("B", "K", "M", "G", "T"):
+        if v < 1024 or unit == "T":
+            return f"{sign}{v:.0f}{unit}" if unit == "B" else f"{sign}{v:.1f}{unit}"
+        v /= 1024
+    return str(n)
+
+
+def build_rows(mappings: List[Mapping], totals: Dict[str, int], history: List[Dict[str, Any]],
+               now: float, since: Optional[float]) -> List[Dict[str, Any]]:
+    rows = []
+    for m in mappings:
+        used = totals.get(m.path)
+        row: Dict[str, Any] = {"app": m.app, "claim": m.claim, "path": m.path, "bytes": used,
+                               "capacity": m.capacity, "delta": None, "per_day": None, "days_to_full": None}
+        base = baseline(history, m.path, now, since) if used is not None else None
+        if base:
+            row["delta"] = used - base[1]
+            elapsed = max(now - base[0], 1.0)
+            row["per_day"] = row["delta"] * 86400 / elapsed
+            row["baseline_age_h"] = round(elapsed / 3600, 1)
+            if m.capacity and row["per_day"] > 0:
+                row["days_to_full"] = max(0.0, (m.capacity - used) / row["per_day"])
+        rows.append(row)
+    return rows
+
+
+def print_report(rows: List[Dict[str, Any]], stats: ScanStats, elapsed: float, top: List[Tuple[str, int]]) -> None:
+    dirs = stats.listed + stats.reused
+    header(f"Disk usage — {len(rows)} path(s), {dirs:,} dirs ({stats.reused:,} cached), {elapsed:.2f}s")
+    aw = max([len(r["app"]) for r in rows] + [3])
+    cw = max([len(r["claim"]) for r in rows] + [5])
+    width = max([len(r["path"]) for r in rows] + [4])
+    print(f"  {BOLD}{'APP':<{aw}} {'CLAIM':<{cw}} {'PATH':<{width}} {'USED':>8} {'CAP':>8} "
+          f"{'%':>4} {'Δ':>9} {'/DAY':>9} {'FULL IN':>8}{NC}")
+    for r in sorted(rows, key=lambda r: (r["app"] == "(unclaimed)", r["app"], r["path"])):
+        if r["bytes"] is None:
+            print(f"  {r['app']:<{aw}} {r['claim']:<{cw}} {r['path']:<{width}} {DIM}{'missing':>8}{NC}")
+            continue
+        pct = f"{100 * r['bytes'] / r['capacity']:.0f}" if r["capacity"] else "—"
+        color = RED if r["capacity"] and r["bytes"] > r["capacity"] else (
+            YELLOW if r["capacity"] and r["bytes"] > 0.8 * r["capacity"] else "")
+        grow = YELLOW if (r["per_day"] or 0) > (1 << 30) else (GREEN if (r["delta"] or 0) < 0 else "")
+        full_in = ("—" if r["days_to_full"] is None else
+                   "<1d" if r["days_to_full"] < 1 else f"{r['days_to_full']:.0f}d")
+        print(f"  {r['app']:<{aw}} {r['claim']:<{cw}} {r['path']:<{width}} {color}{human(r['bytes']):>8}{NC} "
+              f"{human(r['capacity']):>8} {color}{pct:>4}{NC} {grow}{human(r['delta'], True):>9} "
+              f"{human(r['per_day'], True):>9}{NC} {full_in:>8}")
+    if top:
+        header("Largest directories")
+        for path, size in top:
+            print(f"  {human(size):>8}  {path}")
+    for e in stats.errors[:10]:
+        warn(e)
+    if len(stats.errors) > 10:
+        warn(f"... and {len(stats.errors) - 10} more unreadable path(s) (run as root?)")
+    print(f"  {DIM}({stats.listed:,} listed, {stats.reused:,} reused, {stats.files:,} files stat'ed, "
+          f"{stats.big_restat:,} large files re-checked){NC}")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Incremental per-app disk usage of volumes and bind mounts.")
+    ap.add_argument("paths", nargs="*", help="scan these paths instead of the volume map")
+    ap.add_argument("--app", help="only this app's volumes (app directory or docker stack name)")
+    ap.add_argument("--root", default=VOLUMES_ROOT,
+                    help=f"volume root checked for unclaimed data (default: {VOLUMES_ROOT})")
+    ap.add_argument("--since", type=float, metavar="DAYS", help="compare with the newest scan at least DAYS old")
+    ap.add_argument("--full", action="store_true", help="ignore the cache and relist every directory")
+    ap.add_argument("--big", type=float, default=16, metavar="MIB",
+                    help="re-stat files at least this large on every scan (default: 16)")
+    ap.add_argument("--workers", type=int, default=8, help="scanner threads (default: 8)")
+    ap.add_argument("-x", "--one-file-system", action="store_true", help="don't cross mount points")
+    ap.add_argument("--top", type=int, default=0, metavar="N", help="also list the N largest directories")
+    ap.add_argument("--no-save", action="store_true", help="don't update the cache or history")
+    ap.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = ap.parse_args()
+    args.root = os.path.abspath(args.root)
+
+    if args.paths:
+        mappings = [Mapping(os.path.abspath(p), "(path)", "—") for p in args.paths]
+    else:
+        mappings = volume_map(args.app)
+        if not mappings:
+            warn(f"No hostPath volumes or bind mounts found{' for ' + args.app if args.app else ''}")
+            return 0
+    scan_volumes_root = not args.paths and not args.app and os.path.isdir(args.root)
+    candidates = sorted({m.path for m in mappings if os.path.isdir(m.path)}
+                        | ({args.root} if scan_volumes_root else set()))
+    roots = [r for r in candidates if not any(o != r and _within(r, o) for o in candidates)]
+
+    state = load_state()
+    cache: Dict[str, Record] = state.get("dirs", {})
+    history: List[Dict[str, Any]] = state.get("history", [])
+
+    started = time.monotonic()
+    fresh, stats = scan(roots, cache, args.workers, int(args.big * (1 << 20)), args.one_file_system, args.full)
+    elapsed = time.monotonic() - started
+    totals = subtree_totals(fresh)
+
+    if scan_volumes_root:
+        mappings += [Mapping(p, "(unclaimed)", "unclaimed") for p in unclaimed(totals, mappings, args.root)
+                     if totals[p] >= 1 << 20]
+    now = time.time()
+    rows = build_rows(mappings, totals, history, now, args.since)
+
+    if not args.no_save:
+        kept = {p: r for p, r in cache.items() if not any(_within(p, root) for root in roots)}
+        kept.update(fresh)
+        history.append({"t": now, "usage": {r["path"]: r["bytes"] for r in rows if r["bytes"] is not None}})
+        try:
+            save_state({"dirs": kept, "history": history[-HISTORY_LIMIT:]})
+        except OSError as exc:
+            warn(f"Could not save {STATE_FILE.name}: {exc.strerror}")
+
+    top = sorted(totals.items(), key=lambda kv: kv[1], reverse=True)[: args.top] if args.top else []
+    if args.json:
+        print(json.dumps({"elapsed_s": round(elapsed, 3), "listed": stats.listed, "reused": stats.reused,
+                          "files": stats.files, "errors": stats.errors, "volumes": rows,
+                          "top": [{"path": p, "bytes": b} for p, b in top]}, indent=2))
+    else:
+        print_report(rows, stats, elapsed, top)
+        if not history[:-1] and not args.no_save:
+            info("First scan — growth is reported from the next run on")
+    if not fresh and roots:
+        err("Nothing could be scanned")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+duplicates.py — Find services running twice (docker/ and k3s/apps) on the Pi.
+
+Most services exist in both stacks (jellyfin, homarr, filebrowser, n8n,
+pihole, ...). The global README folds them into one entry, but nothing stops
+both copies from running at once — on a Pi that is hundreds of MB spent on
+a second Jellyfin nobody uses. This pairs docker/<stack>/ with
+k3s/apps/<app>/ offline, then checks a runtime snapshot for pairs where both
+sides are actually up:
+
+  - name   (+2)  frontmatter name or directory, ignoring case and punctuation
+  - image  (+2)  same image repository (tag/registry ignored; shared
+                 postgres/redis/... sidecars don't count)
+  - port   (+1)  a published / container / Service / NodePort port in common
+
+A pair scoring 2 or more is the same service. The snapshot is one
+`docker ps` + `docker stats --no-stream` and one `kubectl get pods -A` +
+`kubectl top pods -A`; either side may be missing (no docker, no cluster),
+in which case its copies count as stopped. The measured memory of the copy
+that is not kept is what the duplicate wastes. By default the k3s copy is
+kept (GitOps-managed, the production stack); --keep docker flips that.
+
+The stop plan is one command line to run from the repo root:
+  docker side   docker compose -f docker/<stack>/docker-compose.yml stop
+  k3s side      k3s/apps/<app>/setup.sh scale 0, plus `disable` where the
+                app has a deployment.yaml (replicas: 0 in git, so ArgoCD
+                doesn't scale it back — commit & push afterwards)
+
+Usage:
+  ./duplicates.py                          Running duplicates + stop plan
+  ./duplicates.py --all                    Every cross-stack pair, running or not
+  ./duplicates.py --keep docker            Stop the k3s copy instead
+  ./duplicates.py --json                   Machine-readable report
+  ./duplicates.py --record snap.json       Save the runtime snapshot for later
+  ./duplicates.py --fixture snap.json      Report from a recorded snapshot (offline)
+
+docker and kubectl are resolved from $DOCKER / $KUBECTL (see _k3s.py).
+fixtures/duplicates-snapshot.json is a recorded snapshot with jellyfin and
+homarr running in both stacks; the fakes in fixtures/ can replay it too:
+  ./duplicates.py --fixture fixtures/duplicates-snapshot.json
+  FAKE_DOCKER_SNAPSHOT=fixtures/duplicates-snapshot.json DOCKER="python3 fixtures/fake-docker.py" \
+  FAKE_KUBECTL_SNAPSHOT=fixtures/duplicates-snapshot.json KUBECTL="python3 fixtures/fake-kubectl.py" \
+      ./duplicates.py --record /tmp/snap.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import shlex
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import yaml
+
+from _k3s import (
+    APPS_DIR, BOLD, DIM, GREEN, NC, RED, REPO_ROOT, YELLOW,
+    app_manifests, catalog, compose_env, compose_file, discover_app_dirs, docker_stacks, err, expand_vars,
+    header, info, ok, parse_frontmatter, parse_quantity, pod_spec, run_docker, run_kubectl, warn, workloads,
+)
+
+
+MATCH_SCORE = 2
+# Images that show up as sidecars in many stacks — they say nothing about which service it is.
+GENERIC_IMAGES = {"postgres", "mariadb", "mysql", "redis", "valkey", "mongo", "busybox", "alpine"}
+PROJECT_LABEL = "com.docker.compose.project"
+
+
+# ─── Copies (offline, from the repo) ─────────────────────────────────────────
+
+
+@dataclass
+class Copy:
+    stack: str                                          # docker | k3s
+    directory: str
+    name: str
+    images: Set[str] = field(default_factory=set)
+    ports: Set[int] = field(default_factory=set)
+    namespace: str = ""                                 # k3s
+    workloads: List[str] = field(default_factory=list)  # k3s
+    project: str = ""                                   # docker compose project
+    containers: Set[str] = field(default_factory=set)   # docker container_name values
+    compose: Optional[Path] = None
+    running: List[str] = field(default_factory=list)    # containers / pods seen in the snapshot
+    memory: Optional[float] = None                      # bytes, measured
+
+    @property
+    def label(self) -> str:
+        return f"{self.stack}/{self.directory}"
+
+    def keys(self) -> Set[str]:
+        return {name_key(self.name), name_key(self.directory)} - {""}
+
+
+def name_key(value: Any) -> str:
+    return re.sub(r"[^a-z0-9]", "", str(value).lower())
+
+
+def image_key(ref: str) -> str:
+    """Repository name only: ghcr.io/foo/jellyfin:10.9@sha256:… → jellyfin."""
+    ref = re.sub(r"\$\{[^}]*\}", "", ref.strip().strip("\"'")).split("@", 1)[0]
+    last = ref.rstrip("/").rsplit("/", 1)[-1]
+    return last.split(":", 1)[0].lower()
+
+
+def _compose_ports(entries: Any, env: Dict[str, str]) -> Set[int]:
+    """Host and container side of every `ports:` entry (short or long syntax)."""
+    out: Set[int] = set()
+    for entry in entries or []:
+        if isinstance(entry, dict):
+            values = [entry.get("published"), entry.get("target")]
+        else:
+            text = expand_vars(str(entry), env) or ""
+            values = text.split("/", 1)[0].split(":")[-2:]
+        for v in values:
+            v = str(v or "").strip()
+            if v.isdigit():
+                out.add(int(v))
+    return out
+
+
+def docker_copies() -> Tuple[List[Copy], List[str]]:
+    copies: List[Copy] = []
+    notes: List[str] = []
+    for path in docker_stacks():
+        meta = parse_frontmatter(path / "README.md") or {}
+        copy = Copy("docker", path.name, str(meta.get("name") or path.name), project=path.name.lower(),
+                    compose=compose_file(path))
+        copies.append(copy)
+        if copy.compose is None:
+            notes.append(f"{copy.label}: no default compose file — matched by name only")
+            continue
+        env = compose_env(path)
+        try:
+            doc = yaml.safe_load(copy.compose.read_text(encoding="utf-8")) or {}
+        except yaml.YAMLError as exc:
+            notes.append(f"{copy.label}: invalid YAML ({exc}) — matched by name only")
+            continue
+        for svc_name, svc in (doc.get("services") or {}).items():
+            svc = svc or {}
+            if svc.get("image"):
+                copy.images.add(image_key(expand_vars(str(svc["image"]), env) or str(svc["image"])))
+            copy.ports |= _compose_ports(svc.get("ports"), env)
+            copy.containers.add(expand_vars(str(svc.get("container_name") or ""), env)
+                                or f"{copy.project}-{svc_name}-1")
+    return copies, notes
+
+
+def k3s_copies() -> List[Copy]:
+    """Every app dir, catalogued or not (forgejo has manifests but no README)."""
+    copies: List[Copy] = []
+    metas = {m["directory"]: m for m in catalog()}
+    for app_dir in discover_app_dirs(include_databases=False):
+        meta = metas.get(app_dir.name, {})
+        copy = Copy("k3s", app_dir.name, str(meta.get("name") or app_dir.name),
+                    namespace=str(meta.get("namespace") or ""))
+        if meta.get("external_port") and str(meta["external_port"]).isdigit():
+            copy.ports.add(int(meta["external_port"]))
+        docs = app_manifests(app_dir)
+        for wl in workloads(docs):
+            copy.workloads.append(wl["metadata"]["name"])
+            copy.namespace = copy.namespace or wl["metadata"].get("namespace", "")
+            for c in pod_spec(wl).get("containers") or []:
+                if c.get("image"):
+                    copy.images.add(image_key(str(c["image"])))
+                for p in c.get("ports") or []:
+                    copy.ports |= {int(p[k]) for k in ("containerPort", "hostPort") if str(p.get(k, "")).isdigit()}
+        for svc in (d for d in docs if d.get("kind") == "Service"):
+            for p in (svc.get("spec") or {}).get("ports") or []:
+                copy.ports |= {int(p[k]) for k in ("port", "nodePort") if str(p.get(k, "")).isdigit()}
+        copies.append(copy)
+    return copies
+
+
+# ─── Matching ────────────────────────────────────────────────────────────────
+
+
+@dataclass
+class Pair:
+    docker: Copy
+    k3s: Copy
+    score: int
+    reasons: List[str]
+
+    @property
+    def both_running(self) -> bool:
+        return bool(self.docker.running and self.k3s.running)
+
+
+def match(docker: List[Copy], k3s: List[Copy]) -> List[Pair]:
+    """Best k3s partner for each docker stack (each k3s app used at most once)."""
+    scored: List[Pair] = []
+    for d in docker:
+        for k in k3s:
+            reasons: List[str] = []
+            if d.keys() & k.keys():
+                reasons.append("name")
+            images = (d.images & k.images) - GENERIC_IMAGES
+            if images:
+                reasons.append(f"image {', '.join(sorted(images))}")
+            ports = d.ports & k.ports
+            if ports:
+                reasons.append(f"port {', '.join(str(p) for p in sorted(ports))}")
+            score = 2 * ("name" in reasons) + 2 * bool(images) + bool(ports)
+            if score >= MATCH_SCORE:
+                scored.append(Pair(d, k, score, reasons))
+    pairs: List[Pair] = []
+    taken: Set[str] = set()
+    for p in sorted(scored, key=lambda p: (-p.score, p.docker.directory, p.k3s.directory)):
+        if p.docker.label in taken or p.k3s.label in taken:
+            continue
+        taken |= {p.docker.label, p.k3s.label}
+        pairs.append(p)
+    return sorted(pairs, key=lambda p: p.docker.directory)
+
+
+# ─── Runtime snapshot ────────────────────────────────────────────────────────
+
+
+def _json_lines(text: str) -> List[Dict[str, Any]]:
+    return [json.loads(line) for line in text.splitlines() if line.strip().startswith("{")]
+
+
+def fetch_raw() -> Dict[str, Any]:
+    """docker ps/stats and kubectl pods/top; a side that can't be read is None."""
+    raw: Dict[str, Any] = {
+        "taken_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "docker": None,
+        "kubernetes": None,
+    }
+    res = run_docker(["ps", "--format", "{{json .}}"], timeout=30)
+    if res.returncode == 0:
+        stats = run_docker(["stats", "--no-stream", "--format", "{{json .}}"], timeout=60)
+        raw["docker"] = {
+            "ps": _json_lines(res.stdout),
+            "stats": _json_lines(stats.stdout) if stats.returncode == 0 else [],
+        }
+    else:
+        warn(f"docker ps failed — docker copies count as stopped ({res.stderr.strip()[:120]})")
+
+    res = run_kubectl(["get", "pods", "-A", "-o", "json"], timeout=60)
+    if res.returncode == 0:
+        top: List[Dict[str, str]] = []
+        usage = run_kubectl(["top", "pods", "-A", "--no-headers"], timeout=30)
+        if usage.returncode == 0:
+            for line in usage.stdout.splitlines():
+                cols = line.split()
+                if len(cols) >= 4:
+                    top.append({"namespace": cols[0], "pod": cols[1], "cpu": cols[2], "memory": cols[3]})
+        raw["kubernetes"] = {"pods": json.loads(res.stdout).get("items", []), "top": top}
+    else:
+        warn(f"kubectl get pods failed — k3s copies count as stopped ({res.stderr.strip()[:120]})")
+    return raw
+
+
+def _docker_memory(mem_usage: str) -> Optional[float]:
+    """`docker stats` MemUsage ("512.3MiB / 7.64GiB") → bytes used."""
+    used = mem_usage.split("/", 1)[0].strip()
+    return parse_quantity(used[:-1] if used.endswith("B") else used)
+
+
+def attach_runtime(docker: List[Copy], k3s: List[Copy], raw: Dict[str, Any]) -> None:
+    side = raw.get("docker") or {}
+    mem = {str(s.get("Name", "")): _docker_memory(str(s.get("MemUsage", ""))) for s in side.get("stats", [])}
+    for copy in docker:
+        for c in side.get("ps", []):
+            labels = dict(kv.split("=", 1) for kv in str(c.get("Labels", "")).split(",") if "=" in kv)
+            name = str(c.get("Names", ""))
+            if labels.get(PROJECT_LABEL) == copy.project or name in copy.containers:
+                copy.running.append(name)
+        used = [mem[n] for n in copy.running if mem.get(n) is not None]
+        copy.memory = sum(used) if used else None
+
+    side = raw.get("kubernetes") or {}
+    top = {(t["namespace"], t["pod"]): parse_quantity(t["memory"]) for t in side.get("top", [])}
+    for copy in k3s:
+        prefixes = tuple(f"{w}-" for w in copy.workloads or [copy.directory])
+        for pod in side.get("pods", []):
+            meta = pod.get("metadata") or {}
+            if (meta.get("namespace") == copy.namespace and meta.get("name", "").startswith(prefixes)
+                    and (pod.get("status") or {}).get("phase") == "Running"):
+                copy.running.append(meta["name"])
+        used = [top[(copy.namespace, p)] for p in copy.running if top.get((copy.namespace, p)) is not None]
+        copy.memory = sum(used) if used else None
+
+
+# ─── Plan ────────────────────────────────────────────────────────────────────
+
+
+def _rel(path: Path) -> str:
+    return path.relative_to(REPO_ROOT).as_posix()
+
+
+def stop_command(copy: Copy) -> str:
+    if copy.stack == "docker":
+        compose = copy.compose or (REPO_ROOT / "docker" / copy.directory / "docker-compose.yml")
+        return f"docker compose -f {shlex.quote(_rel(compose))} stop"
+    setup = APPS_DIR / copy.directory / "setup.sh"
+    steps = [f"{shlex.quote(_rel(setup))} scale 0"]
+    if (APPS_DIR / copy.directory / "deployment.yaml").is_file():
+        steps.insert(0, f"{shlex.quote(_rel(setup))} disable")
+    return " && ".join(steps)
+
+
+def redundant(pair: Pair, keep: str) -> Copy:
+    return pair.k3s if keep == "docker" else pair.docker
+
+
+# ─── Report ──────────────────────────────────────────────────────────────────
+
+
+def _mib(value: Optional[float]) -> str:
+    return f"{value / 2**20:.0f}Mi" if value is not None else "—"
+
+
+def _state(copy: Copy) -> str:
+    if not copy.running:
+        return f"{DIM}stopped{NC}"
+    return f"{GREEN}running{NC} {_mib(copy.memory)}"
+
+
+def print_report(pairs: List[Pair], keep: str, show_all: bool, taken_at: str) -> List[Pair]:
+    dups = [p for p in pairs if p.both_running]
+    shown = pairs if show_all else dups
+    header(f"Cross-stack duplicates — {len(pairs)} services in both stacks, {len(dups)} running twice"
+           + (f"  {DIM}(snapshot {taken_at}){NC}" if taken_at else ""))
+    if not shown:
+        ok("No service is running in both stacks")
+        return dups
+    width = max(len(p.docker.directory) for p in shown)
+    for p in shown:
+        mark = f"{RED}✗{NC}" if p.both_running else " "
+        print(f"  {mark} {BOLD}{p.docker.directory:<{width}}{NC}  docker {_state(p.docker)}"
+              f"  │  k3s {p.k3s.directory} {_state(p.k3s)}  {DIM}({'; '.join(p.reasons)}){NC}")
+    if not dups:
+        return dups
+
+    wasted = [redundant(p, keep).memory for p in dups]
+    total = sum(w for w in wasted if w is not None)
+    print("")
+    for p, w in zip(dups, wasted):
+        stop = redundant(p, keep)
+        print(f"  {YELLOW}{stop.label}{NC} duplicates {p.k3s.label if stop is p.docker else p.docker.label}"
+              f" — wastes {_mib(w)}")
+    unknown = sum(w is None for w in wasted)
+    info(f"Stopping the {'k3s' if keep == 'docker' else 'docker'} copies reclaims ~{_mib(total)}"
+         + (f" ({unknown} without a memory reading)" if unknown else ""))
+    print("")
+    print(f"  {BOLD}Plan{NC} {DIM}(from {REPO_ROOT}){NC}")
+    print("    " + " && ".join(stop_command(redundant(p, keep)) for p in dups))
+    if keep == "docker" and any((APPS_DIR / p.k3s.directory / "deployment.yaml").is_file() for p in dups):
+        print(f"  {DIM}then commit & push the replicas: 0 change so ArgoCD keeps them down{NC}")
+    return dups
+
+
+def as_json(pairs: List[Pair], keep: str, taken_at: str) -> Dict[str, Any]:
+    def side(c: Copy) -> Dict[str, Any]:
+        return {"directory": c.directory, "name": c.name, "running": c.running, "memory_bytes": c.memory}
+
+    dups = [p for p in pairs if p.both_running]
+    return {
+        "taken_at": taken_at,
+        "keep": keep,
+        "pairs": [
+            {"docker": side(p.docker), "k3s": side(p.k3s), "score": p.score, "reasons": p.reasons,
+             "duplicate": p.both_running,
+             "stop": stop_command(redundant(p, keep)) if p.both_running else None,
+             "wasted_bytes": redundant(p, keep).memory if p.both_running else None}
+            for p in pairs
+        ],
+        "wasted_bytes": sum(redundant(p, keep).memory or 0 for p in dups),
+        "plan": " && ".join(stop_command(redundant(p, keep)) for p in dups),
+    }
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Find services running in both docker/ and k3s/apps.")
+    ap.add_argument("--keep", choices=("k3s", "docker"), default="k3s",
+                    help="which copy to keep running (default: k3s)")
+    ap.add_argument("--all", action="store_true", help="list every cross-stack pair, not just running ones")
+    ap.add_argument("--json", action="store_true", help="machine-readable output")
+    src = ap.add_mutually_exclusive_group()
+    src.add_argument("--record", type=Path, metavar="FILE", help="save the runtime snapshot to FILE")
+    src.add_argument("--fixture", type=Path, metavar="FILE", help="use a recorded snapshot instead of docker/kubectl")
+    args = ap.parse_args()
+
+    docker, notes = docker_copies()
+    k3s = k3s_copies()
+    pairs = match(docker, k3s)
+
+    if args.fixture:
+        try:
+            raw = json.loads(args.fixture.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as exc:
+            err(f"Cannot read fixture {args.fixture}: {exc}")
+            return 1
+    else:
+        raw = fetch_raw()
+        if raw["docker"] is None and raw["kubernetes"] is None:
+            err("Neither docker nor kubectl answered — nothing to compare")
+            return 1
+    if args.record:
+        args.record.write_text(json.dumps(raw, indent=2) + "\n", encoding="utf-8")
+        info(f"Snapshot saved to {args.record}")
+    attach_runtime(docker, k3s, raw)
+
+    if args.json:
+        json.dump(as_json(pairs, args.keep, raw.get("taken_at", "")), sys.stdout, indent=2)
+        print("")
+        return 0
+    for note in notes:
+        warn(note)
+    print_report(pairs, args.keep, args.all, raw.get("taken_at", ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
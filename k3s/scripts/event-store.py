@@ -0,0 +1,582 @@
+#!/usr/bin/env python3
+"""
+event-store.py — Persistent, indexed history of OOM kills, BackOffs and restarts.
+
+`setup.sh events` shows whatever the API server still holds, and Events
+expire after about an hour — an overnight OOM storm is gone by breakfast.
+This records Events plus container restart counters into SQLite
+(k3s/.events.db, gitignored) so they can be queried days later.
+
+What is stored:
+  - Warning Events, and the few Normal ones that matter here (Killing,
+    SystemOOM, ...); --all-types keeps every Event
+  - per container, `restartCount` from the pod list (reason "Restarted") and
+    every OOMKilled termination state (reason "OOMKilled") — the kubelet
+    doesn't emit an Event for either
+
+Storage is deduplicated and compacted: every source (an Event uid, a
+container's restart counter) only ever adds the increase in its count since
+it was last seen, and repeats of the same reason on the same object
+collapse into one counted interval [first_seen, last_seen] while they keep
+coming within --gap minutes of each other. Intervals never cross a UTC day,
+so per-day figures are exact. Indexes on namespace, object, reason, app and
+time keep the report queries to index range scans. Rows older than --retain
+days are dropped on every write, and the oldest go first if the file would
+outgrow --max-mb.
+
+Recording is meant for cron on the node (or --watch in a tmux pane):
+
+  */10 * * * *  cd ~/Home-Server-Lab/k3s/scripts && ./event-store.py --record -q
+
+Usage:
+  ./event-store.py --record                One read of events + pods into the store
+  ./event-store.py --watch 60              Record every 60s until interrupted
+  ./event-store.py --ingest dump.json ...  Load recorded `kubectl get events,pods -A -o json`
+  ./event-store.py                         Top OOM-killed apps + restarts per app per day (7 days)
+  ./event-store.py --oom --days 7          Top OOM-killed apps (and node OOMs) this week
+  ./event-store.py --restarts --days 14    Restarts per app per day
+  ./event-store.py --app homarr            One app's stored history
+  ./event-store.py --compact               Merge intervals and apply retention now
+  ./event-store.py --json                  Machine-readable report
+
+--at pins "now" (windows and retention) when replaying old dumps, e.g. the
+two recorded reads of an overnight OOM / crash-loop in fixtures/:
+  ./event-store.py --db /tmp/events.db --at 2026-10-18T08:00:00Z \
+      --ingest fixtures/events-2026-10-18T0210Z.json fixtures/events-2026-10-18T0740Z.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from _k3s import (
+    BOLD, DIM, K3S_ROOT, NC, RED, YELLOW,
+    discover_app_dirs, err, header, info, load_yaml_docs, manifest_files, ok, run_kubectl, warn, workloads,
+)
+
+
+DB_FILE = K3S_ROOT / ".events.db"
+SCHEMA_VERSION = 1
+OOM_REASONS = ("OOMKilled", "OOMKilling", "SystemOOM")
+RESTARTED = "Restarted"
+KEEP_NORMAL = {"Killing", "SystemOOM", "Rebooted", "NodeNotReady", "Preempting"}
+DAY = 86400
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS intervals (
+    id         INTEGER PRIMARY KEY,
+    namespace  TEXT NOT NULL,
+    kind       TEXT NOT NULL,
+    object     TEXT NOT NULL,
+    container  TEXT NOT NULL,
+    app        TEXT NOT NULL,
+    reason     TEXT NOT NULL,
+    type       TEXT NOT NULL,
+    message    TEXT NOT NULL,
+    first_seen INTEGER NOT NULL,
+    last_seen  INTEGER NOT NULL,
+    count      INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sources (
+    uid       TEXT PRIMARY KEY,
+    interval  INTEGER NOT NULL,
+    count     INTEGER NOT NULL,
+    last_seen INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS intervals_namespace ON intervals (namespace, last_seen);
+CREATE INDEX IF NOT EXISTS intervals_object    ON intervals (object, last_seen);
+CREATE INDEX IF NOT EXISTS intervals_reason    ON intervals (reason, last_seen);
+CREATE INDEX IF NOT EXISTS intervals_app       ON intervals (app, reason, last_seen);
+CREATE INDEX IF NOT EXISTS intervals_time      ON intervals (last_seen);
+CREATE INDEX IF NOT EXISTS intervals_group     ON intervals (namespace, kind, object, container, reason, last_seen);
+CREATE INDEX IF NOT EXISTS sources_interval    ON sources (interval);
+"""
+
+GROUP = ("namespace", "kind", "object", "container", "reason")
+
+
+# ─── Records ─────────────────────────────────────────────────────────────────
+
+
+@dataclass
+class Record:
+    uid: str                    # dedup key of the source (Event uid, pod uid/container/...)
+    namespace: str
+    kind: str
+    object: str
+    container: str
+    reason: str
+    type: str
+    message: str
+    first: int
+    last: int
+    count: int                  # cumulative, as reported by the source
+
+    def group(self) -> Tuple[str, ...]:
+        return tuple(getattr(self, k) for k in GROUP)
+
+
+def _ts(value: Any) -> Optional[int]:
+    """RFC 3339 timestamp ("2026-10-19T03:12:45Z", with or without micros) → epoch seconds."""
+    if not value:
+        return None
+    try:
+        return int(datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp())
+    except ValueError:
+        return None
+
+
+def _day(ts: int) -> int:
+    return ts - ts % DAY
+
+
+def _field_container(field_path: str) -> str:
+    m = re.search(r"containers\{([^}]+)\}", field_path or "")
+    return m.group(1) if m else ""
+
+
+def from_event(obj: Dict[str, Any], now: int, all_types: bool = False) -> Optional[Record]:
+    """core/v1 or events.k8s.io/v1 Event → Record (None if it's not worth keeping)."""
+    meta = obj.get("metadata") or {}
+    involved = obj.get("involvedObject") or obj.get("regarding") or {}
+    reason, etype = str(obj.get("reason") or ""), str(obj.get("type") or "Normal")
+    if not reason or not (all_types or etype == "Warning" or reason in KEEP_NORMAL or reason in OOM_REASONS):
+        return None
+    series = obj.get("series") or {}
+    first = (_ts(obj.get("firstTimestamp")) or _ts(obj.get("eventTime"))
+             or _ts(obj.get("deprecatedFirstTimestamp")) or _ts(meta.get("creationTimestamp")) or now)
+    last = (_ts(obj.get("lastTimestamp")) or _ts(series.get("lastObservedTime"))
+            or _ts(obj.get("deprecatedLastTimestamp")) or first)
+    namespace = str(involved.get("namespace") or meta.get("namespace") or "")
+    return Record(
+        uid=str(meta.get("uid") or f"event/{namespace}/{meta.get('name', '')}"),
+        namespace=namespace,
+        kind=str(involved.get("kind") or ""),
+        object=str(involved.get("name") or ""),
+        container=_field_container(str(involved.get("fieldPath") or "")),
+        reason=reason,
+        type=etype,
+        message=str(obj.get("message") or obj.get("note") or "").strip(),
+        first=min(first, last),
+        last=last,
+        count=int(obj.get("count") or series.get("count") or obj.get("deprecatedCount") or 1),
+    )
+
+
+def from_pod(pod: Dict[str, Any], now: int) -> List[Record]:
+    """Restart counters and OOMKilled terminations of one pod's containers."""
+    meta, status = pod.get("metadata") or {}, pod.get("status") or {}
+    uid = meta.get("uid") or f"{meta.get('namespace')}/{meta.get('name')}"
+    out: List[Record] = []
+    for cs in (status.get("initContainerStatuses") or []) + (status.get("containerStatuses") or []):
+        name = str(cs.get("name") or "")
+        last_term = (cs.get("lastState") or {}).get("terminated") or {}
+
+        def record(key: str, reason: str, message: str, at: Optional[int], count: int) -> Record:
+            return Record(f"pod/{uid}/{name}/{key}", str(meta.get("namespace") or ""), "Pod",
+                          str(meta.get("name") or ""), name, reason, "Warning", message, at or now, at or now, count)
+
+        restarts = int(cs.get("restartCount") or 0)
+        if restarts:
+            exit_info = f", last exit {last_term.get('reason', '?')} ({last_term.get('exitCode', '?')})" if last_term else ""
+            out.append(record("restarts", RESTARTED, f"restartCount {restarts}{exit_info}",
+                              _ts(last_term.get("finishedAt")), restarts))
+        for term in (last_term, (cs.get("state") or {}).get("terminated") or {}):
+            if term.get("reason") == "OOMKilled":
+                finished = term.get("finishedAt") or ""
+                out.append(record(f"oom/{finished}", "OOMKilled",
+                                  f"OOMKilled (exit {term.get('exitCode', 137)})", _ts(finished), 1))
+    return out
+
+
+def records_from(doc: Any, now: int, all_types: bool = False) -> List[Record]:
+    """Records from a List / EventList / PodList (or a bare object, or a list of them)."""
+    items = doc.get("items", [doc]) if isinstance(doc, dict) else doc if isinstance(doc, list) else []
+    out: List[Record] = []
+    for obj in items:
+        if not isinstance(obj, dict):
+            continue
+        kind = obj.get("kind")
+        if kind == "Pod" or (kind is None and "containerStatuses" in (obj.get("status") or {})):
+            out += from_pod(obj, now)
+        elif kind == "Event" or "involvedObject" in obj or "regarding" in obj:
+            rec = from_event(obj, now, all_types)
+            if rec is not None:
+                out.append(rec)
+    return out
+
+
+# ─── App index ───────────────────────────────────────────────────────────────
+
+
+_POD_SUFFIX = re.compile(r"(-[a-z0-9]{6,10})?-[a-z0-9]{5}$")
+
+
+class AppIndex:
+    """(namespace, object name) → app directory, from the workloads in k3s/apps and k3s/databases."""
+
+    def __init__(self) -> None:
+        self.prefixes: Dict[str, List[Tuple[str, str]]] = {}
+        for app_dir in discover_app_dirs():
+            for path in manifest_files(app_dir):
+                for wl in workloads(load_yaml_docs(path)):
+                    meta = wl.get("metadata") or {}
+                    self.prefixes.setdefault(str(meta.get("namespace") or ""), []).append(
+                        (str(meta.get("name") or ""), app_dir.name))
+        for entries in self.prefixes.values():
+            entries.sort(key=lambda e: -len(e[0]))
+
+    def app(self, namespace: str, kind: str, name: str) -> str:
+        for wl, app in self.prefixes.get(namespace, []):
+            if name == wl or name.startswith(f"{wl}-"):
+                return app
+        if kind == "Pod":
+            return _POD_SUFFIX.sub("", name)
+        return name
+
+
+# ─── Store ───────────────────────────────────────────────────────────────────
+
+
+def connect(path: Path, readonly: bool = False) -> sqlite3.Connection:
+    """The store at `path`, created on first use — unless readonly, which never
+    writes: a missing or never-initialised file opens as an empty in-memory store."""
+    if readonly:
+        if path.is_file():
+            db = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+            if db.execute("PRAGMA user_version").fetchone()[0] != 0:
+                db.row_factory = sqlite3.Row
+                return db
+            db.close()
+        path = Path(":memory:")
+    db = sqlite3.connect(str(path))
+    db.row_factory = sqlite3.Row
+    if db.execute("PRAGMA user_version").fetchone()[0] == 0:
+        db.execute("PRAGMA auto_vacuum = INCREMENTAL")      # only takes effect before the first table
+        db.executescript(SCHEMA)
+        db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        db.commit()
+    return db
+
+
+def _open_interval(db: sqlite3.Connection, rec: Record, at: int, gap: int) -> Optional[sqlite3.Row]:
+    """The group's interval that `at` continues: same UTC day, within `gap` of its end."""
+    return db.execute(
+        f"SELECT * FROM intervals WHERE {' AND '.join(f'{k} = ?' for k in GROUP)}"
+        " AND last_seen >= ? AND first_seen >= ? ORDER BY last_seen DESC LIMIT 1",
+        (*rec.group(), at - gap, _day(rec.last)),
+    ).fetchone()
+
+
+def ingest(db: sqlite3.Connection, records: Iterable[Record], apps: AppIndex, gap: int) -> Tuple[int, int, Set[Tuple[str, ...]]]:
+    """Add the increase of every source; returns (sources changed, unchanged, touched groups)."""
+    changed = same = 0
+    touched: Set[Tuple[str, ...]] = set()
+    for rec in records:
+        src = db.execute("SELECT * FROM sources WHERE uid = ?", (rec.uid,)).fetchone()
+        if src is None:
+            delta, at = rec.count, rec.first
+        else:
+            delta, at = max(rec.count - src["count"], 0), src["last_seen"]
+            if delta == 0 and rec.last <= src["last_seen"]:
+                same += 1
+                continue
+        row = _open_interval(db, rec, at, gap)
+        if row is not None:
+            db.execute(
+                "UPDATE intervals SET count = count + ?, first_seen = MIN(first_seen, ?),"
+                " last_seen = MAX(last_seen, ?), message = ?, type = ? WHERE id = ?",
+                (delta, max(rec.first, _day(rec.last)), rec.last, rec.message, rec.type, row["id"]))
+            interval = row["id"]
+        elif delta == 0:
+            interval = src["interval"]          # seen again, nothing new happened
+        else:
+            first = rec.first if src is None else rec.last
+            interval = db.execute(
+                "INSERT INTO intervals (namespace, kind, object, container, app, reason, type, message,"
+                " first_seen, last_seen, count) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (rec.namespace, rec.kind, rec.object, rec.container,
+                 apps.app(rec.namespace, rec.kind, rec.object), rec.reason, rec.type, rec.message,
+                 max(first, _day(rec.last)), rec.last, delta),
+            ).lastrowid
+        db.execute(
+            "INSERT INTO sources (uid, interval, count, last_seen) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT(uid) DO UPDATE SET interval = excluded.interval, count = MAX(count, excluded.count),"
+            " last_seen = MAX(last_seen, excluded.last_seen)",
+            (rec.uid, interval, rec.count, rec.last))
+        changed += 1
+        touched.add(rec.group())
+    db.commit()
+    return changed, same, touched
+
+
+def compact(db: sqlite3.Connection, gap: int, groups: Optional[Iterable[Tuple[str, ...]]] = None) -> int:
+    """Merge a group's intervals that touch (same UTC day, ≤ gap apart); returns rows removed."""
+    if groups is None:
+        groups = [tuple(r) for r in db.execute(f"SELECT DISTINCT {', '.join(GROUP)} FROM intervals")]
+    removed = 0
+    where = " AND ".join(f"{k} = ?" for k in GROUP)
+    for group in groups:
+        rows = db.execute(f"SELECT * FROM intervals WHERE {where} ORDER BY first_seen, id", group).fetchall()
+        keep = None
+        for row in rows:
+            if (keep is not None and _day(row["first_seen"]) == _day(keep["first_seen"])
+                    and row["first_seen"] - keep["last_seen"] <= gap):
+                last = max(keep["last_seen"], row["last_seen"])
+                message = row["message"] if row["last_seen"] >= keep["last_seen"] else keep["message"]
+                db.execute("UPDATE intervals SET count = count + ?, last_seen = ?, message = ? WHERE id = ?",
+                           (row["count"], last, message, keep["id"]))
+                db.execute("UPDATE sources SET interval = ? WHERE interval = ?", (keep["id"], row["id"]))
+                db.execute("DELETE FROM intervals WHERE id = ?", (row["id"],))
+                keep = db.execute("SELECT * FROM intervals WHERE id = ?", (keep["id"],)).fetchone()
+                removed += 1
+            else:
+                keep = row
+    db.commit()
+    return removed
+
+
+def _size(db: sqlite3.Connection) -> int:
+    return db.execute("PRAGMA page_count").fetchone()[0] * db.execute("PRAGMA page_size").fetchone()[0]
+
+
+def prune(db: sqlite3.Connection, now: int, retain_days: float, max_bytes: int) -> int:
+    """Drop rows past retention, then the oldest 10% at a time while over max_bytes."""
+    cutoff = now - int(retain_days * DAY)
+    dropped = db.execute("DELETE FROM intervals WHERE last_seen < ?", (cutoff,)).rowcount
+    db.execute("DELETE FROM sources WHERE last_seen < ?", (cutoff,))
+    db.commit()
+    db.execute("PRAGMA incremental_vacuum")
+    while _size(db) > max_bytes:
+        total = db.execute("SELECT COUNT(*) FROM intervals").fetchone()[0]
+        if not total:
+            break
+        oldest = db.execute("SELECT last_seen FROM intervals ORDER BY last_seen LIMIT 1 OFFSET ?",
+                            (max(total // 10, 1) - 1,)).fetchone()[0]
+        dropped += db.execute("DELETE FROM intervals WHERE last_seen <= ?", (oldest,)).rowcount
+        db.execute("DELETE FROM sources WHERE interval NOT IN (SELECT id FROM intervals)")
+        db.commit()
+        db.execute("PRAGMA incremental_vacuum")
+    return dropped
+
+
+# ─── Recording ───────────────────────────────────────────────────────────────
+
+
+def fetch(now: int, all_types: bool) -> Tuple[List[Record], Optional[str]]:
+    """One `kubectl get events -A` + `kubectl get pods -A` read."""
+    events = run_kubectl(["get", "events", "-A", "-o", "json"], timeout=60)
+    if events.returncode != 0:
+        return [], events.stderr.strip() or "kubectl get events failed"
+    records = records_from(json.loads(events.stdout), now, all_types)
+    pods = run_kubectl(["get", "pods", "-A", "-o", "json"], timeout=60)
+    if pods.returncode == 0:
+        records += records_from(json.loads(pods.stdout), now)
+    else:
+        warn(f"kubectl get pods failed — restart counters not recorded ({pods.stderr.strip()[:120]})")
+    return records, None
+
+
+def store(db: sqlite3.Connection, records: List[Record], apps: AppIndex, args: argparse.Namespace, now: int) -> None:
+    changed, same, touched = ingest(db, records, apps, args.gap * 60)
+    merged = compact(db, args.gap * 60, touched)
+    dropped = prune(db, now, args.retain, int(args.max_mb * 2**20))
+    if not args.quiet or dropped:
+        ok(f"{changed} new/updated, {same} unchanged" + (f", {merged} merged" if merged else "")
+           + (f", {dropped} expired" if dropped else "") + f" → {args.db.name} ({_size(db) / 2**20:.1f} MiB)")
+
+
+# ─── Queries ─────────────────────────────────────────────────────────────────
+
+
+def top_oom(db: sqlite3.Connection, since: int, limit: int, app: Optional[str] = None) -> List[Dict[str, Any]]:
+    """OOM kills per owning app — a Deployment's pods get new names on every
+    restart, so per pod the same leak would show up as many one-off kills."""
+    sql = ("SELECT app, namespace, SUM(count) AS kills, COUNT(DISTINCT object) AS pods,"
+           " MAX(last_seen) AS last FROM intervals"
+           f" WHERE kind = 'Pod' AND reason IN ({', '.join('?' * len(OOM_REASONS))}) AND last_seen >= ?")
+    params: List[Any] = [*OOM_REASONS, since]
+    if app:
+        sql += " AND app = ?"
+        params.append(app)
+    sql += " GROUP BY namespace, app ORDER BY kills DESC, last DESC LIMIT ?"
+    return [dict(r) for r in db.execute(sql, (*params, limit))]
+
+
+def node_oom(db: sqlite3.Connection, since: int) -> List[Dict[str, Any]]:
+    """Node-level OOMs (SystemOOM) — the kernel killed something outside any pod's limit."""
+    sql = ("SELECT object AS node, SUM(count) AS kills, MAX(last_seen) AS last FROM intervals"
+           f" WHERE kind = 'Node' AND reason IN ({', '.join('?' * len(OOM_REASONS))}) AND last_seen >= ?"
+           " GROUP BY object ORDER BY kills DESC")
+    return [dict(r) for r in db.execute(sql, (*OOM_REASONS, since))]
+
+
+def restarts_per_day(db: sqlite3.Connection, since: int, app: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+    """{app: {YYYY-MM-DD: restarts}}."""
+    sql = ("SELECT app, date(last_seen, 'unixepoch') AS day, SUM(count) AS n FROM intervals"
+           " WHERE reason = ? AND last_seen >= ?")
+    params: List[Any] = [RESTARTED, since]
+    if app:
+        sql += " AND app = ?"
+        params.append(app)
+    out: Dict[str, Dict[str, int]] = {}
+    for r in db.execute(sql + " GROUP BY app, day", params):
+        out.setdefault(r["app"], {})[r["day"]] = r["n"]
+    return out
+
+
+def history(db: sqlite3.Connection, since: int, app: str, limit: int) -> List[Dict[str, Any]]:
+    return [dict(r) for r in db.execute(
+        "SELECT * FROM intervals WHERE app = ? AND last_seen >= ? ORDER BY last_seen DESC LIMIT ?",
+        (app, since, limit))]
+
+
+# ─── Report ──────────────────────────────────────────────────────────────────
+
+
+def _when(ts: int) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%m-%d %H:%M")
+
+
+def print_oom(rows: List[Dict[str, Any]], nodes: List[Dict[str, Any]], days: float) -> None:
+    header(f"Top OOM-killed apps — last {days:g} days")
+    if not rows and not nodes:
+        ok("No OOM kills recorded")
+        return
+    apps = [f"{r['namespace']}/{r['app']}" for r in rows]
+    width = max((len(a) for a in apps), default=0)
+    for r, app in zip(rows, apps):
+        pods = f"{r['pods']} pods" if r["pods"] != 1 else "1 pod"
+        print(f"  {RED}{r['kills']:>4}×{NC}  {app:<{width}}  {DIM}{pods}, last {_when(r['last'])}{NC}")
+    for r in nodes:
+        print(f"  {RED}{r['kills']:>4}×{NC}  node {r['node']}  {DIM}system OOM, last {_when(r['last'])}{NC}")
+
+
+def print_restarts(table: Dict[str, Dict[str, int]], now: int, days: float) -> None:
+    header(f"Restarts per app per day — last {days:g} days")
+    if not table:
+        ok("No restarts recorded")
+        return
+    dates = [datetime.fromtimestamp(_day(now) - i * DAY, timezone.utc).strftime("%Y-%m-%d")
+             for i in reversed(range(max(int(days), 1)))]
+    width = max(len(a) for a in table)
+    print(f"  {BOLD}{'app':<{width}}{NC}  " + " ".join(f"{d[5:]:>5}" for d in dates) + "  total")
+    for app in sorted(table, key=lambda a: -sum(table[a].values())):
+        cells = [table[app].get(d, 0) for d in dates]
+        line = " ".join(f"{YELLOW}{c:>5}{NC}" if c else f"{DIM}{'·':>5}{NC}" for c in cells)
+        print(f"  {app:<{width}}  {line}  {sum(table[app].values()):>5}")
+
+
+def print_history(rows: List[Dict[str, Any]], app: str, days: float) -> None:
+    header(f"Stored events — {app}, last {days:g} days")
+    if not rows:
+        info("Nothing recorded for this app")
+        return
+    for r in rows:
+        span = _when(r["first_seen"]) + (f"–{_when(r['last_seen'])[6:]}" if r["last_seen"] != r["first_seen"] else "")
+        colour = RED if r["type"] == "Warning" else DIM
+        obj = r["object"] + (f"/{r['container']}" if r["container"] else "")
+        print(f"  {DIM}{span:<17}{NC} {colour}{r['reason']:<16}{NC} {r['count']:>4}×  {obj}  {DIM}{r['message'][:80]}{NC}")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Record OOM kills, BackOffs and restarts into SQLite and query them.")
+    mode = ap.add_mutually_exclusive_group()
+    mode.add_argument("--record", action="store_true", help="read events + pods from the cluster once")
+    mode.add_argument("--watch", type=int, metavar="SECONDS", help="record every SECONDS until interrupted")
+    mode.add_argument("--ingest", nargs="+", type=Path, metavar="FILE", help="load recorded kubectl JSON dumps")
+    mode.add_argument("--compact", action="store_true", help="merge intervals and apply retention")
+    ap.add_argument("--oom", action="store_true", help="report: top OOM-killed apps, plus node OOMs")
+    ap.add_argument("--restarts", action="store_true", help="report: restarts per app per day")
+    ap.add_argument("--app", help="report: one app's stored history")
+    ap.add_argument("--days", type=float, default=7, help="report window (default 7)")
+    ap.add_argument("--limit", type=int, default=10, help="rows per report (default 10)")
+    ap.add_argument("--db", type=Path, default=DB_FILE, help=f"database (default k3s/{DB_FILE.name})")
+    ap.add_argument("--retain", type=float, default=30, metavar="DAYS", help="keep DAYS of history (default 30)")
+    ap.add_argument("--max-mb", type=float, default=32, help="cap the database size (default 32)")
+    ap.add_argument("--gap", type=int, default=60, metavar="MIN",
+                    help="repeats within MIN minutes extend one interval (default 60)")
+    ap.add_argument("--all-types", action="store_true", help="store Normal events too")
+    ap.add_argument("--at", help="evaluate windows and retention as of this UTC time (replaying dumps)")
+    ap.add_argument("--json", action="store_true", help="machine-readable report")
+    ap.add_argument("-q", "--quiet", action="store_true", help="recording: only report problems")
+    args = ap.parse_args()
+
+    now = _ts(args.at) if args.at else int(time.time())
+    if now is None:
+        err(f"--at: cannot parse {args.at!r} (use 2026-10-19T08:00:00Z)")
+        return 1
+    # Reports only read: they must not leave an empty k3s/.events.db behind
+    db = connect(args.db, readonly=not (args.record or args.watch or args.ingest or args.compact))
+
+    if args.record or args.watch:
+        apps = AppIndex()
+        while True:
+            stamp = int(time.time()) if not args.at else now
+            records, problem = fetch(stamp, args.all_types)
+            if problem:
+                err(problem)
+                if not args.watch:
+                    return 1
+            else:
+                store(db, records, apps, args, stamp)
+            if not args.watch:
+                return 0
+            try:
+                time.sleep(args.watch)
+            except KeyboardInterrupt:
+                return 0
+    if args.ingest:
+        records: List[Record] = []
+        for path in args.ingest:
+            try:
+                records += records_from(json.loads(path.read_text(encoding="utf-8")), now, args.all_types)
+            except (OSError, json.JSONDecodeError) as exc:
+                err(f"Cannot read {path}: {exc}")
+                return 1
+        store(db, records, AppIndex(), args, now)
+        return 0
+    if args.compact:
+        merged = compact(db, args.gap * 60)
+        dropped = prune(db, now, args.retain, int(args.max_mb * 2**20))
+        ok(f"{merged} interval(s) merged, {dropped} expired → {_size(db) / 2**20:.1f} MiB")
+        return 0
+
+    since = now - int(args.days * DAY)
+    show_all = not (args.oom or args.restarts or args.app)
+    report: Dict[str, Any] = {}
+    if args.oom or show_all or args.app:
+        report["oom"] = top_oom(db, since, args.limit, args.app)
+        report["node_oom"] = [] if args.app else node_oom(db, since)
+    if args.restarts or show_all or args.app:
+        report["restarts"] = restarts_per_day(db, since, args.app)
+    if args.app:
+        report["history"] = history(db, since, args.app, args.limit * 3)
+
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print("")
+        return 0
+    if not db.execute("SELECT 1 FROM intervals LIMIT 1").fetchone():
+        info(f"Nothing stored in {args.db.name} yet — run ./event-store.py --record (see --help)")
+        return 0
+    if "history" in report:
+        print_history(report["history"], args.app, args.days)
+    if "oom" in report:
+        print_oom(report["oom"], report["node_oom"], args.days)
+    if "restarts" in report:
+        print_restarts(report["restarts"], now, args.days)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
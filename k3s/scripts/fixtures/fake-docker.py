@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+fake-docker.py — Stand-in for the `docker` calls compose-up.py and duplicates.py make.
+
+Nothing is started: `compose up` stamps the stack (the cwd) in a state dir,
+and `compose ps` reports its services as running, with every service that
+has a healthcheck "starting" until FAKE_DOCKER_DELAY seconds after its up.
+
+  cd k3s/scripts
+  DOCKER="python3 $PWD/fixtures/fake-docker.py" ./compose-up.py
+
+(absolute path: compose-up.py runs docker from each stack's directory)
+
+  FAKE_DOCKER_STATE      state dir (default: $TMPDIR/fake-docker)
+  FAKE_DOCKER_DELAY      seconds from up to healthy (default: 1)
+  FAKE_DOCKER_UNHEALTHY  comma-separated stacks whose healthchecks fail
+  FAKE_DOCKER_FAIL       comma-separated stacks whose `compose up` fails
+
+`network inspect` fails until `network create` has made the network.
+
+`ps` / `stats --no-stream` (with `--format '{{json .}}'`) replay the docker
+side of a duplicates.py snapshot, so `./duplicates.py --record` runs offline:
+
+  FAKE_DOCKER_SNAPSHOT   snapshot file (e.g. fixtures/duplicates-snapshot.json)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+
+STATE = Path(os.environ.get("FAKE_DOCKER_STATE") or Path(tempfile.gettempdir()) / "fake-docker")
+DELAY = float(os.environ.get("FAKE_DOCKER_DELAY", "1"))
+
+
+def _stacks(var: str) -> set:
+    return {s for s in os.environ.get(var, "").split(",") if s}
+
+
+def network(args: list) -> int:
+    nets = STATE / "networks"
+    nets.mkdir(parents=True, exist_ok=True)
+    if args[:1] == ["inspect"] and len(args) > 1:
+        return 0 if (nets / args[1]).exists() else 1
+    if args[:1] == ["create"] and len(args) > 1:
+        (nets / args[1]).touch()
+        print(args[1])
+        return 0
+    return 1
+
+
+def compose(args: list) -> int:
+    stack = Path.cwd().name
+    compose_file = "docker-compose.yml"
+    if args[:1] == ["-f"] and len(args) > 1:
+        compose_file, args = args[1], args[2:]
+    stamp = STATE / "stacks" / stack
+    if args[:1] == ["up"]:
+        if stack in _stacks("FAKE_DOCKER_FAIL"):
+            print(f"Error response from daemon: {stack} failed to start (FAKE_DOCKER_FAIL)", file=sys.stderr)
+            return 1
+        time.sleep(0.1)
+        stamp.parent.mkdir(parents=True, exist_ok=True)
+        stamp.write_text(str(time.time()), encoding="utf-8")
+        return 0
+    if args[:1] == ["ps"]:
+        if not stamp.exists():
+            return 0
+        doc = yaml.safe_load(Path(compose_file).read_text(encoding="utf-8")) or {}
+        up = time.time() - float(stamp.read_text(encoding="utf-8")) >= DELAY
+        for name, svc in (doc.get("services") or {}).items():
+            health = ""
+            if (svc or {}).get("healthcheck"):
+                health = "starting" if not up else "unhealthy" if stack in _stacks("FAKE_DOCKER_UNHEALTHY") else "healthy"
+            container = re.sub(r"\$\{\w+:?-([^}]*)\}", r"\1", str((svc or {}).get("container_name") or ""))
+            print(json.dumps({"Name": container or f"{stack}-{name}-1",
+                              "Service": name, "State": "running", "Health": health, "ExitCode": 0}))
+        return 0
+    return 1
+
+
+def snapshot(what: str) -> int:
+    path = os.environ.get("FAKE_DOCKER_SNAPSHOT")
+    if not path:
+        print("fake-docker: set FAKE_DOCKER_SNAPSHOT to answer ps/stats", file=sys.stderr)
+        return 1
+    side = json.loads(Path(path).read_text(encoding="utf-8")).get("docker") or {}
+    for entry in side.get(what) or []:
+        print(json.dumps(entry))
+    return 0
+
+
+def main() -> int:
+    args = sys.argv[1:]
+    if args[:1] in (["ps"], ["stats"]):
+        return snapshot(args[0])
+    if args[:1] == ["network"]:
+        return network(args[1:])
+    if args[:1] == ["compose"]:
+        return compose(args[1:])
+    print(f"fake-docker: unsupported command: {' '.join(args)}", file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
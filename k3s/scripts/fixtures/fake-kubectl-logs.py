@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+fake-kubectl-logs.py — Stand-in for the `kubectl` calls logs.py makes.
+
+Three pods — automation/n8n, databases/postgres and databases/redis (with
+an `exporter` sidecar) — answer `get pods` (-A / -n / -l, as logs.py pushes
+them down) and `logs --timestamps`, honouring --tail, --since, --since-time
+and -f. Lines mix levels (INFO, WARN, ERROR, level=debug), and each stream
+writes one 70 000-byte line to exercise logs.py's per-line limit.
+
+  KUBECTL="python3 fixtures/fake-kubectl-logs.py" ./logs.py n8n postgres redis
+
+  FAKE_LOGS_LINES   lines of history per container (default: 60)
+  FAKE_LOGS_RATE    lines per second per container with -f (default: 20)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import re
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+
+PODS = [
+    ("automation", "n8n-7d9f8c6b5-abcde", "n8n", ["n8n"]),
+    ("databases", "postgres-5c8d7f6b9-xyz12", "postgres", ["postgres"]),
+    ("databases", "redis-6b7c9d8f5-qq111", "redis", ["redis", "exporter"]),
+]
+HISTORY = int(os.environ.get("FAKE_LOGS_LINES", "60"))
+RATE = float(os.environ.get("FAKE_LOGS_RATE", "20"))
+LEVELS = ["INFO", "INFO", "INFO", "WARN", "ERROR", "level=debug"]
+UNITS = {"s": 1, "m": 60, "h": 3600}
+
+
+def _opt(args: list, name: str) -> str:
+    for i, a in enumerate(args):
+        if a.startswith(name + "="):
+            return a.split("=", 1)[1]
+        if a == name and i + 1 < len(args):
+            return args[i + 1]
+    return ""
+
+
+def _matches(selector: str, labels: dict) -> bool:
+    for term in re.split(r",(?![^()]*\))", selector):
+        term = term.strip()
+        m = re.match(r"^([\w./-]+)\s+(in|notin)\s+\(([^)]*)\)$", term)
+        if m:
+            values = {v.strip() for v in m.group(3).split(",")}
+            if (labels.get(m.group(1)) in values) != (m.group(2) == "in"):
+                return False
+        elif "!=" in term:
+            k, v = term.split("!=", 1)
+            if labels.get(k.strip()) == v.strip():
+                return False
+        elif "=" in term:
+            k, v = term.replace("==", "=").split("=", 1)
+            if labels.get(k.strip()) != v.strip():
+                return False
+        elif term and term not in labels:
+            return False
+    return True
+
+
+def get_pods(args: list) -> int:
+    ns, selector = _opt(args, "-n"), _opt(args, "-l")
+    items = [
+        {"metadata": {"namespace": n, "name": pod, "labels": {"app": app}},
+         "spec": {"containers": [{"name": c} for c in containers]}}
+        for n, pod, app, containers in PODS
+        if (not ns or n == ns) and (not selector or _matches(selector, {"app": app}))
+    ]
+    print(json.dumps({"apiVersion": "v1", "kind": "List", "items": items}))
+    return 0
+
+
+def _line(ts: datetime, app: str, rng: random.Random, i: int) -> str:
+    return f"{ts.strftime('%Y-%m-%dT%H:%M:%S.%f')}123Z {rng.choice(LEVELS)} {app} message {i}"
+
+
+def logs(args: list) -> int:
+    ns = _opt(args, "-n")
+    pod = args[args.index("-n") + 2]
+    container = _opt(args, "-c")
+    match = next((p for p in PODS if p[0] == ns and p[1] == pod and container in p[3]), None)
+    if match is None:
+        print(f'Error from server (NotFound): pods "{pod}" not found', file=sys.stderr)
+        return 1
+    app = match[2]
+    rng = random.Random(f"{pod}/{container}")
+    now = datetime.now(timezone.utc)
+    # History: HISTORY lines spread over the last hour, cut by --since / --since-time / --tail.
+    stamps = [(i, now - timedelta(seconds=3600 * (HISTORY - i) / HISTORY)) for i in range(HISTORY)]
+    since = _opt(args, "--since")
+    if since:
+        cutoff = now - timedelta(seconds=int(since[:-1]) * UNITS[since[-1]])
+        stamps = [(i, t) for i, t in stamps if t >= cutoff]
+    since_time = _opt(args, "--since-time")
+    if since_time:
+        cutoff = datetime.strptime(since_time, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+        stamps = [(i, t) for i, t in stamps if t >= cutoff]
+    tail = _opt(args, "--tail")
+    if tail and int(tail) >= 0:
+        stamps = stamps[len(stamps) - int(tail):] if int(tail) else []
+    for n, (i, ts) in enumerate(stamps):
+        print(_line(ts, app, rng, i), flush=True)
+        if n == len(stamps) // 2:
+            print(f"{ts.strftime('%Y-%m-%dT%H:%M:%S.%f')}Z " + "x" * 70000, flush=True)
+    if "-f" not in args:
+        return 0
+    i = HISTORY
+    while True:
+        time.sleep(rng.expovariate(RATE))
+        print(_line(datetime.now(timezone.utc), app, rng, i), flush=True)
+        i += 1
+
+
+def main() -> int:
+    args = sys.argv[1:]
+    try:
+        if args[:2] == ["get", "pods"]:
+            return get_pods(args[2:])
+        if args[:1] == ["logs"]:
+            return logs(args[1:])
+    except (BrokenPipeError, KeyboardInterrupt):
+        return 0
+    print(f"fake-kubectl-logs: unsupported command: {' '.join(args)}", file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
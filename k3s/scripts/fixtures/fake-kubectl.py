@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+fake-kubectl.py — Stand-in for the `kubectl` calls parallel-restore.py and duplicates.py make.
+
+Nothing touches a cluster: applies succeed after a short pause, `rollout
+status` takes FAKE_KUBECTL_DELAY seconds, and the infra gates (`get
+deployment`) report installed unless listed in FAKE_KUBECTL_MISSING.
+
+  KUBECTL="python3 fixtures/fake-kubectl.py" ./parallel-restore.py
+
+  FAKE_KUBECTL_DELAY    seconds per rollout (default: 0.3)
+  FAKE_KUBECTL_MISSING  comma-separated gate deployments that are absent
+                        (e.g. cert-manager)
+  FAKE_KUBECTL_FAIL     comma-separated substrings; any call whose arguments
+                        contain one fails (e.g. "n8n" or "n8n-config")
+  FAKE_KUBECTL_LOG      append every call to this file
+  FAKE_KUBECTL_SNAPSHOT a duplicates.py snapshot (fixtures/duplicates-snapshot.json)
+                        whose pods answer `get pods -A -o json` / `top pods -A`
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+
+DELAY = float(os.environ.get("FAKE_KUBECTL_DELAY", "0.3"))
+
+
+def _listed(var: str) -> list:
+    return [s for s in os.environ.get(var, "").split(",") if s]
+
+
+def main() -> int:
+    args = sys.argv[1:]
+    line = " ".join(args)
+    log = os.environ.get("FAKE_KUBECTL_LOG")
+    if log:
+        with open(log, "a", encoding="utf-8") as fh:
+            fh.write(line + "\n")
+    if args[:1] == ["apply"] and "-" in args:
+        sys.stdin.read()
+    failing = next((s for s in _listed("FAKE_KUBECTL_FAIL") if s in line), None)
+    if failing:
+        print(f"error: {failing} failed (FAKE_KUBECTL_FAIL)", file=sys.stderr)
+        return 1
+
+    if args[:2] == ["config", "current-context"]:
+        print("fake")
+        return 0
+    if args[:2] == ["get", "deployment"] and len(args) > 2:
+        if args[2] in _listed("FAKE_KUBECTL_MISSING"):
+            print(f'Error from server (NotFound): deployments.apps "{args[2]}" not found', file=sys.stderr)
+            return 1
+        print(f"deployment.apps/{args[2]}")
+        return 0
+    if args[:2] == ["create", "configmap"] and "--dry-run=client" in args:
+        ns = args[args.index("-n") + 1] if "-n" in args else "default"
+        keys = [a.split("=", 2)[1] for a in args if a.startswith("--from-file=")]
+        print(f"apiVersion: v1\nkind: ConfigMap\nmetadata:\n  name: {args[2]}\n  namespace: {ns}\ndata:")
+        for key in keys:
+            print(f"  {key}: ''")
+        return 0
+    if args[:1] == ["apply"]:
+        time.sleep(0.05)
+        return 0
+    snapshot = os.environ.get("FAKE_KUBECTL_SNAPSHOT")
+    if snapshot and args[:2] in (["get", "pods"], ["top", "pods"]):
+        side = json.loads(Path(snapshot).read_text(encoding="utf-8")).get("kubernetes") or {}
+        if args[0] == "get":
+            print(json.dumps({"apiVersion": "v1", "kind": "List", "items": side.get("pods") or []}))
+        else:
+            for t in side.get("top") or []:
+                print(f"{t['namespace']}  {t['pod']}  {t['cpu']}  {t['memory']}")
+        return 0
+    if args[:2] == ["rollout", "status"]:
+        time.sleep(DELAY)
+        print(f"{args[2]} successfully rolled out")
+        return 0
+    print(f"fake-kubectl: unsupported command: {line}", file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
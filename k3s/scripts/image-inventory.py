@@ -0,0 +1,539 @@
+#!/usr/bin/env python3
+"""
+image-inventory.py — Offline image inventory, pre-pull plan and save bundle.
+
+After a reinstall, k3s pulls every image lazily and one at a time as pods
+get scheduled, so cold start is dominated by pulls. This collects every
+image reference in the repo without touching a cluster:
+
+  - k3s/apps, k3s/databases and k3s/infra manifests, including init containers
+    and `image:` / `{repository, tag}` keys in Helm values files
+  - docker/*/ compose files (${VAR:-default} and .env.example expanded)
+  - Dockerfile FROM lines (base images of custom builds such as n8n-custom)
+
+References are normalised (redis:7 → docker.io/library/redis:7) and
+deduplicated. Each one is then pinned against k3s/images.lock.json, which
+holds the linux/arm64 manifest digest and layer list per image. The lock is
+refreshed online with --update-lock (needs skopeo), or --resolve fills in
+just the missing entries before the other modes run; without --resolve
+every mode works offline. Without a lock nothing is pinned and the
+shared-layer phase below has nothing to work with.
+
+The pre-pull plan is ordered to make the most of shared layers:
+  1. Images providing layers that several others also use go first, greedily,
+     so later pulls reuse what's already on disk.
+  2. Everything else follows restore-DAG order (parallel-restore.py waves:
+     databases before the apps that need them), docker-only images last.
+
+Usage:
+  ./image-inventory.py                        Inventory table
+  ./image-inventory.py --plan                 Ordered pre-pull plan
+  ./image-inventory.py --plan --resolve       ...pinning unlocked images first (online)
+  ./image-inventory.py --plan --format crictl     `k3s crictl pull image@sha256:` commands
+  ./image-inventory.py --plan --format mirror skopeo copy commands to sync the
+                                              Forgejo registry from registries.yaml.j2
+                                              (--mirror <registry/prefix> overrides)
+  ./image-inventory.py --bundle bundle.json   docker save bundle manifest (air-gap)
+  ./image-inventory.py --scope k3s            Ignore docker/ stacks
+  ./image-inventory.py --update-lock          Resolve digests + layers (online)
+  ./image-inventory.py --json                 Machine-readable inventory
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import hashlib
+import importlib.util
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import yaml
+
+from _k3s import (
+    APPS_DIR, BOLD, DATABASES_DIR, DIM, DOCKER_DIR, GREEN, INFRA_DIR, K3S_ROOT, NC, REPO_ROOT, SCRIPTS_DIR, YELLOW,
+    compose_env, err, expand_vars, header, info, ok, warn,
+)
+
+
+LOCK_FILE = K3S_ROOT / "images.lock.json"
+PLATFORM = ("linux", "arm64")
+K3S_IMAGE_DIR = "/var/lib/rancher/k3s/agent/images"
+INFRA_WAVE = 0
+DOCKER_WAVE = 99
+
+# k3s's registries.yaml (rendered by ansible) names the in-cluster registry;
+# --format mirror copies images under MIRROR_PREFIX there.
+REGISTRIES_TEMPLATE = REPO_ROOT / "ansible" / "roles" / "k3s" / "templates" / "registries.yaml.j2"
+ANSIBLE_VARS = REPO_ROOT / "ansible" / "group_vars" / "all.yml"
+MIRROR_PREFIX = "mirror"
+
+FROM_RE = re.compile(r"^\s*FROM\s+(?:--platform=\S+\s+)?(\S+)(?:\s+AS\s+(\S+))?", re.IGNORECASE | re.MULTILINE)
+
+
+# ─── References ──────────────────────────────────────────────────────────────
+
+
+def normalise(ref: str) -> str:
+    """Fully-qualified form: registry/namespace/name:tag (or @digest)."""
+    ref = ref.strip().strip("\"'")
+    name, digest = (ref.split("@", 1) + [""])[:2]
+    last = name.rsplit("/", 1)[-1]
+    tag = ""
+    if ":" in last:
+        name, tag = name.rsplit(":", 1)
+    first = name.split("/", 1)[0]
+    if "/" not in name or not ("." in first or ":" in first or first == "localhost"):
+        name = f"docker.io/{name}" if "/" in name else f"docker.io/library/{name}"
+    if digest:
+        return f"{name}:{tag}@{digest}" if tag else f"{name}@{digest}"
+    return f"{name}:{tag or 'latest'}"
+
+
+def short(ref: str) -> str:
+    """Display form without the docker.io/library noise."""
+    for prefix in ("docker.io/library/", "docker.io/"):
+        if ref.startswith(prefix):
+            return ref[len(prefix):]
+    return ref
+
+
+@dataclass
+class Image:
+    ref: str
+    users: Set[str] = field(default_factory=set)       # "k3s:apps/n8n", "docker:seafile", "build:docker/n8n"
+    wave: int = DOCKER_WAVE
+    fanout: int = 0                                     # restore nodes waiting on this image's app
+    digest: str = ""
+    layers: List[str] = field(default_factory=list)
+    size: int = 0
+
+    @property
+    def pinned(self) -> str:
+        if "@" in self.ref:
+            return self.ref
+        return f"{self.ref.rsplit(':', 1)[0]}@{self.digest}" if self.digest else self.ref
+
+    @property
+    def floating(self) -> bool:
+        return "@" not in self.ref and self.ref.rsplit(":", 1)[-1] in ("latest", "stable", "main")
+
+
+# ─── Discovery ───────────────────────────────────────────────────────────────
+
+
+def _walk_images(node: Any) -> Iterator[str]:
+    """Every `image:` value in a parsed YAML tree (strings and {repository, tag})."""
+    if isinstance(node, dict):
+        for k, v in node.items():
+            if k == "image":
+                if isinstance(v, str) and v and not v.startswith(("http://", "https://")):
+                    yield v
+                elif isinstance(v, dict) and isinstance(v.get("repository"), str):
+                    registry = v.get("registry")
+                    repo = f"{registry}/{v['repository']}" if registry else v["repository"]
+                    tag = v.get("tag") or v.get("digest")
+                    if tag:
+                        yield f"{repo}@{tag}" if str(tag).startswith("sha256:") else f"{repo}:{tag}"
+                    else:
+                        yield repo
+                else:
+                    yield from _walk_images(v)
+            else:
+                yield from _walk_images(v)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _walk_images(item)
+
+
+def _yaml_tree(path: Path) -> List[Any]:
+    try:
+        return list(yaml.safe_load_all(path.read_text(encoding="utf-8", errors="ignore")))
+    except yaml.YAMLError as exc:
+        warn(f"YAML error in {path.relative_to(REPO_ROOT)}: {exc}")
+        return []
+
+
+def collect(scope: str) -> Tuple[Dict[str, Image], List[str]]:
+    images: Dict[str, Image] = {}
+    unresolved: List[str] = []
+
+    def add(raw: str, user: str) -> None:
+        ref = normalise(raw)
+        images.setdefault(ref, Image(ref)).users.add(user)
+
+    roots = [DATABASES_DIR, APPS_DIR, INFRA_DIR]
+    for root in roots:
+        for path in sorted(root.rglob("*.y*ml")) if root.is_dir() else []:
+            if path.suffix not in (".yaml", ".yml") or "config" in path.relative_to(root).parts:
+                continue
+            user = f"k3s:{path.relative_to(K3S_ROOT).parts[0]}/{path.relative_to(root).parts[0]}"
+            for doc in _yaml_tree(path):
+                for raw in _walk_images(doc):
+                    add(raw, user)
+
+    if scope == "all" and DOCKER_DIR.is_dir():
+        for stack in sorted(p for p in DOCKER_DIR.iterdir() if p.is_dir()):
+            env = compose_env(stack)
+            for path in sorted(stack.glob("*.y*ml")):
+                for doc in _yaml_tree(path):
+                    if not isinstance(doc, dict) or not isinstance(doc.get("services"), dict):
+                        continue
+                    for svc in doc["services"].values():
+                        raw = (svc or {}).get("image") if isinstance(svc, dict) else None
+                        if not isinstance(raw, str):
+                            continue
+                        value = expand_vars(raw, env)
+                        if not value or value.endswith(":"):
+                            unresolved.append(f"docker/{stack.name}/{path.name}: {raw}")
+                        else:
+                            add(value, f"docker:{stack.name}")
+
+    # Base images of custom builds (FROM lines), wherever a Dockerfile lives.
+    for dockerfile in sorted(REPO_ROOT.glob("*/*/Dockerfile")):
+        stages: Set[str] = set()
+        text = dockerfile.read_text(encoding="utf-8", errors="ignore")
+        for m in FROM_RE.finditer(text):
+            base, alias = m.group(1), m.group(2)
+            if base not in stages and base.lower() != "scratch" and "$" not in base:
+                add(base, f"build:{dockerfile.parent.relative_to(REPO_ROOT)}")
+            if alias:
+                stages.add(alias)
+    return images, unresolved
+
+
+# ─── Restore priority ────────────────────────────────────────────────────────
+
+
+def restore_waves() -> Dict[str, Tuple[int, int]]:
+    """App name → (wave, -dependents) from parallel-restore.py's DAG.
+
+    Within a wave, nodes other apps wait on (the databases) sort first.
+    """
+    spec = importlib.util.spec_from_file_location("parallel_restore", SCRIPTS_DIR / "parallel-restore.py")
+    if spec is None or spec.loader is None:
+        return {}
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module          # dataclasses resolve types via sys.modules
+    spec.loader.exec_module(module)
+    try:
+        nodes = module.build_dag(None)
+        layers = module.waves(nodes)
+    except ValueError as exc:
+        warn(f"Restore DAG unusable ({exc}) — ordering by name only")
+        return {}
+    fanout = {name: sum(1 for n in nodes.values() if name in n.deps) for name in nodes}
+    return {name: (i, -fanout[name]) for i, layer in enumerate(layers) for name in layer}
+
+
+def assign_waves(images: Dict[str, Image], waves: Dict[str, Tuple[int, int]]) -> None:
+    for img in images.values():
+        best = (DOCKER_WAVE, 0)
+        for user in img.users:
+            kind, _, where = user.partition(":")
+            top, _, name = where.partition("/")
+            if kind == "k3s":
+                best = min(best, (INFRA_WAVE, 0) if top == "infra" else waves.get(name, (DOCKER_WAVE - 1, 0)))
+            elif kind == "build":
+                # Build bases inherit the wave of the k3s app running the built
+                # image (docker/n8n → n8n) so they're warm before it's needed.
+                best = min(best, waves.get(Path(where).name, best))
+        img.wave, img.fanout = best[0], -best[1]
+
+
+# ─── Lock file ───────────────────────────────────────────────────────────────
+
+
+def load_lock() -> Dict[str, Any]:
+    try:
+        return json.loads(LOCK_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {"platform": "/".join(PLATFORM), "images": {}}
+
+
+def apply_lock(images: Dict[str, Image], lock: Dict[str, Any]) -> None:
+    entries = lock.get("images", {})
+    for img in images.values():
+        entry = entries.get(img.ref.split("@", 1)[0]) or {}
+        img.digest = img.ref.split("@", 1)[1] if "@" in img.ref else entry.get("digest", "")
+        img.layers = list(entry.get("layers", []))
+        img.size = int(entry.get("size", 0))
+
+
+def skopeo_cmd() -> List[str]:
+    return shlex.split(os.environ.get("SKOPEO", "skopeo"))
+
+
+def resolve(ref: str) -> Tuple[Optional[Dict[str, Any]], str]:
+    """Platform manifest digest, layers and size for one ref via `skopeo inspect`."""
+    os_name, arch = PLATFORM
+    base = skopeo_cmd() + [f"--override-os={os_name}", f"--override-arch={arch}"]
+    try:
+        res = subprocess.run(base + ["inspect", f"docker://{ref}"], capture_output=True, text=True, timeout=120)
+    except (OSError, subprocess.TimeoutExpired) as exc:
+        return None, str(exc)
+    if res.returncode != 0:
+        return None, res.stderr.strip().splitlines()[-1] if res.stderr.strip() else "skopeo failed"
+    data = json.loads(res.stdout)
+    layers = data.get("LayersData") or []
+    return {
+        "digest": data.get("Digest", ""),
+        "layers": data.get("Layers") or [l.get("Digest") for l in layers],
+        "size": sum(int(l.get("Size") or 0) for l in layers),
+        "resolved": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }, ""
+
+
+def update_lock(images: Dict[str, Image], jobs: int, prune: bool, missing_only: bool = False) -> int:
+    from concurrent.futures import ThreadPoolExecutor
+
+    lock = load_lock()
+    entries = lock.setdefault("images", {})
+    todo = sorted(ref for ref in images if "@" not in ref and not (missing_only and ref in entries))
+    if not todo:
+        return 0
+    header(f"Resolving {len(todo)} image(s) for {'/'.join(PLATFORM)}")
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        for ref, (entry, why) in zip(todo, pool.map(resolve, todo)):
+            if entry is None:
+                failed += 1
+                err(f"{short(ref)}: {why}")
+                continue
+            changed = entries.get(ref, {}).get("digest") != entry["digest"]
+            entries[ref] = entry
+            print(f"  {GREEN if changed else DIM}{'↻' if changed else '='}{NC} {short(ref):<60} {entry['digest'][:19]}")
+    # Drop refs the repo no longer uses (only when the whole repo was scanned).
+    lock["images"] = {k: v for k, v in sorted(entries.items()) if k in images or not prune}
+    lock["platform"] = "/".join(PLATFORM)
+    tmp = LOCK_FILE.with_suffix(".tmp")
+    tmp.write_text(json.dumps(lock, indent=2) + "\n", encoding="utf-8")
+    tmp.replace(LOCK_FILE)
+    print("")
+    ok(f"Lock written → {LOCK_FILE.relative_to(REPO_ROOT)} ({failed} failed)")
+    return 1 if failed else 0
+
+
+def default_mirror() -> Optional[str]:
+    """<registry>/MIRROR_PREFIX for the first mirror in registries.yaml.j2, with
+    its {{ var }} placeholders filled from ansible/group_vars/all.yml."""
+    try:
+        mirrors = (yaml.safe_load(REGISTRIES_TEMPLATE.read_text(encoding="utf-8")) or {}).get("mirrors") or {}
+        variables = yaml.safe_load(ANSIBLE_VARS.read_text(encoding="utf-8")) or {}
+    except (OSError, yaml.YAMLError):
+        return None
+    for name in mirrors:
+        host = re.sub(r"\{\{\s*(\w+)\s*\}\}", lambda m: str(variables.get(m.group(1), m.group(0))), str(name))
+        if "{{" not in host:
+            return f"{host}/{MIRROR_PREFIX}"
+    return None
+
+
+# ─── Planning ────────────────────────────────────────────────────────────────
+
+
+def plan(images: Dict[str, Image]) -> List[Tuple[Image, str]]:
+    """Pull order with the reason each image is where it is."""
+    users_of: Dict[str, Set[str]] = defaultdict(set)
+    for img in images.values():
+        for layer in img.layers:
+            users_of[layer].add(img.ref)
+
+    order: List[Tuple[Image, str]] = []
+    remaining = dict(images)
+    pulled: Set[str] = set()
+    # Phase 1 — greedily take the image that brings the most not-yet-pulled
+    # layers that other remaining images also need.
+    while True:
+        best, best_gain = None, 0
+        for img in sorted(remaining.values(), key=lambda i: (i.wave, -i.fanout, i.ref)):
+            gain = sum(
+                1 for layer in img.layers
+                if layer not in pulled and len(users_of[layer] & remaining.keys()) > 1
+            )
+            if gain > best_gain:
+                best, best_gain = img, gain
+        if best is None:
+            break
+        sharers = {r for layer in best.layers for r in users_of[layer]} - {best.ref}
+        order.append((best, f"base: {best_gain} layer(s) shared with {len(sharers & remaining.keys())} image(s)"))
+        pulled.update(best.layers)
+        del remaining[best.ref]
+    # Phase 2 — restore order.
+    for img in sorted(remaining.values(), key=lambda i: (i.wave, -i.fanout, i.ref)):
+        reason = "infra" if img.wave == INFRA_WAVE else ("docker/ only" if img.wave == DOCKER_WAVE else f"wave {img.wave}")
+        order.append((img, reason))
+    return order
+
+
+def bundle_groups(order: List[Tuple[Image, str]]) -> List[List[Image]]:
+    """Images that share layers go in one `docker save` archive (stored once)."""
+    parent: Dict[str, str] = {img.ref: img.ref for img, _ in order}
+
+    def find(x: str) -> str:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    owner: Dict[str, str] = {}
+    for img, _ in order:
+        for layer in img.layers:
+            if layer in owner:
+                parent[find(img.ref)] = find(owner[layer])
+            else:
+                owner[layer] = img.ref
+    groups: Dict[str, List[Image]] = {}
+    for img, _ in order:
+        groups.setdefault(find(img.ref), []).append(img)
+    return list(groups.values())
+
+
+def write_bundle(order: List[Tuple[Image, str]], path: Path) -> None:
+    archives = []
+    for i, group in enumerate(bundle_groups(order), 1):
+        slug = re.sub(r"[^a-z0-9]+", "-", short(group[0].ref).split("@")[0].lower()).strip("-")
+        name = f"{i:02d}-{slug}.tar"
+        refs = [img.ref.split("@")[0] for img in group]
+        platform = "/".join(PLATFORM)
+        archives.append({
+            "archive": name,
+            "images": [
+                {"ref": img.ref, "pinned": img.pinned, "digest": img.digest or None, "wave": img.wave,
+                 "used_by": sorted(img.users)}
+                for img in group
+            ],
+            "shared_layers": len(set.intersection(*(set(img.layers) for img in group))) if len(group) > 1 else 0,
+            "pull": [f"docker pull --platform {platform} {img.pinned}" for img in group],
+            "tag": [f"docker tag {img.pinned} {img.ref.split('@')[0]}" for img in group if img.digest and "@" not in img.ref],
+            "save": f"docker save -o {name} " + " ".join(shlex.quote(r) for r in refs),
+        })
+    manifest = {
+        "generated": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "platform": "/".join(PLATFORM),
+        "install_dir": K3S_IMAGE_DIR,
+        "note": f"Copy the archives into {K3S_IMAGE_DIR}/ before k3s starts; it imports them at boot.",
+        "archives": archives,
+    }
+    manifest["content_hash"] = hashlib.sha256(json.dumps(archives, sort_keys=True).encode()).hexdigest()
+    path.write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+
+
+# ─── Output ──────────────────────────────────────────────────────────────────
+
+
+def print_inventory(images: Dict[str, Image], unresolved: List[str]) -> None:
+    rows = sorted(images.values(), key=lambda i: (i.wave, -i.fanout, i.ref))
+    pinned = sum(1 for i in rows if i.digest)
+    header(f"Images — {len(rows)} unique, {pinned} pinned in {LOCK_FILE.name}")
+    width = min(60, max(len(short(i.ref)) for i in rows))
+    print(f"  {BOLD}{'IMAGE':<{width}}  {'DIGEST':<19}  {'WAVE':>4}  USED BY{NC}")
+    for img in rows:
+        digest = img.digest[:19] if img.digest else f"{YELLOW}unpinned{NC}" + " " * 11
+        wave = {INFRA_WAVE: "infra", DOCKER_WAVE: "—"}.get(img.wave, str(img.wave))
+        flag = f" {DIM}(floating tag){NC}" if img.floating else ""
+        print(f"  {short(img.ref):<{width}}  {digest:<19}  {wave:>4}  {', '.join(sorted(img.users))}{flag}")
+    if unresolved:
+        print("")
+        for u in unresolved:
+            warn(f"unresolved variable, skipped: {u}")
+
+
+def print_plan(order: List[Tuple[Image, str]], fmt: str, mirror: Optional[str]) -> None:
+    if fmt == "list":
+        header(f"Pre-pull plan — {len(order)} image(s)")
+        width = max(len(short(img.ref)) for img, _ in order)
+        for n, (img, reason) in enumerate(order, 1):
+            digest = img.digest[7:19] if img.digest else f"{YELLOW}unpinned{NC}    "
+            print(f"  {n:>3}. {short(img.ref):<{width}}  {digest}  {DIM}{reason}{NC}")
+        return
+    for img, reason in order:
+        if fmt == "crictl":
+            # Pull the pinned digest, then give it the tag pods ask for, so
+            # kubelet finds it locally instead of resolving the tag again.
+            if img.digest:
+                print(f"sudo k3s crictl pull {img.pinned}   # {reason}")
+                if "@" not in img.ref:
+                    print(f"sudo k3s ctr -n k8s.io images tag --force {img.pinned} {img.ref}")
+            else:
+                print(f"sudo k3s crictl pull {img.ref}   # unpinned, {reason}")
+        else:
+            src = img.ref.split("@")[0]
+            dest_path = src.split("/", 1)[1] if "/" in src else src
+            print(f"skopeo copy --override-os={PLATFORM[0]} --override-arch={PLATFORM[1]} "
+                  f"docker://{img.pinned} docker://{mirror.rstrip('/')}/{dest_path}   # {reason}")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Offline image inventory, pre-pull plan and save bundle.")
+    ap.add_argument("--scope", choices=["all", "k3s"], default="all", help="include docker/ stacks (default: all)")
+    ap.add_argument("--plan", action="store_true", help="print the ordered pre-pull plan")
+    ap.add_argument("--format", choices=["list", "crictl", "mirror"], default="list", help="plan output format")
+    ap.add_argument("--mirror", help="target registry/prefix for --format mirror "
+                                     "(default: the registry in registries.yaml.j2)")
+    ap.add_argument("--bundle", type=Path, metavar="FILE", help="write a docker save bundle manifest (JSON)")
+    ap.add_argument("--update-lock", action="store_true", help="resolve digests + layers with skopeo (online)")
+    ap.add_argument("--resolve", action="store_true", help="lock images missing from the lock first (online)")
+    ap.add_argument("--jobs", type=int, default=4, help="parallel skopeo lookups for --update-lock / --resolve")
+    ap.add_argument("--json", action="store_true", help="print the inventory as JSON")
+    args = ap.parse_args()
+    if args.format == "mirror" and not args.mirror:
+        args.mirror = default_mirror()
+        if not args.mirror:
+            ap.error(f"no registry found in {REGISTRIES_TEMPLATE.relative_to(REPO_ROOT)} — pass --mirror <registry/prefix>")
+
+    images, unresolved = collect(args.scope)
+    if not images:
+        warn("No image references found")
+        return 0
+    if args.update_lock:
+        return update_lock(images, args.jobs, prune=args.scope == "all")
+    if args.resolve:
+        with contextlib.redirect_stdout(sys.stderr):      # keep plan output pipeable
+            if update_lock(images, args.jobs, prune=False, missing_only=True) != 0:
+                warn("Some images could not be resolved — they stay unpinned")
+
+    if not LOCK_FILE.is_file():
+        warn(f"No {LOCK_FILE.relative_to(REPO_ROOT)} — nothing is pinned and shared layers are unknown; "
+             "run --update-lock (or add --resolve) while online")
+    apply_lock(images, load_lock())
+    assign_waves(images, restore_waves())
+
+    if args.json:
+        print(json.dumps([
+            {"ref": i.ref, "pinned": i.pinned, "digest": i.digest or None, "wave": i.wave,
+             "layers": len(i.layers), "size": i.size, "floating": i.floating, "used_by": sorted(i.users)}
+            for i in sorted(images.values(), key=lambda i: (i.wave, -i.fanout, i.ref))
+        ], indent=2))
+        return 0
+
+    if args.plan or args.bundle:
+        order = plan(images)
+        if args.bundle:
+            write_bundle(order, args.bundle)
+            if not args.plan:
+                ok(f"Bundle manifest → {args.bundle}")
+                return 0
+        print_plan(order, args.format, args.mirror)
+        if args.format == "list":
+            unpinned = sum(1 for img, _ in order if not img.digest)
+            if unpinned:
+                print("")
+                info(f"{unpinned} image(s) have no pinned digest — run --update-lock while online")
+        return 0
+
+    print_inventory(images, unresolved)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+ingress-probe.py — Concurrent ingress / DNS / LoadBalancer health probe.
+
+Targets come from the catalog (k3s/apps/<svc>/README.md frontmatter), so
+nothing is hardcoded:
+  - domain         → https://<domain>/       via Traefik (websecure)
+  - external_port  → http://<node-ip>:<port>/ via the ServiceLB
+
+Apps with an external_port but no domain (e.g. samba on 445) don't speak
+HTTP; their port is probed with a plain TCP connect instead.
+
+Every target is probed concurrently, --count times, each attempt under its own
+--timeout. A single attempt records DNS, TCP connect, TLS handshake and
+time-to-first-byte separately; the report shows p50/p95/p99 of the total plus
+the median TLS handshake. A target is "up" if any attempt got a response below
+500 (401/403 count — most apps sit behind a login).
+
+Usage:
+  ./ingress-probe.py                        Probe every catalog endpoint once
+  ./ingress-probe.py --count 20             20 rounds → meaningful percentiles
+  ./ingress-probe.py --only homarr --only n8n
+  ./ingress-probe.py --no-domains           Direct IP:port only (no DNS/TLS)
+  ./ingress-probe.py --json                 Machine-readable output
+  ./ingress-probe.py --url local=http://127.0.0.1:8000/
+                                            Probe ad-hoc URLs instead of the catalog
+  ./ingress-probe.py --list                 Print the targets and exit
+
+The node IP defaults to $K3S_NODE_IP (else 192.168.0.108, as cluster-restore.sh).
+Exit status is 1 if any target never came up.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import ssl
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+from urllib.parse import urlsplit
+
+from _k3s import BOLD, DIM, GREEN, NC, RED, YELLOW, catalog, err, header, ok, warn
+
+
+DEFAULT_NODE_IP = "192.168.0.108"
+USER_AGENT = "k3s-ingress-probe/1"
+
+
+@dataclass
+class Target:
+    app: str
+    kind: str           # "domain" | "direct" | "tcp" | "url"
+    url: str
+    host: str
+    port: int
+    tls: bool
+    path: str = "/"
+
+
+@dataclass
+class Sample:
+    status: Optional[int] = None
+    dns_ms: Optional[float] = None
+    connect_ms: Optional[float] = None
+    tls_ms: Optional[float] = None
+    ttfb_ms: Optional[float] = None
+    total_ms: Optional[float] = None
+    error: str = ""
+
+    @property
+    def up(self) -> bool:
+        return not self.error and (self.status is None or self.status < 500)
+
+
+@dataclass
+class Result:
+    target: Target
+    samples: List[Sample] = field(default_factory=list)
+
+
+# ─── Targets ─────────────────────────────────────────────────────────────────
+
+
+def parse_url(app: str, url: str, kind: str = "url") -> Target:
+    parts = urlsplit(url if "://" in url else f"http://{url}")
+    if parts.scheme not in ("http", "https", "tcp") or not parts.hostname:
+        raise ValueError(f"unsupported URL: {url}")
+    tls = parts.scheme == "https"
+    port = parts.port or (443 if tls else 80)
+    path = parts.path or "/"
+    if parts.query:
+        path += f"?{parts.query}"
+    return Target(app, "tcp" if parts.scheme == "tcp" else kind, url, parts.hostname, port, tls, path)
+
+
+def parse_url_arg(arg: str) -> Target:
+    """`--url NAME=URL` or a bare URL; a `=` past the scheme (a query) isn't a NAME."""
+    name, sep, rest = arg.partition("=")
+    if sep and "://" not in name:
+        return parse_url(name, rest)
+    return parse_url(arg, arg)
+
+
+def catalog_targets(node_ip: str, only: Sequence[str], domains: bool, direct: bool) -> List[Target]:
+    targets: List[Target] = []
+    for meta in catalog():
+        app = meta["directory"]
+        if only and app not in only:
+            continue
+        domain, port = meta["domain"], meta["external_port"]
+        if domains and domain:
+            targets.append(parse_url(app, f"https://{domain}/", "domain"))
+        if direct and port:
+            scheme = "http" if domain else "tcp"
+            targets.append(parse_url(app, f"{scheme}://{node_ip}:{port}/", "direct"))
+    return targets
+
+
+# ─── Probing ─────────────────────────────────────────────────────────────────
+
+
+def _ms(start: float) -> float:
+    return (time.perf_counter() - start) * 1000.0
+
+
+async def _attempt(target: Target, ssl_ctx: ssl.SSLContext, sample: Sample) -> None:
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+
+    t = time.perf_counter()
+    infos = await loop.getaddrinfo(target.host, target.port, type=socket.SOCK_STREAM)
+    sample.dns_ms = _ms(t)
+    family, _, _, _, addr = infos[0]
+
+    t = time.perf_counter()
+    reader, writer = await asyncio.open_connection(addr[0], addr[1], family=family)
+    sample.connect_ms = _ms(t)
+    try:
+        if target.kind == "tcp":
+            sample.total_ms = _ms(start)
+            return
+        if target.tls:
+            t = time.perf_counter()
+            await writer.start_tls(ssl_ctx, server_hostname=target.host)
+            sample.tls_ms = _ms(t)
+
+        t = time.perf_counter()
+        host = target.host if target.port in (80, 443) else f"{target.host}:{target.port}"
+        writer.write(
+            f"GET {target.path} HTTP/1.1\r\nHost: {host}\r\nUser-Agent: {USER_AGENT}\r\n"
+            "Accept: */*\r\nConnection: close\r\n\r\n".encode("latin-1")
+        )
+        await writer.drain()
+        status_line = await reader.readline()
+        sample.ttfb_ms = _ms(t)
+        fields = status_line.decode("latin-1").split()
+        if len(fields) < 2 or not fields[0].startswith("HTTP/") or not fields[1].isdigit():
+            raise ConnectionError(f"not an HTTP response: {status_line[:40]!r}")
+        sample.status = int(fields[1])
+        await reader.readuntil(b"\r\n\r\n")
+        sample.total_ms = _ms(start)
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (OSError, ssl.SSLError):
+            pass
+
+
+async def probe_once(target: Target, timeout: float, ssl_ctx: ssl.SSLContext) -> Sample:
+    sample = Sample()
+    try:
+        await asyncio.wait_for(_attempt(target, ssl_ctx, sample), timeout)
+    except asyncio.TimeoutError:
+        sample.error = f"timeout after {timeout:g}s"
+    except socket.gaierror as exc:
+        sample.error = f"dns: {exc.strerror or exc}"
+    except ssl.SSLCertVerificationError as exc:
+        sample.error = f"tls: {exc.verify_message or exc}"
+    except (OSError, ssl.SSLError, ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError) as exc:
+        sample.error = str(exc) or type(exc).__name__
+    return sample
+
+
+async def probe_all(
+    targets: List[Target], count: int, timeout: float, concurrency: int, ssl_ctx: ssl.SSLContext
+) -> List[Result]:
+    """Probe every target concurrently; each target's rounds run back to back."""
+    sem = asyncio.Semaphore(max(1, concurrency))
+    results = [Result(t) for t in targets]
+
+    async def run(result: Result) -> None:
+        for _ in range(count):
+            async with sem:
+                result.samples.append(await probe_once(result.target, timeout, ssl_ctx))
+
+    await asyncio.gather(*(run(r) for r in results))
+    return results
+
+
+# ─── Report ──────────────────────────────────────────────────────────────────
+
+
+def percentile(values: Sequence[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile; None for an empty sample."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarise(result: Result) -> Dict[str, object]:
+    good = [s for s in result.samples if s.up]
+    totals = [s.total_ms for s in good if s.total_ms is not None]
+    statuses = sorted({s.status for s in result.samples if s.status is not None})
+    errors = sorted({s.error for s in result.samples if s.error})
+
+    def p(pct: float, values: Sequence[float] = totals) -> Optional[float]:
+        v = percentile(values, pct)
+        return None if v is None else round(v, 2)
+
+    return {
+        "app": result.target.app,
+        "kind": result.target.kind,
+        "url": result.target.url,
+        "up": bool(good),
+        "ok": len(good),
+        "attempts": len(result.samples),
+        "statuses": statuses,
+        "p50_ms": p(50),
+        "p95_ms": p(95),
+        "p99_ms": p(99),
+        "dns_p50_ms": p(50, [s.dns_ms for s in good if s.dns_ms is not None]),
+        "tls_p50_ms": p(50, [s.tls_ms for s in good if s.tls_ms is not None]),
+        "errors": errors,
+    }
+
+
+def _fmt(ms: Optional[float]) -> str:
+    return "—" if ms is None else f"{ms:.1f}"
+
+
+def print_table(rows: List[Dict[str, object]], count: int) -> None:
+    header(f"Endpoint probe — {len(rows)} targets × {count} round(s)")
+    width = max([len(str(r["url"])) for r in rows] + [3])
+    print(f"  {BOLD}{'APP':<16} {'URL':<{width}}  {'STATUS':<8} {'OK':>7}  "
+          f"{'p50':>7} {'p95':>7} {'p99':>7}  {'TLS':>6} {'DNS':>6}{NC}")
+    for r in rows:
+        statuses = ",".join(str(s) for s in r["statuses"]) or ("open" if r["kind"] == "tcp" and r["up"] else "—")
+        color = GREEN if r["ok"] == r["attempts"] else (YELLOW if r["up"] else RED)
+        print(f"  {r['app']:<16} {r['url']:<{width}}  {color}{statuses:<8}{NC} "
+              f"{color}{str(r['ok']) + '/' + str(r['attempts']):>7}{NC}  "
+              f"{_fmt(r['p50_ms']):>7} {_fmt(r['p95_ms']):>7} {_fmt(r['p99_ms']):>7}  "
+              f"{_fmt(r['tls_p50_ms']):>6} {_fmt(r['dns_p50_ms']):>6}")
+        for e in r["errors"]:
+            print(f"  {'':<16} {DIM}↳ {e}{NC}")
+    print(f"  {DIM}(latencies in ms; TLS/DNS are medians){NC}")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Concurrent health probe for every catalog endpoint.")
+    ap.add_argument("--count", type=int, default=1, help="probe rounds per target (default: 1)")
+    ap.add_argument("--timeout", type=float, default=5.0, help="per-attempt timeout in seconds (default: 5)")
+    ap.add_argument("--concurrency", type=int, default=64, help="max in-flight probes (default: 64)")
+    ap.add_argument("--node-ip", default=os.environ.get("K3S_NODE_IP", DEFAULT_NODE_IP))
+    ap.add_argument("--only", action="append", default=[], metavar="APP", help="limit to these apps")
+    ap.add_argument("--no-domains", action="store_true", help="skip https://<domain> targets")
+    ap.add_argument("--no-direct", action="store_true", help="skip <node-ip>:<port> targets")
+    ap.add_argument("--url", action="append", default=[], metavar="NAME=URL",
+                    help="probe this URL instead of the catalog (repeatable)")
+    ap.add_argument("--insecure", action="store_true", help="don't verify TLS certificates")
+    ap.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    ap.add_argument("--list", action="store_true", help="print targets and exit")
+    args = ap.parse_args()
+
+    try:
+        if args.url:
+            targets = [parse_url_arg(u) for u in args.url]
+        else:
+            targets = catalog_targets(args.node_ip, args.only, not args.no_domains, not args.no_direct)
+    except ValueError as exc:
+        err(str(exc))
+        return 2
+    if not targets:
+        warn("No targets — nothing in the catalog matched")
+        return 0
+    if args.list:
+        for t in targets:
+            print(f"{t.app:<16} {t.kind:<7} {t.url}")
+        return 0
+
+    ssl_ctx = ssl.create_default_context()
+    if args.insecure:
+        ssl_ctx.check_hostname = False
+        ssl_ctx.verify_mode = ssl.CERT_NONE
+
+    results = asyncio.run(probe_all(targets, max(1, args.count), args.timeout, args.concurrency, ssl_ctx))
+    rows = [summarise(r) for r in results]
+
+    if args.json:
+        print(json.dumps({"count": args.count, "timeout": args.timeout, "targets": rows}, indent=2))
+    else:
+        print_table(rows, args.count)
+        down = [r for r in rows if not r["up"]]
+        print("")
+        if down:
+            warn(f"{len(down)}/{len(rows)} endpoint(s) down: {', '.join(str(r['url']) for r in down)}")
+        else:
+            ok(f"All {len(rows)} endpoint(s) responding")
+    return 1 if any(not r["up"] for r in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""
+logs.py — Follow many pods at once, merged by timestamp and filtered.
+
+`setup.sh logs` follows one pod of one app. Cross-app debugging (n8n →
+postgres → redis) needs several at once, so this runs one `kubectl logs
+--timestamps` per pod/container concurrently under asyncio and merges their
+lines into a single time-ordered stream:
+
+  - Each stream keeps a bounded buffer (--buffer lines). When the terminal
+    can't keep up, the oldest buffered lines are dropped and counted, so
+    memory stays flat no matter how many pods are tailed.
+  - Lines wait up to --window ms so a line from a slower stream can still be
+    printed before a later line from a faster one.
+  - The selection, --since and --tail go to the API server (`get pods -l`,
+    `logs --since / --tail`), so only the wanted pods and history are sent.
+    kubectl logs has no text filter, though: --grep / --exclude / --level
+    run here, on every line streamed, as it is read and before it is
+    buffered.
+  - Per-stream line, drop and lag counts (log timestamp → receipt) go to
+    stderr with --stats N and when the run ends.
+  - New pods (restarts, rollouts) are picked up by re-listing every
+    --rediscover seconds.
+
+Select pods by app (catalog directory name, or a database under
+k3s/databases/), by namespace, by catalog category, or by a raw label
+selector. The selections are combined.
+
+Usage:
+  ./logs.py n8n postgres redis                  Follow three apps together
+  ./logs.py --namespace databases --level warn  Warnings+ from every DB
+  ./logs.py --category Automation -g 'timeout|refused'
+  ./logs.py -l app=jellyfin --since 10m --no-follow
+  ./logs.py n8n --stats 10                      Print per-stream stats every 10s
+
+kubectl is resolved from $KUBECTL (see _k3s.py), so the fake log source in
+fixtures/ can stand in for a cluster (n8n, postgres and a two-container
+redis pod, with a line over the per-line limit in each stream):
+  KUBECTL="python3 fixtures/fake-kubectl-logs.py" ./logs.py n8n postgres redis --level warn
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import re
+import signal
+import sys
+import time
+from calendar import timegm
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Pattern, Sequence, Set, Tuple
+
+from _k3s import (
+    BLUE, CYAN, DATABASES_DIR, DIM, GREEN, NC, RED, YELLOW,
+    app_manifests, catalog, err, kubectl_cmd, run_kubectl, warn,
+)
+
+
+LEVELS = {"trace": 0, "debug": 1, "info": 2, "warn": 3, "error": 4, "fatal": 5}
+LEVEL_RE = re.compile(
+    r"""(?ix)
+    (?:\blevel["']?\s*[=:]\s*["']?|\[|\b)
+    (trace|debug|dbug|info|inf|notice|warn|warning|wrn|error|err|eror|fatal|panic|crit|critical)
+    \b"""
+)
+LEVEL_ALIASES = {
+    "dbug": "debug", "inf": "info", "notice": "info", "warning": "warn", "wrn": "warn",
+    "err": "error", "eror": "error", "panic": "fatal", "crit": "fatal", "critical": "fatal",
+}
+LEVEL_COLOR = {"warn": YELLOW, "error": RED, "fatal": RED}
+MAGENTA = "\033[0;35m" if CYAN else ""
+STREAM_COLORS = [CYAN, GREEN, BLUE, YELLOW, MAGENTA]
+LINE_LIMIT = 64 * 1024
+
+
+# ─── Selection ───────────────────────────────────────────────────────────────
+
+
+def app_namespaces(names: Sequence[str]) -> List[Tuple[str, str]]:
+    """(namespace, app) for catalog apps and databases; unknown names are errors."""
+    known = {m["directory"]: str(m.get("namespace", "")) for m in catalog()}
+    out: List[Tuple[str, str]] = []
+    for name in names:
+        if "/" in name:
+            ns, app = name.split("/", 1)
+            out.append((ns, app))
+        elif name in known:
+            out.append((known[name], name))
+        elif (DATABASES_DIR / name).is_dir():
+            ns = next((d["metadata"]["namespace"] for d in app_manifests(DATABASES_DIR / name)
+                       if (d.get("metadata") or {}).get("namespace")), "databases")
+            out.append((ns, name))
+        else:
+            raise KeyError(name)
+    return out
+
+
+def category_apps(pattern: str) -> List[Tuple[str, str]]:
+    needle = pattern.lower()
+    return [
+        (str(m.get("namespace", "")), m["directory"])
+        for m in catalog() if needle in str(m.get("category", "")).lower()
+    ]
+
+
+@dataclass(frozen=True)
+class Selection:
+    apps: Tuple[Tuple[str, str], ...] = ()
+    namespaces: Tuple[str, ...] = ()
+    selector: str = ""
+    containers: Tuple[str, ...] = ()
+
+    def queries(self) -> List[List[str]]:
+        """`kubectl get pods` argument lists — the API server does the selecting."""
+        out = []
+        if self.apps:
+            names = sorted({app for _, app in self.apps})
+            out.append(["-A", "-l", f"app in ({','.join(names)})"])
+        out += [["-n", ns] for ns in self.namespaces]
+        if self.selector:
+            out.append(["-A", "-l", self.selector])
+        return out
+
+    def pods(self) -> List[Tuple[str, str, str, str]]:
+        """(namespace, pod, container, app) for every matching container — one API call per kind of selection."""
+        seen: Set[Tuple[str, str]] = set()
+        out = []
+        for i, query in enumerate(self.queries()):
+            res = run_kubectl(["get", "pods", *query, "-o", "json"], timeout=30)
+            if res.returncode != 0:
+                raise RuntimeError(res.stderr.strip() or "kubectl get pods failed")
+            by_app = bool(self.apps) and i == 0
+            for pod in json.loads(res.stdout).get("items", []):
+                meta = pod.get("metadata") or {}
+                ns, labels = meta.get("namespace", ""), meta.get("labels") or {}
+                # `app in (...)` spans namespaces; keep only the namespace each app lives in
+                if (by_app and (ns, labels.get("app")) not in self.apps) or (ns, meta.get("name")) in seen:
+                    continue
+                seen.add((ns, meta.get("name")))
+                app = labels.get("app") or labels.get("app.kubernetes.io/name") or meta.get("name", "")
+                for c in (pod.get("spec") or {}).get("containers") or []:
+                    if not self.containers or c["name"] in self.containers:
+                        out.append((ns, meta["name"], c["name"], app))
+        return out
+
+
+# ─── Streams ─────────────────────────────────────────────────────────────────
+
+
+_EPOCH_CACHE: Dict[str, float] = {}
+
+
+def parse_ts(stamp: str) -> Optional[float]:
+    """RFC3339(Nano) as written by `kubectl logs --timestamps` → epoch seconds."""
+    if len(stamp) < 20 or stamp[10] != "T":
+        return None
+    base = stamp[:19]
+    epoch = _EPOCH_CACHE.get(base)
+    if epoch is None:
+        try:
+            epoch = float(timegm(time.strptime(base, "%Y-%m-%dT%H:%M:%S")))
+        except ValueError:
+            return None
+        if len(_EPOCH_CACHE) > 4096:
+            _EPOCH_CACHE.clear()
+        _EPOCH_CACHE[base] = epoch
+    frac = 0.0
+    if stamp[19] == ".":
+        digits = stamp[20:].rstrip("Z").split("+")[0].split("-")[0]
+        if digits.isdigit():
+            frac = int(digits[:6].ljust(6, "0")) / 1e6
+    return epoch + frac
+
+
+def detect_level(text: str) -> str:
+    m = LEVEL_RE.search(text[:200])
+    if not m:
+        return "info"
+    word = m.group(1).lower()
+    return LEVEL_ALIASES.get(word, word)
+
+
+@dataclass
+class Filters:
+    include: List[Pattern[str]] = field(default_factory=list)
+    exclude: List[Pattern[str]] = field(default_factory=list)
+    min_level: int = 0
+
+    def passes(self, text: str) -> Tuple[bool, str]:
+        level = detect_level(text)
+        if LEVELS.get(level, 2) < self.min_level:
+            return False, level
+        if self.include and not any(p.search(text) for p in self.include):
+            return False, level
+        if any(p.search(text) for p in self.exclude):
+            return False, level
+        return True, level
+
+
+@dataclass
+class Stream:
+    namespace: str
+    pod: str
+    container: str
+    app: str
+    label: str
+    color: str
+    buffer: Deque[Tuple[float, float, str, str]]     # (log ts, arrival, level, text)
+    lines: int = 0
+    shown: int = 0
+    filtered: int = 0
+    dropped: int = 0
+    truncated: int = 0
+    lag_last: float = 0.0
+    lag_max: float = 0.0
+    done: bool = False
+    exit_code: Optional[int] = None
+    last_ts: float = 0.0
+
+    @property
+    def key(self) -> Tuple[str, str, str]:
+        return self.namespace, self.pod, self.container
+
+
+async def skip_line(reader: asyncio.StreamReader, buffered: int) -> None:
+    """Discard an over-long line chunk by chunk, through its newline."""
+    while True:
+        await reader.readexactly(buffered)
+        try:
+            await reader.readuntil(b"\n")
+            return
+        except asyncio.LimitOverrunError as exc:
+            buffered = exc.consumed
+        except asyncio.IncompleteReadError:
+            return
+
+
+async def read_stream(stream: Stream, args: Sequence[str], filters: Filters) -> None:
+    """Run one `kubectl logs` and feed its lines into the stream's bounded buffer."""
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *kubectl_cmd(), *args,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+            stdin=asyncio.subprocess.DEVNULL, limit=LINE_LIMIT,
+        )
+    except OSError:
+        stream.done, stream.exit_code = True, 127
+        return
+    assert proc.stdout is not None
+    try:
+        while True:
+            try:
+                raw = await proc.stdout.readuntil(b"\n")
+            except asyncio.IncompleteReadError as exc:
+                raw = exc.partial                    # EOF, last line had no newline
+            except asyncio.LimitOverrunError as exc:
+                # Line longer than LINE_LIMIT: drop all of it, not just what is buffered.
+                stream.truncated += 1
+                await skip_line(proc.stdout, exc.consumed)
+                continue
+            if not raw:
+                break
+            now = time.time()
+            line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+            stamp, _, text = line.partition(" ")
+            ts = parse_ts(stamp)
+            if ts is None:
+                ts, text = (stream.last_ts or now), line
+            stream.last_ts = ts
+            stream.lines += 1
+            stream.lag_last = max(0.0, now - ts)
+            stream.lag_max = max(stream.lag_max, stream.lag_last)
+            keep, level = filters.passes(text)
+            if not keep:
+                stream.filtered += 1
+                continue
+            if len(stream.buffer) == stream.buffer.maxlen:
+                stream.dropped += 1
+            stream.buffer.append((ts, now, level, text))
+        stream.exit_code = await proc.wait()
+    finally:
+        # Cancelled (Ctrl+C / end of run): stop kubectl, but don't report it as a failure.
+        if proc.returncode is None:
+            try:
+                proc.terminate()
+            except ProcessLookupError:
+                pass
+            await proc.wait()
+        stream.done = True
+
+
+# ─── Merge + output ──────────────────────────────────────────────────────────
+
+
+def fmt_line(stream: Stream, ts: float, level: str, text: str) -> str:
+    clock = time.strftime("%H:%M:%S", time.localtime(ts)) + f".{int((ts % 1) * 1000):03d}"
+    body = f"{LEVEL_COLOR[level]}{text}{NC}" if level in LEVEL_COLOR else text
+    return f"{DIM}{clock}{NC} {stream.color}{stream.label}{NC} │ {body}"
+
+
+def emit_ready(streams: Sequence[Stream], window: float, flush: bool = False) -> int:
+    """Print buffered lines in timestamp order once they've waited `window`s.
+
+    k-way merge over the stream heads: the oldest head is printed only after
+    it has been buffered for the window, which gives slower streams time to
+    deliver earlier lines. `flush` drains everything regardless.
+    """
+    out: List[str] = []
+    cutoff = time.time() - window
+    while True:
+        head: Optional[Stream] = None
+        for s in streams:
+            if s.buffer and (head is None or s.buffer[0][0] < head.buffer[0][0]):
+                head = s
+        if head is None:
+            break
+        ts, arrived, level, text = head.buffer[0]
+        if not flush and arrived > cutoff:
+            break
+        head.buffer.popleft()
+        head.shown += 1
+        out.append(fmt_line(head, ts, level, text))
+    if out:
+        sys.stdout.write("\n".join(out) + "\n")
+        sys.stdout.flush()
+    return len(out)
+
+
+def print_stats(streams: Sequence[Stream], final: bool) -> None:
+    w = max([len(s.label) for s in streams] + [6])
+    lines = [f"{'STREAM':<{w}} {'LINES':>7} {'SHOWN':>7} {'FILTER':>7} {'DROP':>6} {'LONG':>5} "
+             f"{'LAG':>7} {'MAXLAG':>7}  STATE"]
+    for s in streams:
+        state = "ended" if s.done else "live"
+        if s.done and s.exit_code not in (0, None):
+            state = f"exit {s.exit_code}"
+        lines.append(f"{s.label:<{w}} {s.lines:>7} {s.shown:>7} {s.filtered:>7} "
+                     f"{(RED if s.dropped else '') + str(s.dropped) + (NC if s.dropped else ''):>6} "
+                     f"{s.truncated:>5} {s.lag_last:>6.2f}s {s.lag_max:>6.2f}s  {state}")
+    title = "Stream stats" + (" (final)" if final else "")
+    print(f"\n{DIM}── {title} ──{NC}\n" + "\n".join(lines), file=sys.stderr)
+
+
+async def run(selection: Selection, opts: argparse.Namespace, filters: Filters) -> int:
+    streams: Dict[Tuple[str, str, str], Stream] = {}
+    tasks: Set[asyncio.Task] = set()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    started = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+    def start_new(found: List[Tuple[str, str, str, str]], first: bool) -> None:
+        multi_container = {(ns, pod) for ns, pod, _, _ in found if sum(1 for f in found if f[:2] == (ns, pod)) > 1}
+        for ns, pod, container, app in found:
+            key = (ns, pod, container)
+            if key in streams:
+                continue
+            suffix = pod[len(app) + 1:] if pod.startswith(app + "-") else pod
+            label = f"{app}/{suffix[-5:]}" + (f":{container}" if (ns, pod) in multi_container else "")
+            stream = Stream(ns, pod, container, app, label, STREAM_COLORS[len(streams) % len(STREAM_COLORS)],
+                            deque(maxlen=opts.buffer))
+            streams[key] = stream
+            args = ["logs", "--timestamps", "-n", ns, pod, "-c", container]
+            args += ["-f"] if opts.follow else []
+            if not first:
+                # Pods found later (restarts, rollouts) start where this run did.
+                args.append(f"--since-time={started}")
+            elif opts.since:
+                args.append(f"--since={opts.since}")
+            else:
+                args.append(f"--tail={opts.tail}")
+            task = asyncio.create_task(read_stream(stream, args, filters))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            if not first:
+                print(f"{DIM}── following new pod {label} ──{NC}", file=sys.stderr)
+
+    found = selection.pods()
+    if not found:
+        warn("No pods matched the selection")
+        return 1
+    start_new(found, first=True)
+    print(f"{DIM}── {len(streams)} stream(s){' — Ctrl+C to stop' if opts.follow else ''} ──{NC}", file=sys.stderr)
+
+    tick = 0.05
+    next_stats = time.monotonic() + opts.stats if opts.stats else None
+    next_discover = time.monotonic() + opts.rediscover if opts.follow and opts.rediscover else None
+    while not stop.is_set():
+        emit_ready(list(streams.values()), opts.window / 1000.0)
+        if not tasks and all(not s.buffer for s in streams.values()):
+            break
+        now = time.monotonic()
+        if next_stats and now >= next_stats:
+            print_stats(list(streams.values()), final=False)
+            next_stats = now + opts.stats
+        if next_discover and now >= next_discover:
+            next_discover = now + opts.rediscover
+            try:
+                start_new(await asyncio.to_thread(selection.pods), first=False)
+            except RuntimeError as exc:
+                warn(f"Re-listing pods failed: {exc}")
+        try:
+            await asyncio.wait_for(stop.wait(), tick)
+        except asyncio.TimeoutError:
+            pass
+
+    for task in list(tasks):
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    emit_ready(list(streams.values()), 0, flush=True)
+    if opts.stats is not None or any(s.dropped or s.truncated for s in streams.values()):
+        print_stats(list(streams.values()), final=True)
+    return 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Follow many pods at once, merged by timestamp.")
+    ap.add_argument("apps", nargs="*", help="catalog apps / databases, or namespace/app")
+    ap.add_argument("-n", "--namespace", action="append", default=[], help="every pod in this namespace")
+    ap.add_argument("--category", action="append", default=[], help="catalog category substring, e.g. Automation")
+    ap.add_argument("-l", "--selector", default="", help="label selector, e.g. app=n8n,tier!=cache")
+    ap.add_argument("-c", "--container", action="append", default=[], help="only these container names")
+    ap.add_argument("-g", "--grep", action="append", default=[], metavar="REGEX", help="show lines matching any")
+    ap.add_argument("-x", "--exclude", action="append", default=[], metavar="REGEX", help="hide lines matching any")
+    ap.add_argument("--level", choices=list(LEVELS), help="minimum level (unlabelled lines count as info)")
+    ap.add_argument("-i", "--ignore-case", action="store_true", help="case-insensitive --grep/--exclude")
+    ap.add_argument("--tail", type=int, default=20, help="lines of history per stream (default: 20)")
+    ap.add_argument("--since", help="history window instead of --tail, e.g. 10m")
+    ap.add_argument("--no-follow", dest="follow", action="store_false", help="print history and exit")
+    ap.add_argument("--buffer", type=int, default=1000, help="max buffered lines per stream (default: 1000)")
+    ap.add_argument("--window", type=int, default=250, help="reorder window in ms (default: 250)")
+    ap.add_argument("--stats", type=float, nargs="?", const=0.0, default=None, metavar="SECONDS",
+                    help="print per-stream stats at exit, or every N seconds")
+    ap.add_argument("--rediscover", type=float, default=15.0, help="seconds between pod re-lists (0 = off)")
+    args = ap.parse_args()
+
+    try:
+        apps = app_namespaces(args.apps)
+    except KeyError as exc:
+        err(f"Unknown app {exc} — use namespace/app for apps outside the catalog")
+        return 2
+    for cat in args.category:
+        matched = category_apps(cat)
+        if not matched:
+            warn(f"No catalog apps in a category matching '{cat}'")
+        apps += matched
+    if not (apps or args.namespace or args.selector):
+        ap.error("select pods by app, --namespace, --category or --selector")
+
+    flags = re.IGNORECASE if args.ignore_case else 0
+    try:
+        filters = Filters(
+            include=[re.compile(p, flags) for p in args.grep],
+            exclude=[re.compile(p, flags) for p in args.exclude],
+            min_level=LEVELS[args.level] if args.level else 0,
+        )
+    except re.error as exc:
+        err(f"Bad regex: {exc}")
+        return 2
+
+    selection = Selection(tuple(apps), tuple(args.namespace), args.selector, tuple(args.container))
+    try:
+        return asyncio.run(run(selection, args, filters))
+    except RuntimeError as exc:
+        err(str(exc))
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
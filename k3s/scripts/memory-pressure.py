@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+memory-pressure.py — Offline eviction / OOM-kill simulator for the node.
+
+Builds the pod set from the manifests (k3s/databases/*, k3s/apps/*, plus the
+`resources` blocks of the Helm values under k3s/infra/*) with each pod's
+priority (priorityClassName → k3s/infra/priority-classes, else the
+globalDefault class), QoS class (from requests/limits, as the API server
+derives it) and expected memory use. Then it squeezes the node: memory used
+outside the pods (host processes, docker/ stacks, page cache that won't
+drop) is raised step by step and two failure paths are replayed:
+
+  eviction  kubelet's hard eviction on memory.available: while below the
+            threshold, evict the top of (usage > request first, then lowest
+            priority, then largest usage − request)
+  oom       pressure that outruns kubelet (a spike inside one housekeeping
+            interval): once RAM is exhausted the kernel kills the process
+            with the highest oom_score = usage/RAM·1000 + oom_score_adj
+            (Guaranteed −997, BestEffort 1000, Burstable 1000 − 1000·request/RAM)
+
+For each pod the report shows the order it goes in and how much non-pod
+memory it took to get there. Node size, reservations and the eviction
+threshold come from ansible/roles/k3s/templates/k3s-config.yaml.j2 and the
+8 GB reference node; zram adds size·(1 − 1/ratio) of headroom.
+
+Expected usage per pod is, in order: --set, --usage / --live (kubectl top),
+the memory request, the memory limit, --default-usage.
+
+Usage:
+  ./memory-pressure.py                          Both scenarios, manifest requests as usage
+  ./memory-pressure.py --live                   Use current `kubectl top pods -A`
+  ./memory-pressure.py --usage top.txt          Saved `kubectl top pods -A` output (or YAML ns/pod: 300Mi)
+  ./memory-pressure.py --zram 2Gi --zram-ratio 3
+  ./memory-pressure.py --node-memory 4Gi --set media/jellyfin=1.5Gi
+  ./memory-pressure.py --scenario oom --json
+
+Workloads with replicas: 0 are left out. Pods are named after their
+workload; replicas > 1 appear as name-0, name-1, …
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import yaml
+
+from _k3s import (
+    BOLD, DIM, INFRA_DIR, NC, RED, REPO_ROOT, YELLOW, WORKLOAD_KINDS,
+    app_manifests, discover_app_dirs, err, header, info, parse_quantity, pod_spec, run_kubectl, warn,
+)
+
+
+MI = 2 ** 20
+PRIORITY_DIR = INFRA_DIR / "priority-classes"
+K3S_CONFIG = REPO_ROOT / "ansible" / "roles" / "k3s" / "templates" / "k3s-config.yaml.j2"
+DEFAULT_NODE_MEMORY = "8Gi"
+# Helm charts under infra/ and the namespace they're installed into
+HELM_NAMESPACES = {"traefik": "kube-system", "cert-manager": "cert-manager", "argocd": "argocd"}
+
+
+@dataclass
+class Pod:
+    namespace: str
+    name: str
+    workload: str
+    priority_class: str
+    priority: int
+    qos: str
+    request: float            # bytes
+    limit: Optional[float]
+    usage: float
+    usage_source: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.namespace}/{self.name}"
+
+    def oom_score_adj(self, capacity: float) -> int:
+        if self.qos == "Guaranteed":
+            return -997
+        if self.qos == "BestEffort":
+            return 1000
+        return int(min(max(2, 1000 - (1000 * self.request) // capacity), 999))
+
+    def oom_score(self, capacity: float) -> int:
+        return int(max(0, min(2000, self.usage * 1000 // capacity + self.oom_score_adj(capacity))))
+
+
+@dataclass
+class Death:
+    order: int
+    pod: str
+    qos: str
+    priority: int
+    usage_mib: float
+    external_mib: float       # non-pod memory at the moment it died
+    available_mib: float      # memory.available (eviction) or free RAM (oom) just before
+    reason: str
+
+
+@dataclass
+class Node:
+    memory: float
+    reserved: float
+    threshold: float
+    zram_headroom: float
+
+    @property
+    def capacity(self) -> float:
+        return self.memory + self.zram_headroom
+
+
+# ─── Inputs ──────────────────────────────────────────────────────────────────
+
+
+def priority_classes() -> Tuple[Dict[str, int], Tuple[str, int]]:
+    classes: Dict[str, int] = {}
+    default = ("", 0)
+    for path in sorted(PRIORITY_DIR.glob("*.y*ml")) if PRIORITY_DIR.is_dir() else []:
+        for doc in yaml.safe_load_all(path.read_text(encoding="utf-8")):
+            if isinstance(doc, dict) and doc.get("kind") == "PriorityClass":
+                name, value = doc["metadata"]["name"], int(doc.get("value", 0))
+                classes[name] = value
+                if doc.get("globalDefault"):
+                    default = (name, value)
+    return classes, default
+
+
+def kubelet_args() -> Dict[str, float]:
+    """kube-reserved / system-reserved memory and the hard eviction threshold (bytes)."""
+    out = {"reserved": 0.0, "threshold": 100 * MI}      # kubelet's default threshold
+    text = K3S_CONFIG.read_text(encoding="utf-8") if K3S_CONFIG.is_file() else ""
+    for m in re.finditer(r"(kube|system)-reserved=[^\"\n]*?memory=([0-9.]+[A-Za-z]*)", text):
+        out["reserved"] += parse_quantity(m.group(2)) or 0
+    m = re.search(r"eviction-hard=[^\"\n]*memory\.available<([0-9.]+[A-Za-z]*)", text)
+    if m:
+        out["threshold"] = parse_quantity(m.group(1)) or out["threshold"]
+    return out
+
+
+def _qos(containers: List[Dict[str, Any]]) -> str:
+    requests = [(c.get("resources") or {}).get("requests") or {} for c in containers]
+    limits = [(c.get("resources") or {}).get("limits") or {} for c in containers]
+    if not any(requests) and not any(limits):
+        return "BestEffort"
+    for req, lim in zip(requests, limits):
+        for res in ("cpu", "memory"):
+            if res not in lim or parse_quantity(req.get(res, lim[res])) != parse_quantity(lim[res]):
+                return "Burstable"
+    return "Guaranteed"
+
+
+def _memory(containers: List[Dict[str, Any]]) -> Tuple[float, Optional[float]]:
+    request, limit, unlimited = 0.0, 0.0, False
+    for c in containers:
+        res = c.get("resources") or {}
+        lim = parse_quantity((res.get("limits") or {}).get("memory"))
+        request += parse_quantity((res.get("requests") or {}).get("memory")) or lim or 0
+        if lim is None:
+            unlimited = True
+        else:
+            limit += lim
+    return request, None if unlimited else limit
+
+
+def manifest_pods(classes: Dict[str, int], default: Tuple[str, int]) -> List[Dict[str, Any]]:
+    pods = []
+    for app_dir in discover_app_dirs():
+        for doc in app_manifests(app_dir):
+            if doc.get("kind") not in WORKLOAD_KINDS:
+                continue
+            meta = doc.get("metadata") or {}
+            replicas = 1 if doc["kind"] == "DaemonSet" else int((doc.get("spec") or {}).get("replicas", 1))
+            spec = pod_spec(doc)
+            pc = spec.get("priorityClassName") or default[0]
+            base = {
+                "namespace": meta.get("namespace", "default"), "workload": f"{doc['kind']}/{meta.get('name')}",
+                "priority_class": pc or "—", "priority": classes.get(pc, default[1]),
+                "containers": spec.get("containers") or [],
+            }
+            for i in range(replicas):
+                pods.append({**base, "name": meta.get("name") if replicas == 1 else f"{meta.get('name')}-{i}"})
+    return pods
+
+
+def helm_pods(classes: Dict[str, int], default: Tuple[str, int]) -> List[Dict[str, Any]]:
+    """One pod per `resources` block in infra/<chart>/values.yaml."""
+    pods = []
+    for chart, namespace in HELM_NAMESPACES.items():
+        path = INFRA_DIR / chart / "values.yaml"
+        if not path.is_file():
+            continue
+        values = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+
+        def walk(node: Any, trail: List[str]) -> Iterable[Tuple[List[str], Dict[str, Any], Dict[str, Any]]]:
+            if isinstance(node, dict):
+                if isinstance(node.get("resources"), dict):
+                    yield trail, node["resources"], node
+                for k, v in node.items():
+                    if k != "resources":
+                        yield from walk(v, trail + [str(k)])
+
+        for trail, resources, owner in walk(values, []):
+            pc = owner.get("priorityClassName") or default[0]
+            pods.append({
+                "namespace": namespace, "name": "-".join([chart] + trail), "workload": f"helm/{chart}",
+                "priority_class": pc or "—", "priority": classes.get(pc, default[1]),
+                "containers": [{"resources": resources}],
+            })
+    return pods
+
+
+def parse_usage(text: str) -> Dict[str, float]:
+    """`kubectl top pods -A` output, or a YAML mapping of ns/pod → quantity."""
+    usage: Dict[str, float] = {}
+    try:
+        data = yaml.safe_load(text)
+    except yaml.YAMLError:
+        data = None
+    if isinstance(data, dict):
+        return {str(k): parse_quantity(v) or 0 for k, v in data.items()}
+    for line in text.splitlines():
+        cols = line.split()
+        if len(cols) >= 4 and cols[0] != "NAMESPACE":
+            value = parse_quantity(cols[3])
+            if value is not None:
+                usage[f"{cols[0]}/{cols[1]}"] = value
+    return usage
+
+
+def _match_usage(pod: Dict[str, Any], usage: Dict[str, float]) -> Optional[float]:
+    """Exact ns/name, else the sum over live pods named <workload>-<hash>-<id> / <name>-<n>."""
+    key = f"{pod['namespace']}/{pod['name']}"
+    if key in usage:
+        return usage[key]
+    prefix = f"{pod['namespace']}/{pod['name']}-"
+    hits = [v for k, v in usage.items() if k.startswith(prefix)]
+    return sum(hits) if hits else None
+
+
+def build_pods(raw: List[Dict[str, Any]], usage: Dict[str, float], overrides: Dict[str, float],
+               default_usage: float) -> List[Pod]:
+    pods = []
+    for p in raw:
+        request, limit = _memory(p["containers"])
+        key = f"{p['namespace']}/{p['name']}"
+        measured = _match_usage(p, usage)
+        if key in overrides:
+            value, source = overrides[key], "--set"
+        elif measured is not None:
+            value, source = measured, "top"
+        elif request:
+            value, source = request, "request"
+        elif limit:
+            value, source = limit, "limit"
+        else:
+            value, source = default_usage, "default"
+        pods.append(Pod(p["namespace"], p["name"], p["workload"], p["priority_class"], p["priority"],
+                        _qos(p["containers"]), request, limit, value, source))
+    return pods
+
+
+# ─── Simulation ──────────────────────────────────────────────────────────────
+
+
+def eviction_rank(pod: Pod) -> Tuple[bool, int, float]:
+    """kubelet's order for memory pressure: smallest tuple is evicted first."""
+    return (pod.usage <= pod.request, pod.priority, -(pod.usage - pod.request))
+
+
+def simulate(pods: List[Pod], node: Node, scenario: str, step: float) -> Tuple[List[Death], float]:
+    """Raise non-pod memory by `step` until every pod is gone; returns deaths and the first-death load."""
+    alive = list(pods)
+    deaths: List[Death] = []
+    external = 0.0
+    first = -1.0
+    while alive:
+        free = node.capacity - node.reserved - external - sum(p.usage for p in alive)
+        if scenario == "eviction" and free < node.threshold:
+            victim = min(alive, key=eviction_rank)
+            reason = "usage > request" if victim.usage > victim.request else "priority / usage"
+        elif scenario == "oom" and free < 0:
+            victim = max(alive, key=lambda p: (p.oom_score(node.memory), p.usage))
+            reason = f"oom_score {victim.oom_score(node.memory)}"
+        else:
+            external += step
+            continue
+        alive.remove(victim)
+        if first < 0:
+            first = external
+        deaths.append(Death(len(deaths) + 1, victim.key, victim.qos, victim.priority,
+                            round(victim.usage / MI, 1), round(external / MI), round(free / MI), reason))
+    return deaths, first
+
+
+# ─── Report ──────────────────────────────────────────────────────────────────
+
+
+def _mib(value: Optional[float]) -> str:
+    return "—" if value is None else f"{value / MI:.0f}Mi"
+
+
+def print_inventory(pods: List[Pod], node: Node) -> None:
+    total = sum(p.usage for p in pods)
+    header(f"Pods — {len(pods)} ({total / MI:.0f}Mi expected) on {node.memory / MI:.0f}Mi RAM"
+           f" + {node.zram_headroom / MI:.0f}Mi zram headroom, {node.reserved / MI:.0f}Mi reserved,"
+           f" eviction < {node.threshold / MI:.0f}Mi")
+    width = max([len(p.key) for p in pods] + [3])
+    print(f"  {BOLD}{'POD':<{width}} {'CLASS':<14} {'PRIO':>5} {'QOS':<10} {'REQ':>7} {'LIMIT':>7} "
+          f"{'USAGE':>7} {'FROM':<8} {'OOM':>5}{NC}")
+    for p in sorted(pods, key=lambda p: (-p.priority, p.key)):
+        over = p.limit is not None and p.usage > p.limit
+        color = RED if over else (YELLOW if p.qos == "BestEffort" else "")
+        print(f"  {p.key:<{width}} {p.priority_class:<14} {p.priority:>5} {color}{p.qos:<10}{NC} "
+              f"{_mib(p.request):>7} {_mib(p.limit):>7} {color}{_mib(p.usage):>7}{NC} {p.usage_source:<8} "
+              f"{p.oom_score(node.memory):>5}")
+
+
+def print_deaths(title: str, deaths: List[Death], first: float, node: Node) -> None:
+    header(title)
+    if not deaths:
+        print(f"  {DIM}nothing to kill{NC}")
+        return
+    width = max(len(d.pod) for d in deaths)
+    print(f"  {BOLD}{'#':>3} {'POD':<{width}} {'QOS':<10} {'PRIO':>5} {'USAGE':>7} "
+          f"{'NON-POD':>8} {'FREE':>7}  WHY{NC}")
+    for d in deaths:
+        print(f"  {d.order:>3} {d.pod:<{width}} {d.qos:<10} {d.priority:>5} {d.usage_mib:>6.0f}Mi "
+              f"{d.external_mib:>6.0f}Mi {d.available_mib:>5.0f}Mi  {DIM}{d.reason}{NC}")
+    print(f"  {DIM}(NON-POD: memory used outside the pods when it went; first loss at "
+          f"{first / MI:.0f}Mi of non-pod memory){NC}")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Replay kubelet eviction and kernel OOM ordering offline.")
+    ap.add_argument("--scenario", choices=("eviction", "oom", "both"), default="both")
+    ap.add_argument("--node-memory", default=DEFAULT_NODE_MEMORY, help=f"physical RAM (default: {DEFAULT_NODE_MEMORY})")
+    ap.add_argument("--reserved", help="kube+system reserved memory (default: from the k3s config template)")
+    ap.add_argument("--threshold", help="eviction-hard memory.available (default: from the k3s config template)")
+    ap.add_argument("--zram", default="0", help="zram disksize, e.g. 2Gi (default: none)")
+    ap.add_argument("--zram-ratio", type=float, default=3.0, help="zram compression ratio (default: 3)")
+    ap.add_argument("--usage", type=Path, help="saved `kubectl top pods -A` output, or YAML ns/pod: quantity")
+    ap.add_argument("--live", action="store_true", help="take usage from `kubectl top pods -A` now")
+    ap.add_argument("--set", action="append", default=[], metavar="NS/POD=QTY", help="override one pod's usage")
+    ap.add_argument("--default-usage", default="128Mi", help="usage for pods with no request/limit (default: 128Mi)")
+    ap.add_argument("--no-infra", action="store_true", help="leave out the Helm-installed infra pods")
+    ap.add_argument("--step", default="16Mi", help="pressure increment (default: 16Mi)")
+    ap.add_argument("--json", action="store_true", help="print JSON instead of tables")
+    args = ap.parse_args()
+
+    kubelet = kubelet_args()
+    try:
+        zram = parse_quantity(args.zram) or 0
+        node = Node(
+            memory=_required(args.node_memory),
+            reserved=parse_quantity(args.reserved) if args.reserved else kubelet["reserved"],
+            threshold=parse_quantity(args.threshold) if args.threshold else kubelet["threshold"],
+            zram_headroom=zram * (1 - 1 / args.zram_ratio) if args.zram_ratio > 1 else 0,
+        )
+        overrides = {k: _required(v) for k, v in (s.split("=", 1) for s in args.set)}
+        step = _required(args.step)
+        if step <= 0:
+            raise ValueError(f"--step must be positive: {args.step}")
+        default_usage = _required(args.default_usage)
+    except ValueError as exc:
+        err(str(exc))
+        return 2
+
+    usage: Dict[str, float] = {}
+    if args.usage:
+        usage = parse_usage(args.usage.read_text(encoding="utf-8"))
+    elif args.live:
+        res = run_kubectl(["top", "pods", "-A", "--no-headers"], timeout=30)
+        if res.returncode != 0:
+            err(f"kubectl top failed: {res.stderr.strip()}")
+            return 1
+        usage = parse_usage(res.stdout)
+
+    classes, default = priority_classes()
+    raw = manifest_pods(classes, default) + ([] if args.no_infra else helm_pods(classes, default))
+    pods = build_pods(raw, usage, overrides, default_usage)
+    if not pods:
+        warn("No workloads found")
+        return 0
+    for key in overrides:
+        if key not in {p.key for p in pods}:
+            warn(f"--set {key}: no such pod")
+
+    scenarios = ["eviction", "oom"] if args.scenario == "both" else [args.scenario]
+    results = {s: simulate(pods, node, s, step) for s in scenarios}
+
+    if args.json:
+        print(json.dumps({
+            "node": {**asdict(node), "capacity": node.capacity},
+            "pods": [{**asdict(p), "oom_score": p.oom_score(node.memory)} for p in pods],
+            **{s: {"first_loss_bytes": first, "deaths": [asdict(d) for d in deaths]}
+               for s, (deaths, first) in results.items()},
+        }, indent=2))
+        return 0
+
+    print_inventory(pods, node)
+    titles = {"eviction": "kubelet eviction order (memory.available < threshold)",
+              "oom": "Kernel OOM-kill order (pressure faster than kubelet reacts)"}
+    for s, (deaths, first) in results.items():
+        print_deaths(titles[s], deaths, first, node)
+    over = [p.key for p in pods if p.limit is not None and p.usage > p.limit]
+    if over:
+        warn(f"Usage above the memory limit — OOM-killed by their own cgroup first: {', '.join(over)}")
+    best_effort = [p.key for p in pods if p.qos == "BestEffort"]
+    if best_effort:
+        info(f"BestEffort (no requests/limits, always ranked as over their request): {', '.join(best_effort)}")
+    return 0
+
+
+def _required(value: str) -> float:
+    q = parse_quantity(value)
+    if q is None:
+        raise ValueError(f"not a quantity: {value}")
+    return q
+
+
+if __name__ == "__main__":
+    sys.exit(main())
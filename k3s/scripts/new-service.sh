@@ -7,6 +7,9 @@ set -euo pipefail
 #            conventions used in this repo.
 #
 # Usage: ./new-service.sh
+#
+# To scaffold several services at once without prompts, list them in a spec
+# file and use new-services.py (see k3s/scripts/services.example.yaml).
 
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 REPO_ROOT="$(cd "$SCRIPT_DIR/.." && pwd)"
@@ -269,27 +272,39 @@ gen_argocd_application() {
   # For apps nested under a category (e.g. databases), adjust the path
   [[ -d "$OUT_DIR" ]] && app_path="k3s/apps/$(realpath --relative-to="$APPS_DIR" "$OUT_DIR")"
 
-  # Build the new entry
+  # Build the new entry (every key the template references — missingkey=error)
   local entry
-  entry=$(printf '          - name: %s\n            namespace: %s\n            path: %s' "$APP" "$NAMESPACE" "$app_path")
+  entry=$(printf '          - name: %s\n            namespace: %s\n            category: %s\n            path: %s\n            wave: "0"' \
+    "$APP" "$NAMESPACE" "$NAMESPACE" "$app_path")
 
-  # Insert before the last blank line in the elements list (just before 'template:')
-  # Find the line number of '  template:' and insert before it
+  # Insert after the last line of the generator's elements list
   local insert_line
-  insert_line=$(grep -n '^  template:' "$appset_file" | head -1 | cut -d: -f1)
+  insert_line=$(awk '
+    /^ *elements:/ { inside = 1; next }
+    inside && NF && match($0, /^ */) && RLENGTH < 10 { exit }
+    inside && NF { last = NR }
+    END { print last }
+  ' "$appset_file")
   if [[ -z "$insert_line" ]]; then
-    warn "Could not find template: section in ApplicationSet — add entry manually"
+    warn "Could not find the elements list in the ApplicationSet — add entry manually"
     return
   fi
 
   # Insert the entry (with a blank line before for readability)
   {
-    head -n "$(( insert_line - 1 ))" "$appset_file"
+    head -n "$insert_line" "$appset_file"
     echo ""
     echo "$entry"
-    tail -n +"$insert_line" "$appset_file"
+    tail -n +"$(( insert_line + 1 ))" "$appset_file"
   } > "${appset_file}.tmp" && mv "${appset_file}.tmp" "$appset_file"
   ok "Added ${APP} to infra/argocd/applicationset.yaml"
+
+  # Place it in the right sync wave now that its manifests exist
+  if command -v python3 &>/dev/null && python3 "$SCRIPT_DIR/sync-waves.py" --write --quiet; then
+    ok "Sync waves re-derived (sync-waves.py)"
+  else
+    warn "Run ./sync-waves.py --write to place ${APP} in its ArgoCD sync wave"
+  fi
 }
 
 gen_setup_sh() {
@@ -0,0 +1,728 @@
+#!/usr/bin/env python3
+"""
+new-services.py — Non-interactive, batched version of new-service.sh.
+
+Reads a YAML spec listing any number of services and renders, for each one,
+the same files new-service.sh writes (deployment, service, ingress, pvc,
+secret template, setup.sh) plus a README.md whose frontmatter follows the
+k3s schema in .github/scripts/_schema.py. The services also get
+ApplicationSet entries, and any namespace that doesn't exist yet is added
+to base/namespaces/namespaces.yaml.
+
+Everything is rendered and validated in memory first: every document is
+parsed back, names, selectors, ports and claims are cross-checked, and
+ports/domains are checked against the catalog and each other. Only if the
+whole batch is clean is anything written. New app directories are built in
+a staging directory and renamed into place, and shared files are replaced
+via a temp file, so an interrupted run never leaves half an app behind.
+
+Spec format (see k3s/scripts/services.example.yaml):
+
+    defaults:                      # merged into every service
+      storage_size: 2Gi
+      memory: 128Mi
+    services:
+      - name: sonarr
+        image: lscr.io/linuxserver/sonarr:4.0.14
+        port: 8989                 # container port
+        namespace: media
+        external_port: 8989        # LoadBalancer (omit → ClusterIP)
+        domain: sonarr.home.ijlalahmad.dev
+        storage: 5Gi               # or {size, mount, root: apps|databases}, or false
+        secret: [API_KEY]          # secret.yaml template keys (or true)
+        env: {PUID: "1000"}
+        title: Sonarr              # README frontmatter ↓
+        category: "🎬 Media & Entertainment"
+        purpose: TV Series Manager
+        description: Monitors RSS feeds and grabs new episodes.
+        icon: "📺"
+        features: [Calendar view, Quality profiles]
+
+Usage:
+  ./new-services.py ../apps/services.yaml             Scaffold every service
+  ./new-services.py services.yaml --dry-run           Validate + list files only
+  ./new-services.py services.yaml --only sonarr       Subset of the spec
+  ./new-services.py services.yaml --force             Overwrite existing apps
+  ./new-services.py services.yaml --no-argocd         Skip the ApplicationSet
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from string import Template
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import yaml
+
+from _k3s import (
+    APPS_DIR, BOLD, CYAN, DIM, GREEN, K3S_ROOT, NAMESPACES_FILE, NC, REPO_ROOT, SCRIPTS_DIR, YELLOW,
+    catalog, err, header, info, ok, warn,
+)
+
+
+APPSET_FILE = K3S_ROOT / "infra" / "argocd" / "applicationset.yaml"
+SCHEMA = REPO_ROOT / ".github" / "scripts" / "_schema.py"
+STORAGE_ROOTS = {"apps": "/home/pi/k3s-volumes/apps", "databases": "/home/pi/k3s-volumes/databases"}
+TLS_SECRET = "wildcard-home-ijlalahmad-dev-tls"
+NAME_RE = re.compile(r"^[a-z0-9]([-a-z0-9]*[a-z0-9])?$")
+QUANTITY_RE = re.compile(r"^[0-9]+(\.[0-9]+)?(m|Ki|Mi|Gi|Ti|k|M|G|T)?$")
+
+
+@dataclass
+class Service:
+    name: str
+    image: str
+    port: int
+    namespace: str
+    external_port: Optional[int] = None
+    domain: str = ""
+    storage_size: str = ""
+    storage_root: str = "apps"
+    mount: str = "/data"
+    secret_keys: List[str] = field(default_factory=list)
+    has_secret: bool = False
+    env: Dict[str, str] = field(default_factory=dict)
+    cpu: str = "50m"
+    memory: str = "128Mi"
+    memory_limit: str = "512Mi"
+    shell: str = "sh"
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def service_port(self) -> int:
+        return self.external_port or self.port
+
+    @property
+    def storage_path(self) -> str:
+        return f"{STORAGE_ROOTS.get(self.storage_root, self.storage_root)}/{self.name}/data"
+
+
+# ─── Spec ────────────────────────────────────────────────────────────────────
+
+
+def _int(value: Any) -> Optional[int]:
+    try:
+        return int(str(value).strip()) if value not in (None, "", "—") else None
+    except ValueError:
+        return None
+
+
+def parse_service(raw: Dict[str, Any], defaults: Dict[str, Any]) -> Tuple[Optional[Service], List[str]]:
+    entry = {**defaults, **raw}
+    name = str(entry.get("name") or "")
+    errors = [f"missing '{k}'" for k in ("name", "image", "port", "namespace") if not entry.get(k)]
+    if errors:
+        return None, errors
+
+    svc = Service(name=name, image=str(entry["image"]), port=_int(entry["port"]) or 0,
+                  namespace=str(entry["namespace"]))
+    svc.external_port = _int(entry.get("external_port"))
+    svc.domain = str(entry.get("domain") or "")
+    svc.mount = str(entry.get("mount") or svc.mount)
+    storage = entry.get("storage", entry.get("storage_size"))
+    if isinstance(storage, dict):
+        svc.storage_size = str(storage.get("size") or defaults.get("storage_size") or "2Gi")
+        svc.mount = str(storage.get("mount") or svc.mount)
+        svc.storage_root = str(storage.get("root") or svc.storage_root)
+    elif storage not in (None, False, ""):
+        svc.storage_size = str(defaults.get("storage_size") or "2Gi") if storage is True else str(storage)
+    secret = entry.get("secret")
+    svc.has_secret = bool(secret)
+    svc.secret_keys = [str(k) for k in secret] if isinstance(secret, list) else []
+    svc.env = {str(k): str(v) for k, v in (entry.get("env") or {}).items()}
+    for key in ("cpu", "memory", "memory_limit", "shell"):
+        if entry.get(key):
+            setattr(svc, key, str(entry[key]))
+
+    title = str(entry.get("title") or name.replace("-", " ").title())
+    svc.meta = {
+        "name": title,
+        "category": entry.get("category"),
+        "purpose": entry.get("purpose"),
+        "description": entry.get("description"),
+        "icon": entry.get("icon") or "📦",
+        "namespace": svc.namespace,
+        "external_port": str(svc.external_port) if svc.external_port else "—",
+        "domain": svc.domain or "—",
+        "components": components(svc),
+        "features": entry.get("features"),
+        "resource_usage": entry.get("resource_usage") or f"~{svc.memory.replace('i', 'B')} RAM",
+    }
+    return svc, []
+
+
+def components(svc: Service) -> List[str]:
+    out = ["deployment", "service"]
+    if svc.domain:
+        out.append("ingress")
+    if svc.has_secret:
+        out.append("sealedsecret")
+    if svc.storage_size:
+        out.append("pvc")
+    return out
+
+
+def load_spec(path: Path, only: Sequence[str] = ()) -> Tuple[List[Service], List[str]]:
+    try:
+        data = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    except (OSError, yaml.YAMLError) as exc:
+        return [], [f"{path}: {exc}"]
+    if isinstance(data, list):
+        data = {"services": data}
+    defaults = data.get("defaults") or {}
+    services, errors = [], []
+    for i, raw in enumerate(data.get("services") or []):
+        if not isinstance(raw, dict):
+            errors.append(f"services[{i}]: not a mapping")
+            continue
+        if only and raw.get("name") not in only:
+            continue
+        svc, problems = parse_service(raw, defaults)
+        errors += [f"{raw.get('name') or f'services[{i}]'}: {p}" for p in problems]
+        if svc:
+            services.append(svc)
+    return services, errors
+
+
+# ─── Templates ───────────────────────────────────────────────────────────────
+
+DEPLOYMENT = Template("""\
+apiVersion: apps/v1
+kind: Deployment
+metadata:
+  name: ${APP}
+  namespace: ${NAMESPACE}
+  labels:
+    app: ${APP}
+spec:
+  replicas: 1
+  revisionHistoryLimit: 2
+  strategy:
+    type: Recreate
+  selector:
+    matchLabels:
+      app: ${APP}
+  template:
+    metadata:
+      labels:
+        app: ${APP}
+    spec:
+      containers:
+        - name: ${APP}
+          image: ${IMAGE}
+          ports:
+            - containerPort: ${CONTAINER_PORT}
+              name: web
+          env:
+${ENV}${SECRET_BLOCK}${MOUNT_BLOCK}          resources:
+            requests:
+              cpu: ${CPU}
+              memory: ${MEMORY}
+            limits:
+              memory: ${MEMORY_LIMIT}
+${VOLUME_BLOCK}""")
+
+SERVICE = Template("""\
+apiVersion: v1
+kind: Service
+metadata:
+  name: ${APP}
+  namespace: ${NAMESPACE}
+spec:
+  type: ${SERVICE_TYPE}
+  selector:
+    app: ${APP}
+  ports:
+    - name: web
+      port: ${SERVICE_PORT}
+      targetPort: ${CONTAINER_PORT}
+      protocol: TCP
+""")
+
+INGRESS = Template("""\
+apiVersion: traefik.io/v1alpha1
+kind: IngressRoute
+metadata:
+  name: ${APP}
+  namespace: ${NAMESPACE}
+spec:
+  entryPoints:
+    - websecure
+  routes:
+    - match: Host(`${DOMAIN}`)
+      kind: Rule
+      services:
+        - name: ${APP}
+          port: ${SERVICE_PORT}
+  tls:
+    secretName: ${TLS_SECRET}
+""")
+
+PVC = Template("""\
+apiVersion: v1
+kind: PersistentVolume
+metadata:
+  name: ${APP}-data
+spec:
+  capacity:
+    storage: ${STORAGE_SIZE}
+  accessModes:
+    - ReadWriteOnce
+  persistentVolumeReclaimPolicy: Retain
+  storageClassName: ""
+  hostPath:
+    path: ${STORAGE_PATH}
+    type: DirectoryOrCreate
+  claimRef:
+    name: ${APP}-data
+    namespace: ${NAMESPACE}
+---
+apiVersion: v1
+kind: PersistentVolumeClaim
+metadata:
+  name: ${APP}-data
+  namespace: ${NAMESPACE}
+spec:
+  accessModes:
+    - ReadWriteOnce
+  storageClassName: ""
+  volumeName: ${APP}-data
+  resources:
+    requests:
+      storage: ${STORAGE_SIZE}
+""")
+
+SECRET = Template("""\
+apiVersion: v1
+kind: Secret
+metadata:
+  name: ${APP}-secret
+  namespace: ${NAMESPACE}
+type: Opaque
+stringData:
+  # Fill in the values below, then run: ./setup.sh seal
+${SECRET_KEYS}""")
+
+SETUP_SH = Template("""\
+#!/usr/bin/env bash
+set -euo pipefail
+
+# ─── App Configuration ───────────────────────────────────────────────────────
+APP="${APP}"
+NAMESPACE="${NAMESPACE}"
+CONTAINER_PORT="${CONTAINER_PORT}"
+EXTERNAL_PORT="${EXTERNAL_PORT}"
+DOMAIN="${DOMAIN}"
+DEFAULT_SHELL="${SHELL}"
+
+# Components this app uses
+HAS_PVC=${HAS_PVC}
+HAS_SECRET=${HAS_SECRET}
+HAS_INGRESS=${HAS_INGRESS}
+HAS_CONFIGMAP=false
+HAS_RBAC=false
+
+# ─────────────────────────────────────────────────────────────────────────────
+DEPLOY_DIR="$$(cd "$$(dirname "$${BASH_SOURCE[0]}")" && pwd)"
+NODE_IP="$${K3S_NODE_IP:-$$(kubectl get node -o jsonpath='{.items[0].status.addresses[?(@.type=="InternalIP")].address}' 2>/dev/null | tr ' ' '\\n' | grep -v ':' | head -1 || echo '192.168.0.108')}"
+
+_find_scripts() {
+  local d="$$1"
+  while [[ "$$d" != "/" ]]; do
+    [[ -d "$$d/scripts" && -f "$$d/scripts/_app-ctl.sh" ]] && echo "$$d/scripts" && return
+    d="$$(dirname "$$d")"
+  done
+}
+SCRIPTS_DIR="$$(_find_scripts "$$DEPLOY_DIR")"
+[[ -z "$$SCRIPTS_DIR" ]] && { echo "ERROR: k3s/scripts/_app-ctl.sh not found"; exit 1; }
+
+# shellcheck source=../../scripts/_app-ctl.sh
+source "$$SCRIPTS_DIR/_app-ctl.sh"
+main "$$@"
+""")
+
+README = Template("""\
+---
+${FRONTMATTER}---
+
+# ${TITLE} — ${PURPOSE}
+
+${DESCRIPTION}
+
+## Features
+
+${FEATURES}
+
+## Kubernetes Architecture
+
+| Resource | Type | Purpose |
+|----------|------|---------|
+${RESOURCES}
+
+## Quick Start
+
+```bash
+cd k3s/apps/${APP}
+${QUICKSTART}```
+${ACCESS}
+## Manifests
+
+| File | What's inside |
+|------|---------------|
+${MANIFESTS}
+""")
+
+
+def _q(value: str) -> str:
+    return json.dumps(str(value), ensure_ascii=False)
+
+
+def frontmatter(meta: Dict[str, Any]) -> str:
+    lines = []
+    for key, value in meta.items():
+        if value is None:
+            continue
+        if isinstance(value, list):
+            lines.append(f"{key}:")
+            lines += [f"  - {v}" if key == "components" else f"  - {_q(v)}" for v in value]
+        else:
+            lines.append(f"{key}: {_q(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def render(svc: Service) -> Dict[str, str]:
+    """All files of one app, keyed by name relative to its directory."""
+    env = {"TZ": "UTC", **svc.env}
+    values = {
+        "APP": svc.name, "NAMESPACE": svc.namespace, "IMAGE": svc.image,
+        "CONTAINER_PORT": svc.port, "SERVICE_PORT": svc.service_port,
+        "SERVICE_TYPE": "LoadBalancer" if svc.external_port else "ClusterIP",
+        "EXTERNAL_PORT": svc.external_port or "", "DOMAIN": svc.domain, "TLS_SECRET": TLS_SECRET,
+        "STORAGE_SIZE": svc.storage_size, "STORAGE_PATH": svc.storage_path,
+        "CPU": svc.cpu, "MEMORY": svc.memory, "MEMORY_LIMIT": svc.memory_limit, "SHELL": svc.shell,
+        "HAS_PVC": str(bool(svc.storage_size)).lower(), "HAS_SECRET": str(svc.has_secret).lower(),
+        "HAS_INGRESS": str(bool(svc.domain)).lower(),
+        "ENV": "".join(f"            - name: {k}\n              value: {_q(v)}\n" for k, v in env.items()),
+        "SECRET_BLOCK": "", "MOUNT_BLOCK": "", "VOLUME_BLOCK": "",
+    }
+    if svc.has_secret:
+        values["SECRET_BLOCK"] = f"          envFrom:\n            - secretRef:\n                name: {svc.name}-secret\n"
+        values["SECRET_KEYS"] = "".join(f'  {k}: "changeme"\n' for k in svc.secret_keys) or '  # ADMIN_PASSWORD: "changeme"\n'
+    if svc.storage_size:
+        values["MOUNT_BLOCK"] = f"          volumeMounts:\n            - name: data\n              mountPath: {svc.mount}\n"
+        values["VOLUME_BLOCK"] = (f"      volumes:\n        - name: data\n          persistentVolumeClaim:\n"
+                                  f"            claimName: {svc.name}-data\n")
+
+    files = {"deployment.yaml": DEPLOYMENT.substitute(values), "service.yaml": SERVICE.substitute(values)}
+    if svc.domain:
+        files["ingress.yaml"] = INGRESS.substitute(values)
+    if svc.storage_size:
+        files["pvc.yaml"] = PVC.substitute(values)
+    if svc.has_secret:
+        files["secret.yaml"] = SECRET.substitute(values)
+    files["setup.sh"] = SETUP_SH.substitute(values)
+    files["README.md"] = render_readme(svc, files)
+    return files
+
+
+def render_readme(svc: Service, files: Dict[str, str]) -> str:
+    kind = "LoadBalancer" if svc.external_port else "ClusterIP"
+    resources = [f"| `{svc.name}` | Deployment | Single replica |",
+                 f"| `{svc.name}` | Service ({kind}) | Port `{svc.service_port}` → `{svc.port}` |"]
+    manifests = {"deployment.yaml": f"{svc.name} container ({svc.image})",
+                 "service.yaml": f"{kind} Service on TCP `{svc.service_port}`"}
+    if svc.domain:
+        resources.append(f"| `{svc.name}` | IngressRoute | Hosts `{svc.domain}` |")
+        manifests["ingress.yaml"] = f"Traefik IngressRoute for `{svc.domain}`"
+    if svc.has_secret:
+        keys = ", ".join(f"`{k}`" for k in svc.secret_keys) or "app credentials"
+        resources.append(f"| `{svc.name}-secret` | SealedSecret → Secret | {keys} |")
+        manifests["sealedsecret.yaml"] = "Encrypted secret (`./setup.sh seal` from `secret.yaml`)"
+    if svc.storage_size:
+        resources.append(f"| `{svc.name}-data` | PV + PVC | `{svc.storage_path}` ({svc.storage_size}) at `{svc.mount}` |")
+        manifests["pvc.yaml"] = f"hostPath PV + `ReadWriteOnce` PVC, {svc.storage_size}"
+    quickstart = ("./setup.sh seal\n" if svc.has_secret else "") + "./setup.sh deploy\n./setup.sh status\n"
+    access = ""
+    if svc.domain:
+        access = f"\nOpen `https://{svc.domain}`" + (f" (or `http://<node-ip>:{svc.external_port}`)" if svc.external_port else "") + ".\n"
+    elif svc.external_port:
+        access = f"\nReachable at `<node-ip>:{svc.external_port}`.\n"
+    return README.substitute(
+        FRONTMATTER=frontmatter(svc.meta), TITLE=svc.meta["name"], PURPOSE=svc.meta["purpose"] or "",
+        DESCRIPTION=svc.meta["description"] or "", APP=svc.name,
+        FEATURES="\n".join(f"- {f}" for f in svc.meta["features"] or []),
+        RESOURCES="\n".join(resources), QUICKSTART=quickstart, ACCESS=access,
+        MANIFESTS="\n".join(f"| `{k}` | {v} |" for k, v in manifests.items()),
+    )
+
+
+# ─── Validation ──────────────────────────────────────────────────────────────
+
+
+def k3s_schema() -> Any:
+    """The frontmatter schema module the README generators and CI validate with."""
+    spec = importlib.util.spec_from_file_location("_schema", SCHEMA)
+    if spec is None or spec.loader is None or not SCHEMA.is_file():
+        raise ImportError(f"{SCHEMA} not found")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module          # dataclasses resolve types via sys.modules
+    spec.loader.exec_module(module)
+    return module
+
+
+def check_service(svc: Service, files: Dict[str, str], schema: Any) -> Tuple[List[str], List[str]]:
+    """Parse every rendered file back and cross-check it; returns (errors, warnings)."""
+    errors: List[str] = []
+    warnings: List[str] = []
+    if not NAME_RE.match(svc.name) or len(svc.name) > 58:
+        errors.append("name must be a DNS-1123 label of at most 58 characters")
+    if not NAME_RE.match(svc.namespace):
+        errors.append(f"namespace '{svc.namespace}' is not a DNS-1123 label")
+    for label, port in (("port", svc.port), ("external_port", svc.external_port)):
+        if port is not None and not 0 < port < 65536:
+            errors.append(f"{label} {port} out of range")
+    for q in (svc.cpu, svc.memory, svc.memory_limit, svc.storage_size):
+        if q and not QUANTITY_RE.match(q):
+            errors.append(f"'{q}' is not a Kubernetes quantity")
+    if svc.storage_root not in STORAGE_ROOTS and not svc.storage_root.startswith("/"):
+        errors.append(f"storage root '{svc.storage_root}' must be apps, databases or an absolute path")
+    if svc.domain and not svc.domain.endswith(".home.ijlalahmad.dev"):
+        warnings.append(f"domain {svc.domain} isn't covered by the wildcard certificate {TLS_SECRET}")
+
+    docs: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    broken = False
+    for name, text in files.items():
+        if not name.endswith(".yaml"):
+            continue
+        try:
+            for doc in yaml.safe_load_all(text):
+                if not isinstance(doc, dict):
+                    continue
+                meta = doc.get("metadata") or {}
+                if not doc.get("apiVersion") or not doc.get("kind") or not meta.get("name"):
+                    errors.append(f"{name}: document without apiVersion/kind/metadata.name")
+                    broken = True
+                    continue
+                if doc["kind"] != "PersistentVolume" and meta.get("namespace") != svc.namespace:
+                    errors.append(f"{name}: {doc['kind']}/{meta['name']} not in namespace {svc.namespace}")
+                docs[(doc["kind"], meta["name"])] = doc
+        except yaml.YAMLError as exc:
+            errors.append(f"{name}: {exc}")
+            broken = True
+    if broken:
+        return errors, warnings
+
+    deploy = docs.get(("Deployment", svc.name)) or {}
+    labels = (((deploy.get("spec") or {}).get("template") or {}).get("metadata") or {}).get("labels") or {}
+    selector = ((deploy.get("spec") or {}).get("selector") or {}).get("matchLabels") or {}
+    if not selector or any(labels.get(k) != v for k, v in selector.items()):
+        errors.append("deployment.yaml: selector doesn't match the pod template labels")
+    service = docs.get(("Service", svc.name)) or {}
+    if any(labels.get(k) != v for k, v in ((service.get("spec") or {}).get("selector") or {}).items()):
+        errors.append("service.yaml: selector doesn't match the pod labels")
+    ports = [p.get("port") for p in (service.get("spec") or {}).get("ports") or []]
+    route = docs.get(("IngressRoute", svc.name))
+    if route:
+        for r in route["spec"]["routes"]:
+            for backend in r.get("services") or []:
+                if backend.get("name") != svc.name or backend.get("port") not in ports:
+                    errors.append(f"ingress.yaml: backend {backend.get('name')}:{backend.get('port')} isn't the Service")
+    if svc.storage_size:
+        pv = docs.get(("PersistentVolume", f"{svc.name}-data")) or {}
+        pvc = docs.get(("PersistentVolumeClaim", f"{svc.name}-data")) or {}
+        ref = (pv.get("spec") or {}).get("claimRef") or {}
+        if (pvc.get("spec") or {}).get("volumeName") != f"{svc.name}-data" or ref.get("name") != f"{svc.name}-data":
+            errors.append("pvc.yaml: PV claimRef and PVC volumeName don't point at each other")
+
+    meta = yaml.safe_load(files["README.md"].split("---\n", 2)[1]) or {}
+    for issue in schema.validate(meta, "k3s"):
+        (errors if issue.level == "error" else warnings).append(f"README frontmatter {issue}")
+    return errors, warnings
+
+
+def check_batch(services: Sequence[Service], force: bool, schema: Any) -> List[str]:
+    """Names, ports and domains must be unique across the batch and the catalog."""
+    errors = []
+    seen: Set[str] = set()
+    for svc in services:
+        if svc.name in seen:
+            errors.append(f"{svc.name}: listed twice in the spec")
+        seen.add(svc.name)
+        if (APPS_DIR / svc.name).exists() and not force:
+            errors.append(f"{svc.name}: k3s/apps/{svc.name} already exists (use --force to overwrite)")
+    # Catalog first, so a clash is reported against the new service; an app
+    # being overwritten (--force) shares its label and doesn't clash with itself.
+    entries = [(m["directory"], m) for m in catalog()] + [(svc.name, svc.meta) for svc in services]
+    errors += [f"{label}: {issue}" for label, issue in schema.conflicts(entries, "k3s") if label in seen]
+    return errors
+
+
+# ─── Shared files ────────────────────────────────────────────────────────────
+
+
+def appset_with(services: Sequence[Service]) -> Optional[str]:
+    """applicationset.yaml with an element appended per new app, or None if unchanged."""
+    if not APPSET_FILE.is_file():
+        return None
+    text = APPSET_FILE.read_text(encoding="utf-8")
+    doc = yaml.safe_load(text)
+    elements = doc["spec"]["generators"][0]["list"]["elements"]
+    known = {e.get("name") for e in elements}
+    new = [s for s in services if s.name not in known]
+    if not new:
+        return None
+    lines = text.splitlines(keepends=True)
+    start = next(i for i, l in enumerate(lines) if l.strip() == "elements:")
+    end = start + 1
+    for i in range(start + 1, len(lines)):
+        stripped = lines[i].strip()
+        if stripped and len(lines[i]) - len(lines[i].lstrip()) < 10:
+            break
+        if stripped:
+            end = i + 1
+    block = ["\n", "          # ── Scaffolded by new-services.py ─────────────────\n"]
+    for s in new:
+        block += [f"          - name: {s.name}\n", f"            namespace: {s.namespace}\n",
+                  f"            category: {s.namespace}\n", f"            path: k3s/apps/{s.name}\n",
+                  '            wave: "0"\n']      # re-derived by sync-waves.py once written
+    out = "".join(lines[:end] + block + lines[end:])
+    parsed = yaml.safe_load(out)["spec"]["generators"][0]["list"]["elements"]
+    if len(parsed) != len(elements) + len(new):
+        raise ValueError("could not place new entries in the ApplicationSet element list")
+    return out
+
+
+def namespaces_with(services: Sequence[Service]) -> Optional[str]:
+    if not NAMESPACES_FILE.is_file():
+        return None
+    text = NAMESPACES_FILE.read_text(encoding="utf-8")
+    known = {(d.get("metadata") or {}).get("name") for d in yaml.safe_load_all(text) if isinstance(d, dict)}
+    new = sorted({s.namespace for s in services} - known)
+    if not new:
+        return None
+    blocks = [f"---\napiVersion: v1\nkind: Namespace\nmetadata:\n  name: {ns}\n  labels:\n    category: {ns}\n"
+              for ns in new]
+    return text.rstrip("\n") + "\n" + "".join(blocks)
+
+
+# ─── Write ───────────────────────────────────────────────────────────────────
+
+
+def _replace(path: Path, content: str, mode: Optional[int] = None) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(content, encoding="utf-8")
+    if mode is not None:
+        tmp.chmod(mode)
+    os.replace(tmp, path)
+
+
+def write_all(rendered: Dict[str, Dict[str, str]], shared: Dict[Path, str]) -> None:
+    """New apps are built in a staging dir and renamed in; existing ones file by file."""
+    staging = Path(tempfile.mkdtemp(prefix=".new-services-", dir=APPS_DIR))
+    try:
+        for app, files in rendered.items():
+            target = APPS_DIR / app
+            build = staging / app if not target.exists() else target
+            build.mkdir(parents=True, exist_ok=True)
+            for name, content in files.items():
+                _replace(build / name, content, 0o755 if name.endswith(".sh") else None)
+            if build != target:
+                os.rename(build, target)
+        for path, content in shared.items():
+            _replace(path, content)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Scaffold many k3s services from one YAML spec.")
+    ap.add_argument("spec", type=Path, help="services spec (see k3s/scripts/services.example.yaml)")
+    ap.add_argument("--only", action="append", default=[], metavar="NAME", help="only these services")
+    ap.add_argument("--dry-run", action="store_true", help="validate and list files, write nothing")
+    ap.add_argument("--force", action="store_true", help="overwrite existing app directories")
+    ap.add_argument("--no-argocd", action="store_true", help="don't add ApplicationSet entries")
+    args = ap.parse_args()
+
+    services, errors = load_spec(args.spec, args.only)
+    if not services and not errors:
+        warn("No services in the spec")
+        return 0
+
+    try:
+        schema = k3s_schema()
+    except ImportError as exc:
+        err(f"Cannot load the frontmatter schema: {exc}")
+        return 1
+    rendered: Dict[str, Dict[str, str]] = {}
+    warnings: List[str] = []
+    for svc in services:
+        files = render(svc)
+        problems, notes = check_service(svc, files, schema)
+        errors += [f"{svc.name}: {p}" for p in problems]
+        warnings += [f"{svc.name}: {n}" for n in notes]
+        rendered[svc.name] = files
+    errors += check_batch(services, args.force, schema)
+
+    shared: Dict[Path, str] = {}
+    try:
+        appset = None if args.no_argocd else appset_with(services)
+    except (ValueError, KeyError, IndexError, TypeError, StopIteration) as exc:
+        errors.append(f"applicationset.yaml: {exc}")
+        appset = None
+    if appset:
+        shared[APPSET_FILE] = appset
+    namespaces = namespaces_with(services)
+    if namespaces:
+        shared[NAMESPACES_FILE] = namespaces
+
+    for w in warnings:
+        warn(w)
+    if errors:
+        for e in errors:
+            err(e)
+        err(f"{len(errors)} problem(s) — nothing written")
+        return 1
+
+    header(f"Scaffold — {len(rendered)} service(s){' (dry run)' if args.dry_run else ''}")
+    for svc in services:
+        files = rendered[svc.name]
+        access = " ".join(filter(None, [f":{svc.external_port}" if svc.external_port else "ClusterIP",
+                                        f"https://{svc.domain}" if svc.domain else ""]))
+        print(f"  {GREEN}+{NC} {BOLD}k3s/apps/{svc.name}/{NC}  {DIM}{svc.namespace}  {access}{NC}")
+        print(f"    {DIM}{'  '.join(files)}{NC}")
+    for path in shared:
+        print(f"  {YELLOW}~{NC} {path.relative_to(REPO_ROOT)}")
+    if args.dry_run:
+        return 0
+
+    write_all(rendered, shared)
+    print("")
+    ok(f"Scaffolded {len(rendered)} service(s)")
+    if appset:
+        res = subprocess.run([sys.executable, str(SCRIPTS_DIR / "sync-waves.py"), "--write", "--quiet"])
+        if res.returncode != 0:
+            warn("Could not re-derive ArgoCD sync waves — run ./sync-waves.py --write")
+    secrets = [s.name for s in services if s.has_secret]
+    if secrets:
+        info(f"Fill in secret.yaml, then seal: ./seal.sh --all  ({', '.join(secrets)})")
+    domains = [s.domain for s in services if s.domain]
+    if domains:
+        info(f"Add Pi-hole Local DNS → 192.168.0.108 for: {', '.join(domains)}")
+    if namespaces:
+        info(f"New namespace(s) added — {CYAN}kubectl apply -f k3s/base/namespaces/namespaces.yaml{NC}")
+    info("Deploy: ./apply-apps.py " + " ".join(f"../apps/{s.name}" for s in services))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
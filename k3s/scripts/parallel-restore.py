@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+parallel-restore.py — Dependency-aware, parallel replacement for the
+apply_all_apps + wait_for_apps phase of cluster-restore.sh.
+
+Builds a DAG from the manifests in this repo and applies independent nodes
+concurrently, watching every rollout in parallel:
+
+    namespaces ─┬─ priority-classes ─┐
+                ├─ sealed-secrets ───┼─ databases/* ── apps that reference
+                ├─ traefik ──────────┤                 <db>.databases[.svc]
+                └─ cert-manager ─────┘
+
+Edges are derived, not hardcoded:
+  - SealedSecret                      → sealed-secrets controller ready
+  - IngressRoute / Ingress / TLSStore → traefik ready
+  - Certificate / Issuer              → cert-manager ready (skipped if absent)
+  - priorityClassName                 → priority-classes applied
+  - "<svc>.databases" in any manifest or config/ file → that database ready
+
+The infra nodes (sealed-secrets, traefik, cert-manager) are readiness gates —
+installing them stays with `cluster-restore.sh --infra` (helm + key restore).
+
+Apps that end up ready are recorded in apply-apps.py's hash state, as its
+own apply would, so the next `apply-apps.py --all` or `setup.sh deploy`
+skips them instead of re-applying everything.
+
+Usage:
+  ./parallel-restore.py                     Apply databases + apps, wait for rollouts
+  ./parallel-restore.py --dry-run           Print the DAG as waves, touch nothing
+  ./parallel-restore.py --only apps         Skip k3s/databases/*
+  ./parallel-restore.py --workers 2 --timeout 300
+
+kubectl is resolved from $KUBECTL (default: kubectl), so the scheduler can be
+exercised end-to-end against fixtures/fake-kubectl.py:
+  KUBECTL="python3 fixtures/fake-kubectl.py" ./parallel-restore.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import re
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from _k3s import (
+    BOLD, CYAN, DIM, GREEN, INFRA_DIR, K3S_ROOT, NAMESPACES_FILE, NC, RED, SCRIPTS_DIR, YELLOW,
+    DATABASES_DIR, app_manifests, discover_app_dirs, err, header, info, load_yaml_docs,
+    manifest_files, ok, pod_spec, run_kubectl, warn, workloads,
+)
+
+
+# (node name, namespace, deployment, optional) — installed by cluster-restore.sh --infra
+INFRA_GATES: List[Tuple[str, str, str, bool]] = [
+    ("sealed-secrets", "kube-system", "sealed-secrets-controller", False),
+    ("traefik", "traefik", "traefik", False),
+    ("cert-manager", "cert-manager", "cert-manager", True),
+]
+
+TRAEFIK_KINDS = {"IngressRoute", "IngressRouteTCP", "IngressRouteUDP", "Middleware", "TLSStore", "Ingress"}
+CERT_MANAGER_KINDS = {"Certificate", "Issuer", "ClusterIssuer"}
+
+
+# ─── DAG model ───────────────────────────────────────────────────────────────
+
+
+@dataclass
+class Node:
+    name: str
+    deps: Set[str] = field(default_factory=set)
+    app_dir: Optional[Path] = None
+    files: List[Path] = field(default_factory=list)
+    rollouts: List[Tuple[str, str, str]] = field(default_factory=list)  # (kind, name, ns)
+    gate: bool = False
+    optional: bool = False
+    status: str = "pending"
+    detail: str = ""
+    started: float = 0.0
+    applied: float = 0.0
+    finished: float = 0.0
+
+
+def _reference_text(app_dir: Path) -> str:
+    """Manifests plus config/ files — anywhere a DB hostname can appear."""
+    parts = [f.read_text(encoding="utf-8", errors="ignore") for f in manifest_files(app_dir)]
+    config_dir = app_dir / "config"
+    if config_dir.is_dir():
+        parts += [p.read_text(encoding="utf-8", errors="ignore") for p in sorted(config_dir.iterdir()) if p.is_file()]
+    return "\n".join(parts)
+
+
+def build_dag(only: Optional[str] = None) -> Dict[str, Node]:
+    nodes: Dict[str, Node] = {}
+
+    nodes["namespaces"] = Node("namespaces", files=[NAMESPACES_FILE])
+    pc_dir = INFRA_DIR / "priority-classes"
+    pc_files = manifest_files(pc_dir)
+    priority_classes = {
+        d["metadata"]["name"] for f in pc_files for d in load_yaml_docs(f) if d.get("kind") == "PriorityClass"
+    }
+    if pc_files:
+        nodes["priority-classes"] = Node("priority-classes", deps={"namespaces"}, files=pc_files)
+    for name, ns, deploy, optional in INFRA_GATES:
+        nodes[name] = Node(
+            name, deps={"namespaces"}, rollouts=[("deployment", deploy, ns)], gate=True, optional=optional,
+        )
+
+    app_dirs = discover_app_dirs(include_databases=only != "apps")
+    if only == "databases":
+        app_dirs = [d for d in app_dirs if d.parent == DATABASES_DIR]
+
+    # Services exposed by each database node, for "<svc>.<ns>" reference matching.
+    db_services: Dict[str, List[Tuple[str, str]]] = {}
+    for d in discover_app_dirs():
+        if d.parent != DATABASES_DIR:
+            continue
+        db_services[d.name] = [
+            (doc["metadata"]["name"], doc["metadata"].get("namespace", "default"))
+            for doc in app_manifests(d) if doc.get("kind") == "Service"
+        ]
+
+    for app_dir in app_dirs:
+        docs = app_manifests(app_dir)
+        kinds = {d.get("kind") for d in docs}
+        node = Node(app_dir.name, deps={"namespaces"}, app_dir=app_dir, files=manifest_files(app_dir))
+        if "SealedSecret" in kinds:
+            node.deps.add("sealed-secrets")
+        if kinds & TRAEFIK_KINDS:
+            node.deps.add("traefik")
+        if kinds & CERT_MANAGER_KINDS:
+            node.deps.add("cert-manager")
+        for wl in workloads(docs):
+            meta = wl.get("metadata") or {}
+            node.rollouts.append((wl["kind"].lower(), meta.get("name", ""), meta.get("namespace", "default")))
+            if pod_spec(wl).get("priorityClassName") in priority_classes and "priority-classes" in nodes:
+                node.deps.add("priority-classes")
+
+        if app_dir.parent != DATABASES_DIR:
+            text = _reference_text(app_dir)
+            for db, services in db_services.items():
+                if any(re.search(rf"\b{re.escape(svc)}\.{re.escape(ns)}\b", text) for svc, ns in services):
+                    node.deps.add(db)
+        nodes[node.name] = node
+
+    # A database filtered out by --only is assumed to be running already.
+    for node in nodes.values():
+        node.deps &= nodes.keys()
+    return nodes
+
+
+def waves(nodes: Dict[str, Node]) -> List[List[str]]:
+    """Kahn layering; raises ValueError on a dependency cycle."""
+    indeg = {n: len(node.deps) for n, node in nodes.items()}
+    out: List[List[str]] = []
+    ready = sorted(n for n, d in indeg.items() if d == 0)
+    seen = 0
+    while ready:
+        out.append(ready)
+        seen += len(ready)
+        nxt: List[str] = []
+        for n in ready:
+            for m, node in nodes.items():
+                if n in node.deps:
+                    indeg[m] -= 1
+                    if indeg[m] == 0:
+                        nxt.append(m)
+        ready = sorted(nxt)
+    if seen != len(nodes):
+        cyclic = sorted(n for n, d in indeg.items() if d > 0)
+        raise ValueError(f"dependency cycle between: {', '.join(cyclic)}")
+    return out
+
+
+# ─── Node actions ────────────────────────────────────────────────────────────
+
+
+def apply_node(node: Node) -> Tuple[bool, str]:
+    """Apply a node's manifests in one kubectl process (order preserved)."""
+    if node.gate:
+        probe = run_kubectl(["get", "deployment", node.rollouts[0][1], "-n", node.rollouts[0][2], "-o", "name"], timeout=30)
+        if probe.returncode != 0:
+            return (node.optional, "not installed" if node.optional else "not installed — run cluster-restore.sh --infra")
+        return True, ""
+
+    if node.app_dir and (node.app_dir / "kustomization.yaml").is_file():
+        res = run_kubectl(["apply", "-k", str(node.app_dir)], timeout=300)
+        return res.returncode == 0, res.stderr.strip()
+
+    # Non-kustomize config/ directories become ${APP}-config, as in _apply_config_dir.
+    config_dir = node.app_dir / "config" if node.app_dir else None
+    if config_dir and config_dir.is_dir():
+        ns = next((ns for _, _, ns in node.rollouts), "default")
+        args = ["create", "configmap", f"{node.name}-config", "-n", ns, "--dry-run=client", "-o", "yaml"]
+        args += [f"--from-file={p.name}={p}" for p in sorted(config_dir.iterdir()) if p.is_file()]
+        res = run_kubectl(args, timeout=60)
+        if res.returncode == 0:
+            res = run_kubectl(["apply", "-f", "-"], input=res.stdout, timeout=60)
+        if res.returncode != 0:
+            # the workloads mount it — applying them anyway would only crash-loop
+            return False, f"{node.name}-config: {res.stderr.strip()}"
+
+    args = ["apply"]
+    for f in node.files:
+        args += ["-f", str(f)]
+    res = run_kubectl(args, timeout=300)
+    return res.returncode == 0, res.stderr.strip()
+
+
+def watch_node(node: Node, timeout: int) -> Tuple[bool, str]:
+    """Wait for every workload of a node to finish rolling out."""
+    for kind, name, ns in node.rollouts:
+        res = run_kubectl(["rollout", "status", f"{kind}/{name}", "-n", ns, f"--timeout={timeout}s"], timeout=timeout + 15)
+        if res.returncode != 0:
+            return False, f"{kind}/{name} not ready after {timeout}s"
+    return True, ""
+
+
+# ─── Scheduler ───────────────────────────────────────────────────────────────
+
+
+def run(nodes: Dict[str, Node], workers: int, watchers: int, timeout: int, strict: bool) -> bool:
+    """Apply nodes as soon as their dependencies are ready.
+
+    Applies are bounded by `workers` (API server / Pi CPU pressure); rollout
+    watches are cheap blocking calls and get their own, larger pool.
+    """
+    t0 = time.monotonic()
+    lock = threading.Lock()
+    remaining = {n: set(node.deps) for n, node in nodes.items()}
+    running: Dict[Future, Tuple[Node, str]] = {}
+
+    def _log(node: Node, colour: str, symbol: str, extra: str = "") -> None:
+        with lock:
+            stamp = f"{time.monotonic() - t0:6.1f}s"
+            print(f"  {DIM}{stamp}{NC}  {colour}{symbol}{NC} {node.name}{('  ' + DIM + extra + NC) if extra else ''}")
+
+    with ThreadPoolExecutor(max_workers=workers) as apply_pool, ThreadPoolExecutor(max_workers=watchers) as watch_pool:
+
+        def _apply(node: Node) -> Tuple[bool, str]:
+            # Stamped here, not at submit, so time queued for a worker isn't counted.
+            node.started = time.monotonic() - t0
+            return apply_node(node)
+
+        def _start(name: str) -> None:
+            node = nodes[name]
+            node.status = "applying"
+            running[apply_pool.submit(_apply, node)] = (node, "apply")
+
+        def _release(done: Node) -> None:
+            for other, deps in remaining.items():
+                if done.name not in deps:
+                    continue
+                deps.discard(done.name)
+                nxt = nodes[other]
+                if deps or nxt.status != "pending":
+                    continue
+                if strict and any(nodes[d].status in ("failed", "blocked") for d in nxt.deps):
+                    nxt.status = "blocked"
+                    nxt.detail = "dependency failed (--strict)"
+                    nxt.started = nxt.finished = time.monotonic() - t0
+                    _log(nxt, YELLOW, "⏭", nxt.detail)
+                    _release(nxt)
+                else:
+                    _start(other)
+
+        def _finish(node: Node, success: bool, detail: str) -> None:
+            node.finished = time.monotonic() - t0
+            node.detail = detail
+            if success:
+                node.status = "skipped" if detail else "ready"
+                _log(node, YELLOW if detail else GREEN, "✓", detail)
+            else:
+                node.status = "failed"
+                _log(node, RED, "✗", detail)
+            _release(node)
+
+        for name in sorted(n for n, deps in remaining.items() if not deps):
+            _start(name)
+
+        while running:
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for fut in done:
+                node, phase = running.pop(fut)
+                success, detail = fut.result()
+                if phase == "apply":
+                    node.applied = time.monotonic() - t0
+                    if not success or not node.rollouts or (node.gate and detail):
+                        _finish(node, success, detail)
+                    else:
+                        node.status = "rolling"
+                        _log(node, CYAN, "→", f"applied, waiting on {len(node.rollouts)} rollout(s)")
+                        running[watch_pool.submit(watch_node, node, timeout)] = (node, "watch")
+                else:
+                    _finish(node, success, detail)
+
+    return all(n.status in ("ready", "skipped") for n in nodes.values())
+
+
+# ─── apply-apps.py state ─────────────────────────────────────────────────────
+
+
+def _apply_apps_module() -> Any:
+    """apply-apps.py, for render() and its state file."""
+    spec = importlib.util.spec_from_file_location("apply_apps", SCRIPTS_DIR / "apply-apps.py")
+    if spec is None or spec.loader is None:
+        raise ImportError("apply-apps.py not found")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module          # dataclasses resolve types via sys.modules
+    spec.loader.exec_module(module)
+    return module
+
+
+def record_hashes(nodes: Dict[str, Node]) -> int:
+    """Record the apps this run applied in apply-apps.py's state file, as its
+    own apply would — otherwise the next `apply-apps.py --all` / `setup.sh
+    deploy` re-applies everything. Failed apps lose their record."""
+    applier = _apply_apps_module()
+    state = applier.load_state()
+    recorded = state.setdefault(applier.current_context(), {})
+    count = 0
+    for node in nodes.values():
+        if node.gate or node.app_dir is None or node.status not in ("ready", "failed"):
+            continue
+        s = applier.render(node.app_dir)
+        if node.status == "ready" and not s.error:
+            recorded[s.rel] = s.digest
+            count += 1
+        else:
+            recorded.pop(s.rel, None)
+    applier.save_state(state)
+    return count
+
+
+# ─── Report ──────────────────────────────────────────────────────────────────
+
+
+def critical_path(nodes: Dict[str, Node]) -> List[Node]:
+    """Walk back from the last node to finish through the dependency that gated it."""
+    done = [n for n in nodes.values() if n.finished]
+    if not done:
+        return []
+    path = [max(done, key=lambda n: n.finished)]
+    while path[-1].deps:
+        path.append(max((nodes[d] for d in path[-1].deps), key=lambda n: n.finished))
+    return list(reversed(path))
+
+
+def print_report(nodes: Dict[str, Node], wall: float) -> None:
+    header("Restore timeline")
+    print(f"  {BOLD}{'NODE':<20} {'START':>7} {'APPLY':>7} {'ROLLOUT':>8} {'TOTAL':>7}  STATUS{NC}")
+    for node in sorted(nodes.values(), key=lambda n: (n.started, n.name)):
+        apply_s = max(node.applied - node.started, 0.0) if node.applied else 0.0
+        roll_s = max(node.finished - node.applied, 0.0) if node.applied else 0.0
+        colour = {"ready": GREEN, "skipped": YELLOW, "failed": RED}.get(node.status, YELLOW)
+        print(
+            f"  {node.name:<20} {node.started:6.1f}s {apply_s:6.1f}s {roll_s:7.1f}s "
+            f"{node.finished - node.started:6.1f}s  {colour}{node.status}{NC}"
+            + (f"  {DIM}{node.detail}{NC}" if node.detail else "")
+        )
+
+    path = critical_path(nodes)
+    if path:
+        header("Critical path")
+        chain = f" {DIM}→{NC} ".join(f"{n.name} ({n.finished - n.started:.1f}s)" for n in path)
+        print(f"  {chain}")
+    serial = sum(n.finished - n.started for n in nodes.values())
+    print(f"\n  Wall clock: {BOLD}{wall:.1f}s{NC}   serial sum: {serial:.1f}s"
+          + (f"   speedup: {serial / wall:.1f}×" if wall > 0 else ""))
+
+
+# ─── Main ────────────────────────────────────────────────────────────────────
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Parallel, dependency-ordered k3s restore.")
+    ap.add_argument("--workers", type=int, default=4, help="concurrent kubectl apply calls (default: 4)")
+    ap.add_argument("--watchers", type=int, default=16, help="concurrent rollout watches (default: 16)")
+    ap.add_argument("--timeout", type=int, default=120, help="per-rollout timeout in seconds (default: 120)")
+    ap.add_argument("--only", choices=("databases", "apps"), help="restrict to one tier")
+    ap.add_argument("--strict", action="store_true", help="skip nodes whose dependencies failed")
+    ap.add_argument("--dry-run", action="store_true", help="print the DAG and exit")
+    args = ap.parse_args()
+
+    nodes = build_dag(args.only)
+    try:
+        layers = waves(nodes)
+    except ValueError as exc:
+        err(str(exc))
+        return 1
+
+    if args.dry_run:
+        header(f"Restore plan — {len(nodes)} nodes, {len(layers)} waves")
+        for i, layer in enumerate(layers, start=1):
+            print(f"\n  {BOLD}Wave {i}{NC}")
+            for name in layer:
+                node = nodes[name]
+                deps = ", ".join(sorted(node.deps)) or "—"
+                kind = "gate" if node.gate else f"{len(node.files)} file(s), {len(node.rollouts)} rollout(s)"
+                print(f"    {name:<20} {DIM}{kind:<28} after: {deps}{NC}")
+        return 0
+
+    info(f"Restoring {len(nodes)} nodes from {K3S_ROOT} "
+         f"(workers={args.workers}, watchers={args.watchers}, timeout={args.timeout}s)")
+    start = time.monotonic()
+    success = run(nodes, args.workers, args.watchers, args.timeout, args.strict)
+    print_report(nodes, time.monotonic() - start)
+    try:
+        recorded = record_hashes(nodes)
+        info(f"Recorded {recorded} applied app(s) in apply-apps.py's state file")
+    except (ImportError, OSError) as exc:
+        warn(f"Could not record apply-apps.py hashes ({exc}) — its next run re-applies everything")
+
+    if success:
+        ok("All nodes ready")
+        return 0
+    failed = [n.name for n in nodes.values() if n.status not in ("ready", "skipped")]
+    warn(f"{len(failed)} node(s) not ready: {', '.join(failed)}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
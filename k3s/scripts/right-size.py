@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+"""
+right-size.py — Requests / limits from observed usage, as minimal manifest patches.
+
+The resources blocks in the manifests and the resource_usage strings in the
+READMEs were written before the apps ever ran on the Pi. This turns recorded
+usage into per-container numbers:
+
+  memory request  the --percentile (default p90) of the working set
+  memory limit    the observed peak + --headroom (default 30%); a container
+                  that was OOM-killed is never lowered and gets at least
+                  1.5× the limit it was killed at
+  cpu request     the --percentile of CPU use (min 10m)
+  cpu limit       only raised, when the peak + headroom would hit it —
+                  throttling a start-up burst costs more than it saves
+
+A value moves only when it is off by more than --min-change (default 10%),
+so the patches stay small. Each app's README frontmatter gets a matching
+resource_usage line (typical total per workload).
+
+Samples come from `--record`, meant for cron on the node:
+
+  */5 * * * *  cd ~/Home-Server-Lab/k3s/scripts && ./right-size.py --record
+
+Each run appends `kubectl top pods -A --containers` (working set, CPU) and
+any OOMKilled container states to k3s/.usage-samples.jsonl (gitignored);
+samples older than --retain days are pruned about once a day. Containers
+with fewer than --min-samples samples (default: a day's worth) are left
+alone.
+
+fixtures/usage-samples.jsonl holds two recorded days of jellyfin, n8n and
+homarr (one OOM kill included) for trying the recommender offline:
+
+  ./right-size.py --samples fixtures/usage-samples.jsonl --min-samples 48 --diff
+
+Usage:
+  ./right-size.py --record                 Take one sample (cron)
+  ./right-size.py                          Recommendations + which files would change
+  ./right-size.py jellyfin n8n --diff      Only these apps, show the patches
+  ./right-size.py --write                  Patch manifests and README frontmatter
+  ./right-size.py --samples pi.jsonl --since 7 --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import difflib
+import json
+import math
+import os
+import re
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import yaml
+
+from _k3s import (
+    BOLD, DIM, GREEN, K3S_ROOT, NC, RED, REPO_ROOT, YELLOW, WORKLOAD_KINDS,
+    block_end, discover_app_dirs, doc_ranges, ensure_key, err, find_key, header, info, load_yaml_docs,
+    manifest_files, ok, parse_quantity, pod_spec, run_kubectl, warn,
+)
+
+
+SAMPLES_FILE = K3S_ROOT / ".usage-samples.jsonl"
+PRUNE_SLACK = 86400          # --record prunes expired samples at most about once a day
+MI = 2 ** 20
+FIELDS = ("requests.memory", "requests.cpu", "limits.memory", "limits.cpu")   # manifest order
+USAGE_RE = re.compile(r"~(\d+(?:\.\d+)?)(?:-\d+(?:\.\d+)?)?\s?([KMG])B")
+
+
+# ─── Recording ───────────────────────────────────────────────────────────────
+
+
+def take_sample(now: float) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One `kubectl top` snapshot plus OOMKilled container states, as sample records."""
+    top = run_kubectl(["top", "pods", "-A", "--containers", "--no-headers"], timeout=60)
+    if top.returncode != 0:
+        return [], top.stderr.strip() or "kubectl top failed (is metrics-server running?)"
+    records: List[Dict[str, Any]] = []
+    for line in top.stdout.splitlines():
+        cols = line.split()
+        if len(cols) < 5:
+            continue
+        cpu, mem = parse_quantity(cols[3]), parse_quantity(cols[4])
+        if cpu is None or mem is None:
+            continue
+        records.append({"ts": int(now), "ns": cols[0], "pod": cols[1], "container": cols[2],
+                        "cpu": round(cpu * 1000), "mem": int(mem)})
+
+    pods = run_kubectl(["get", "pods", "-A", "-o", "json"], timeout=60)
+    if pods.returncode == 0:
+        for pod in json.loads(pods.stdout).get("items", []):
+            meta = pod.get("metadata") or {}
+            limits = {c.get("name"): ((c.get("resources") or {}).get("limits") or {}).get("memory")
+                      for c in (pod.get("spec") or {}).get("containers") or []}
+            for cs in (pod.get("status") or {}).get("containerStatuses") or []:
+                for state in (cs.get("lastState") or {}, cs.get("state") or {}):
+                    term = state.get("terminated") or {}
+                    if term.get("reason") == "OOMKilled":
+                        records.append({"ts": int(now), "ns": meta.get("namespace"), "pod": meta.get("name"),
+                                        "container": cs.get("name"), "oom": term.get("finishedAt") or "",
+                                        "limit": int(parse_quantity(limits.get(cs.get("name"))) or 0)})
+    return records, None
+
+
+def _oldest(path: Path) -> Optional[int]:
+    """Timestamp of the first sample — the file is appended in time order."""
+    try:
+        with path.open(encoding="utf-8") as fh:
+            return int(json.loads(fh.readline()).get("ts", 0))
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def append_samples(path: Path, records: List[Dict[str, Any]], retain_days: float, now: float) -> int:
+    """Append `records`; returns how many expired samples were dropped.
+
+    Every run only appends — rewriting the whole file every 5 minutes is
+    ~10 MB of SD card writes each time. Samples older than retain_days are
+    pruned by a rewrite only once the oldest is PRUNE_SLACK past the cutoff,
+    i.e. about once a day.
+    """
+    cutoff = now - retain_days * 86400
+    dropped = 0
+    oldest = _oldest(path)
+    if oldest is not None and oldest < cutoff - PRUNE_SLACK:
+        samples = load_samples([path])
+        kept = [r for r in samples if r.get("ts", 0) >= cutoff]
+        dropped = len(samples) - len(kept)
+        tmp = path.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as fh:
+            fh.writelines(json.dumps(r, separators=(",", ":")) + "\n" for r in kept)
+        os.replace(tmp, path)
+    with path.open("a", encoding="utf-8") as fh:
+        fh.writelines(json.dumps(r, separators=(",", ":")) + "\n" for r in records)
+    return dropped
+
+
+def load_samples(paths: Iterable[Path]) -> List[Dict[str, Any]]:
+    out: List[Dict[str, Any]] = []
+    for path in paths:
+        if not path.is_file():
+            continue
+        for line in path.read_text(encoding="utf-8").splitlines():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(record, dict):
+                out.append(record)
+    return out
+
+
+# ─── Manifest index ──────────────────────────────────────────────────────────
+
+
+@dataclass
+class Container:
+    app: str
+    app_dir: Path
+    file: Path
+    kind: str
+    workload: str
+    namespace: str
+    name: str
+    resources: Dict[str, Dict[str, Any]]
+
+    @property
+    def key(self) -> Tuple[str, str, str]:
+        return (self.namespace, self.workload, self.name)
+
+
+def manifest_containers(apps: Set[str]) -> List[Container]:
+    out: List[Container] = []
+    for app_dir in discover_app_dirs():
+        if apps and app_dir.name not in apps:
+            continue
+        for path in manifest_files(app_dir):
+            for doc in load_yaml_docs(path):
+                if doc.get("kind") not in WORKLOAD_KINDS:
+                    continue
+                meta = doc.get("metadata") or {}
+                for c in pod_spec(doc).get("containers") or []:
+                    out.append(Container(app_dir.name, app_dir, path, doc["kind"], meta.get("name", ""),
+                                         meta.get("namespace", "default"), c.get("name", ""),
+                                         c.get("resources") or {}))
+    return out
+
+
+def workload_of(ns: str, pod: str, workloads: Dict[str, List[str]]) -> Optional[str]:
+    """Longest workload name in the namespace that prefixes the pod name."""
+    hits = [w for w in workloads.get(ns, []) if pod.startswith(w + "-")]
+    return max(hits, key=len) if hits else None
+
+
+# ─── Recommendation ──────────────────────────────────────────────────────────
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * q / 100
+    lo, hi = math.floor(rank), math.ceil(rank)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (rank - lo)
+
+
+def _ceil(value: float, step: float) -> float:
+    return math.ceil(value / step) * step
+
+
+def fmt_memory(value: float) -> str:
+    mib = int(round(value / MI))
+    return f"{mib // 1024}Gi" if mib >= 1024 and mib % 1024 == 0 else f"{mib}Mi"
+
+
+def fmt_cpu(millicores: float) -> str:
+    return f"{int(millicores)}m"
+
+
+@dataclass
+class Recommendation:
+    app: str
+    file: str
+    kind: str
+    workload: str
+    container: str
+    samples: int
+    mem_p50: float
+    mem_pq: float
+    mem_peak: float
+    cpu_pq: float
+    cpu_peak: float
+    ooms: int
+    oom_limit: float                   # highest limit an OOM kill was recorded at
+    current: Dict[str, Optional[str]] = field(default_factory=dict)    # "requests.memory" → "256Mi"
+    changes: Dict[str, str] = field(default_factory=dict)              # only the values that move
+
+
+def _moved(old: Optional[float], new: float, min_change: float) -> bool:
+    return old is None or old <= 0 or abs(new - old) / old > min_change
+
+
+def recommend(c: Container, mem: List[float], cpu: List[float], ooms: Set[Tuple[str, str, float]],
+              args: argparse.Namespace) -> Recommendation:
+    req, lim = c.resources.get("requests") or {}, c.resources.get("limits") or {}
+    current = {f: (req if f.startswith("requests") else lim).get(f.split(".")[1]) for f in FIELDS}
+    rec = Recommendation(c.app, c.file.relative_to(REPO_ROOT).as_posix(), c.kind, c.workload, c.name, len(mem),
+                         percentile(mem, 50), percentile(mem, args.percentile), max(mem),
+                         percentile(cpu, args.percentile), max(cpu), len(ooms), max((o[2] for o in ooms), default=0),
+                         {k: None if v is None else str(v) for k, v in current.items()})
+    old = {k: parse_quantity(v) if v is not None else None for k, v in current.items()}
+    headroom = 1 + args.headroom / 100
+
+    mem_request = max(16 * MI, _ceil(rec.mem_pq, 16 * MI))
+    mem_limit = max(_ceil(rec.mem_peak * headroom, 32 * MI), mem_request)
+    if rec.ooms:
+        mem_limit = max(mem_limit, _ceil(rec.oom_limit * 1.5, 32 * MI), old["limits.memory"] or 0)
+    cpu_request = max(10.0, _ceil(rec.cpu_pq, 5))
+
+    if _moved(old["requests.memory"], mem_request, args.min_change):
+        rec.changes["requests.memory"] = fmt_memory(mem_request)
+    if (rec.ooms and mem_limit > (old["limits.memory"] or 0)) or \
+            (not rec.ooms and _moved(old["limits.memory"], mem_limit, args.min_change)):
+        rec.changes["limits.memory"] = fmt_memory(mem_limit)
+    old_cpu = old["requests.cpu"] * 1000 if old["requests.cpu"] else None
+    if _moved(old_cpu, cpu_request, args.min_change):
+        rec.changes["requests.cpu"] = fmt_cpu(cpu_request)
+    if old["limits.cpu"] and rec.cpu_peak * headroom > old["limits.cpu"] * 1000:
+        rec.changes["limits.cpu"] = fmt_cpu(_ceil(rec.cpu_peak * headroom, 50))
+    return rec
+
+
+def build(containers: List[Container], samples: List[Dict[str, Any]], args: argparse.Namespace
+          ) -> Tuple[List[Recommendation], List[str]]:
+    workloads: Dict[str, List[str]] = {}
+    for c in containers:
+        workloads.setdefault(c.namespace, []).append(c.workload)
+    mem: Dict[Tuple[str, str, str], List[float]] = {}
+    cpu: Dict[Tuple[str, str, str], List[float]] = {}
+    ooms: Dict[Tuple[str, str, str], Set[Tuple[str, str, float]]] = {}
+    for s in samples:
+        wl = workload_of(str(s.get("ns")), str(s.get("pod")), workloads)
+        if wl is None:
+            continue
+        key = (s["ns"], wl, s.get("container", ""))
+        if "oom" in s:
+            ooms.setdefault(key, set()).add((s["pod"], s["oom"], float(s.get("limit") or 0)))
+        elif "mem" in s:
+            mem.setdefault(key, []).append(float(s["mem"]))
+            cpu.setdefault(key, []).append(float(s.get("cpu", 0)))
+
+    recs: List[Recommendation] = []
+    skipped: List[str] = []
+    for c in containers:
+        n = len(mem.get(c.key, []))
+        if n < args.min_samples:
+            skipped.append(f"{c.app}/{c.workload}/{c.name} ({n} samples)")
+            continue
+        recs.append(recommend(c, mem[c.key], cpu[c.key], ooms.get(c.key, set()), args))
+    return recs, skipped
+
+
+# ─── Patches ─────────────────────────────────────────────────────────────────
+
+
+def _container_item(lines: List[str], lo: int, hi: int, name: str) -> Optional[int]:
+    """Line of the `- ...` item for container `name` under the doc's `containers:`."""
+    start = next((j for j in range(lo, hi) if lines[j].strip() == "containers:"), None)
+    if start is None:
+        return None
+    end = block_end(lines, start)
+    items = [j for j in range(start + 1, end) if lines[j].lstrip().startswith("- ")]
+    if not items:
+        return None
+    dash = min(len(lines[j]) - len(lines[j].lstrip()) for j in items)
+    for j in items:
+        if len(lines[j]) - len(lines[j].lstrip()) != dash:
+            continue
+        m = re.match(r"^\s*- name:(.*)$", lines[j])
+        k = None if m else find_key(lines, j + 1, block_end(lines, j), dash + 2, "name")
+        found = m.group(1) if m else (lines[k].split(":", 1)[1] if k is not None else "")
+        if found.strip().strip("'\"") == name:
+            return j
+    return None
+
+
+def patch_manifest(text: str, recs: List[Recommendation]) -> str:
+    lines = text.splitlines(keepends=True)
+    for rec in recs:
+        for lo, hi in doc_ranges(lines):
+            try:
+                doc = yaml.safe_load("".join(lines[lo:hi]))
+            except yaml.YAMLError:
+                continue
+            if not isinstance(doc, dict) or doc.get("kind") != rec.kind or \
+                    (doc.get("metadata") or {}).get("name") != rec.workload:
+                continue
+            item = _container_item(lines, lo, hi, rec.container)
+            if item is None:
+                break
+            resources = ensure_key(lines, item, "resources")
+            for path in (p for p in FIELDS if p in rec.changes):
+                section, key = path.split(".")
+                ensure_key(lines, ensure_key(lines, resources, section), key, rec.changes[path])
+            break
+    return "".join(lines)
+
+
+def _amount(value: float) -> str:
+    mib = value / MI
+    if mib >= 1000:
+        return f"~{float(f'{mib / 1024:.2g}'):g}GB RAM"
+    return f"~{int(float(f'{mib:.2g}'))}MB RAM"
+
+
+def _usage_total(text: str) -> float:
+    units = {"K": 1 / 1024, "M": 1.0, "G": 1024.0}
+    return sum(float(n) * units[u] for n, u in USAGE_RE.findall(text)) * MI
+
+
+def resource_usage(recs: List[Recommendation]) -> str:
+    """Typical (p50) memory per workload, summed over its containers."""
+    per_workload: Dict[str, float] = {}
+    for r in recs:
+        per_workload[r.workload] = per_workload.get(r.workload, 0.0) + r.mem_p50
+    if len(per_workload) == 1:
+        return _amount(next(iter(per_workload.values())))
+    return ", ".join(f"{_amount(v)} ({w})" for w, v in sorted(per_workload.items(), key=lambda kv: -kv[1]))
+
+
+def patch_readme(text: str, usage: str, min_change: float) -> str:
+    m = re.search(r"^resource_usage:\s*(.*)$", text.split("\n---", 1)[0], re.MULTILINE)
+    if not m:
+        return text
+    current = m.group(1).strip().strip("'\"")
+    if not _moved(_usage_total(current) or None, _usage_total(usage), min_change):
+        return text
+    return text[:m.start()] + f'resource_usage: "{usage}"' + text[m.end():]
+
+
+def planned_changes(recs: List[Recommendation], min_change: float) -> Dict[Path, Tuple[str, str]]:
+    changes: Dict[Path, Tuple[str, str]] = {}
+    by_file: Dict[str, List[Recommendation]] = {}
+    by_app: Dict[str, List[Recommendation]] = {}
+    for r in recs:
+        if r.changes:
+            by_file.setdefault(r.file, []).append(r)
+        by_app.setdefault(r.app, []).append(r)
+    for rel, file_recs in by_file.items():
+        path = REPO_ROOT / rel
+        current = path.read_text(encoding="utf-8")
+        patched = patch_manifest(current, file_recs)
+        if patched != current:
+            changes[path] = (current, patched)
+    for app_recs in by_app.values():
+        readme = (REPO_ROOT / app_recs[0].file).parent / "README.md"
+        if not readme.is_file():
+            continue
+        current = readme.read_text(encoding="utf-8")
+        patched = patch_readme(current, resource_usage(app_recs), min_change)
+        if patched != current:
+            changes[readme] = (current, patched)
+    return changes
+
+
+def _write(path: Path, content: str) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(content, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+# ─── Report ──────────────────────────────────────────────────────────────────
+
+
+def _mib(value: float) -> str:
+    return f"{value / MI:.0f}Mi"
+
+
+def _arrow(rec: Recommendation, key: str) -> str:
+    old = rec.current.get(key) or "—"
+    new = rec.changes.get(key)
+    if new is None:
+        return f"{DIM}{old}{NC}"
+    grew = (parse_quantity(new) or 0) > (parse_quantity(old) or 0)
+    return f"{old}→{RED if grew else GREEN}{new}{NC}"
+
+
+def print_report(recs: List[Recommendation], pq: float) -> None:
+    header(f"Right-sizing — {len(recs)} container(s), memory p{pq:g} / peak, cpu p{pq:g}")
+    if not recs:
+        return
+    width = max(len(f"{r.app}/{r.container}") for r in recs)
+    print(f"  {BOLD}{'APP/CONTAINER':<{width}} {'N':>5} {'WS p50':>7} {f'p{pq:g}':>7} {'PEAK':>7} {'OOM':>3}  "
+          f"MEM REQ / LIMIT · CPU REQ / LIMIT{NC}")
+    for r in sorted(recs, key=lambda r: (r.app, r.workload, r.container)):
+        oom = f"{RED}{r.ooms:>3}{NC}" if r.ooms else f"{r.ooms:>3}"
+        print(f"  {r.app + '/' + r.container:<{width}} {r.samples:>5} {_mib(r.mem_p50):>7} {_mib(r.mem_pq):>7} "
+              f"{_mib(r.mem_peak):>7} {oom}  {_arrow(r, 'requests.memory')} / {_arrow(r, 'limits.memory')}"
+              f" · {_arrow(r, 'requests.cpu')} / {_arrow(r, 'limits.cpu')}")
+
+    def total(key: str, source: str) -> float:
+        out = 0.0
+        for r in recs:
+            value = r.changes.get(key, r.current.get(key)) if source == "new" else r.current.get(key)
+            out += (parse_quantity(value) or 0) if value else 0
+        return out
+
+    req_old, req_new = total("requests.memory", "old"), total("requests.memory", "new")
+    lim_old, lim_new = total("limits.memory", "old"), total("limits.memory", "new")
+    print("")
+    info(f"Memory requests {_mib(req_old)} → {_mib(req_new)} ({_mib(req_new - req_old)}), "
+         f"limits {_mib(lim_old)} → {_mib(lim_new)} ({_mib(lim_new - lim_old)})")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Recommend requests/limits from recorded usage and patch the manifests.")
+    ap.add_argument("apps", nargs="*", help="only these apps (default: every app and database)")
+    mode = ap.add_mutually_exclusive_group()
+    mode.add_argument("--record", action="store_true", help=f"append one sample to {SAMPLES_FILE.name} and exit")
+    mode.add_argument("--write", action="store_true", help="patch manifests and README frontmatter")
+    ap.add_argument("--diff", action="store_true", help="print a unified diff of the patches")
+    ap.add_argument("--samples", type=Path, action="append", help=f"sample file(s) (default: k3s/{SAMPLES_FILE.name})")
+    ap.add_argument("--since", type=float, default=0, metavar="DAYS", help="only samples from the last DAYS days")
+    ap.add_argument("--retain", type=float, default=14, metavar="DAYS", help="--record: keep DAYS of samples (default 14)")
+    ap.add_argument("--percentile", type=float, default=90, help="request percentile (default 90)")
+    ap.add_argument("--headroom", type=float, default=30, metavar="PCT", help="limit headroom over peak (default 30)")
+    ap.add_argument("--min-change", type=float, default=10, metavar="PCT", help="ignore moves under PCT%% (default 10)")
+    ap.add_argument("--min-samples", type=int, default=288,
+                    help="skip containers with fewer samples (default 288 — a day at 5 min)")
+    ap.add_argument("--json", action="store_true", help="machine-readable recommendations")
+    args = ap.parse_args()
+    args.min_change /= 100
+    now = time.time()
+
+    if args.record:
+        records, problem = take_sample(now)
+        if problem:
+            err(problem)
+            return 1
+        dropped = append_samples(SAMPLES_FILE, records, args.retain, now)
+        pruned = f" ({dropped} expired sample(s) pruned)" if dropped else ""
+        ok(f"Recorded {len(records)} sample(s) → {SAMPLES_FILE.name}{pruned}")
+        return 0
+
+    samples = load_samples(args.samples or [SAMPLES_FILE])
+    if args.since:
+        samples = [s for s in samples if s.get("ts", 0) >= now - args.since * 86400]
+    if not samples:
+        err("No samples — run ./right-size.py --record from cron first (see --help)")
+        return 1
+    apps = set(args.apps)
+    containers = manifest_containers(apps)
+    unknown = apps - {c.app for c in containers}
+    if unknown:
+        err(f"No workloads for: {', '.join(sorted(unknown))}")
+        return 1
+
+    recs, skipped = build(containers, samples, args)
+    changes = planned_changes(recs, args.min_change)
+    if args.json:
+        print(json.dumps({"recommendations": [asdict(r) for r in recs], "skipped": skipped,
+                          "files": [p.relative_to(REPO_ROOT).as_posix() for p in changes]}, indent=2))
+        return 0
+
+    print_report(recs, args.percentile)
+    if skipped:
+        warn(f"Too few samples (< {args.min_samples}), left alone: {', '.join(skipped)}")
+    if args.diff:
+        for path, (old, new) in changes.items():
+            rel = path.relative_to(REPO_ROOT).as_posix()
+            sys.stdout.writelines(difflib.unified_diff(
+                old.splitlines(keepends=True), new.splitlines(keepends=True), f"a/{rel}", f"b/{rel}"))
+    if not changes:
+        ok("Manifests already match observed usage")
+        return 0
+    print("")
+    for path in changes:
+        print(f"  {GREEN if args.write else YELLOW}{'✓' if args.write else '~'}{NC} {path.relative_to(REPO_ROOT)}")
+    if args.write:
+        for path, (_, new) in changes.items():
+            _write(path, new)
+        ok(f"Patched {len(changes)} file(s) — review with git diff, then commit")
+    else:
+        info(f"{len(changes)} file(s) would change — re-run with --write")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
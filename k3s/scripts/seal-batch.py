@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+seal-batch.py — Offline, parallel, change-aware version of `seal.sh --all`.
+
+Discovers every plaintext secret under k3s/ (secret.yaml, plus the
+<prefix>-secret.yaml files forgejo's runner uses) and seals each one next to
+itself as sealedsecret.yaml / <prefix>-sealedsecret.yaml.
+
+Differences from the per-file loop in seal.sh:
+  - Always offline: kubeseal --cert against infra/sealed-secrets/public-cert.pem
+    (fetched once, like _ensure_cert, if missing). No controller round trip.
+  - stringData → data normalisation is done in-process instead of one
+    `kubectl create --dry-run=client` per file (same no-merge semantics).
+  - Runs kubeseal across a worker pool.
+  - Keeps a content-hash manifest so a secret is re-sealed only when its
+    plaintext, the cert, or the sealed output on disk changed. Unchanged
+    secrets keep their existing sealedsecret.yaml byte-for-byte, so git diffs
+    stay quiet.
+  - SealedSecrets in the app dirs sync-waves.py manages get its sync-wave
+    annotation before they are written (and hashed), so a re-seal neither
+    drops it nor leaves `sync-waves.py --check` stale.
+
+The manifest stores SHA-256 digests (never plaintext) in
+infra/sealed-secrets/.seal-manifest.json, which is gitignored.
+
+Usage:
+  ./seal-batch.py                 Seal everything that changed
+  ./seal-batch.py --force         Re-seal everything (e.g. after key rotation)
+  ./seal-batch.py --dry-run       List what would be sealed
+  ./seal-batch.py --jobs 8        Worker count (default: CPU count)
+  ./seal-batch.py apps/n8n/secret.yaml
+                                  Only these secrets (seal.sh <file> uses this)
+
+kubeseal is resolved from $KUBESEAL (default: kubeseal).
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import importlib.util
+import json
+import os
+import shlex
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import yaml
+
+from _k3s import INFRA_DIR, K3S_ROOT, SCRIPTS_DIR, err, header, info, ok, warn
+
+
+CERT = INFRA_DIR / "sealed-secrets" / "public-cert.pem"
+MANIFEST = INFRA_DIR / "sealed-secrets" / ".seal-manifest.json"
+CONTROLLER_NAME = "sealed-secrets-controller"
+CONTROLLER_NS = "kube-system"
+
+
+def kubeseal_cmd() -> List[str]:
+    return shlex.split(os.environ.get("KUBESEAL", "kubeseal"))
+
+
+# ─── Discovery ───────────────────────────────────────────────────────────────
+
+
+def sealed_path(secret: Path) -> Path:
+    """secret.yaml → sealedsecret.yaml, runner-secret.yaml → runner-sealedsecret.yaml"""
+    return secret.with_name(secret.name[: -len("secret.yaml")] + "sealedsecret.yaml")
+
+
+def discover_secrets(root: Path) -> List[Path]:
+    found = [
+        p for p in root.rglob("*secret.yaml")
+        if p.name == "secret.yaml" or p.name.endswith("-secret.yaml")
+    ]
+    return sorted(p for p in found if not p.name.endswith("sealedsecret.yaml"))
+
+
+# ─── Normalisation ───────────────────────────────────────────────────────────
+
+
+def normalise(secret: Path) -> Tuple[str, Dict[str, Any]]:
+    """Fold stringData into base64 data, like `kubectl create --dry-run=client`.
+
+    Returns (canonical JSON used for hashing, Secret object fed to kubeseal).
+    """
+    doc = yaml.safe_load(secret.read_text(encoding="utf-8")) or {}
+    if not isinstance(doc, dict) or doc.get("kind") != "Secret":
+        raise ValueError("not a v1 Secret")
+    data = {k: str(v) for k, v in (doc.get("data") or {}).items()}
+    for k, v in (doc.get("stringData") or {}).items():
+        data[k] = base64.b64encode(str(v).encode("utf-8")).decode("ascii")
+    meta = doc.get("metadata") or {}
+    obj: Dict[str, Any] = {
+        "apiVersion": "v1",
+        "kind": "Secret",
+        "metadata": {k: meta[k] for k in ("name", "namespace", "labels", "annotations") if meta.get(k)},
+        "type": doc.get("type", "Opaque"),
+        "data": dict(sorted(data.items())),
+    }
+    if not obj["metadata"].get("name"):
+        raise ValueError("metadata.name is required")
+    return json.dumps(obj, sort_keys=True, separators=(",", ":")), obj
+
+
+def sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+# ─── Cert + manifest ─────────────────────────────────────────────────────────
+
+
+def ensure_cert() -> bool:
+    if CERT.is_file():
+        return True
+    warn(f"Public cert not found at {CERT} — fetching from cluster...")
+    CERT.parent.mkdir(parents=True, exist_ok=True)
+    res = subprocess.run(
+        kubeseal_cmd() + [f"--controller-name={CONTROLLER_NAME}", f"--controller-namespace={CONTROLLER_NS}", "--fetch-cert"],
+        capture_output=True, text=True,
+    )
+    if res.returncode != 0 or "BEGIN CERTIFICATE" not in res.stdout:
+        err(f"Could not fetch cert: {res.stderr.strip()}")
+        return False
+    CERT.write_text(res.stdout, encoding="utf-8")
+    ok(f"Cert fetched → {CERT}  (safe to commit to git)")
+    return True
+
+
+def load_manifest() -> Dict[str, Dict[str, str]]:
+    try:
+        return json.loads(MANIFEST.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest: Dict[str, Dict[str, str]]) -> None:
+    tmp = MANIFEST.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    tmp.replace(MANIFEST)
+
+
+# ─── Sealing ─────────────────────────────────────────────────────────────────
+
+
+def _waves_module() -> Any:
+    """sync-waves.py, for wave_dirs() / patch_manifest()."""
+    spec = importlib.util.spec_from_file_location("sync_waves", SCRIPTS_DIR / "sync-waves.py")
+    if spec is None or spec.loader is None:
+        raise ImportError("sync-waves.py not found")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def seal_one(obj: Dict[str, Any], output: Path, stamp: Optional[Callable[[str], str]] = None) -> Tuple[bool, str]:
+    res = subprocess.run(
+        kubeseal_cmd() + ["--cert", str(CERT), "--format", "yaml"],
+        input=yaml.safe_dump(obj, sort_keys=False), capture_output=True, text=True,
+    )
+    if res.returncode != 0 or not res.stdout.strip():
+        return False, res.stderr.strip() or "kubeseal produced no output"
+    sealed = stamp(res.stdout) if stamp else res.stdout
+    tmp = output.with_name(output.name + ".tmp")
+    tmp.write_text(sealed, encoding="utf-8")
+    tmp.replace(output)
+    return True, sha256(sealed.encode("utf-8"))
+
+
+def plan(secrets: List[Path], manifest: Dict[str, Dict[str, str]], cert_hash: str, force: bool):
+    """Split secrets into (to_seal, unchanged, broken)."""
+    to_seal: List[Tuple[Path, str, Dict[str, Any], str]] = []
+    unchanged: List[Path] = []
+    broken: List[Tuple[Path, str]] = []
+    for secret in secrets:
+        rel = str(secret.relative_to(K3S_ROOT))
+        try:
+            canonical, obj = normalise(secret)
+        except (ValueError, yaml.YAMLError) as exc:
+            broken.append((secret, str(exc)))
+            continue
+        secret_hash = sha256(canonical.encode("utf-8"))
+        output = sealed_path(secret)
+        prev: Optional[Dict[str, str]] = manifest.get(rel)
+        fresh = (
+            not force
+            and prev is not None
+            and prev.get("secret") == secret_hash
+            and prev.get("cert") == cert_hash
+            and output.is_file()
+            and prev.get("sealed") == sha256(output.read_bytes())
+        )
+        if fresh:
+            unchanged.append(secret)
+        else:
+            to_seal.append((secret, rel, obj, secret_hash))
+    return to_seal, unchanged, broken
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Offline batch sealer for every secret under k3s/.")
+    ap.add_argument("--force", action="store_true", help="re-seal even if nothing changed")
+    ap.add_argument("--dry-run", action="store_true", help="only list what would be sealed")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 4, help="parallel kubeseal workers")
+    ap.add_argument("secrets", nargs="*", type=Path, help="only seal these secret files (default: all under k3s/)")
+    args = ap.parse_args()
+
+    if not ensure_cert():
+        return 1
+    cert_hash = sha256(CERT.read_bytes())
+    manifest = load_manifest()
+    if manifest and all(v.get("cert") != cert_hash for v in manifest.values()):
+        info("Public cert changed since the last run — every secret will be re-sealed")
+
+    secrets = discover_secrets(K3S_ROOT)
+    if not secrets:
+        info(f"No secret.yaml files under {K3S_ROOT}")
+        return 0
+    selected = secrets
+    if args.secrets:
+        wanted = {p.resolve() for p in args.secrets}
+        selected = [s for s in secrets if s.resolve() in wanted]
+        for p in sorted(wanted - {s.resolve() for s in selected}):
+            err(f"Not a secret file under {K3S_ROOT}: {p}")
+        if len(selected) != len(wanted):
+            return 1
+    to_seal, unchanged, broken = plan(selected, manifest, cert_hash, args.force)
+
+    header(f"Sealing — {len(to_seal)} changed, {len(unchanged)} unchanged, {len(broken)} invalid")
+    for secret, why in broken:
+        err(f"{secret.relative_to(K3S_ROOT)}: {why}")
+    if args.dry_run:
+        for secret, rel, _, _ in to_seal:
+            print(f"  would seal  {rel} → {sealed_path(secret).name}")
+        return 1 if broken else 0
+
+    waves = _waves_module()
+    wave_dirs: Set[Path] = waves.wave_dirs() if to_seal else set()
+
+    def seal(item: Tuple[Path, str, Dict[str, Any], str]) -> Tuple[bool, str]:
+        secret, _, obj, _ = item
+        stamp = waves.patch_manifest if secret.parent in wave_dirs else None
+        return seal_one(obj, sealed_path(secret), stamp)
+
+    started = time.monotonic()
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        results = pool.map(lambda item: (item, seal(item)), to_seal)
+        for (secret, rel, _, secret_hash), (success, detail) in results:
+            if success:
+                manifest[rel] = {"secret": secret_hash, "cert": cert_hash, "sealed": detail}
+                ok(f"→ {sealed_path(secret).relative_to(K3S_ROOT)}")
+            else:
+                failed += 1
+                err(f"{rel}: {detail}")
+
+    # Forget secrets that no longer exist so the manifest doesn't grow forever.
+    live = {str(s.relative_to(K3S_ROOT)) for s in secrets}
+    manifest = {k: v for k, v in manifest.items() if k in live}
+    save_manifest(manifest)
+
+    print("")
+    ok(f"Done — {len(to_seal) - failed} sealed, {len(unchanged)} unchanged, "
+       f"{failed + len(broken)} failed ({time.monotonic() - started:.1f}s)")
+    return 1 if failed or broken else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
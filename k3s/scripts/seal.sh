@@ -4,7 +4,8 @@ set -euo pipefail
 #
 # Usage:
 #   ./seal.sh <path/to/secret.yaml>   Seal one file
-#   ./seal.sh --all                   Seal all secret.yaml files under k3s/apps/
+#   ./seal.sh --all                   Seal all secret.yaml files under k3s/ (changed ones only)
+#   ./seal.sh --all --force           Re-seal every secret (e.g. after a key rotation)
 #   ./seal.sh --fetch-cert            Re-fetch public cert from the cluster (auto-done on first run)
 
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
@@ -41,6 +42,10 @@ _ensure_cert() {
   fi
 }
 
+_have_batch() {
+  command -v python3 &>/dev/null && python3 -c 'import yaml' &>/dev/null
+}
+
 seal_one() {
   local input="$1"
 
@@ -55,6 +60,12 @@ seal_one() {
     return 1
   fi
 
+  # The batch sealer also stamps sync-waves.py's annotation, so a re-seal keeps it
+  if _have_batch; then
+    python3 "$SCRIPT_DIR/seal-batch.py" --force "$input"
+    return
+  fi
+
   local output; output="$(dirname "$input")/sealedsecret.yaml"
 
   info "Sealing: $input"
@@ -73,6 +84,14 @@ seal_one() {
 }
 
 seal_all() {
+  # Prefer the offline batch sealer (parallel, skips unchanged secrets)
+  if _have_batch; then
+    python3 "$SCRIPT_DIR/seal-batch.py" "$@"
+    return
+  fi
+  warn "python3 + PyYAML not found — falling back to sequential sealing of apps/"
+  warn "(without the sync-wave annotation — run ./sync-waves.py --write afterwards)"
+
   local count=0 failed=0
   info "Sealing all secret.yaml files under $REPO_ROOT/apps/ ..."
   echo ""
@@ -102,7 +121,7 @@ fetch_cert() {
 show_usage() {
   echo "Usage:"
   echo "  $(basename "$0") <path/to/secret.yaml>   Seal a single secret"
-  echo "  $(basename "$0") --all                   Seal all secret.yaml files in apps/"
+  echo "  $(basename "$0") --all [--force]         Seal changed secret.yaml files under k3s/"
   echo "  $(basename "$0") --fetch-cert            Re-fetch public cert from cluster"
   echo ""
   echo "Notes:"
@@ -115,7 +134,7 @@ show_usage() {
 _check_deps
 
 case "${1:-}" in
-  --all)        _ensure_cert; seal_all ;;
+  --all)        _ensure_cert; seal_all "${@:2}" ;;
   --fetch-cert) fetch_cert ;;
   ""|-h|--help) show_usage ;;
   *)            _ensure_cert; seal_one "$1" ;;
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+sync-waves.py — ArgoCD sync waves from the manifest dependency graph.
+
+Without waves the homelab ApplicationSet syncs every Application at once:
+on a Pi that is a pull + start storm, and apps crash-loop until the
+databases they point at come up. This reuses parallel-restore.py's DAG
+(the same derived edges — "<svc>.databases" references in manifests and
+config/, SealedSecrets, IngressRoutes, priorityClassName) and layers the
+ApplicationSet elements so each one lands in the earliest wave after
+everything it needs. Infra gates (sealed-secrets, traefik, cert-manager)
+are installed by helm before ArgoCD and count as already there.
+
+What it patches:
+  - infra/argocd/applicationset.yaml
+      every element gets `wave: "N"`; the template carries it as the `wave`
+      label and as the argocd.argoproj.io/sync-wave annotation, and keeps
+      `automated: {prune, selfHeal}` (this restores the block if it is gone)
+  - SealedSecrets in apps/ and databases/ get sync-wave "-1", so a Secret
+    is unsealed before the workloads in the same Application that mount it
+    (seal-batch.py stamps the same annotation on what it seals, so a re-seal
+    and --check agree)
+
+Progressive sync is opt-in: --rolling adds a RollingSync strategy with one
+step per wave, so the ApplicationSet controller rolls git changes out wave
+by wave. RollingSync forces automated sync off on every generated
+Application — no selfHeal, prune only on sync — and halts later waves
+while any app in a wave is unhealthy, so the block is dropped while it is
+on. --no-rolling switches back; without either flag the file keeps its
+current mode (k3s/README.md, "GitOps deploy model").
+
+Every edit is a line edit — comments and layout are kept, and a second
+run changes nothing.
+
+Usage:
+  ./sync-waves.py                       Show the waves and which files are stale
+  ./sync-waves.py --diff                ...plus a unified diff
+  ./sync-waves.py --write               Patch the files
+  ./sync-waves.py --check               Exit 1 if any file is stale (CI, offline)
+  ./sync-waves.py --max-per-wave 4      Cap wave width (spreads independent apps)
+  ./sync-waves.py --write --rolling     Opt in to RollingSync (--no-rolling: back out)
+"""
+
+from __future__ import annotations
+
+import argparse
+import difflib
+import importlib.util
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import yaml
+
+from _k3s import (
+    BOLD, CYAN, DIM, GREEN, INFRA_DIR, NC, REPO_ROOT, SCRIPTS_DIR, YELLOW,
+    block_end, doc_ranges, drop_key, ensure_key, err, find_key, header, info, manifest_files, ok, warn,
+)
+
+
+APPSET_FILE = INFRA_DIR / "argocd" / "applicationset.yaml"
+ANNOTATION = "argocd.argoproj.io/sync-wave"
+SECRET_WAVE = "-1"
+STRATEGY_MARK = "# Generated by k3s/scripts/sync-waves.py — one RollingSync step per sync wave."
+
+
+def _restore_module() -> Any:
+    """parallel-restore.py, for build_dag() / waves()."""
+    spec = importlib.util.spec_from_file_location("parallel_restore", SCRIPTS_DIR / "parallel-restore.py")
+    if spec is None or spec.loader is None:
+        raise ImportError("parallel-restore.py not found")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module          # dataclasses resolve types via sys.modules
+    spec.loader.exec_module(module)
+    return module
+
+
+# ─── Wave assignment ─────────────────────────────────────────────────────────
+
+
+def element_graph(elements: List[Dict[str, Any]], restore: Any) -> Tuple[Dict[str, Any], List[str]]:
+    """ApplicationSet elements as restore.Node objects, deps restricted to other elements."""
+    dag = restore.build_dag()
+    by_path: Dict[str, str] = {}
+    for name, node in dag.items():
+        source = node.app_dir or (node.files[0].parent if node.files and name != "namespaces" else None)
+        if source is not None:
+            by_path[source.resolve().relative_to(REPO_ROOT.resolve()).as_posix()] = name
+    node_to_element: Dict[str, str] = {}
+    notes: List[str] = []
+    for e in elements:
+        node = by_path.get(str(e.get("path", "")).rstrip("/"))
+        if node is None:
+            notes.append(f"{e['name']}: no manifests at {e.get('path')} — placed in wave 0")
+        else:
+            node_to_element[node] = e["name"]
+    graph: Dict[str, Any] = {e["name"]: restore.Node(e["name"]) for e in elements}
+    for node, name in node_to_element.items():
+        graph[name].deps = {node_to_element[d] for d in dag[node].deps if d in node_to_element}
+    for name, node in dag.items():
+        if node.app_dir is not None and name not in node_to_element:
+            notes.append(f"{name}: {node.app_dir.relative_to(REPO_ROOT)} is not in the ApplicationSet")
+    return graph, notes
+
+
+def assign_waves(graph: Dict[str, Any], restore: Any, max_per_wave: int = 0) -> Dict[str, int]:
+    """Earliest wave after every dependency; with a cap, the nodes that gate the
+    longest chains are placed first and the rest slide to later waves."""
+    layers = restore.waves(graph)             # raises ValueError on a cycle
+    dependents: Dict[str, List[str]] = {n: [] for n in graph}
+    for n, node in graph.items():
+        for d in node.deps:
+            dependents[d].append(n)
+    height: Dict[str, int] = {}
+    for layer in reversed(layers):
+        for n in layer:
+            height[n] = 1 + max((height[m] for m in dependents[n]), default=0)
+
+    wave: Dict[str, int] = {}
+    w = 0
+    while len(wave) < len(graph):
+        ready = sorted((n for n in graph if n not in wave and all(wave.get(d, w) < w for d in graph[n].deps)),
+                       key=lambda n: (-height[n], n))
+        for n in ready[:max_per_wave or None]:
+            wave[n] = w
+        w += 1
+    return wave
+
+
+# ─── ApplicationSet ──────────────────────────────────────────────────────────
+
+
+def _quoted(value: str) -> str:
+    return f'"{value}"'
+
+
+def _strategy_block(wave: Dict[str, int]) -> List[str]:
+    block = [f"  {STRATEGY_MARK}\n", "  strategy:\n", "    type: RollingSync\n",
+             "    rollingSync:\n", "      steps:\n"]
+    for w in range(max(wave.values(), default=0) + 1):
+        block += ["        - matchExpressions:\n", "            - key: wave\n",
+                  "              operator: In\n", f"              values: [{_quoted(str(w))}]\n"]
+    return block + ["\n"]
+
+
+def is_rolling(text: str) -> bool:
+    """Whether the ApplicationSet currently carries the generated RollingSync strategy."""
+    return STRATEGY_MARK in text
+
+
+def patch_appset(text: str, wave: Dict[str, int], rolling: Optional[bool] = None) -> str:
+    """Stamp waves on the elements and template. rolling=None keeps the file's
+    current mode; True adds the RollingSync strategy, False removes it."""
+    if rolling is None:
+        rolling = is_rolling(text)
+    lines = text.splitlines(keepends=True)
+
+    start = next((i for i, l in enumerate(lines) if l.strip() == "elements:"), None)
+    if start is None:
+        raise ValueError("no list generator `elements:` in the ApplicationSet")
+    end = block_end(lines, start)
+    items = [i for i in range(start + 1, end) if re.match(r"^\s*- name:\s*\S", lines[i])]
+    for i in reversed(items):
+        name = lines[i].split("name:", 1)[1].strip().strip("'\"")
+        ensure_key(lines, i, "wave", _quoted(str(wave.get(name, 0))))
+
+    template = next((i for i, l in enumerate(lines) if l.rstrip() == "  template:"), None)
+    if template is None:
+        raise ValueError("no `template:` in the ApplicationSet")
+    meta = find_key(lines, template + 1, block_end(lines, template), 4, "metadata")
+    if meta is None:
+        raise ValueError("no `template.metadata` in the ApplicationSet")
+    ensure_key(lines, ensure_key(lines, meta, "labels"), "wave", _quoted("{{ .wave }}"))
+    ensure_key(lines, ensure_key(lines, meta, "annotations"), ANNOTATION, _quoted("{{ .wave }}"))
+    spec = find_key(lines, template + 1, block_end(lines, template), 4, "spec")
+    if spec is None:
+        raise ValueError("no `template.spec` in the ApplicationSet")
+    policy = ensure_key(lines, spec, "syncPolicy")
+    if rolling:
+        drop_key(lines, policy, "automated")       # RollingSync forces it off anyway
+    elif find_key(lines, policy + 1, block_end(lines, policy), 8, "automated") is None:
+        lines[policy + 1:policy + 1] = ["        automated:\n", "          prune: true\n",
+                                        "          selfHeal: true\n"]
+
+    # Drop any previous strategy block; with rolling, regenerate it just above template:.
+    old = next((i for i, l in enumerate(lines) if l.rstrip() == "  strategy:"), None)
+    if old is not None:
+        stop = block_end(lines, old)
+        if old > 0 and lines[old - 1].strip() == STRATEGY_MARK:
+            old -= 1
+        if stop < len(lines) and not lines[stop].strip():
+            stop += 1
+        del lines[old:stop]
+    if rolling:
+        template = next(i for i, l in enumerate(lines) if l.rstrip() == "  template:")
+        lines[template:template] = _strategy_block(wave)
+    return "".join(lines)
+
+
+# ─── Manifests ───────────────────────────────────────────────────────────────
+
+
+def patch_manifest(text: str) -> str:
+    """sync-wave SECRET_WAVE on every SealedSecret document."""
+    lines = text.splitlines(keepends=True)
+    for lo, hi in reversed(doc_ranges(lines)):
+        try:
+            doc = yaml.safe_load("".join(lines[lo:hi]))
+        except yaml.YAMLError:
+            continue
+        if not isinstance(doc, dict) or doc.get("kind") != "SealedSecret":
+            continue
+        meta = find_key(lines, lo, hi, 0, "metadata")
+        if meta is not None:
+            ensure_key(lines, ensure_key(lines, meta, "annotations"), ANNOTATION, _quoted(SECRET_WAVE))
+    return "".join(lines)
+
+
+def wave_dirs(restore: Any = None) -> Set[Path]:
+    """App dirs whose SealedSecrets carry SECRET_WAVE (seal-batch.py stamps these too)."""
+    restore = restore or _restore_module()
+    return {node.app_dir for node in restore.build_dag().values() if node.app_dir is not None}
+
+
+def planned_changes(restore: Any, wave: Dict[str, int],
+                    rolling: Optional[bool] = None) -> Dict[Path, Tuple[str, str]]:
+    """{path: (current, patched)} for every file whose content would change."""
+    changes: Dict[Path, Tuple[str, str]] = {}
+    current = APPSET_FILE.read_text(encoding="utf-8")
+    patched = patch_appset(current, wave, rolling)
+    if patched != current:
+        changes[APPSET_FILE] = (current, patched)
+    for app_dir in sorted(wave_dirs(restore)):
+        for path in manifest_files(app_dir):
+            current = path.read_text(encoding="utf-8")
+            if "SealedSecret" not in current:
+                continue
+            patched = patch_manifest(current)
+            if patched != current:
+                changes[path] = (current, patched)
+    return changes
+
+
+def _write(path: Path, content: str) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(content, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+# ─── Report ──────────────────────────────────────────────────────────────────
+
+
+def print_waves(graph: Dict[str, Any], wave: Dict[str, int]) -> None:
+    header(f"Sync waves — {len(wave)} Applications in {max(wave.values(), default=-1) + 1} waves")
+    for w in range(max(wave.values(), default=-1) + 1):
+        members = sorted(n for n, v in wave.items() if v == w)
+        print(f"  {BOLD}{CYAN}wave {w}{NC}  {DIM}({len(members)}){NC}")
+        for n in members:
+            deps = sorted(graph[n].deps)
+            after = f"  {DIM}after {', '.join(deps)}{NC}" if deps else ""
+            print(f"    {n}{after}")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Derive ArgoCD sync waves from the manifest dependency graph.")
+    mode = ap.add_mutually_exclusive_group()
+    mode.add_argument("--write", action="store_true", help="patch the ApplicationSet and manifests")
+    mode.add_argument("--check", action="store_true", help="exit 1 if any file is out of date")
+    ap.add_argument("--diff", action="store_true", help="print a unified diff of pending changes")
+    ap.add_argument("--max-per-wave", type=int, default=0, metavar="N",
+                    help="at most N Applications per wave (default: unlimited)")
+    strategy = ap.add_mutually_exclusive_group()
+    strategy.add_argument("--rolling", dest="rolling", action="store_const", const=True,
+                          help="opt in to a RollingSync strategy (turns off automated sync)")
+    strategy.add_argument("--no-rolling", dest="rolling", action="store_const", const=False,
+                          help="remove the RollingSync strategy, restoring automated sync")
+    ap.add_argument("-q", "--quiet", action="store_true", help="only report problems and written files")
+    args = ap.parse_args()
+
+    if not APPSET_FILE.is_file():
+        err(f"ApplicationSet not found at {APPSET_FILE}")
+        return 1
+    restore = _restore_module()
+    try:
+        doc = yaml.safe_load(APPSET_FILE.read_text(encoding="utf-8"))
+        elements = doc["spec"]["generators"][0]["list"]["elements"]
+    except (yaml.YAMLError, KeyError, IndexError, TypeError) as exc:
+        err(f"Cannot read the ApplicationSet element list: {exc}")
+        return 1
+
+    graph, notes = element_graph(elements, restore)
+    try:
+        wave = assign_waves(graph, restore, args.max_per_wave)
+        changes = planned_changes(restore, wave, args.rolling)
+    except ValueError as exc:
+        err(str(exc))
+        return 1
+
+    if not args.quiet:
+        print_waves(graph, wave)
+        print("")
+    for note in notes:
+        warn(note)
+
+    if args.diff:
+        for path, (old, new) in changes.items():
+            rel = path.relative_to(REPO_ROOT).as_posix()
+            sys.stdout.writelines(difflib.unified_diff(
+                old.splitlines(keepends=True), new.splitlines(keepends=True), f"a/{rel}", f"b/{rel}"))
+    if not changes:
+        if not args.quiet:
+            ok("ApplicationSet and manifests are up to date")
+        return 0
+
+    for path in changes:
+        marker = f"{GREEN}✓{NC}" if args.write else f"{YELLOW}~{NC}"
+        print(f"  {marker} {path.relative_to(REPO_ROOT)}")
+    if args.write:
+        for path, (_, new) in changes.items():
+            _write(path, new)
+        ok(f"Patched {len(changes)} file(s)")
+        return 0
+    if args.check:
+        err(f"{len(changes)} file(s) out of date — run ./sync-waves.py --write")
+        return 1
+    info(f"{len(changes)} file(s) would change — re-run with --write")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
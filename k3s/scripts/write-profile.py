@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+"""
+write-profile.py — Who is wearing out the SD card: block writes per app and volume.
+
+Databases, torrent clients (deluge, bitcomet, aria2) and the Home Assistant
+recorder write constantly; on a Pi booting from SD that is card wear plus IO
+stalls for everything else. This samples the kernel's own counters twice
+and attributes the difference:
+
+  /proc/diskstats           sectors written per disk / partition
+  <cgroup>/io.stat          wbytes per device for every docker container
+                            (docker-<id>.scope), k3s pod (kubepods…pod<uid>)
+                            and host service (system.slice/*.service)
+  /proc/self/mountinfo      which block device backs each path
+
+Container ids and pod uids are named through `docker ps` / `kubectl get pods`
+(the pod's `app` label). Writes on a disk no cgroup accounts for (filesystem
+journal, kernel threads) show up as "unattributed".
+
+Volumes come from disk-usage.py's map (PersistentVolume hostPaths and
+docker/ bind mounts). A volume on the SD card whose app writes more than
+--threshold MiB/day there is flagged: → tmpfs for caches, transcodes and
+logs that can be lost on reboot, → SSD for everything else.
+
+Usage:
+  ./write-profile.py                       Sample 60s, rank writers, flag volumes
+  ./write-profile.py --interval 300        Longer sample (steadier daily estimate)
+  ./write-profile.py --interval 0          Averages since boot, no waiting
+  ./write-profile.py --record snap.json    Save the counters, compare later with:
+  ./write-profile.py --baseline snap.json  Rates since that snapshot (e.g. overnight)
+  ./write-profile.py --json
+
+--proc / --sys point at another root, e.g. the fake tree in fixtures/ (an
+SD card and an SSD, three pods, a docker container and two host services):
+  ./write-profile.py --proc fixtures/write-profile/proc --sys fixtures/write-profile/sys \
+      --interval 0 --names fixtures/write-profile/names.json
+
+--offline leaves writers as docker:<id> / pod:<uid>; --names FILE names them
+from a JSON map instead of docker / kubectl (ids and uids may be prefixes):
+  {"docker": {"3f2a9c...": "deluge"}, "pods": {"8d1e5b7a-...": "jellyfin"}}
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from _k3s import (
+    BOLD, DIM, GREEN, NC, RED, SCRIPTS_DIR, YELLOW, err, header, info, ok, run_docker, run_kubectl, warn,
+)
+
+
+SECTOR = 512
+DAY = 86400
+MI = 2 ** 20
+TMPFS_HINTS = ("cache", "transcode", "tmp", "temp", "log", "logs")
+DOCKER_RE = re.compile(r"docker[-/]([0-9a-f]{64})")
+POD_RE = re.compile(r"pod([0-9a-f]{8}[-_][0-9a-f]{4}[-_][0-9a-f]{4}[-_][0-9a-f]{4}[-_][0-9a-f]{12})")
+SERVICE_RE = re.compile(r"^system\.slice/([^/]+\.service)$")
+
+
+def _disk_usage_module() -> Any:
+    """disk-usage.py, for its volume map (PV hostPaths + docker bind mounts) and human()."""
+    spec = importlib.util.spec_from_file_location("disk_usage", SCRIPTS_DIR / "disk-usage.py")
+    if spec is None or spec.loader is None:
+        raise ImportError("disk-usage.py not found")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module          # dataclasses resolve types via sys.modules
+    spec.loader.exec_module(module)
+    return module
+
+
+# ─── Counters ────────────────────────────────────────────────────────────────
+
+
+def _read(path: Path) -> str:
+    try:
+        return path.read_text(encoding="utf-8", errors="ignore")
+    except OSError:
+        return ""
+
+
+def read_diskstats(proc: Path) -> Dict[str, Dict[str, Any]]:
+    """name → {"dev": "MAJ:MIN", "sectors": sectors written}."""
+    out: Dict[str, Dict[str, Any]] = {}
+    for line in _read(proc / "diskstats").splitlines():
+        cols = line.split()
+        if len(cols) >= 10 and cols[9].isdigit():
+            out[cols[2]] = {"dev": f"{cols[0]}:{cols[1]}", "sectors": int(cols[9])}
+    return out
+
+
+def read_cgroups(sys_root: Path) -> Dict[str, Dict[str, int]]:
+    """cgroup path (relative) → {"MAJ:MIN": wbytes} for container, pod and service cgroups."""
+    root = sys_root / "fs" / "cgroup"
+    out: Dict[str, Dict[str, int]] = {}
+    for dirpath, dirnames, _ in os.walk(root):
+        rel = os.path.relpath(dirpath, root).replace(os.sep, "/")
+        if not (DOCKER_RE.search(rel) or POD_RE.search(rel) or SERVICE_RE.match(rel)):
+            continue
+        dirnames[:] = []                     # a pod's io.stat already sums its containers
+        counters: Dict[str, int] = {}
+        for line in _read(Path(dirpath) / "io.stat").splitlines():
+            dev, _, rest = line.partition(" ")
+            m = re.search(r"\bwbytes=(\d+)", rest)
+            if m:
+                counters[dev] = counters.get(dev, 0) + int(m.group(1))
+        if counters:
+            out[rel] = counters
+    return out
+
+
+def snapshot(proc: Path, sys_root: Path) -> Dict[str, Any]:
+    uptime = _read(proc / "uptime").split()
+    return {
+        "uptime": float(uptime[0]) if uptime else time.monotonic(),
+        "disks": read_diskstats(proc),
+        "cgroups": read_cgroups(sys_root),
+    }
+
+
+def zero_snapshot() -> Dict[str, Any]:
+    """The counters at boot — --interval 0 measures everything since then."""
+    return {"uptime": 0.0, "disks": {}, "cgroups": {}}
+
+
+# ─── Devices and mounts ──────────────────────────────────────────────────────
+
+
+@dataclass
+class Device:
+    name: str                               # whole disk (mmcblk0, sda)
+    kind: str                               # sd | ssd | hdd | ram | loop
+    written: float = 0.0                    # bytes in the window
+    attributed: float = 0.0
+
+
+def disk_of(name: str, disks: Dict[str, Any], sys_root: Path) -> str:
+    """Partition → its disk (mmcblk0p2 → mmcblk0); disks map to themselves."""
+    block = sys_root / "class" / "block"
+    if block.is_dir():
+        partition = (block / name / "partition").exists()
+    else:
+        partition = bool(re.match(r"([shv]d[a-z]+\d+|(mmcblk|nvme\d+n)\d+p\d+)$", name))
+    parents = [d for d in disks if d != name and name.startswith(d)] if partition else []
+    return max(parents, key=len) if parents else name
+
+
+def device_kind(disk: str, sys_root: Path) -> str:
+    if disk.startswith("mmcblk"):
+        return "sd"
+    if disk.startswith(("zram", "ram")):
+        return "ram"
+    if disk.startswith("loop"):
+        return "loop"
+    return "hdd" if _read(sys_root / "class" / "block" / disk / "queue" / "rotational").strip() == "1" else "ssd"
+
+
+@dataclass
+class Mount:
+    point: str
+    dev: str                                # MAJ:MIN
+    fstype: str
+    source: str
+
+
+def read_mounts(proc: Path) -> List[Mount]:
+    mounts: List[Mount] = []
+    for line in _read(proc / "self" / "mountinfo").splitlines():
+        left, _, right = line.partition(" - ")
+        cols, tail = left.split(), right.split()
+        if len(cols) >= 5 and len(tail) >= 2:
+            point = re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), cols[4])
+            mounts.append(Mount(point, cols[2], tail[0], tail[1]))
+    return sorted(mounts, key=lambda m: -len(m.point))
+
+
+def _within(path: str, root: str) -> bool:
+    return path == root or root == "/" or path.startswith(root.rstrip("/") + "/")
+
+
+def backing(path: str, mounts: List[Mount], disks: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    """(label, diskstats name) of the mount holding `path`; the name is None off block devices."""
+    by_dev = {v["dev"]: k for k, v in disks.items()}
+    for m in mounts:
+        if _within(path, m.point):
+            name = by_dev.get(m.dev) or (os.path.basename(m.source) if os.path.basename(m.source) in disks else None)
+            return (name, name) if name else (m.fstype, None)
+    return ("?", None)
+
+
+# ─── Attribution ─────────────────────────────────────────────────────────────
+
+
+def load_names(path: Path) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """--names file → the same maps container_names() builds."""
+    raw = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(raw, dict) or not all(isinstance(raw.get(k, {}), dict) for k in ("docker", "pods")):
+        raise ValueError('expected {"docker": {id: app}, "pods": {uid: app}}')
+    docker = {str(k): f"docker:{v}" for k, v in (raw.get("docker") or {}).items()}
+    pods = {str(k): f"k3s:{v}" for k, v in (raw.get("pods") or {}).items()}
+    return docker, pods
+
+
+def container_names(offline: bool) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """docker id → "docker:<project>" and pod uid → "k3s:<app>"."""
+    docker: Dict[str, str] = {}
+    pods: Dict[str, str] = {}
+    if offline:
+        return docker, pods
+    res = run_docker(["ps", "-a", "--no-trunc", "--format",
+                      '{{.ID}}\t{{.Label "com.docker.compose.project"}}\t{{.Names}}'], timeout=30)
+    if res.returncode == 0:
+        for line in res.stdout.splitlines():
+            cols = line.split("\t")
+            if len(cols) == 3:
+                docker[cols[0]] = f"docker:{cols[1] or cols[2]}"
+    res = run_kubectl(["get", "pods", "-A", "-o", "json"], timeout=60)
+    if res.returncode == 0:
+        for pod in json.loads(res.stdout).get("items", []):
+            meta = pod.get("metadata") or {}
+            app = (meta.get("labels") or {}).get("app") or re.sub(r"(-[a-z0-9]{6,10})?-[a-z0-9]{5}$", "",
+                                                                 meta.get("name", ""))
+            pods[meta.get("uid", "")] = f"k3s:{app}"
+    return docker, pods
+
+
+def _lookup(names: Dict[str, str], key: str) -> Optional[str]:
+    """Exact id, else the entry whose id is a prefix of it (--names files use short ids)."""
+    if key in names:
+        return names[key]
+    return next((v for k, v in names.items() if k and key.startswith(k)), None)
+
+
+def owner(cgroup: str, docker: Dict[str, str], pods: Dict[str, str]) -> str:
+    m = DOCKER_RE.search(cgroup)
+    if m:
+        return _lookup(docker, m.group(1)) or f"docker:{m.group(1)[:12]}"
+    m = POD_RE.search(cgroup)
+    if m:
+        uid = m.group(1).replace("_", "-")
+        return _lookup(pods, uid) or f"pod:{uid[:8]}"
+    m = SERVICE_RE.match(cgroup)
+    return f"host:{m.group(1)}" if m else cgroup
+
+
+@dataclass
+class Profile:
+    seconds: float
+    devices: Dict[str, Device] = field(default_factory=dict)
+    disk: Dict[str, str] = field(default_factory=dict)                      # diskstats name → disk
+    writers: Dict[Tuple[str, str], float] = field(default_factory=dict)    # (app, disk) → bytes
+    named: Set[str] = field(default_factory=set)                            # writers docker/kubectl named
+
+    def per_day(self, value: float) -> float:
+        return value / self.seconds * DAY if self.seconds > 0 else 0.0
+
+
+def profile(before: Dict[str, Any], after: Dict[str, Any], sys_root: Path,
+            docker: Dict[str, str], pods: Dict[str, str]) -> Profile:
+    seconds = after["uptime"] - before["uptime"]
+    if seconds <= 0:
+        raise ValueError("the baseline is not older than now (rebooted since it was recorded?)")
+    prof = Profile(seconds, named=set(docker.values()) | set(pods.values()))
+    disks = after["disks"]
+    dev_to_disk: Dict[str, str] = {}
+    for name, stat in disks.items():
+        disk = prof.disk[name] = disk_of(name, disks, sys_root)
+        dev_to_disk[stat["dev"]] = disk
+        if disk != name:
+            continue                         # partitions are already counted in their disk
+        old = (before["disks"].get(name) or {}).get("sectors", 0)
+        prof.devices[disk] = Device(disk, device_kind(disk, sys_root), max(stat["sectors"] - old, 0) * SECTOR)
+
+    for cgroup, counters in after["cgroups"].items():
+        app = owner(cgroup, docker, pods)
+        old = before["cgroups"].get(cgroup) or {}
+        for dev, wbytes in counters.items():
+            disk = dev_to_disk.get(dev)
+            if disk is None or disk not in prof.devices:
+                continue
+            delta = max(wbytes - old.get(dev, 0), 0)
+            if delta:
+                prof.writers[(app, disk)] = prof.writers.get((app, disk), 0) + delta
+                prof.devices[disk].attributed += delta
+    return prof
+
+
+# ─── Volumes ─────────────────────────────────────────────────────────────────
+
+
+def _app_key(mapping_app: str) -> str:
+    """disk-usage.py's app ("jellyfin", "docker:deluge") → writer key."""
+    if mapping_app.startswith("docker:"):
+        return f"docker:{mapping_app.split(':', 1)[1].lower()}"
+    return f"k3s:{mapping_app}"
+
+
+def flag_volumes(prof: Profile, mappings: List[Any], mounts: List[Mount], disks: Dict[str, Any],
+                 threshold: float) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """SD-backed volumes of heavy writers, plus heavy SD writers with no volume there.
+
+    io.stat is per cgroup, not per path: app_bytes_per_day is the app's whole
+    write rate to that disk, the same figure on each of its volumes there."""
+    ssd = next((d.name for d in prof.devices.values() if d.kind == "ssd"), None)
+    flagged: List[Dict[str, Any]] = []
+    covered = set()
+    for m in mappings:
+        part, name = backing(m.path, mounts, disks)
+        disk = prof.disk.get(name or "")
+        device = prof.devices.get(disk or "")
+        if device is None or device.kind != "sd":
+            continue
+        key = _app_key(m.app)
+        covered.add((key, disk))
+        rate = prof.per_day(prof.writers.get((key, disk), 0))
+        if rate < threshold:
+            continue
+        words = set(re.split(r"[/_.-]", m.path.lower()))
+        target = "tmpfs" if words & set(TMPFS_HINTS) else (f"SSD ({ssd})" if ssd else "SSD (none attached)")
+        flagged.append({"app": key, "path": m.path, "claim": m.claim, "device": part, "disk": disk,
+                        "app_bytes_per_day": rate, "move_to": target})
+    notes: List[str] = []
+    for (app, disk), written in sorted(prof.writers.items(), key=lambda kv: -kv[1]):
+        rate = prof.per_day(written)
+        # an unnamed docker:<id> can't be matched to a volume, so it proves nothing
+        if (rate >= threshold and prof.devices[disk].kind == "sd" and (app, disk) not in covered
+                and app in prof.named):
+            notes.append(f"{app} writes {rate / MI:.0f} MiB/day to {disk} but has no volume there"
+                         " — container layer or logs")
+    return sorted(flagged, key=lambda f: (-f["app_bytes_per_day"], f["app"], f["path"])), notes
+
+
+# ─── Report ──────────────────────────────────────────────────────────────────
+
+
+KIND_LABEL = {"sd": "SD card", "ssd": "SSD", "hdd": "HDD", "ram": "RAM", "loop": "loop"}
+
+
+def print_report(prof: Profile, flagged: List[Dict[str, Any]], notes: List[str], top: int, human: Any) -> None:
+    window = f"{prof.seconds:.0f}s" if prof.seconds < 3 * 3600 else f"{prof.seconds / 3600:.1f}h"
+    header(f"Block devices — writes over {window}, as a daily estimate")
+    for d in sorted(prof.devices.values(), key=lambda d: -d.written):
+        if d.kind in ("ram", "loop") and not d.written:
+            continue
+        colour = YELLOW if d.kind == "sd" else NC
+        unattributed = max(d.written - d.attributed, 0)
+        print(f"  {colour}{d.name:<10}{NC} {KIND_LABEL[d.kind]:<8} {human(prof.per_day(d.written)):>8}/day"
+              f"  {DIM}({human(d.written / prof.seconds)}/s; unattributed {human(prof.per_day(unattributed))}/day){NC}")
+
+    header("Biggest writers")
+    ranked = sorted(prof.writers.items(), key=lambda kv: -kv[1])[:top]
+    if not ranked:
+        info("No cgroup wrote anything in the window")
+    peak = ranked[0][1] if ranked else 1
+    width = max((len(app) for (app, _), _ in ranked), default=0)
+    for i, ((app, disk), written) in enumerate(ranked, 1):
+        bar = "█" * max(int(20 * written / peak), 1)
+        colour = YELLOW if prof.devices[disk].kind == "sd" else DIM
+        print(f"  {i:>3}  {app:<{width}}  {colour}{disk:<10}{NC} {human(prof.per_day(written)):>8}/day  {DIM}{bar}{NC}")
+
+    header("Volumes to move off the SD card")
+    if not flagged:
+        ok("No SD-backed volume is above the threshold")
+    last = None
+    for f in flagged:
+        if (f["app"], f["disk"]) != last:
+            last = (f["app"], f["disk"])
+            print(f"  {RED}●{NC} {BOLD}{f['app']}{NC} writes {human(f['app_bytes_per_day'])}/day to {f['disk']}"
+                  f"  {DIM}(whole app — the kernel doesn't split it per volume){NC}")
+        print(f"      {f['path']}  {DIM}({f['claim']}, {f['device']}){NC} → {GREEN}{f['move_to']}{NC}")
+    for note in notes:
+        warn(note)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Attribute block writes to apps and flag SD-card volumes.")
+    ap.add_argument("--interval", type=float, default=60, metavar="SECONDS",
+                    help="sample window (default 60; 0 = averages since boot)")
+    src = ap.add_mutually_exclusive_group()
+    src.add_argument("--record", type=Path, metavar="FILE", help="save the current counters and exit")
+    src.add_argument("--baseline", type=Path, metavar="FILE", help="compare against a --record snapshot")
+    ap.add_argument("--threshold", type=float, default=512, metavar="MIB",
+                    help="flag SD volumes whose app writes more than MIB per day there (default 512)")
+    ap.add_argument("--top", type=int, default=15, help="writers to list (default 15)")
+    ap.add_argument("--proc", type=Path, default=Path("/proc"), help="procfs root (default /proc)")
+    ap.add_argument("--sys", type=Path, default=Path("/sys"), help="sysfs root (default /sys)")
+    names = ap.add_mutually_exclusive_group()
+    names.add_argument("--offline", action="store_true", help="don't ask docker / kubectl for names")
+    names.add_argument("--names", type=Path, metavar="FILE",
+                       help="name containers and pods from a JSON map instead of docker / kubectl")
+    ap.add_argument("--json", action="store_true", help="machine-readable output")
+    args = ap.parse_args()
+
+    if not (args.proc / "diskstats").is_file():
+        err(f"{args.proc / 'diskstats'} not found — this needs Linux (or a fake tree via --proc/--sys)")
+        return 1
+    if args.names:
+        try:
+            docker, pods = load_names(args.names)
+        except (OSError, ValueError) as exc:
+            err(f"Cannot read names {args.names}: {exc}")
+            return 1
+    if args.record:
+        args.record.write_text(json.dumps(snapshot(args.proc, args.sys)) + "\n", encoding="utf-8")
+        ok(f"Counters saved to {args.record} — compare later with --baseline {args.record}")
+        return 0
+    if args.baseline:
+        try:
+            before = json.loads(args.baseline.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as exc:
+            err(f"Cannot read baseline {args.baseline}: {exc}")
+            return 1
+    elif args.interval > 0:
+        before = snapshot(args.proc, args.sys)
+        if not args.json:
+            info(f"Sampling for {args.interval:g}s ...")
+        time.sleep(args.interval)
+    else:
+        before = zero_snapshot()
+    after = snapshot(args.proc, args.sys)
+    if not after["cgroups"]:
+        warn("No container / pod / service cgroups with io.stat found (cgroup v2 with the io controller needed)")
+
+    if not args.names:
+        docker, pods = container_names(args.offline)
+    try:
+        prof = profile(before, after, args.sys, docker, pods)
+    except ValueError as exc:
+        err(str(exc))
+        return 1
+    du = _disk_usage_module()
+    flagged, notes = flag_volumes(prof, du.volume_map(None), read_mounts(args.proc), after["disks"],
+                                  args.threshold * MI)
+
+    if args.json:
+        json.dump({
+            "seconds": prof.seconds,
+            "devices": [{"name": d.name, "kind": d.kind, "bytes_per_day": prof.per_day(d.written),
+                         "unattributed_per_day": prof.per_day(max(d.written - d.attributed, 0))}
+                        for d in prof.devices.values()],
+            "writers": [{"app": app, "device": disk, "bytes_per_day": prof.per_day(w)}
+                        for (app, disk), w in sorted(prof.writers.items(), key=lambda kv: -kv[1])],
+            "flagged": flagged,
+            "notes": notes,
+        }, sys.stdout, indent=2)
+        print("")
+        return 0
+    print_report(prof, flagged, notes, args.top, du.human)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())